@@ -0,0 +1,35 @@
+"""
+添加地址查询日志表
+
+地址查询限频改为令牌桶后，查询记录改为仅追加写入 address_query_records
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+
+# revision identifiers
+revision = '005_address_query_records'
+down_revision = '004_user_confirmation_fields'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """创建 address_query_records 表"""
+    op.create_table(
+        'address_query_records',
+        sa.Column('id', sa.Integer(), nullable=False, autoincrement=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('address', sa.String(64), nullable=False),
+        sa.Column('queried_at', sa.DateTime(), nullable=False, default=datetime.now),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_index('idx_address_query_user_time', 'address_query_records', ['user_id', 'queried_at'])
+
+
+def downgrade():
+    """回滚迁移"""
+    op.drop_index('idx_address_query_user_time', table_name='address_query_records')
+    op.drop_table('address_query_records')
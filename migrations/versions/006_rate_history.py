@@ -0,0 +1,57 @@
+"""
+添加汇率历史表
+
+rate_samples 保存原始采样，rate_rollups 保存 1m/1h/1d 聚合桶
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision = '006_rate_history'
+down_revision = '005_address_query_records'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """创建 rate_samples / rate_rollups 表"""
+    op.create_table(
+        'rate_samples',
+        sa.Column('id', sa.Integer(), nullable=False, autoincrement=True),
+        sa.Column('source', sa.String(20), nullable=False),
+        sa.Column('channel', sa.String(20), nullable=False),
+        sa.Column('ts', sa.DateTime(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_rate_samples_series_ts', 'rate_samples', ['source', 'channel', 'ts'])
+
+    op.create_table(
+        'rate_rollups',
+        sa.Column('id', sa.Integer(), nullable=False, autoincrement=True),
+        sa.Column('source', sa.String(20), nullable=False),
+        sa.Column('channel', sa.String(20), nullable=False),
+        sa.Column('resolution', sa.String(4), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('open', sa.Float(), nullable=False),
+        sa.Column('high', sa.Float(), nullable=False),
+        sa.Column('low', sa.Float(), nullable=False),
+        sa.Column('close', sa.Float(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('first_at', sa.DateTime(), nullable=False),
+        sa.Column('last_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'idx_rate_rollups_bucket', 'rate_rollups', ['source', 'channel', 'resolution', 'bucket_start'], unique=True
+    )
+
+
+def downgrade():
+    """回滚迁移"""
+    op.drop_index('idx_rate_rollups_bucket', table_name='rate_rollups')
+    op.drop_table('rate_rollups')
+    op.drop_index('idx_rate_samples_series_ts', table_name='rate_samples')
+    op.drop_table('rate_samples')
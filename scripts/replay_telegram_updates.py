@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+本地回放 Telegram 更新到 Webhook 路由
+
+用法:
+    python scripts/replay_telegram_updates.py                      # 回放内置的示例会话
+    python scripts/replay_telegram_updates.py updates.json         # 回放录制的更新（JSON 数组）
+    python scripts/replay_telegram_updates.py --url http://localhost:8001/telegram/webhook --repeat 100
+
+需要 Bot 以 USE_WEBHOOK=true 运行；secret token 与 Bot 使用同一份配置计算。
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+
+def load_updates(path: str | None) -> list[dict]:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else [data]
+
+    from tests.mocks.telegram_updates import TelegramUpdateRecordings
+
+    return TelegramUpdateRecordings.session()
+
+
+def main() -> int:
+    from src.api.telegram_webhook import get_webhook_secret_token
+    from src.config import settings
+
+    parser = argparse.ArgumentParser(description="回放 Telegram 更新到本地 Webhook")
+    parser.add_argument("file", nargs="?", help="录制的更新 JSON 文件（默认使用内置示例会话）")
+    parser.add_argument("--url", default=f"http://localhost:{settings.api_port}{settings.bot_webhook_path}")
+    parser.add_argument("--repeat", type=int, default=1, help="重复次数（每轮 update_id 递增）")
+    args = parser.parse_args()
+
+    updates = load_updates(args.file)
+    headers = {"X-Telegram-Bot-Api-Secret-Token": get_webhook_secret_token()}
+    latencies = []
+    failed = 0
+
+    with httpx.Client(timeout=10.0) as client:
+        for round_no in range(args.repeat):
+            for update in updates:
+                payload = {**update, "update_id": update["update_id"] + round_no * len(updates)}
+                started = time.perf_counter()
+                response = client.post(args.url, json=payload, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failed += 1
+                    print(f"❌ update_id={payload['update_id']}: {response.status_code} {response.text}")
+
+    if not latencies:
+        print("没有可回放的更新")
+        return 0
+
+    latencies.sort()
+    print(
+        f"已发送 {len(latencies)} 条更新，失败 {failed} 条；"
+        f"平均 {sum(latencies) / len(latencies) * 1000:.1f}ms，"
+        f"最大 {latencies[-1] * 1000:.1f}ms"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,8 +10,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from .middleware import close_rate_limit_redis, setup_middleware
-from .routes import close_energy_api_client
+from .routes import close_energy_api_client, reset_energy_caches
 from .routes import router as api_router
+from .telegram_webhook import router as telegram_webhook_router
 
 
 logger = logging.getLogger(__name__)
@@ -22,12 +23,17 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动时执行
     logger.info("API application starting up...")
+    from src.modules.trx_exchange.rate_manager import rate_cache_invalidator
+
+    # 独立部署时也能立即收到汇率变更（与 Bot 同进程时重复启动无副作用）
+    await rate_cache_invalidator.start()
     yield
     # 关闭时执行
     logger.info("API application shutting down, cleaning up resources...")
     try:
         # 关闭能量 API 客户端
         await close_energy_api_client()
+        reset_energy_caches()
         logger.debug("Energy API client closed")
     except Exception as e:
         logger.error(f"Error closing energy API client: {e}")
@@ -39,6 +45,11 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error closing rate limit Redis: {e}")
 
+    try:
+        await rate_cache_invalidator.stop()
+    except Exception as e:
+        logger.error(f"Error stopping rate cache invalidation: {e}")
+
     logger.info("API application cleanup complete")
 
 
@@ -69,6 +80,8 @@ def create_api_app() -> FastAPI:
 
     # 注册路由
     app.include_router(api_router, prefix="/api")
+    # Webhook 模式下接收 Telegram 推送的更新
+    app.include_router(telegram_webhook_router)
 
     # 全局异常处理
     @app.exception_handler(HTTPException)
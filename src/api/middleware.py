@@ -3,17 +3,20 @@ API中间件配置
 
 包含：
 - 请求日志中间件
-- 速率限制中间件（基于 Redis 滑动窗口算法）
+- 速率限制中间件（基于 Redis GCRA 算法，每个客户端一个 key、每次请求一次 Lua 调用）
 """
 
 import logging
+import math
 import time
 from collections.abc import Callable
 
 from fastapi import FastAPI, Request, Response
 from fastapi.responses import JSONResponse
 
+from ..common.rate_limiter import GCRALimiter, RateLimitResult
 from ..common.redis_helper import create_redis_client
+from ..config import settings
 
 
 logger = logging.getLogger(__name__)
@@ -35,9 +38,11 @@ class RateLimitConfig:
     WHITELIST_PATHS: list = [
         "/health",
         "/api/health",
+        "/api/ready",
         "/docs",
         "/openapi.json",
         "/redoc",
+        settings.bot_webhook_path,  # Telegram 推送更新（由 secret token 校验，来源 IP 集中）
     ]
 
     # Redis key 前缀
@@ -47,6 +52,9 @@ class RateLimitConfig:
 # 全局 Redis 客户端（延迟初始化）
 _redis_client = None
 
+# 全局限流器（被拒绝期间的请求在本进程直接拒绝，不再访问 Redis；Redis 不可用时降级放行）
+api_rate_limiter = GCRALimiter(prefix=RateLimitConfig.REDIS_KEY_PREFIX, local_fallback=False)
+
 
 async def get_redis_client():
     """获取或创建 Redis 客户端"""
@@ -62,6 +70,8 @@ async def close_rate_limit_redis():
     if _redis_client is not None:
         await _redis_client.close()
         _redis_client = None
+    api_rate_limiter.redis_client = None
+    api_rate_limiter._script = None
 
 
 async def log_requests(request: Request, call_next: Callable) -> Response:
@@ -110,9 +120,9 @@ async def check_rate_limit(
     identifier: str,
     limit: int,
     window_seconds: int,
-) -> tuple[bool, int, int]:
+) -> RateLimitResult:
     """
-    检查速率限制（滑动窗口算法）
+    检查速率限制（GCRA 算法）
 
     Args:
         identifier: 限制标识符（如 IP 或 API Key）
@@ -120,49 +130,30 @@ async def check_rate_limit(
         window_seconds: 时间窗口（秒）
 
     Returns:
-        tuple: (是否允许, 剩余请求数, 重置时间戳)
+        RateLimitResult: 是否允许、剩余请求数、需等待秒数、额度恢复秒数
     """
     try:
-        redis = await get_redis_client()
-        current_time = int(time.time())
-        window_start = current_time - window_seconds
-        key = f"{RateLimitConfig.REDIS_KEY_PREFIX}{identifier}"
-
-        # 使用 Redis 管道执行原子操作
-        pipe = redis.pipeline()
-
-        # 1. 移除过期的请求记录
-        pipe.zremrangebyscore(key, 0, window_start)
-
-        # 2. 获取当前窗口内的请求数
-        pipe.zcard(key)
-
-        # 3. 添加当前请求（使用时间戳作为分数和成员）
-        # 使用 current_time + 微秒确保唯一性
-        member = f"{current_time}:{time.time_ns()}"
-        pipe.zadd(key, {member: current_time})
-
-        # 4. 设置 key 过期时间
-        pipe.expire(key, window_seconds + 1)
-
-        results = await pipe.execute()
-
-        # results[1] 是 zcard 的结果（移除过期记录后的计数）
-        current_count = results[1]
-
-        # 计算剩余请求数和重置时间
-        remaining = max(0, limit - current_count - 1)  # -1 因为刚添加了一个
-        reset_time = current_time + window_seconds
-
-        # 判断是否超过限制
-        is_allowed = current_count < limit
-
-        return is_allowed, remaining, reset_time
-
+        if api_rate_limiter.redis_client is None:
+            api_rate_limiter.redis_client = await get_redis_client()
+        return await api_rate_limiter.acquire(identifier, limit, window_seconds)
     except Exception as e:
-        # Redis 不可用时，允许请求通过（降级策略）
+        # 限流器异常时允许请求通过（降级策略）
         logger.warning(f"速率限制检查失败，降级放行: {e}")
-        return True, limit, int(time.time()) + window_seconds
+        return RateLimitResult(True, limit, limit, 0.0, 0.0)
+
+
+def _rate_limit_headers(result: RateLimitResult, window: int) -> dict[str, str]:
+    """标准 RateLimit-* 响应头（保留 X-RateLimit-* 兼容旧客户端）"""
+    reset_after = math.ceil(result.reset_after)
+    return {
+        "RateLimit-Limit": str(result.limit),
+        "RateLimit-Remaining": str(result.remaining),
+        "RateLimit-Reset": str(reset_after),
+        "RateLimit-Policy": f"{result.limit};w={window}",
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Reset": str(int(time.time()) + reset_after),
+    }
 
 
 def get_client_identifier(request: Request) -> tuple[str, str]:
@@ -200,7 +191,7 @@ async def rate_limit_middleware(request: Request, call_next: Callable) -> Respon
     """
     速率限制中间件
 
-    使用 Redis 滑动窗口算法限制 API 请求频率：
+    使用 Redis GCRA 算法限制 API 请求频率：
     - 未认证请求：按 IP 限制，60 次/分钟
     - 已认证请求：按 API Key 限制，300 次/分钟
     - 白名单路径不受限制
@@ -222,32 +213,27 @@ async def rate_limit_middleware(request: Request, call_next: Callable) -> Respon
         window = RateLimitConfig.IP_LIMIT_WINDOW_SECONDS
 
     # 检查速率限制
-    is_allowed, remaining, reset_time = await check_rate_limit(identifier, limit, window)
+    result = await check_rate_limit(identifier, limit, window)
+    headers = _rate_limit_headers(result, window)
 
-    if not is_allowed:
+    if not result.allowed:
+        retry_after = max(1, math.ceil(result.retry_after))
         logger.warning(f"速率限制触发: {identifier}, path={path}, limit={limit}/{window}s")
         return JSONResponse(
             status_code=429,
             content={
                 "error": "Too Many Requests",
-                "message": f"请求过于频繁，请在 {window} 秒后重试",
-                "retry_after": window,
-            },
-            headers={
-                "X-RateLimit-Limit": str(limit),
-                "X-RateLimit-Remaining": "0",
-                "X-RateLimit-Reset": str(reset_time),
-                "Retry-After": str(window),
+                "message": f"请求过于频繁，请在 {retry_after} 秒后重试",
+                "retry_after": retry_after,
             },
+            headers={**headers, "Retry-After": str(retry_after)},
         )
 
     # 处理请求
     response = await call_next(request)
 
     # 添加速率限制信息到响应头
-    response.headers["X-RateLimit-Limit"] = str(limit)
-    response.headers["X-RateLimit-Remaining"] = str(remaining)
-    response.headers["X-RateLimit-Reset"] = str(reset_time)
+    response.headers.update(headers)
 
     return response
 
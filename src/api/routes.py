@@ -2,12 +2,15 @@
 API路由定义
 """
 
+import json
 import logging
-from datetime import datetime
+from datetime import UTC, datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+from src.common.swr_cache import SWRCache
 from src.core.registry import get_registry
 from src.payments.order import order_manager
 from src.wallet.wallet_manager import WalletManager
@@ -66,6 +69,12 @@ class SendMessageRequest(BaseModel):
     disable_notification: bool = False
 
 
+class BulkAddressQueryRequest(BaseModel):
+    """批量地址查询请求"""
+
+    addresses: list[str]
+
+
 class UserBalanceResponse(BaseModel):
     """用户余额响应"""
 
@@ -116,7 +125,50 @@ async def get_statistics(_: str = Depends(api_key_auth)):
     # 获取模块统计
     module_stats = registry.get_statistics()
 
-    return {"success": True, "data": {"modules": module_stats, "orders": order_stats, "timestamp": datetime.now()}}
+    # 更新接收与处理队列、Bot API 连接池等待时间
+    from src.api.telegram_webhook import get_webhook_stats
+    from src.common.leader_election import get_leader_elector
+    from src.common.telegram_request import get_request_pool_stats
+    from src.core.startup import get_startup_timer
+    from src.core.update_processor import get_update_processor
+
+    processor = get_update_processor()
+    update_stats = processor.stats()
+    if processor.journal is not None:
+        update_stats["journal"] = processor.journal.stats()
+    pool_stats = get_request_pool_stats()
+
+    return {
+        "success": True,
+        "data": {
+            "modules": module_stats,
+            "orders": order_stats,
+            "updates": update_stats,
+            "request_pools": pool_stats,
+            "webhook": get_webhook_stats(),
+            "leader": get_leader_elector().status(),
+            "startup": get_startup_timer().report(),
+            "timestamp": datetime.now(),
+        },
+    }
+
+
+@router.get("/ready", tags=["System"])
+async def readiness_check():
+    """就绪检查：Bot 完成启动（含缓存预热）并开始接收更新后返回 200，否则 503"""
+    from src.core.startup import get_startup_timer
+
+    report = get_startup_timer().report()
+    status_code = 200 if report["ready"] else 503
+    return JSONResponse(status_code=status_code, content={"ready": report["ready"], "startup": report})
+
+
+@router.get("/leader", tags=["System"])
+async def get_leader_status():
+    """本实例的领导者选举状态（多实例部署时仅领导者运行支付监听与定时任务）"""
+    from src.common.leader_election import get_leader_elector
+
+    return {"success": True, "data": get_leader_elector().status()}
 
 
 # ==================== 模块管理接口 ====================
@@ -374,6 +426,45 @@ async def broadcast_message(
     return {"success": True, "data": {"total": len(user_ids), "success": success_count, "failed": failed_count}}
 
 
+# ==================== 地址查询接口 ====================
+
+
+@router.post("/address/bulk-query", tags=["Address"])
+async def bulk_query_addresses(request: BulkAddressQueryRequest, _: str = Depends(api_key_auth)):
+    """
+    批量查询地址余额
+
+    以 NDJSON 流式返回：先返回格式无效的地址，其余地址按查询完成顺序逐行返回。
+    """
+    from src.clients.tron import TronAPIClient
+    from src.config import settings
+    from src.modules.address_query.validator import parse_address_list
+
+    addresses, invalid = parse_address_list("\n".join(request.addresses))
+    # 上限作用于全部输入（含格式无效的条目，它们也会逐条返回）
+    total = len(addresses) + len(invalid)
+    if total > settings.address_bulk_max:
+        raise HTTPException(status_code=400, detail=f"Too many addresses: {total} > {settings.address_bulk_max}")
+
+    async def stream():
+        for item in invalid:
+            yield json.dumps({"address": item, "success": False, "error": "invalid_address"}) + "\n"
+
+        async for address, info in TronAPIClient().iter_address_infos(addresses):
+            if info is None:
+                row = {"address": address, "success": False, "error": "lookup_failed"}
+            else:
+                row = {
+                    "address": address,
+                    "success": True,
+                    "trx_balance": info.trx_balance,
+                    "usdt_balance": info.usdt_balance,
+                }
+            yield json.dumps(row) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 # ==================== 实时汇率接口 ====================
 
 
@@ -387,6 +478,49 @@ async def get_usdt_rates():
     return {"success": True, "data": rates}
 
 
+@router.get("/rates/history", tags=["Rates"])
+async def get_rate_history(
+    source: str = Query("okx", description="数据源：okx / trx_exchange"),
+    channel: str = Query("bank", description="渠道：bank / alipay / wechat / usdt_trx"),
+    start: datetime = Query(..., description="起始时间（ISO 8601，未带时区按 UTC）"),
+    end: datetime | None = Query(None, description="结束时间，默认当前时间"),
+    resolution: str | None = Query(None, description="聚合粒度：1m / 1h / 1d，默认按跨度自动选择"),
+    _: str = Depends(api_key_auth),
+):
+    """查询汇率历史（读取 1m/1h/1d 聚合桶，返回 OHLC 与均值）"""
+    import asyncio
+
+    from src.rates.history import rate_history
+
+    try:
+        used, points = await asyncio.to_thread(
+            rate_history.query, source, channel, start, end or datetime.now(UTC), resolution
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return {"success": True, "data": {"source": source, "channel": channel, "resolution": used, "points": points}}
+
+
+@router.get("/rates/at", tags=["Rates"])
+async def get_rate_at(
+    at: datetime = Query(..., description="查询时刻（ISO 8601，未带时区按 UTC）"),
+    source: str = Query("trx_exchange", description="数据源：okx / trx_exchange"),
+    channel: str = Query("usdt_trx", description="渠道：bank / alipay / wechat / usdt_trx"),
+    _: str = Depends(api_key_auth),
+):
+    """查询指定时刻生效的汇率（如下单时的汇率）"""
+    import asyncio
+
+    from src.rates.history import rate_history
+
+    rate = await asyncio.to_thread(rate_history.rate_at, source, channel, at)
+    if rate is None:
+        raise HTTPException(status_code=404, detail="No rate recorded before the given time")
+
+    return {"success": True, "data": {"source": source, "channel": channel, "at": at.isoformat(), "rate": rate}}
+
+
 # ==================== 能量兑换接口 ====================
 
 
@@ -452,6 +586,46 @@ async def close_energy_api_client():
         _energy_api_client = None
 
 
+# 上游价格/账户信息缓存（stale-while-revalidate，延迟初始化）
+_energy_price_cache: SWRCache | None = None
+_energy_account_cache: SWRCache | None = None
+
+
+def get_energy_price_cache() -> SWRCache:
+    """获取能量价格缓存单例"""
+    global _energy_price_cache
+    if _energy_price_cache is None:
+        from src.config import settings
+
+        _energy_price_cache = SWRCache(
+            lambda: get_energy_api_client().query_price(),
+            ttl=settings.energy_price_cache_ttl,
+            name="energy_prices",
+        )
+    return _energy_price_cache
+
+
+def get_energy_account_cache() -> SWRCache:
+    """获取能量账户信息缓存单例"""
+    global _energy_account_cache
+    if _energy_account_cache is None:
+        from src.config import settings
+
+        _energy_account_cache = SWRCache(
+            lambda: get_energy_api_client().get_account_info(),
+            ttl=settings.energy_account_cache_ttl,
+            name="energy_account",
+        )
+    return _energy_account_cache
+
+
+def reset_energy_caches():
+    """清空能量上游缓存"""
+    global _energy_price_cache, _energy_account_cache
+    _energy_price_cache = None
+    _energy_account_cache = None
+
+
 class EnergyBuyRequest(BaseModel):
     """购买能量请求"""
 
@@ -477,11 +651,11 @@ async def get_energy_account(_: str = Depends(api_key_auth)):
     """
     查询 trxno 代理账户信息（需要认证）
 
-    返回代理账户的 TRX/USDT 余额和冻结金额
+    返回代理账户的 TRX/USDT 余额和冻结金额（缓存，cache_age 为缓存年龄秒数）
     """
     try:
-        client = get_energy_api_client()
-        account_info = await client.get_account_info()
+        cached = await get_energy_account_cache().get()
+        account_info = cached.value
 
         return {
             "success": True,
@@ -490,6 +664,8 @@ async def get_energy_account(_: str = Depends(api_key_auth)):
                 "balance_trx": account_info.balance_trx,
                 "balance_usdt": account_info.balance_usdt,
                 "frozen_balance": account_info.frozen_balance,
+                "cache_age": round(cached.age, 1),
+                "stale": cached.stale,
             },
         }
     except Exception as e:
@@ -502,11 +678,11 @@ async def get_energy_prices():
     """
     查询 trxno 实时能量价格
 
-    从 trxno.com API 获取最新的能量价格
+    从 trxno.com API 获取能量价格（缓存，过期后后台刷新，cache_age 为缓存年龄秒数）
     """
     try:
-        client = get_energy_api_client()
-        price_info = await client.query_price()
+        cached = await get_energy_price_cache().get()
+        price_info = cached.value
 
         return {
             "success": True,
@@ -515,6 +691,8 @@ async def get_energy_prices():
                 "energy_131k_price": price_info.energy_131k_price,
                 "package_price": price_info.package_price,
                 "source": "trxno.com",
+                "cache_age": round(cached.age, 1),
+                "stale": cached.stale,
             },
         }
     except Exception as e:
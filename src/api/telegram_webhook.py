@@ -0,0 +1,83 @@
+"""
+Telegram 更新接收（Webhook 模式）
+
+USE_WEBHOOK=true 时 Bot 不再长轮询，Telegram 将更新推送到内置 API 服务的 BOT_WEBHOOK_PATH：
+- 校验 X-Telegram-Bot-Api-Secret-Token
+- 解析为 Update 后放入 Application.update_queue，立即返回 200，由 Application 异步处理
+- 未绑定 Application（轮询模式或启动中）时返回 503，Telegram 会稍后重试
+"""
+
+import hashlib
+import hmac
+import logging
+from typing import Any
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from telegram import Update
+from telegram.ext import Application
+
+from ..config import settings
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# 接收更新的 Application（Webhook 模式启动后绑定）
+_application: Application | None = None
+_received = 0
+_rejected = 0
+
+
+def get_webhook_secret_token() -> str:
+    """setWebhook 使用的 secret_token（未配置时由 webhook_secret 派生，多实例一致）"""
+    if settings.bot_webhook_secret_token:
+        return settings.bot_webhook_secret_token
+    return hashlib.sha256(f"telegram-webhook:{settings.webhook_secret}".encode()).hexdigest()
+
+
+def attach_application(application: Application | None) -> None:
+    """绑定（或解绑，传 None）接收更新的 Application"""
+    global _application
+    _application = application
+
+
+def get_webhook_stats() -> dict[str, Any]:
+    """更新接收统计"""
+    return {
+        "active": _application is not None,
+        "received": _received,
+        "rejected": _rejected,
+        "queue_size": _application.update_queue.qsize() if _application is not None else 0,
+    }
+
+
+@router.post(settings.bot_webhook_path, include_in_schema=False)
+async def telegram_webhook(
+    request: Request,
+    secret_token: str | None = Header(default=None, alias="X-Telegram-Bot-Api-Secret-Token"),
+):
+    """接收 Telegram 推送的更新"""
+    global _received, _rejected
+
+    application = _application
+    if application is None:
+        raise HTTPException(status_code=503, detail="Webhook is not active")
+
+    if not hmac.compare_digest((secret_token or "").encode(), get_webhook_secret_token().encode()):
+        _rejected += 1
+        logger.warning(f"拒绝 Telegram 更新：secret token 无效 (from {request.client.host if request.client else '?'})")
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+
+    try:
+        data = await request.json()
+        update = Update.de_json(data, application.bot)
+    except Exception as e:
+        logger.warning(f"无法解析 Telegram 更新: {e}")
+        raise HTTPException(status_code=400, detail="Invalid update")
+    if update is None:
+        raise HTTPException(status_code=400, detail="Invalid update")
+
+    await application.update_queue.put(update)
+    _received += 1
+    return {"ok": True}
@@ -6,10 +6,11 @@
 
 import logging
 import os
+import threading
 from datetime import datetime
 
 from sqlalchemy import Column, DateTime, Integer, String, Text, create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 
 logger = logging.getLogger(__name__)
@@ -36,13 +37,28 @@ class AuditLogger:
     """审计日志记录器"""
 
     def __init__(self, db_path: str = None):
-        """初始化审计日志"""
+        """初始化审计日志（不访问数据库，建表推迟到 init() 或首次访问）"""
         if db_path is None:
             db_path = os.getenv("DATABASE_URL", "sqlite:///./tg_bot.db")
 
         self.engine = create_engine(db_path)
-        Base.metadata.create_all(self.engine)
         self.SessionLocal = sessionmaker(bind=self.engine)
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def init(self) -> None:
+        """创建审计日志表（启动钩子中调用，重复调用无副作用）"""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                Base.metadata.create_all(self.engine)
+                self._initialized = True
+
+    def _get_session(self) -> Session:
+        """获取数据库会话（未初始化时先建表）"""
+        self.init()
+        return self.SessionLocal()
 
     def log(
         self,
@@ -54,7 +70,7 @@ class AuditLogger:
         ip_address: str = "",
     ):
         """记录审计日志"""
-        session = self.SessionLocal()
+        session = self._get_session()
         try:
             log = AuditLog(
                 admin_id=admin_id, action=action, target=target, details=details, result=result, ip_address=ip_address
@@ -71,7 +87,7 @@ class AuditLogger:
 
     def get_recent_logs(self, limit: int = 50):
         """获取最近的审计日志"""
-        session = self.SessionLocal()
+        session = self._get_session()
         try:
             logs = session.query(AuditLog).order_by(AuditLog.created_at.desc()).limit(limit).all()
             return logs
@@ -80,7 +96,7 @@ class AuditLogger:
 
     def get_admin_logs(self, admin_id: int, limit: int = 20):
         """获取指定管理员的操作日志"""
-        session = self.SessionLocal()
+        session = self._get_session()
         try:
             logs = (
                 session.query(AuditLog)
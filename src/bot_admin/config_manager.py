@@ -7,6 +7,7 @@
 
 import logging
 import os
+import threading
 from datetime import datetime
 
 from sqlalchemy import Column, DateTime, Float, Integer, String, Text, create_engine
@@ -61,23 +62,36 @@ class ConfigManager:
     """配置管理器"""
 
     def __init__(self, db_path: str = None):
-        """初始化配置管理器"""
+        """初始化配置管理器（不访问数据库，建表推迟到 init() 或首次访问）"""
         if db_path is None:
             db_path = os.getenv("DATABASE_URL", "sqlite:///./tg_bot.db")
 
-        # 确保数据库目录存在
-        if db_path.startswith("sqlite:///"):
-            db_file_path = db_path.replace("sqlite:///", "")
-            db_dir = os.path.dirname(db_file_path)
-            if db_dir and not os.path.exists(db_dir):
-                os.makedirs(db_dir, exist_ok=True)
-
+        self.db_path = db_path
         self.engine = create_engine(db_path)
-        Base.metadata.create_all(self.engine)
         self.SessionLocal = sessionmaker(bind=self.engine)
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def init(self) -> None:
+        """创建数据库目录与配置表（启动钩子中调用，重复调用无副作用）"""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            # 确保数据库目录存在
+            if self.db_path.startswith("sqlite:///"):
+                db_file_path = self.db_path.replace("sqlite:///", "")
+                db_dir = os.path.dirname(db_file_path)
+                if db_dir and not os.path.exists(db_dir):
+                    os.makedirs(db_dir, exist_ok=True)
+
+            Base.metadata.create_all(self.engine)
+            self._initialized = True
 
     def _get_session(self) -> Session:
-        """获取数据库会话"""
+        """获取数据库会话（未初始化时先建表）"""
+        self.init()
         return self.SessionLocal()
 
     # ==================== 价格配置 ====================
@@ -315,6 +315,22 @@ class AdminHandler:
             await update.message.reply_text("❌ 格式错误，请输入数字（例如：15.5）：")
             return EDITING_PREMIUM_3 if months == "3" else (EDITING_PREMIUM_6 if months == "6" else EDITING_PREMIUM_12)
 
+    @staticmethod
+    def _apply_trx_rate(new_rate: float, admin_user_id: int) -> None:
+        """将新汇率写入 RateManager（兑换下单读取的汇率）"""
+        from decimal import Decimal
+
+        from src.database import SessionLocal
+        from src.modules.trx_exchange.rate_manager import RateManager
+
+        db = SessionLocal()
+        try:
+            RateManager.set_rate(db, Decimal(str(new_rate)), admin_user_id)
+        except Exception as e:
+            logger.error(f"Failed to apply TRX rate: {e}")
+        finally:
+            db.close()
+
     async def handle_trx_rate_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """处理 TRX 汇率输入"""
         try:
@@ -328,6 +344,9 @@ class AdminHandler:
             success = config_manager.set_price("trx_exchange_rate", new_rate, update.effective_user.id, "TRX 兑换汇率")
 
             if success:
+                # 同步到兑换使用的汇率表，并通知所有进程清空汇率缓存
+                self._apply_trx_rate(new_rate, update.effective_user.id)
+
                 # 记录审计
                 audit_logger.log(
                     admin_id=update.effective_user.id,
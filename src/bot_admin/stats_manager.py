@@ -23,15 +23,17 @@ class StatsManager:
         # 直接使用 src.database 的 SessionLocal，无需创建独立引擎
         self.SessionLocal = SessionLocal
 
-        # 启动验证：确认数据库引擎和表存在
+    def verify_tables(self) -> bool:
+        """启动验证（由启动钩子调用）：确认数据库引擎和表存在"""
         logger.info(f"StatsManager 使用数据库: {engine.url}")
         inspector = inspect(engine)
         tables = inspector.get_table_names()
 
         if "orders" not in tables:
             logger.warning("数据库中未找到 orders 表，统计功能可能异常")
-        else:
-            logger.info(f"数据库表验证成功，共 {len(tables)} 个表")
+            return False
+        logger.info(f"数据库表验证成功，共 {len(tables)} 个表")
+        return True
 
     def get_order_stats(self) -> dict:
         """获取订单统计"""
@@ -7,42 +7,24 @@ Telegram Bot 主程序入口 - 新架构版本
 import asyncio
 import logging
 import os
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
 
-import uvicorn
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from telegram.ext import Application
 
-# 导入API
-from src.api import create_api_app
-
 # 导入结构化日志配置
 from src.common.logging_config import setup_logging
 from src.config import settings
 from src.core.registry import get_registry
+from src.core.startup import get_startup_timer
 from src.database import check_database_health, init_db_safe
-from src.modules.address_query.handler import AddressQueryModule
-from src.modules.energy.handler import EnergyModule
-from src.modules.menu.handler import MainMenuModule
-
-# 导入标准化模块
-from src.modules.premium.handler import PremiumModule
-
-# 导入 TRX 支付监听器
-from src.modules.trx_exchange.payment_monitor import (
-    get_monitor as get_payment_monitor,
-)
-from src.modules.trx_exchange.payment_monitor import (
-    start_payment_monitor,
-    stop_payment_monitor,
-)
 from src.payments.order import order_manager
 from src.payments.suffix_manager import suffix_manager
-from src.rates.jobs import refresh_usdt_rates_job
-from src.tasks.energy_sync import get_energy_sync_task, run_energy_sync
-from src.tasks.order_expiry import order_expiry_task
 
-# 导入核心服务
-from src.wallet.wallet_manager import WalletManager
+
+# 业务模块、定时任务、API 服务等在首次使用时导入，缩短进程启动到开始初始化的时间
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 
 # 配置日志
@@ -54,6 +36,9 @@ log_file = os.environ.get("LOG_FILE")  # 可选：日志文件路径
 setup_logging(level=log_level, json_format=log_format_json, log_file=log_file)
 logger = logging.getLogger(__name__)
 
+# 接收的更新类型（长轮询与 Webhook 一致）
+ALLOWED_UPDATES = ["message", "callback_query"]
+
 
 class TelegramBotV2:
     """Telegram Bot 主类 - 新架构版本"""
@@ -69,50 +54,118 @@ class TelegramBotV2:
     async def initialize(self):
         """初始化 Bot 及其依赖"""
         logger.info("🚀 初始化 Bot V2...")
+        timer = get_startup_timer()
 
-        # 1. 初始化数据库
-        await self._init_database()
+        # 1. 并发执行初始化钩子（数据库、Redis、管理后台表、错误日志）
+        with timer.phase("init_hooks"):
+            await self._run_init_hooks()
 
-        # 2. 初始化Redis
-        await self._init_redis()
+        # 2. 创建Telegram Application（增加超时时间）
+        with timer.phase("application"):
+            self._build_application()
 
-        # 3. 创建Telegram Application（增加超时时间）
-        from telegram.request import HTTPXRequest
+        # 3. 初始化钱包管理器
+        from src.wallet.wallet_manager import WalletManager
 
-        request = HTTPXRequest(connect_timeout=30.0, read_timeout=30.0, write_timeout=30.0, pool_timeout=30.0)
-        # 注意: Python 3.13 需要禁用 JobQueue 以避免 weakref 兼容性问题
-        self.app = (
-            Application.builder()
-            .token(settings.bot_token)
-            .request(request)
-            .job_queue(None)  # 禁用 JobQueue (Python 3.13 兼容)
-            .build()
-        )
-
-        # 4. 初始化钱包管理器
-        self.wallet_manager = WalletManager()
+        with timer.phase("wallet"):
+            self.wallet_manager = WalletManager()
         logger.info("✅ 钱包管理器初始化完成")
 
-        # 5. 注册标准化模块
-        await self._register_standardized_modules()
+        # 4. 注册标准化模块
+        with timer.phase("modules"):
+            await self._register_standardized_modules()
 
-        # 6. 注册旧模块（兼容性）
+        # 5. 注册旧模块（兼容性）
         await self._register_legacy_modules()
 
-        # 7. 初始化API应用
-        self.api_app = create_api_app()
+        # 6. 初始化API应用
+        from src.api import create_api_app
+
+        with timer.phase("api_app"):
+            self.api_app = create_api_app()
         logger.info("✅ API应用初始化完成")
 
         logger.info("✅ Bot V2 初始化完成")
 
-    async def _init_database(self):
-        """初始化数据库"""
+    async def _run_init_hooks(self):
+        """并发执行导入时不再进行的 I/O（阻塞操作在线程池中执行）"""
+        from src.common.error_collector import error_collector
+
+        await get_startup_timer().run_hooks(
+            {
+                "database": self._init_database,
+                "redis": self._init_redis,
+                "admin_tables": self._init_admin_tables,
+                "error_log": error_collector.ensure_loaded,
+            },
+            timeout=settings.bot_startup_step_timeout_secs,
+        )
+
+    def _build_application(self):
+        """创建 Telegram Application"""
+        from src.common.telegram_request import InstrumentedHTTPXRequest
+        from src.core.update_journal import JournaledUpdateQueue, get_update_journal
+        from src.core.update_processor import get_update_processor
+
+        # 普通 API 调用与长轮询使用独立连接池，互不争抢连接
+        request = InstrumentedHTTPXRequest(
+            "api",
+            connection_pool_size=settings.bot_api_pool_size,
+            connect_timeout=30.0,
+            read_timeout=30.0,
+            write_timeout=30.0,
+            pool_timeout=settings.bot_api_pool_timeout,
+        )
+        get_updates_request = InstrumentedHTTPXRequest(
+            "get_updates",
+            connection_pool_size=settings.bot_get_updates_pool_size,
+            connect_timeout=30.0,
+            read_timeout=30.0,
+            write_timeout=30.0,
+            pool_timeout=30.0,
+        )
+        # 注意: Python 3.13 需要禁用 JobQueue 以避免 weakref 兼容性问题
+        builder = (
+            Application.builder()
+            .token(settings.bot_token)
+            .request(request)
+            .get_updates_request(get_updates_request)
+            .concurrent_updates(get_update_processor())  # 并发处理，同一用户的更新按顺序串行
+            .job_queue(None)  # 禁用 JobQueue (Python 3.13 兼容)
+        )
+        if settings.bot_update_journal_enabled:
+            # 更新入队前写入日志，处理完成后移出，重启时继续处理
+            journal = get_update_journal()
+            builder = builder.update_queue(JournaledUpdateQueue(journal))
+            get_update_processor().journal = journal
+        if settings.bot_persistence_enabled:
+            # 用户状态与对话进度保存到 Redis，按用户懒加载
+            from src.core.persistence import get_persistence
+
+            builder = builder.persistence(get_persistence())
+        self.app = builder.build()
+
+    def _init_database(self):
+        """初始化数据库（在线程池中执行）"""
         try:
             init_db_safe()
             if not check_database_health():
                 logger.warning("⚠️ 数据库健康检查未通过，但继续启动")
         except Exception as e:
             logger.error(f"数据库初始化警告: {e}")
+            return
+
+        from src.bot_admin.stats_manager import stats_manager
+
+        stats_manager.verify_tables()
+
+    def _init_admin_tables(self):
+        """创建管理后台的配置表与审计日志表（在线程池中执行）"""
+        from src.bot_admin.audit_log import audit_logger
+        from src.bot_admin.config_manager import config_manager
+
+        config_manager.init()
+        audit_logger.init()
 
     async def _init_redis(self):
         """初始化Redis连接"""
@@ -123,6 +176,10 @@ class TelegramBotV2:
     async def _register_standardized_modules(self):
         """注册标准化模块"""
         logger.info("📦 注册标准化模块...")
+        from src.modules.address_query.handler import AddressQueryModule
+        from src.modules.energy.handler import EnergyModule
+        from src.modules.menu.handler import MainMenuModule
+        from src.modules.premium.handler import PremiumModule
 
         # 注册主菜单模块（最高优先级）
         menu_module = MainMenuModule()
@@ -198,6 +255,12 @@ class TelegramBotV2:
 
     async def _bootstrap_application(self):
         """启动应用"""
+        # 用户首个更新到达时先加载其持久化状态，再交给各模块处理
+        if settings.bot_persistence_enabled:
+            from src.core.persistence import PRELOAD_GROUP, create_preload_handler
+
+            self.app.add_handler(create_preload_handler(), group=PRELOAD_GROUP)
+
         # 初始化所有标准化模块
         self.registry.initialize_all(self.app)
 
@@ -205,26 +268,78 @@ class TelegramBotV2:
         self.app.add_error_handler(self._global_error_handler)
         logger.info("✅ 全局错误处理器已注册")
 
-        # 初始化全局 HTTP 客户端（连接池复用）
-        from src.common.http_client import get_async_client
+        async def init_http_client():
+            from src.common.http_client import get_async_client
+
+            await get_async_client()
+            logger.info("✅ 全局 HTTP 客户端已初始化")
+
+        # 以下步骤相互独立，并发执行且各自超时：
+        # - 全局 HTTP 客户端（连接池复用）
+        # - Bot 命令菜单（网络不佳时可能很慢，不阻塞启动）
+        # - 定时任务（汇率刷新在调度器启动后立即执行一次）
+        # - 生产环境关键配置检查
+        # - 领导者选举：TRX 支付监听与订单过期定时器只在领导者实例运行（未开启选举时直接启动）
+        await get_startup_timer().run_hooks(
+            {
+                "http_client": init_http_client,
+                "bot_commands": self._setup_bot_commands,
+                "scheduler": self._init_scheduler,
+                "production_config": self._check_production_config,
+                "leader_election": self._start_leader_election,
+            },
+            timeout=settings.bot_startup_step_timeout_secs,
+        )
 
-        await get_async_client()
-        logger.info("✅ 全局 HTTP 客户端已初始化")
+    async def _initialize_and_warm_up(self):
+        """初始化 Telegram Application（getMe）的同时预热热点缓存，二者完成后才开始接收更新"""
+        from src.core.warmup import warm_up_caches
 
-        # 设置Bot命令菜单
-        await self._setup_bot_commands()
+        timer = get_startup_timer()
 
-        # 初始化定时任务
-        await self._init_scheduler()
+        async def initialize():
+            with timer.phase("telegram_initialize"):
+                await self.app.initialize()
+
+        await asyncio.gather(initialize(), warm_up_caches(timer))
+
+    async def _start_leader_election(self):
+        """注册单例后台任务并开始领导者选举"""
+        from src.common.leader_election import get_leader_elector
+        from src.tasks.order_expiry import order_expiry_task
+
+        # 绑定 Bot 实例到订单过期任务（用于发送通知）
+        order_expiry_task.set_bot(self.app.bot)
 
-        # 检查生产环境关键配置
-        await self._check_production_config()
+        elector = get_leader_elector()
+        elector.add_listener(self._on_leader_acquired, self._on_leader_released)
+        await elector.start()
+        if settings.leader_election_enabled:
+            role = "领导者" if elector.is_leader else "跟随者"
+            logger.info(f"✅ 领导者选举已启动，当前实例为{role}")
 
-        # 启动 TRX 支付监听器
+    async def _on_leader_acquired(self):
+        """成为领导者：启动订单过期定时器与 TRX 支付监听器"""
+        from src.tasks.expiry_scheduler import order_expiry_scheduler
+        from src.tasks.order_expiry import order_expiry_task
+
+        await order_expiry_scheduler.start(order_expiry_task.expire_orders_by_ids)
         await self._start_payment_monitor()
 
+    async def _on_leader_released(self):
+        """失去领导权：停止 TRX 支付监听器与订单过期定时器，由新领导者接管"""
+        from src.modules.trx_exchange.payment_monitor import stop_payment_monitor
+        from src.tasks.expiry_scheduler import order_expiry_scheduler
+
+        stop_payment_monitor()
+        logger.info("✅ TRX 支付监听器已停止")
+        await order_expiry_scheduler.stop()
+
     async def _start_payment_monitor(self):
         """启动 TRX 支付监听器"""
+        from src.modules.trx_exchange.payment_monitor import get_monitor as get_payment_monitor
+        from src.modules.trx_exchange.payment_monitor import start_payment_monitor
+
         try:
             # 设置 Bot 实例用于发送用户通知
             monitor = get_payment_monitor()
@@ -288,38 +403,78 @@ class TelegramBotV2:
 
     async def _init_scheduler(self):
         """初始化定时任务"""
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+        from src.common.leader_election import get_leader_elector
+        from src.rates.jobs import prune_rate_history_job, refresh_usdt_rates_job
+        from src.tasks.energy_sync import get_energy_sync_task, run_energy_sync
+        from src.tasks.order_expiry import order_expiry_task
+
         self.scheduler = AsyncIOScheduler(timezone="UTC")
+        # 单例任务：多实例部署时只在领导者实例执行
+        leader_only = get_leader_elector().leader_only
 
-        # 绑定 Bot 实例到订单过期任务（用于发送通知）
-        order_expiry_task.set_bot(self.app.bot)
+        # TRX 汇率缓存跨进程失效订阅
+        from src.modules.trx_exchange.rate_manager import rate_cache_invalidator
 
-        # 订单过期检查（每分钟）
+        await rate_cache_invalidator.start()
+
+        # 订单过期对账扫描（低频兜底）
         self.scheduler.add_job(
-            order_expiry_task.check_and_expire_orders,
+            leader_only(order_expiry_task.check_and_expire_orders),
             "interval",
-            minutes=1,
+            minutes=settings.order_expiry_reconcile_minutes,
             id="check_expired_orders",
             replace_existing=True,
         )
 
-        # USDT汇率刷新（每12小时）
+        # USDT汇率后台刷新（汇率菜单只读缓存，启动时立即预热一次）
         # refresh_usdt_rates_job需要context参数，创建一个包装函数
         async def refresh_rates_wrapper():
             await refresh_usdt_rates_job(None)
 
         self.scheduler.add_job(
-            refresh_rates_wrapper,
+            leader_only(refresh_rates_wrapper),
             "interval",
-            hours=12,  # 每12小时刷新一次
+            minutes=settings.usdt_rates_refresh_minutes,
+            next_run_time=datetime.now(UTC),
             id="refresh_usdt_rates",
             replace_existing=True,
         )
 
+        # 汇率历史保留期清理（每小时）
+        async def prune_rate_history_wrapper():
+            await prune_rate_history_job(None)
+
+        self.scheduler.add_job(
+            leader_only(prune_rate_history_wrapper),
+            "interval",
+            hours=1,
+            id="prune_rate_history",
+            replace_existing=True,
+        )
+
+        # 闲置用户状态移出内存（状态保留在 Redis，下次访问时重新加载）
+        if settings.bot_persistence_enabled:
+            from src.core.persistence import get_persistence
+
+            async def evict_idle_state():
+                await get_persistence().evict_idle(self.app, settings.bot_persistence_idle_minutes * 60)
+
+            self.scheduler.add_job(
+                evict_idle_state, "interval", minutes=10, id="evict_idle_state", replace_existing=True
+            )
+
         # 能量订单状态同步（每5分钟）
         energy_sync_task = get_energy_sync_task()
         energy_sync_task.set_bot(self.app.bot)
         self.scheduler.add_job(
-            run_energy_sync, "interval", minutes=5, id="energy_sync", name="能量订单状态同步", replace_existing=True
+            leader_only(run_energy_sync),
+            "interval",
+            minutes=5,
+            id="energy_sync",
+            name="能量订单状态同步",
+            replace_existing=True,
         )
         logger.info("✅ 能量订单状态同步任务已注册")
 
@@ -367,9 +522,11 @@ class TelegramBotV2:
     async def start_with_api(self):
         """同时启动Bot和API服务"""
         logger.info("🚀 启动 Bot V2 with API...")
+        import uvicorn
 
         await self.initialize()
-        await self._bootstrap_application()
+        with get_startup_timer().phase("bootstrap"):
+            await self._bootstrap_application()
 
         # 启动API服务器
         api_config = uvicorn.Config(
@@ -409,40 +566,134 @@ class TelegramBotV2:
             await self.stop()
 
     async def _run_bot(self):
-        """运行Bot（纯Polling模式）"""
-        await self._start_polling()
+        """运行Bot（USE_WEBHOOK=true 时由 API 服务接收推送，否则长轮询）"""
+        if settings.use_webhook:
+            await self._start_webhook()
+        else:
+            await self._start_polling()
 
     async def _start_polling(self):
         """Polling模式"""
-        # 初始化Application
-        await self.app.initialize()
+        timer = get_startup_timer()
+
+        # 初始化Application并预热缓存
+        await self._initialize_and_warm_up()
+
+        # 处理重启前积压的更新，再开始拉取新更新
+        with timer.phase("catch_up"):
+            await self._catch_up(fetch_from_telegram=True)
 
         # 启动轮询
-        await self.app.start()
-        await self.app.updater.start_polling(allowed_updates=["message", "callback_query"], drop_pending_updates=True)
+        with timer.phase("start_receiving"):
+            await self.app.start()
+            await self.app.updater.start_polling(
+                allowed_updates=ALLOWED_UPDATES, drop_pending_updates=not settings.bot_update_journal_enabled
+            )
+        timer.finish()
 
         # 等待停止信号
         await asyncio.Event().wait()
 
+    async def _start_webhook(self):
+        """Webhook模式：更新由 API 服务的 BOT_WEBHOOK_PATH 路由放入 update_queue"""
+        from src.api.telegram_webhook import attach_application, get_webhook_secret_token
+
+        if not settings.bot_webhook_url:
+            raise RuntimeError("USE_WEBHOOK=true 但未配置 BOT_WEBHOOK_URL")
+
+        timer = get_startup_timer()
+        await self._initialize_and_warm_up()
+
+        # 处理日志中未完成的更新（Telegram 端的积压在绑定后由推送送达）
+        with timer.phase("catch_up"):
+            await self._catch_up(fetch_from_telegram=False)
+
+        with timer.phase("start_receiving"):
+            await self.app.start()
+
+            # 先绑定再注册 Webhook，确保 Telegram 推送的第一条更新即可入队
+            attach_application(self.app)
+            await self.app.bot.set_webhook(
+                url=settings.bot_webhook_url,
+                secret_token=get_webhook_secret_token(),
+                allowed_updates=ALLOWED_UPDATES,
+                max_connections=settings.bot_webhook_max_connections,
+                drop_pending_updates=not settings.bot_update_journal_enabled,
+            )
+        logger.info(f"✅ Webhook 已注册: {settings.bot_webhook_url}")
+        timer.finish()
+
+        # 等待停止信号
+        await asyncio.Event().wait()
+
+    async def _catch_up(self, fetch_from_telegram: bool):
+        """重启追赶：分批处理上次运行未完成及停机期间积压的更新"""
+        if not settings.bot_update_journal_enabled:
+            return
+
+        from src.core.update_journal import catch_up_updates, get_update_journal
+
+        journal = get_update_journal()
+        try:
+            await catch_up_updates(
+                self.app, journal, fetch_from_telegram=fetch_from_telegram, allowed_updates=ALLOWED_UPDATES
+            )
+        except Exception as e:
+            logger.error(f"重启追赶失败，继续启动: {e}", exc_info=True)
+        await journal.start()
+
     async def stop(self):
         """停止Bot"""
         logger.info("⏹️ 正在停止 Bot...")
 
-        # 停止 TRX 支付监听器
-        stop_payment_monitor()
-        logger.info("✅ TRX 支付监听器已停止")
+        # 先取消就绪，编排系统不再分配流量
+        get_startup_timer().set_ready(False)
 
         # 停止定时任务
         if self.scheduler:
             self.scheduler.shutdown()
             logger.info("✅ 定时任务调度器已停止")
 
+        # 交出领导权：停止 TRX 支付监听器与订单过期定时器，并释放租约让其他实例立即接管
+        from src.common.leader_election import get_leader_elector
+        from src.tasks.expiry_scheduler import order_expiry_scheduler
+
+        await get_leader_elector().stop()
+        await order_expiry_scheduler.disconnect()
+
+        # 停止 TRX 汇率缓存失效订阅
+        from src.modules.trx_exchange.rate_manager import rate_cache_invalidator
+
+        await rate_cache_invalidator.stop()
+
+        # 关闭能量同步任务的共享 API 客户端
+        from src.tasks.energy_sync import get_energy_sync_task
+
+        await get_energy_sync_task().close()
+
+        # 写入尚未落库的地址查询日志
+        from src.modules.address_query.query_log import query_log_writer
+
+        await query_log_writer.close()
+
+        # 停止接收 Webhook 推送（不删除 Webhook，滚动重启期间由其他实例继续接收）
+        from src.api.telegram_webhook import attach_application
+
+        attach_application(None)
+
         # 停止Telegram应用
         if self.app:
-            await self.app.updater.stop()
+            if self.app.updater and self.app.updater.running:
+                await self.app.updater.stop()
             await self.app.stop()
             await self.app.shutdown()
 
+        # 写入最终的已处理水位
+        if settings.bot_update_journal_enabled:
+            from src.core.update_journal import get_update_journal
+
+            await get_update_journal().stop()
+
         # 断开Redis
         await order_manager.disconnect()
         await suffix_manager.disconnect()
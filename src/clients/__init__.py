@@ -3,10 +3,19 @@
 
 提供对外部服务的统一访问接口：
 - tron.py: TronScan/TronGrid API
+- tron_router.py: TRON 数据源路由（延迟/错误率评分 + 故障切换）
 - exchange_rate.py: 汇率 API（待实现）
 """
 
-from .tron import TronAPIClient
+from .tron import AddressInfoCache, TronAPIClient, address_info_cache
+from .tron_router import TronProvider, TronProviderRouter, tron_router
 
 
-__all__ = ["TronAPIClient"]
+__all__ = [
+    "AddressInfoCache",
+    "TronAPIClient",
+    "TronProvider",
+    "TronProviderRouter",
+    "address_info_cache",
+    "tron_router",
+]
@@ -5,20 +5,32 @@ TRON 区块链 API 统一客户端
 - 地址余额查询（TRX + USDT）
 - 最近交易记录
 - 浏览器链接生成
+- 地址信息缓存（进程内 LRU + 可选 Redis 共享，并发未命中合并为单次上游请求）
 """
 
+import asyncio
+import json
 import logging
-from dataclasses import dataclass
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
 
 from src.common.http_client import get_async_client
+from src.common.rate_limiter import TokenBucketLimiter
 from src.config import settings
 
+from .tron_router import PROVIDER_TRONSCAN, TronProvider, TronProviderRouter, tron_router
+
 
 logger = logging.getLogger(__name__)
 
 # USDT 合约地址
 USDT_CONTRACT = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
 
+# 地址信息缓存的 Redis key 前缀
+ADDRESS_CACHE_KEY_PREFIX = "tron:address_info:"
+
 
 @dataclass
 class AddressInfo:
@@ -28,6 +40,7 @@ class AddressInfo:
     trx_balance: float
     usdt_balance: float
     recent_txs: list[dict]
+    txs_complete: bool = True  # 交易记录获取失败/超时时为 False（仅有余额）
 
     def format_trx(self) -> str:
         return f"{self.trx_balance:.2f}"
@@ -36,56 +49,290 @@ class AddressInfo:
         return f"{self.usdt_balance:.2f}"
 
 
+class AddressInfoCache:
+    """
+    地址信息缓存
+
+    - 进程内 LRU，成功结果缓存 ttl 秒
+    - 上游明确返回无数据（无效/未知地址）时缓存 None，仅保留 negative_ttl 秒
+    - 同一地址的并发未命中共享同一个上游请求（single-flight）
+    - 可选 Redis 共享，多实例部署时复用彼此的查询结果；Redis 异常时退化为纯进程内缓存
+    """
+
+    _MISSING = object()
+
+    def __init__(self, ttl: float = 30, negative_ttl: float = 10, max_size: int = 1024, shared: bool = False):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.shared = shared
+        self.redis_client = None
+        # address -> (过期时间戳, AddressInfo | None)
+        self._entries: OrderedDict[str, tuple[float, AddressInfo | None]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(self, address: str, loader) -> AddressInfo | None:
+        """
+        获取缓存的地址信息，未命中时调用 loader 加载
+
+        Args:
+            address: TRON 地址
+            loader: 协程函数 loader(address)，返回 AddressInfo 或 None；抛出异常时不缓存
+
+        Raises:
+            loader 抛出的异常
+        """
+        cached = self._get_local(address)
+        if cached is not self._MISSING:
+            self.hits += 1
+            return cached
+
+        task = self._inflight.get(address)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            self.misses += 1
+            task = asyncio.create_task(self._load(address, loader))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[address] = task
+        else:
+            self.hits += 1
+
+        # shield：单个调用方被取消时不影响其他等待同一请求的调用方
+        return await asyncio.shield(task)
+
+    def invalidate(self, address: str | None = None) -> None:
+        """清除指定地址（或全部）的进程内缓存"""
+        if address is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(address, None)
+
+    def stats(self) -> dict:
+        """缓存状态"""
+        return {
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    async def _load(self, address: str, loader) -> AddressInfo | None:
+        """查 Redis → 调用上游 → 回填缓存"""
+        try:
+            shared = await self._get_shared(address)
+            if shared is not self._MISSING:
+                self._set_local(address, shared)
+                return shared
+
+            info = await loader(address)
+            self._set_local(address, info)
+            await self._set_shared(address, info)
+            return info
+        finally:
+            self._inflight.pop(address, None)
+
+    def _get_local(self, address: str):
+        entry = self._entries.get(address)
+        if entry is None:
+            return self._MISSING
+        expires_at, info = entry
+        if expires_at <= time.monotonic():
+            del self._entries[address]
+            return self._MISSING
+        self._entries.move_to_end(address)
+        return info
+
+    def _entry_ttl(self, info: AddressInfo | None) -> float:
+        """完整结果使用 ttl；负结果和缺少交易记录的部分结果只短暂缓存"""
+        if info is None or not info.txs_complete:
+            return self.negative_ttl
+        return self.ttl
+
+    def _set_local(self, address: str, info: AddressInfo | None) -> None:
+        ttl = self._entry_ttl(info)
+        if ttl <= 0:
+            return
+        self._entries[address] = (time.monotonic() + ttl, info)
+        self._entries.move_to_end(address)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _get_redis(self):
+        if not self.shared:
+            return None
+        if self.redis_client is None:
+            from src.common.redis_helper import create_redis_client
+
+            self.redis_client = create_redis_client(decode_responses=True)
+        return self.redis_client
+
+    async def _get_shared(self, address: str):
+        try:
+            redis_client = await self._get_redis()
+            if redis_client is None:
+                return self._MISSING
+            raw = await redis_client.get(f"{ADDRESS_CACHE_KEY_PREFIX}{address}")
+        except Exception as e:
+            logger.warning(f"读取地址信息共享缓存失败: {e}")
+            return self._MISSING
+
+        if raw is None:
+            return self._MISSING
+        data = json.loads(raw)
+        return AddressInfo(**data) if data else None
+
+    async def _set_shared(self, address: str, info: AddressInfo | None) -> None:
+        ttl = self._entry_ttl(info)
+        if ttl <= 0:
+            return
+        try:
+            redis_client = await self._get_redis()
+            if redis_client is None:
+                return
+            payload = json.dumps(asdict(info) if info is not None else None, ensure_ascii=False)
+            await redis_client.set(f"{ADDRESS_CACHE_KEY_PREFIX}{address}", payload, ex=max(1, int(ttl)))
+        except Exception as e:
+            logger.warning(f"写入地址信息共享缓存失败: {e}")
+
+
+# 全局地址信息缓存（所有 TronAPIClient 实例共享）
+address_info_cache = AddressInfoCache(
+    ttl=settings.tron_address_cache_ttl,
+    negative_ttl=settings.tron_address_negative_cache_ttl,
+    max_size=settings.tron_address_cache_size,
+    shared=settings.tron_address_cache_shared,
+)
+
+
+# 批量查询的上游请求预算（所有实例共享；缓存命中不消耗）
+tron_upstream_limiter = TokenBucketLimiter(
+    capacity=settings.tron_upstream_rate_per_second,
+    refill_per_second=settings.tron_upstream_rate_per_second,
+    prefix="tron:upstream:",
+)
+
+
 class TronAPIClient:
     """TRON API 统一客户端"""
 
-    def __init__(self):
-        """初始化客户端"""
-        self.api_url = getattr(settings, "tron_api_url", "")
-        self.api_key = getattr(settings, "tron_api_key", None)
-        self.explorer = getattr(settings, "tron_explorer", "tronscan")
+    def __init__(self, cache: AddressInfoCache | None = None, router: TronProviderRouter | None = None):
+        """
+        初始化客户端
+
+        Args:
+            cache: 地址信息缓存，默认使用全局共享缓存
+            router: 数据源路由，默认使用全局共享路由
+        """
         self.timeout = getattr(settings, "tron_timeout_secs", 10)
+        self.tx_timeout = getattr(settings, "tron_tx_timeout_secs", 5)
+        self.cache = cache or address_info_cache
+        self.router = router or tron_router
 
     async def get_address_info(self, address: str) -> AddressInfo | None:
         """
         获取地址信息（余额 + 交易记录）
 
+        结果按地址缓存；上游请求异常时不缓存，直接返回 None。
+
         Args:
             address: TRON 地址
 
         Returns:
             AddressInfo 或 None
         """
+        address = address.strip()
         try:
-            client = await get_async_client()
-
-            # 根据配置选择 API
-            if self.explorer == "tronscan" or "tronscan" in self.api_url:
-                return await self._fetch_from_tronscan(client, address)
-            else:
-                return await self._fetch_from_trongrid(client, address)
-
+            return await self.cache.get_or_load(address, self._fetch_address_info)
         except Exception as e:
             logger.error(f"获取地址信息失败: {e}", exc_info=True)
             return None
 
-    async def _fetch_from_tronscan(self, client, address: str) -> AddressInfo | None:
-        """使用 TronScan API 获取地址信息"""
-        base_url = self.api_url or "https://apilist.tronscanapi.com"
+    async def iter_address_infos(
+        self, addresses: list[str], concurrency: int | None = None
+    ) -> AsyncIterator[tuple[str, AddressInfo | None]]:
+        """
+        批量获取地址信息，按完成顺序逐个产出
+
+        - 最多 concurrency 个查询同时进行
+        - 缓存未命中的上游请求受 tron_upstream_limiter 速率预算约束
+        - 提前停止迭代时取消剩余查询
+
+        Args:
+            addresses: TRON 地址列表（重复地址只查询一次）
+            concurrency: 并发数，默认 settings.tron_bulk_concurrency
+
+        Yields:
+            (地址, AddressInfo 或 None)
+        """
+        unique = list(dict.fromkeys(address.strip() for address in addresses))
+        semaphore = asyncio.Semaphore(concurrency or settings.tron_bulk_concurrency)
+
+        async def lookup(address: str) -> tuple[str, AddressInfo | None]:
+            async with semaphore:
+                try:
+                    return address, await self.cache.get_or_load(address, self._fetch_address_info_budgeted)
+                except Exception as e:
+                    logger.warning(f"批量查询地址失败 {address}: {e}")
+                    return address, None
+
+        tasks = [asyncio.create_task(lookup(address)) for address in unique]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch_address_info_budgeted(self, address: str) -> AddressInfo | None:
+        """等待上游请求预算后再获取地址信息"""
+        while True:
+            allowed, retry_after = await tron_upstream_limiter.acquire("bulk")
+            if allowed:
+                break
+            await asyncio.sleep(retry_after)
+        return await self._fetch_address_info(address)
 
-        headers = {"Accept": "application/json"}
-        if self.api_key and self.api_key.strip():
-            headers["TRON-PRO-API-KEY"] = self.api_key.strip()
+    async def _fetch_address_info(self, address: str) -> AddressInfo | None:
+        """从上游获取地址信息（不经过缓存），由路由选择数据源并在失败时切换"""
+        client = await get_async_client()
+
+        async def fetch(provider: TronProvider) -> AddressInfo | None:
+            if provider.kind == PROVIDER_TRONSCAN:
+                return await self._fetch_from_tronscan(client, address, provider)
+            return await self._fetch_from_trongrid(client, address, provider)
+
+        return await self.router.call(fetch)
+
+    async def _fetch_from_tronscan(self, client, address: str, provider: TronProvider) -> AddressInfo | None:
+        """
+        使用 TronScan API 获取地址信息
 
-        # 1. 获取账户信息
-        account_url = f"{base_url}/api/accountv2"
+        账户与交易记录两个请求并发发出：账户请求失败时整体失败；
+        交易记录超时或失败时仍返回余额，并标记 txs_complete=False。
+        """
+        headers = provider.headers()
+        account_url = f"{provider.base_url}/api/accountv2"
         params = {"address": address}
 
         logger.info(f"请求 TronScan API: {account_url}")
-        response = await client.get(account_url, headers=headers, params=params, timeout=self.timeout)
+        loop = asyncio.get_running_loop()
+        tx_deadline = loop.time() + self.tx_timeout
+        account_task = asyncio.create_task(
+            client.get(account_url, headers=headers, params=params, timeout=self.timeout)
+        )
+        tx_task = asyncio.create_task(self._fetch_tronscan_transactions(client, address, provider.base_url, headers))
+
+        try:
+            response = await account_task
+        except BaseException:
+            tx_task.cancel()
+            raise
 
         if response.status_code != 200:
+            tx_task.cancel()
             logger.error(f"TronScan API 失败: {response.status_code}")
+            self._raise_if_transient(response.status_code)
             return None
 
         data = response.json()
@@ -94,23 +341,34 @@ class TronAPIClient:
         trx_balance = self._parse_trx_balance(data)
         usdt_balance = self._parse_usdt_balance(data)
 
-        # 2. 获取最近交易
-        recent_txs = await self._fetch_tronscan_transactions(client, address, headers)
+        # 交易记录使用独立的（更短的）超时，超时时返回部分结果
+        try:
+            recent_txs = await asyncio.wait_for(tx_task, timeout=max(0.0, tx_deadline - loop.time()))
+        except TimeoutError:
+            logger.warning(f"获取交易记录超时 ({self.tx_timeout}s)，仅返回余额: {address}")
+            recent_txs = None
 
-        return AddressInfo(address=address, trx_balance=trx_balance, usdt_balance=usdt_balance, recent_txs=recent_txs)
+        return AddressInfo(
+            address=address,
+            trx_balance=trx_balance,
+            usdt_balance=usdt_balance,
+            recent_txs=recent_txs or [],
+            txs_complete=recent_txs is not None,
+        )
 
-    async def _fetch_tronscan_transactions(self, client, address: str, headers: dict) -> list[dict]:
-        """获取 TronScan 交易记录"""
+    async def _fetch_tronscan_transactions(
+        self, client, address: str, base_url: str, headers: dict
+    ) -> list[dict] | None:
+        """获取 TronScan 交易记录，失败时返回 None"""
         try:
-            base_url = self.api_url or "https://apilist.tronscanapi.com"
             tx_url = f"{base_url}/api/transaction"
             params = {"address": address, "limit": 5, "sort": "-timestamp"}
 
-            response = await client.get(tx_url, headers=headers, params=params, timeout=self.timeout)
+            response = await client.get(tx_url, headers=headers, params=params, timeout=self.tx_timeout)
 
             if response.status_code != 200:
                 logger.warning(f"获取交易记录失败: {response.status_code}")
-                return []
+                return None
 
             data = response.json()
             txs = data.get("data", [])
@@ -161,27 +419,23 @@ class TronAPIClient:
 
         except Exception as e:
             logger.error(f"获取交易记录异常: {e}")
-            return []
+            return None
 
-    async def _fetch_from_trongrid(self, client, address: str) -> AddressInfo | None:
+    async def _fetch_from_trongrid(self, client, address: str, provider: TronProvider) -> AddressInfo | None:
         """使用 TronGrid API 获取地址信息"""
-        base_url = self.api_url or "https://api.trongrid.io"
-
-        headers = {"Accept": "application/json"}
-        if self.api_key and self.api_key.strip():
-            headers["TRON-PRO-API-KEY"] = self.api_key.strip()
-
-        account_url = f"{base_url}/v1/accounts/{address}"
+        headers = provider.headers()
+        account_url = f"{provider.base_url}/v1/accounts/{address}"
 
         response = await client.get(account_url, headers=headers, timeout=self.timeout)
 
-        if response.status_code == 401 and self.api_key:
+        if response.status_code == 401 and "TRON-PRO-API-KEY" in headers:
             logger.warning("API 密钥无效，尝试公共 API")
             headers.pop("TRON-PRO-API-KEY", None)
             response = await client.get(account_url, headers=headers, timeout=self.timeout)
 
         if response.status_code != 200:
             logger.error(f"TronGrid API 失败: {response.status_code}")
+            self._raise_if_transient(response.status_code)
             return None
 
         data = response.json()
@@ -212,6 +466,12 @@ class TronAPIClient:
             recent_txs=[],  # TronGrid 不支持交易列表
         )
 
+    @staticmethod
+    def _raise_if_transient(status_code: int) -> None:
+        """限流或服务端错误属于临时故障，抛出异常以免被负缓存"""
+        if status_code == 429 or status_code >= 500:
+            raise RuntimeError(f"TRON API 暂时不可用: HTTP {status_code}")
+
     def _parse_trx_balance(self, data: dict) -> float:
         """解析 TRX 余额"""
         # 尝试从 balances 数组获取
@@ -0,0 +1,238 @@
+"""
+TRON 数据源路由
+
+为 TronScan、TronGrid 及自定义镜像维护滚动延迟与错误率，
+每次请求优先使用当前评分最好的数据源，失败时自动切换到下一个。
+连续失败的数据源进入冷却期，冷却结束后放行一次探测请求，成功即恢复。
+
+地址查询（TronAPIClient）与 USDT 支付监听（PaymentMonitor）共用同一个路由实例，
+单个上游故障不会同时影响两者。
+"""
+
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROVIDER_TRONSCAN = "tronscan"
+PROVIDER_TRONGRID = "trongrid"
+
+DEFAULT_BASE_URLS = {
+    PROVIDER_TRONSCAN: "https://apilist.tronscanapi.com",
+    PROVIDER_TRONGRID: "https://api.trongrid.io",
+}
+
+# 无延迟样本时的假定延迟（秒），使新数据源按配置顺序排在已知的快速数据源之后
+DEFAULT_LATENCY = 1.0
+# 延迟 EWMA 平滑系数
+LATENCY_ALPHA = 0.3
+# 错误率统计窗口（最近 N 次请求）
+ERROR_WINDOW = 20
+
+
+@dataclass
+class TronProvider:
+    """TRON 数据源及其健康状态"""
+
+    name: str
+    kind: str  # tronscan | trongrid
+    base_url: str
+    api_key: str = ""
+    priority: int = 0
+
+    latency: float | None = None
+    consecutive_failures: int = 0
+    cooldown_until: float = 0.0
+    _outcomes: deque = field(default_factory=lambda: deque(maxlen=ERROR_WINDOW), repr=False)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    @property
+    def score(self) -> float:
+        """评分（越小越好）：延迟按错误率加权"""
+        latency = self.latency if self.latency is not None else DEFAULT_LATENCY
+        return latency * (1 + 5 * self.error_rate)
+
+    def is_available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def headers(self) -> dict[str, str]:
+        headers = {"Accept": "application/json"}
+        if self.api_key and self.api_key.strip():
+            headers["TRON-PRO-API-KEY"] = self.api_key.strip()
+        return headers
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "base_url": self.base_url,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "consecutive_failures": self.consecutive_failures,
+            "cooling_down": not self.is_available(time.monotonic()),
+        }
+
+
+class AllProvidersFailedError(Exception):
+    """所有数据源均请求失败"""
+
+
+class TronProviderRouter:
+    """按延迟与错误率评分选择 TRON 数据源"""
+
+    def __init__(self, providers: list[TronProvider], fail_max: int = 3, probe_interval: float = 30.0):
+        """
+        Args:
+            providers: 数据源列表（按配置优先级排列）
+            fail_max: 连续失败多少次后进入冷却
+            probe_interval: 冷却时长（秒），到期后放行一次探测请求
+        """
+        if not providers:
+            raise ValueError("providers must not be empty")
+        self.providers = providers
+        self.fail_max = fail_max
+        self.probe_interval = probe_interval
+
+    def ordered(self, kinds: set[str] | None = None) -> list[TronProvider]:
+        """
+        按评分排序的可用数据源
+
+        全部处于冷却期时仍返回全部数据源（宁可尝试也不直接失败）。
+
+        Args:
+            kinds: 仅返回支持的数据源类型
+        """
+        candidates = [p for p in self.providers if kinds is None or p.kind in kinds]
+        now = time.monotonic()
+        available = [p for p in candidates if p.is_available(now)] or candidates
+        return sorted(available, key=lambda p: (p.score, p.priority))
+
+    async def call(
+        self,
+        operation: Callable[[TronProvider], Awaitable[T]],
+        kinds: set[str] | None = None,
+    ) -> T:
+        """
+        依次在评分最好的数据源上执行 operation，直到成功
+
+        operation 抛出异常视为该数据源故障并切换到下一个；正常返回（包括 None）视为成功。
+
+        Raises:
+            AllProvidersFailedError: 所有数据源均失败
+        """
+        errors = []
+        for provider in self.ordered(kinds):
+            started = time.monotonic()
+            try:
+                result = await operation(provider)
+            except Exception as e:
+                self.record_failure(provider)
+                errors.append(f"{provider.name}: {e}")
+                logger.warning(f"TRON 数据源 {provider.name} 请求失败，尝试下一个: {e}")
+                continue
+            self.record_success(provider, time.monotonic() - started)
+            return result
+
+        raise AllProvidersFailedError("; ".join(errors) or "no provider available")
+
+    def record_success(self, provider: TronProvider, latency: float) -> None:
+        if provider.consecutive_failures >= self.fail_max:
+            logger.info(f"TRON 数据源 {provider.name} 已恢复")
+        provider.latency = (
+            latency if provider.latency is None else LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * provider.latency
+        )
+        provider.consecutive_failures = 0
+        provider.cooldown_until = 0.0
+        provider._outcomes.append(True)
+
+    def record_failure(self, provider: TronProvider) -> None:
+        provider.consecutive_failures += 1
+        provider._outcomes.append(False)
+        if provider.consecutive_failures >= self.fail_max:
+            # 冷却期结束后放行一次探测；探测失败则重新冷却
+            provider.cooldown_until = time.monotonic() + self.probe_interval
+            logger.warning(
+                f"TRON 数据源 {provider.name} 连续失败 {provider.consecutive_failures} 次，冷却 {self.probe_interval}s"
+            )
+
+    def reset(self) -> None:
+        """清空所有健康统计"""
+        for provider in self.providers:
+            provider.latency = None
+            provider.consecutive_failures = 0
+            provider.cooldown_until = 0.0
+            provider._outcomes.clear()
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [p.stats() for p in self.providers]
+
+
+def _detect_kind(url: str, default: str) -> str:
+    if "trongrid" in url:
+        return PROVIDER_TRONGRID
+    if "tronscan" in url:
+        return PROVIDER_TRONSCAN
+    return default
+
+
+def build_providers_from_settings() -> list[TronProvider]:
+    """
+    根据配置构建数据源列表
+
+    - tron_api_url（或 tron_explorer 对应的默认地址）作为首选数据源，使用 tron_api_key
+    - TronScan / TronGrid 官方地址作为备选
+    - tron_api_mirrors: 逗号分隔的 "kind=url" 镜像列表，如 "trongrid=https://mirror.example.com"
+    """
+    api_url = (getattr(settings, "tron_api_url", "") or "").rstrip("/")
+    api_key = getattr(settings, "tron_api_key", "") or ""
+    explorer = getattr(settings, "tron_explorer", PROVIDER_TRONSCAN)
+    primary_kind = PROVIDER_TRONSCAN if explorer == PROVIDER_TRONSCAN or "tronscan" in api_url else PROVIDER_TRONGRID
+
+    entries = [(primary_kind, api_url or DEFAULT_BASE_URLS[primary_kind], api_key)]
+    for kind, url in DEFAULT_BASE_URLS.items():
+        entries.append((kind, url, ""))
+
+    for raw in (getattr(settings, "tron_api_mirrors", "") or "").split(","):
+        raw = raw.strip()
+        if not raw:
+            continue
+        kind, sep, url = raw.partition("=")
+        if not sep:
+            kind, url = _detect_kind(raw, PROVIDER_TRONGRID), raw
+        kind = kind.strip().lower()
+        if kind not in DEFAULT_BASE_URLS:
+            logger.warning(f"忽略未知类型的 TRON 镜像: {raw}")
+            continue
+        entries.append((kind, url.strip().rstrip("/"), ""))
+
+    providers: list[TronProvider] = []
+    seen: set[str] = set()
+    for kind, url, key in entries:
+        if url in seen:
+            continue
+        seen.add(url)
+        name = kind if url == DEFAULT_BASE_URLS[kind] else f"{kind}:{url}"
+        providers.append(TronProvider(name=name, kind=kind, base_url=url, api_key=key, priority=len(providers)))
+    return providers
+
+
+# 全局路由实例（地址查询与支付监听共享）
+tron_router = TronProviderRouter(
+    build_providers_from_settings(),
+    fail_max=settings.tron_provider_fail_max,
+    probe_interval=settings.tron_provider_probe_interval,
+)
@@ -0,0 +1,244 @@
+"""
+跨进程缓存失效通知
+
+进程内缓存（如 RateManager 的汇率）在每个进程（Bot、独立部署的 API、第二个 Bot 实例）中各有一份。
+数据变更时：
+- publish() 递增 Redis 中的版本号并通过 pub/sub 广播，本进程的监听回调立即执行
+- 每个进程的订阅任务收到广播后立即调用监听回调清空本地缓存
+- 读取时兜底：current_version() 按最小间隔读取 Redis 版本号，订阅断线期间漏掉的广播
+  也能在一个检查间隔内发现
+在事件循环中调用时 current_version() 只读内存中的版本号，到期后在后台任务中通过异步客户端刷新；
+publish() 同样在后台任务中发布，读取汇率不会因 Redis 网络往返或连接超时阻塞事件循环。
+在线程或脚本中（没有运行中的事件循环）调用时使用同步客户端。
+Redis 不可用时退化为仅进程内失效（依赖缓存 TTL 兜底）。
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Callable
+
+
+logger = logging.getLogger(__name__)
+
+# Redis 失败后多久内不再尝试（秒），避免每次读取都等待连接超时
+REDIS_RETRY_INTERVAL = 30.0
+# 订阅断开后的重连间隔（秒）
+RESUBSCRIBE_DELAY = 5.0
+
+
+class CacheInvalidator:
+    """基于 Redis pub/sub + 版本号的跨进程缓存失效"""
+
+    def __init__(self, name: str, check_interval: float = 5.0):
+        """
+        Args:
+            name: 缓存名称（用于频道名与版本号 key）
+            check_interval: 读取时检查 Redis 版本号的最小间隔（秒）
+        """
+        self.name = name
+        self.channel = f"cache_invalidate:{name}"
+        self.version_key = f"cache_version:{name}"
+        self.check_interval = check_interval
+        self.redis_client = None  # 同步客户端：事件循环之外的发布与版本检查
+        self.async_redis_client = None  # 异步客户端：订阅，以及事件循环中的发布与版本检查
+        self._listeners: list[Callable[[], None]] = []
+        self._version = 0
+        self._version_checked_at: float | None = None
+        self._redis_disabled_until = 0.0
+        self._task: asyncio.Task | None = None
+        self._refreshing = False
+        self._background: set[asyncio.Task] = set()
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """注册缓存失效回调（收到失效通知时在本进程调用）"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def publish(self) -> int:
+        """
+        数据已变更：清空本进程缓存并通知其他进程
+
+        在事件循环中调用时递增版本号与广播在后台任务中完成。
+
+        Returns:
+            新的版本号（后台发布或 Redis 不可用时为本地已知版本号）
+        """
+        self._notify_listeners()
+        if self._in_event_loop():
+            self._spawn(self._publish_async())
+            return self._version
+
+        client = self._get_client()
+        if client is None:
+            return self._version
+
+        try:
+            version = int(client.incr(self.version_key))
+            self._version = version
+            self._version_checked_at = time.monotonic()
+            client.publish(self.channel, version)
+        except Exception as e:
+            self._disable_redis(e)
+        return self._version
+
+    def current_version(self) -> int:
+        """
+        最新的缓存版本号（至多每 check_interval 秒读取一次 Redis）
+
+        在事件循环中只返回内存中的版本号，到期时在后台刷新（本次读取仍返回旧值）。
+        """
+        now = time.monotonic()
+        if self._version_checked_at is not None and now - self._version_checked_at < self.check_interval:
+            return self._version
+
+        if self._in_event_loop():
+            if not self._refreshing and time.monotonic() >= self._redis_disabled_until:
+                self._refreshing = True
+                self._version_checked_at = now
+                self._spawn(self._refresh_version())
+            return self._version
+
+        client = self._get_client()
+        if client is None:
+            return self._version
+
+        self._version_checked_at = now
+        try:
+            self._version = int(client.get(self.version_key) or 0)
+        except Exception as e:
+            self._disable_redis(e)
+        return self._version
+
+    async def start(self) -> None:
+        """启动订阅任务（重复调用无副作用）"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """停止订阅任务"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+
+    def reset(self) -> None:
+        """清空本地版本状态（测试用）"""
+        self._version = 0
+        self._version_checked_at = None
+        self._redis_disabled_until = 0.0
+
+    async def _publish_async(self) -> None:
+        client = self._get_async_client()
+        if client is None:
+            return
+        try:
+            version = int(await client.incr(self.version_key))
+            self._version = version
+            self._version_checked_at = time.monotonic()
+            await client.publish(self.channel, version)
+        except Exception as e:
+            self._disable_redis(e)
+
+    async def _refresh_version(self) -> None:
+        try:
+            client = self._get_async_client()
+            if client is None:
+                return
+            self._version = int(await client.get(self.version_key) or 0)
+        except Exception as e:
+            self._disable_redis(e)
+        finally:
+            self._refreshing = False
+
+    def _spawn(self, coroutine) -> None:
+        # 保留任务引用，避免未完成的后台任务被回收
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    @staticmethod
+    def _in_event_loop() -> bool:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    def _get_async_client(self):
+        if time.monotonic() < self._redis_disabled_until:
+            return None
+        if self.async_redis_client is None:
+            try:
+                from .redis_helper import create_redis_client
+
+                self.async_redis_client = create_redis_client(decode_responses=True)
+            except Exception as e:
+                self._disable_redis(e)
+                return None
+        return self.async_redis_client
+
+    def _get_client(self):
+        if time.monotonic() < self._redis_disabled_until:
+            return None
+        if self.redis_client is None:
+            try:
+                from .redis_helper import create_sync_redis_client
+
+                self.redis_client = create_sync_redis_client()
+            except Exception as e:
+                self._disable_redis(e)
+                return None
+        return self.redis_client
+
+    def _disable_redis(self, error: Exception) -> None:
+        self._redis_disabled_until = time.monotonic() + REDIS_RETRY_INTERVAL
+        logger.warning(f"缓存失效通知 {self.name} 无法访问 Redis，{REDIS_RETRY_INTERVAL:.0f}s 内仅进程内失效: {error}")
+
+    def _notify_listeners(self) -> None:
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"缓存失效回调执行失败 ({self.name}): {e}")
+
+    def _on_message(self, data) -> None:
+        try:
+            version = int(data)
+        except (TypeError, ValueError):
+            version = self._version + 1
+        if version == self._version:
+            # 本进程自己发布的通知
+            return
+        self._version = version
+        self._version_checked_at = time.monotonic()
+        logger.info(f"收到缓存失效通知 {self.name} (version={version})")
+        self._notify_listeners()
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                if self.async_redis_client is None:
+                    from .redis_helper import create_redis_client
+
+                    self.async_redis_client = create_redis_client(decode_responses=True)
+                pubsub = self.async_redis_client.pubsub()
+                await pubsub.subscribe(self.channel)
+                # 重新订阅期间可能错过广播，立即重新检查版本号
+                self._version_checked_at = None
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._on_message(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"缓存失效订阅 {self.name} 中断，{RESUBSCRIBE_DELAY:.0f}s 后重连: {e}")
+                await asyncio.sleep(RESUBSCRIBE_DELAY)
+            finally:
+                if pubsub is not None:
+                    with contextlib.suppress(Exception):
+                        await pubsub.aclose()
@@ -8,6 +8,8 @@ import logging
 
 from telegram import Update
 from telegram.ext import (
+    Application,
+    BaseHandler,
     CallbackQueryHandler,
     CommandHandler,
     ContextTypes,
@@ -26,6 +28,10 @@ class ConversationTracker:
     """
     对话追踪器 - 追踪每个用户的活跃对话
     确保同一用户同一时间只有一个活跃对话
+
+    TrackedConversationHandler 在对话状态变化时维护「用户 -> 对话键」索引，
+    清理某个用户的对话只访问该用户自己的对话键，与全局进行中的对话数量无关；
+    对话结束（包括超时、被 fallback 结束）时索引与活跃记录自动移除。
     """
 
     # 用户活跃对话: {user_id: handler_name}
@@ -34,6 +40,13 @@ class ConversationTracker:
     # 已注册的所有 ConversationHandler 实例
     _registered_handlers: dict[str, ConversationHandler] = {}
 
+    # 对话键索引: {("user", user_id) | ("chat", chat_id): {handler_name: {conversation_key, ...}}}
+    # per_user 的对话按用户索引，仅 per_chat 的对话按聊天索引
+    _conversation_index: dict[tuple[str, int | str], dict[str, set[tuple]]] = {}
+
+    # 未维护索引的处理器（直接创建的 ConversationHandler），清理时回退为扫描
+    _unindexed_handlers: set[str] = set()
+
     @classmethod
     def register_handler(cls, name: str, handler: ConversationHandler) -> None:
         """
@@ -44,6 +57,10 @@ class ConversationTracker:
             handler: ConversationHandler 实例
         """
         cls._registered_handlers[name] = handler
+        if isinstance(handler, TrackedConversationHandler):
+            cls._unindexed_handlers.discard(name)
+        else:
+            cls._unindexed_handlers.add(name)
         logger.debug(f"注册对话处理器: {name}")
 
     @classmethod
@@ -90,6 +107,68 @@ class ConversationTracker:
         """
         return cls._active_conversations.get(user_id)
 
+    @classmethod
+    def track_key(cls, handler: ConversationHandler, key: tuple, present: bool) -> None:
+        """
+        更新对话键索引
+
+        Args:
+            handler: 对话状态发生变化的处理器
+            key: 对话键
+            present: 对话键是否仍在处理器中（False 表示对话已结束）
+        """
+        owner = cls._key_owner(handler, key)
+        if owner is None:
+            return
+        name = handler.name
+        if present:
+            cls._conversation_index.setdefault(owner, {}).setdefault(name, set()).add(key)
+            return
+
+        conversations = cls._conversation_index.get(owner)
+        keys = conversations.get(name) if conversations else None
+        if keys is None:
+            return
+        keys.discard(key)
+        if keys:
+            return
+        del conversations[name]
+        if not conversations:
+            del cls._conversation_index[owner]
+        # 用户在该处理器中已没有进行中的对话，移除活跃记录
+        if owner[0] == "user" and cls._active_conversations.get(owner[1]) == name:
+            del cls._active_conversations[owner[1]]
+
+    @classmethod
+    def get_user_conversations(cls, user_id: int, chat_id: int | None = None) -> dict[str, set[tuple]]:
+        """
+        获取用户（以及指定聊天中不区分用户）的对话键
+
+        Args:
+            user_id: 用户ID
+            chat_id: 聊天ID
+
+        Returns:
+            {handler_name: {conversation_key, ...}}
+        """
+        owners = [("user", user_id)]
+        if chat_id is not None:
+            owners.append(("chat", chat_id))
+
+        result: dict[str, set[tuple]] = {}
+        for owner in owners:
+            for name, keys in cls._conversation_index.get(owner, {}).items():
+                result.setdefault(name, set()).update(keys)
+
+        for name in cls._unindexed_handlers:
+            handler = cls._registered_handlers.get(name)
+            if handler is None:
+                continue
+            keys = {key for key in list(handler._conversations) if cls._key_owner(handler, key) in owners}
+            if keys:
+                result.setdefault(name, set()).update(keys)
+        return result
+
     @classmethod
     def clear_all_for_user(cls, user_id: int, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
@@ -110,59 +189,53 @@ class ConversationTracker:
         elif hasattr(context, "chat_data") and context._chat_id_and_data:
             chat_id = context._chat_id_and_data[0]
 
-        # 清除所有已注册 ConversationHandler 的内部状态
-        for handler_name, handler in cls._registered_handlers.items():
-            cls._clear_handler_internal_state(handler, user_id, chat_id, handler_name)
+        # 清除该用户在各 ConversationHandler 中的内部状态（只访问索引中属于该用户的对话键）
+        for handler_name, keys in cls.get_user_conversations(user_id, chat_id).items():
+            handler = cls._registered_handlers.get(handler_name)
+            if handler is None:
+                continue
+            for key in keys:
+                if handler._conversations.pop(key, None) is not None:
+                    logger.debug(f"清除 {handler_name} 的内部对话状态: key={key}")
+        cls._conversation_index.pop(("user", user_id), None)
+        if chat_id is not None:
+            cls._conversation_index.pop(("chat", chat_id), None)
 
         # 清理 context.user_data 中的对话相关数据
         NavigationManager._cleanup_conversation_data(context)
 
-    @classmethod
-    def _clear_handler_internal_state(
-        cls, handler: ConversationHandler, user_id: int, chat_id: int | None, handler_name: str
-    ) -> None:
+    @staticmethod
+    def _key_owner(handler: ConversationHandler, key: tuple) -> tuple[str, int | str] | None:
         """
-        清除单个 ConversationHandler 的内部对话状态
+        对话键所属的用户或聊天
 
-        Args:
-            handler: ConversationHandler 实例
-            user_id: 用户ID
-            chat_id: 聊天ID
-            handler_name: 处理器名称（用于日志）
+        对话键依次由 chat_id、user_id、message_id 中启用的部分组成
         """
-        if not hasattr(handler, "_conversations"):
-            return
+        if not isinstance(key, tuple):
+            return None
+        if handler.per_user:
+            index = 1 if handler.per_chat else 0
+            return ("user", key[index]) if len(key) > index else None
+        if handler.per_chat and key:
+            return ("chat", key[0])
+        return None
+
 
-        # ConversationHandler 使用不同的键格式，取决于 per_chat 和 per_user 设置
-        # 常见格式: (chat_id, user_id) 或 chat_id 或 user_id
-        keys_to_remove = []
-
-        for key in list(handler._conversations.keys()):
-            should_remove = False
-
-            if isinstance(key, tuple):
-                # 格式: (chat_id, user_id) - 最常见
-                if len(key) == 2:
-                    key_chat_id, key_user_id = key
-                    if key_user_id == user_id:
-                        should_remove = True
-                # 格式: (chat_id,) 或其他元组
-                elif len(key) >= 1 and chat_id is not None and key[0] == chat_id:
-                    should_remove = True
-            elif key == user_id:
-                # 格式: 直接是 user_id
-                should_remove = True
-            elif chat_id is not None and key == chat_id:
-                # 格式: 直接是 chat_id
-                should_remove = True
-
-            if should_remove:
-                keys_to_remove.append(key)
-
-        # 删除找到的键
-        for key in keys_to_remove:
-            del handler._conversations[key]
-            logger.debug(f"清除 {handler_name} 的内部对话状态: key={key}")
+class TrackedConversationHandler(ConversationHandler):
+    """对话状态变化时同步更新 ConversationTracker 的对话键索引"""
+
+    __slots__ = ()
+
+    def _update_state(self, new_state: object, key: tuple, handler: BaseHandler | None = None) -> None:
+        super()._update_state(new_state, key, handler)
+        ConversationTracker.track_key(self, key, key in self._conversations)
+
+    async def _initialize_persistence(self, application: Application) -> dict:
+        # 启动时从持久化恢复的对话不经过 _update_state
+        conversations = await super()._initialize_persistence(application)
+        for key in list(self._conversations):
+            ConversationTracker.track_key(self, key, True)
+        return conversations
 
 
 class SafeConversationHandler:
@@ -211,6 +284,10 @@ class SafeConversationHandler:
         Returns:
             配置好的ConversationHandler
         """
+        # 启用状态持久化时，具名对话的状态保存到 Redis（未命名的处理器无法区分，保持进程内）
+        from src.config import settings
+
+        persistent = settings.bot_persistence_enabled and name is not None
         name = name or "unnamed"
         logger.info(f"创建安全对话处理器: {name}")
 
@@ -223,8 +300,8 @@ class SafeConversationHandler:
         # 构建安全的fallbacks
         safe_fallbacks = cls._build_safe_fallbacks(fallbacks, name)
 
-        # 创建ConversationHandler
-        handler = ConversationHandler(
+        # 创建ConversationHandler（维护对话键索引）
+        handler = TrackedConversationHandler(
             entry_points=wrapped_entry_points,
             states=wrapped_states,
             fallbacks=safe_fallbacks,
@@ -234,6 +311,7 @@ class SafeConversationHandler:
             per_chat=per_chat,
             per_user=per_user,
             conversation_timeout=conversation_timeout,
+            persistent=persistent,
         )
 
         # 注册处理器到追踪器
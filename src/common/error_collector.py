@@ -3,7 +3,7 @@
 用于收集和分析生产环境中的错误
 
 改进：
-- 启动时自动从文件加载历史错误
+- 首次使用时（或启动钩子中）从文件加载历史错误，导入模块时不读文件
 - 每次收集错误后异步写入文件（防止进程重启丢失数据）
 - 使用线程池执行文件IO，避免阻塞主线程
 """
@@ -32,6 +32,7 @@ class ErrorCollector:
         auto_save_interval: int = 60,
         filename: str = "error_log.json",
         auto_load: bool = True,
+        log_dir: str | Path = "logs",
     ):
         """
         初始化错误收集器
@@ -40,7 +41,8 @@ class ErrorCollector:
             max_errors: 最大保存错误数
             auto_save_interval: 自动保存间隔（秒），默认60秒
             filename: 持久化文件名
-            auto_load: 是否启动时自动加载历史数据
+            auto_load: 是否在构造时立即加载历史数据（否则首次使用时加载）
+            log_dir: 持久化目录（构造时解析为绝对路径，之后切换工作目录不影响读写位置）
         """
         self.errors: list[dict[str, Any]] = []
         self.max_errors = max_errors
@@ -48,17 +50,28 @@ class ErrorCollector:
         self.error_counts = defaultdict(int)  # 错误类型计数
         self.last_save_time = datetime.now()
         self.filename = filename
+        self.log_dir = Path(log_dir).resolve()
         self._dirty = False  # 是否有未保存的更改
         self._lock = threading.Lock()  # 线程安全锁
         self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="error_collector")
+        self._loaded = False
+        self._load_lock = threading.RLock()  # 加载期间收集错误的线程在此等待加载完成
 
         # 启动时自动加载历史数据
         if auto_load:
-            self.load_from_file(filename)
+            self.ensure_loaded()
 
         # 注册退出时保存
         atexit.register(self._save_on_exit)
 
+    def ensure_loaded(self) -> None:
+        """加载历史错误（仅第一次调用时读取文件）"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load_from_file(self.filename)
+
     def _save_on_exit(self):
         """进程退出时同步保存数据"""
         if self._dirty:
@@ -98,6 +111,8 @@ class ErrorCollector:
             "message": message,
             "context": context or {},
         }
+        # 先加载历史错误，避免之后加载时覆盖本次收集的错误
+        self.ensure_loaded()
 
         # 如果有异常对象，记录堆栈
         if exception:
@@ -133,6 +148,7 @@ class ErrorCollector:
         Returns:
             错误摘要信息
         """
+        self.ensure_loaded()
         if not self.errors:
             return {"total": 0, "types": {}, "recent": [], "status": "healthy"}
 
@@ -186,6 +202,7 @@ class ErrorCollector:
         Returns:
             错误列表
         """
+        self.ensure_loaded()
         return [error for error in self.errors if error["type"] == error_type]
 
     def get_errors_in_timerange(self, hours: int = 1) -> list[dict[str, Any]]:
@@ -198,6 +215,7 @@ class ErrorCollector:
         Returns:
             错误列表
         """
+        self.ensure_loaded()
         cutoff_time = datetime.now() - timedelta(hours=hours)
 
         return [error for error in self.errors if datetime.fromisoformat(error["timestamp"]) > cutoff_time]
@@ -212,6 +230,7 @@ class ErrorCollector:
         Returns:
             清理的错误数
         """
+        self.ensure_loaded()
         cutoff_time = datetime.now() - timedelta(days=days)
         original_count = len(self.errors)
 
@@ -235,8 +254,8 @@ class ErrorCollector:
         """
         try:
             # 创建logs目录
-            log_dir = Path("logs")
-            log_dir.mkdir(exist_ok=True)
+            log_dir = self.log_dir
+            log_dir.mkdir(parents=True, exist_ok=True)
 
             # 复制数据（避免锁定太久）
             with self._lock:
@@ -287,9 +306,18 @@ class ErrorCollector:
         Returns:
             是否成功
         """
+        # 持有加载锁：加载期间的 collect() 在 ensure_loaded() 中等待，不会被历史数据覆盖
+        with self._load_lock:
+            try:
+                return self._load_from_file(filename)
+            finally:
+                # 数据替换完成后才标记已加载（显式加载后不再由 ensure_loaded() 重复加载）
+                self._loaded = True
+
+    def _load_from_file(self, filename: str | None) -> bool:
         try:
             target_file = filename or self.filename
-            filepath = Path("logs") / target_file
+            filepath = self.log_dir / target_file
             if not filepath.exists():
                 logger.debug(f"Error log file not found: {filepath}")
                 return False
@@ -321,8 +349,8 @@ class ErrorCollector:
             return False
 
 
-# 全局错误收集器实例
-error_collector = ErrorCollector()
+# 全局错误收集器实例（历史错误在启动钩子或首次使用时加载）
+error_collector = ErrorCollector(auto_load=False)
 
 
 def collect_error(
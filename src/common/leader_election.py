@@ -0,0 +1,318 @@
+"""
+多实例领导者选举
+
+订单过期、汇率刷新、能量同步等定时任务与 TRX 支付监听在每个进程中都会启动，部署多个 Bot 实例时
+会重复发放 TRX、重复发送过期通知、重复调用第三方接口。LeaderElector 基于 Redis 租约选出唯一的
+领导者实例，只有领导者运行这些单例任务：
+- 获取：INCR 生成单调递增的 fencing token，再 SET NX PX 写入「持有者|token」
+- 续约：每 renew_interval 秒检查持有者仍为自己后延长租约（WATCH/MULTI，不依赖 Lua）
+- 失联：续约失败且本地租约到期前主动退位，其他实例最多在一个租约周期内接管
+- 退出：正常停止时删除租约，其他实例在下一次轮询时立即接管
+- 防护：发放资金等不可重复的操作前调用 verify()，确认 Redis 中的 token 仍是自己的
+
+未开启选举（单实例部署）时当前进程始终是领导者，与之前的行为一致。
+开启选举后 Redis 不可用时所有实例都不会成为领导者（宁可暂停单例任务，也不重复执行）。
+"""
+
+import asyncio
+import contextlib
+import functools
+import logging
+import os
+import socket
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# 本地判断租约到期时预留的安全余量（秒），抵消时钟漂移与网络延迟
+LEASE_SAFETY_MARGIN = 1.0
+
+Listener = Callable[[], Awaitable[object]]
+
+
+class LeaderElector:
+    """基于 Redis 租约与 fencing token 的领导者选举"""
+
+    def __init__(
+        self,
+        name: str,
+        instance: str = "primary",
+        lease_seconds: float = 15.0,
+        renew_interval: float = 5.0,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            name: 选举名称（同名的实例竞争同一个租约）
+            instance: 实例名（用于状态展示，持有者标识另含主机名与进程号）
+            lease_seconds: 租约时长（秒），领导者失联后最多经过该时长由其他实例接管
+            renew_interval: 续约/竞选间隔（秒），应明显小于 lease_seconds
+            enabled: 是否开启选举；关闭时始终为领导者
+        """
+        self.name = name
+        self.lease_key = f"leader:{name}"
+        self.token_key = f"leader:{name}:fencing"
+        self.instance = instance
+        self.holder_id = f"{instance}:{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.renew_interval = renew_interval
+        self.enabled = enabled
+        self.redis_client = None
+        self._is_leader = False
+        self._token: int | None = None
+        self._lease_deadline = 0.0
+        self._acquired_at: float | None = None
+        self._transitions = 0
+        self._listeners: list[tuple[Listener | None, Listener | None]] = []
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        """当前是否为领导者（本地租约未到期）"""
+        if not self.enabled:
+            return True
+        return self._is_leader and time.monotonic() < self._lease_deadline
+
+    @property
+    def fencing_token(self) -> int | None:
+        """获得领导权时分配的 fencing token（未开启选举或非领导者时为 None）"""
+        return self._token if self.is_leader else None
+
+    def add_listener(self, on_acquire: Listener | None = None, on_release: Listener | None = None) -> None:
+        """注册领导权变化回调（成为领导者时启动单例任务，失去时停止）"""
+        self._listeners.append((on_acquire, on_release))
+
+    async def start(self) -> None:
+        """开始竞选（重复调用无副作用）"""
+        if not self.enabled:
+            if not self._is_leader:
+                await self._become_leader(None)
+            return
+        if self._task is None or self._task.done():
+            await self._campaign()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止竞选并释放租约，其他实例可以立即接管"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+
+        was_leader = self._is_leader
+        token = self._token
+        await self._step_down("实例停止")
+        if self.enabled and was_leader:
+            await self._release(token)
+
+    async def verify(self) -> bool:
+        """
+        不可重复的操作（如发放 TRX）前确认仍持有租约
+
+        Returns:
+            Redis 中的持有者与 fencing token 仍是自己时为 True（未开启选举时始终为 True）
+        """
+        if not self.enabled:
+            return True
+        if not self.is_leader:
+            return False
+        client = self._get_client()
+        if client is None:
+            return False
+        try:
+            value = await client.get(self.lease_key)
+        except Exception as e:
+            logger.warning(f"校验领导权失败 ({self.name}): {e}")
+            return False
+        if value != self._lease_value(self._token):
+            await self._step_down("租约已被其他实例持有")
+            return False
+        return True
+
+    def leader_only(self, func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """包装定时任务：仅在领导者实例上执行"""
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not self.is_leader:
+                logger.debug(f"非领导者实例，跳过任务 {getattr(func, '__name__', func)}")
+                return None
+            return await func(*args, **kwargs)
+
+        return wrapper
+
+    def status(self) -> dict[str, Any]:
+        is_leader = self.is_leader
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "instance": self.instance,
+            "holder_id": self.holder_id,
+            "is_leader": is_leader,
+            "fencing_token": self._token if is_leader else None,
+            "lease_seconds": self.lease_seconds,
+            "lease_remaining": round(max(0.0, self._lease_deadline - time.monotonic()), 3)
+            if is_leader and self.enabled
+            else None,
+            "leader_since": self._acquired_at if is_leader else None,
+            "transitions": self._transitions,
+        }
+
+    # ==================== 内部方法 ====================
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            try:
+                await self._campaign()
+            except Exception as e:
+                logger.error(f"领导者选举异常 ({self.name}): {e}", exc_info=True)
+
+    async def _campaign(self) -> None:
+        """领导者续约，跟随者尝试获取"""
+        if self._is_leader:
+            if await self._renew():
+                return
+            if time.monotonic() >= self._lease_deadline:
+                await self._step_down("续约失败，租约已到期")
+            return
+        token = await self._try_acquire()
+        if token is not None:
+            await self._become_leader(token)
+
+    async def _try_acquire(self) -> int | None:
+        client = self._get_client()
+        if client is None:
+            return None
+        try:
+            if await client.exists(self.lease_key):
+                return None
+            token = int(await client.incr(self.token_key))
+            requested_at = time.monotonic()
+            acquired = await client.set(
+                self.lease_key, self._lease_value(token), nx=True, px=int(self.lease_seconds * 1000)
+            )
+        except Exception as e:
+            logger.debug(f"竞选领导者失败 ({self.name}): {e}")
+            return None
+        if not acquired:
+            return None
+        self._lease_deadline = requested_at + self.lease_seconds - LEASE_SAFETY_MARGIN
+        return token
+
+    async def _renew(self) -> bool:
+        """延长租约；租约已被其他实例持有时立即退位"""
+        client = self._get_client()
+        if client is None:
+            return False
+        from redis.exceptions import WatchError
+
+        expected = self._lease_value(self._token)
+        requested_at = time.monotonic()
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                await pipe.watch(self.lease_key)
+                lost = await pipe.get(self.lease_key) != expected
+                if lost:
+                    await pipe.unwatch()
+                else:
+                    pipe.multi()
+                    pipe.pexpire(self.lease_key, int(self.lease_seconds * 1000))
+                    await pipe.execute()
+        except WatchError:
+            # 续约期间租约被改动：下一轮按实际持有者判断
+            return False
+        except Exception as e:
+            logger.warning(f"领导者续约失败 ({self.name}): {e}")
+            return False
+        if lost:
+            await self._step_down("租约已被其他实例持有")
+            return False
+        self._lease_deadline = requested_at + self.lease_seconds - LEASE_SAFETY_MARGIN
+        return True
+
+    async def _release(self, token: int | None) -> None:
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                await pipe.watch(self.lease_key)
+                if await pipe.get(self.lease_key) != self._lease_value(token):
+                    await pipe.unwatch()
+                    return
+                pipe.multi()
+                pipe.delete(self.lease_key)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"释放领导者租约失败 ({self.name})，等待租约自然过期: {e}")
+
+    async def _become_leader(self, token: int | None) -> None:
+        self._is_leader = True
+        self._token = token
+        self._acquired_at = time.time()
+        self._transitions += 1
+        if not self.enabled:
+            self._lease_deadline = float("inf")
+        else:
+            logger.info(f"👑 成为领导者 ({self.name})，实例 {self.holder_id}，fencing token {token}")
+        for on_acquire, _ in self._listeners:
+            if on_acquire is not None:
+                try:
+                    await on_acquire()
+                except Exception as e:
+                    logger.error(f"领导者启动回调失败 ({self.name}): {e}", exc_info=True)
+
+    async def _step_down(self, reason: str) -> None:
+        if not self._is_leader:
+            return
+        self._is_leader = False
+        self._lease_deadline = 0.0
+        self._acquired_at = None
+        self._transitions += 1
+        if self.enabled:
+            logger.warning(f"失去领导权 ({self.name})：{reason}")
+        for _, on_release in reversed(self._listeners):
+            if on_release is not None:
+                try:
+                    await on_release()
+                except Exception as e:
+                    logger.error(f"领导者停止回调失败 ({self.name}): {e}", exc_info=True)
+
+    def _lease_value(self, token: int | None) -> str:
+        return f"{self.holder_id}|{token}"
+
+    def _get_client(self):
+        if self.redis_client is None:
+            try:
+                from src.common.redis_helper import create_redis_client
+
+                self.redis_client = create_redis_client(decode_responses=True)
+            except Exception as e:
+                logger.warning(f"领导者选举无法连接 Redis ({self.name}): {e}")
+                return None
+        return self.redis_client
+
+
+_leader_elector: LeaderElector | None = None
+
+
+def get_leader_elector() -> LeaderElector:
+    """获取单例后台任务（支付监听、订单过期、汇率刷新、能量同步）的领导者选举"""
+    global _leader_elector
+    if _leader_elector is None:
+        _leader_elector = LeaderElector(
+            f"{settings.bot_token.split(':', 1)[0]}:jobs",
+            instance=settings.bot_instance_name,
+            lease_seconds=settings.leader_lease_secs,
+            renew_interval=settings.leader_renew_secs,
+            enabled=settings.leader_election_enabled,
+        )
+    return _leader_elector
@@ -0,0 +1,286 @@
+"""
+限流器
+
+- TokenBucketLimiter: 令牌桶，Redis 可用时使用 Lua 脚本原子地完成「补充令牌 + 扣减」，多实例共享同一个桶
+- GCRALimiter: 通用信元速率算法（GCRA），每个客户端只保存一个时间戳，一次 Lua 调用完成检查与更新
+- Redis 不可用时均退化为进程内实现，并在一段时间内不再尝试 Redis，避免每次检查都等待连接超时
+- 检查本身不访问数据库，不阻塞事件循环
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: 桶 key
+# ARGV: capacity, refill_per_second, now, cost（0 表示只查看不扣减）
+# 返回: {allowed(0/1), retry_after(秒，字符串以保留小数)}
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1])
+local ts = tonumber(data[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local needed = math.max(cost, 1)
+if tokens >= needed then
+    if cost > 0 then
+        tokens = tokens - cost
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+        redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    end
+    return {1, '0'}
+end
+
+return {0, tostring((needed - tokens) / rate)}
+"""
+
+# Redis 失败后多久内直接使用进程内令牌桶（秒）
+REDIS_RETRY_INTERVAL = 30.0
+
+
+class TokenBucketLimiter:
+    """
+    令牌桶限流器
+
+    capacity 为突发容量，refill_per_second 为每秒补充的令牌数；
+    两者均可在调用时覆盖（用于运行时可调整的限频配置）。
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_second: float,
+        prefix: str = "token_bucket:",
+        use_redis: bool = True,
+        max_local_keys: int = 10000,
+    ):
+        if capacity <= 0 or refill_per_second <= 0:
+            raise ValueError("capacity and refill_per_second must be positive")
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.prefix = prefix
+        self.use_redis = use_redis
+        self.max_local_keys = max_local_keys
+        self.redis_client = None
+        self._script = None
+        self._redis_disabled_until = 0.0
+        # key -> (tokens, 上次更新时间)
+        self._local: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def acquire(
+        self, key: str, cost: float = 1, capacity: float | None = None, refill_per_second: float | None = None
+    ) -> tuple[bool, float]:
+        """
+        尝试扣减令牌
+
+        Returns:
+            (是否允许, 需要等待的秒数)
+        """
+        return await self._check(key, cost, capacity or self.capacity, refill_per_second or self.refill_per_second)
+
+    async def peek(
+        self, key: str, capacity: float | None = None, refill_per_second: float | None = None
+    ) -> tuple[bool, float]:
+        """查看是否还有令牌（不扣减）"""
+        return await self._check(key, 0, capacity or self.capacity, refill_per_second or self.refill_per_second)
+
+    def reset(self) -> None:
+        """清空进程内令牌桶"""
+        self._local.clear()
+
+    async def _check(self, key: str, cost: float, capacity: float, rate: float) -> tuple[bool, float]:
+        now = time.time()
+        if self.use_redis and now >= self._redis_disabled_until:
+            try:
+                return await self._check_redis(key, cost, capacity, rate, now)
+            except Exception as e:
+                self._redis_disabled_until = now + REDIS_RETRY_INTERVAL
+                logger.warning(f"Redis 令牌桶不可用，{REDIS_RETRY_INTERVAL:.0f}s 内使用进程内限流: {e}")
+        return self._check_local(key, cost, capacity, rate, now)
+
+    async def _check_redis(self, key: str, cost: float, capacity: float, rate: float, now: float) -> tuple[bool, float]:
+        if self.redis_client is None:
+            from .redis_helper import create_redis_client
+
+            self.redis_client = create_redis_client(decode_responses=True)
+        if self._script is None:
+            self._script = self.redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+        allowed, retry_after = await self._script(keys=[f"{self.prefix}{key}"], args=[capacity, rate, now, cost])
+        return bool(int(allowed)), float(retry_after)
+
+    def _check_local(self, key: str, cost: float, capacity: float, rate: float, now: float) -> tuple[bool, float]:
+        tokens, ts = self._local.get(key, (capacity, now))
+        tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+
+        needed = max(cost, 1)
+        if tokens < needed:
+            return False, (needed - tokens) / rate
+
+        if cost > 0:
+            self._local[key] = (tokens - cost, now)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local_keys:
+                self._local.popitem(last=False)
+        return True, 0.0
+
+
+# KEYS[1]: 客户端 key（值为理论到达时间 TAT，秒）
+# ARGV: now, emission_interval（period / limit）, period（突发容量对应的时间）
+# 返回: {allowed(0/1), remaining, retry_after, reset_after}（小数以字符串返回）
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if tat == nil or tat < now then
+    tat = now
+end
+
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if allow_at > now then
+    return {0, 0, tostring(allow_at - now), tostring(tat - now)}
+end
+
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, math.floor((now - allow_at) / interval + 1e-9), '0', tostring(new_tat - now)}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    """限流检查结果"""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # 被拒绝时需要等待的秒数
+    reset_after: float  # 额度完全恢复所需的秒数
+
+
+class GCRALimiter:
+    """
+    GCRA 限流器（等价于容量为 limit、每 period 秒补满的令牌桶）
+
+    每个客户端只在 Redis 中保存一个理论到达时间，被拒绝的请求不写入任何数据。
+    TAT 只会向后推进，因此被拒绝时返回的等待时间在任何实例上都成立：
+    开启 local_precheck 后，等待期内的请求直接在本进程拒绝，不再访问 Redis。
+    """
+
+    def __init__(
+        self,
+        prefix: str = "gcra:",
+        use_redis: bool = True,
+        local_precheck: bool = True,
+        local_fallback: bool = True,
+        max_local_keys: int = 10000,
+    ):
+        """
+        Args:
+            local_precheck: 被拒绝的客户端在等待期内直接本地拒绝
+            local_fallback: Redis 不可用时使用进程内 GCRA；为 False 时抛出异常由调用方决定降级策略
+        """
+        self.prefix = prefix
+        self.use_redis = use_redis
+        self.local_precheck = local_precheck
+        self.local_fallback = local_fallback
+        self.max_local_keys = max_local_keys
+        self.redis_client = None
+        self._script = None
+        self._redis_disabled_until = 0.0
+        # key -> TAT（进程内降级使用）
+        self._local: OrderedDict[str, float] = OrderedDict()
+        # key -> 拒绝截止时间（本地预检查）
+        self._blocked: OrderedDict[str, float] = OrderedDict()
+
+    async def acquire(self, key: str, limit: int, period: float) -> RateLimitResult:
+        """
+        记录一次请求
+
+        Args:
+            key: 客户端标识
+            limit: period 秒内最多请求数
+            period: 时间窗口（秒）
+        """
+        if limit <= 0 or period <= 0:
+            raise ValueError("limit and period must be positive")
+
+        now = time.time()
+        if self.local_precheck:
+            blocked_until = self._blocked.get(key)
+            if blocked_until is not None:
+                if now < blocked_until:
+                    return RateLimitResult(False, limit, 0, blocked_until - now, blocked_until - now + period)
+                del self._blocked[key]
+
+        result = None
+        if self.use_redis and now >= self._redis_disabled_until:
+            try:
+                result = await self._check_redis(key, limit, period, now)
+            except Exception as e:
+                self._redis_disabled_until = now + REDIS_RETRY_INTERVAL
+                logger.warning(f"Redis GCRA 限流不可用，{REDIS_RETRY_INTERVAL:.0f}s 内使用进程内限流: {e}")
+        if result is None:
+            if self.use_redis and not self.local_fallback:
+                raise ConnectionError("Redis rate limiter unavailable")
+            result = self._check_local(key, limit, period, now)
+
+        if not result.allowed and self.local_precheck:
+            self._remember(self._blocked, key, now + result.retry_after)
+        return result
+
+    def reset(self) -> None:
+        """清空进程内状态"""
+        self._local.clear()
+        self._blocked.clear()
+
+    async def _check_redis(self, key: str, limit: int, period: float, now: float) -> RateLimitResult:
+        if self.redis_client is None:
+            from .redis_helper import create_redis_client
+
+            self.redis_client = create_redis_client(decode_responses=True)
+        if self._script is None:
+            self._script = self.redis_client.register_script(GCRA_SCRIPT)
+
+        allowed, remaining, retry_after, reset_after = await self._script(
+            keys=[f"{self.prefix}{key}"], args=[now, period / limit, period]
+        )
+        return RateLimitResult(bool(int(allowed)), limit, int(remaining), float(retry_after), float(reset_after))
+
+    def _check_local(self, key: str, limit: int, period: float, now: float) -> RateLimitResult:
+        interval = period / limit
+        tat = max(self._local.get(key, now), now)
+
+        new_tat = tat + interval
+        allow_at = new_tat - period
+        if allow_at > now:
+            return RateLimitResult(False, limit, 0, allow_at - now, tat - now)
+
+        self._remember(self._local, key, new_tat)
+        return RateLimitResult(True, limit, math.floor((now - allow_at) / interval + 1e-9), 0.0, new_tat - now)
+
+    def _remember(self, store: OrderedDict, key: str, value: float) -> None:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_local_keys:
+            store.popitem(last=False)
+
+
+def retry_after_minutes(seconds: float) -> int:
+    """将等待秒数换算为向上取整的分钟数（至少 1 分钟）"""
+    return max(1, math.ceil(seconds / 60))
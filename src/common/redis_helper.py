@@ -105,6 +105,27 @@ def create_redis_client(decode_responses: bool = True) -> redis.Redis:
     return client
 
 
+def create_sync_redis_client(decode_responses: bool = True, socket_timeout: float = 1.0):
+    """
+    创建同步 Redis 客户端
+
+    供无法 await 的同步代码路径使用（如在数据库会话中发布缓存失效）。
+    超时较短且不重试，调用方需自行处理失败并降级。
+    """
+    import redis as redis_sync
+
+    kwargs = get_redis_kwargs(decode_responses)
+    kwargs.pop("retry", None)
+    kwargs.pop("retry_on_timeout", None)
+    kwargs["socket_timeout"] = socket_timeout
+    kwargs["socket_connect_timeout"] = socket_timeout
+
+    if "url" in kwargs:
+        url = kwargs.pop("url")
+        return redis_sync.Redis.from_url(url, **kwargs)
+    return redis_sync.Redis(**kwargs)
+
+
 async def check_redis_connection() -> bool:
     """
     检查 Redis 连接是否可用
@@ -0,0 +1,120 @@
+"""
+Stale-While-Revalidate 异步缓存
+
+用于包装上游接口调用（能量价格、账户信息等）：
+- 缓存新鲜时直接返回
+- 缓存过期但未超过最大陈旧时间时，立即返回旧值并在后台刷新
+- 无缓存或过于陈旧时等待刷新
+- 同一时刻只有一个刷新请求在途（single-flight），并发调用共享结果
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class CachedValue(Generic[T]):
+    """缓存结果及其元数据"""
+
+    value: T
+    fetched_at: float
+    stale: bool = False
+
+    @property
+    def age(self) -> float:
+        """缓存年龄（秒）"""
+        return max(0.0, time.time() - self.fetched_at)
+
+
+class SWRCache(Generic[T]):
+    """Stale-While-Revalidate 缓存（单值）"""
+
+    def __init__(
+        self,
+        loader: Callable[[], Awaitable[T]],
+        ttl: float,
+        max_stale: float | None = None,
+        name: str = "swr_cache",
+    ):
+        """
+        Args:
+            loader: 加载数据的协程函数
+            ttl: 新鲜期（秒），超过后触发后台刷新
+            max_stale: 最大陈旧时间（秒），超过后必须同步等待刷新；默认 ttl 的 10 倍
+            name: 缓存名称（用于日志）
+        """
+        self._loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale if max_stale is not None else ttl * 10
+        self.name = name
+        self._cached: CachedValue[T] | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    async def get(self) -> CachedValue[T]:
+        """
+        获取缓存值
+
+        Raises:
+            首次加载（或缓存过于陈旧时）刷新失败的异常
+        """
+        cached = self._cached
+        if cached is not None:
+            age = cached.age
+            if age < self.ttl:
+                return cached
+            if age < self.max_stale:
+                self._ensure_refresh()
+                return CachedValue(cached.value, cached.fetched_at, stale=True)
+
+        try:
+            return await asyncio.shield(self._ensure_refresh())
+        except Exception:
+            if cached is not None:
+                # 刷新失败时宁可返回陈旧数据也不报错
+                logger.warning(f"{self.name} 刷新失败，返回陈旧缓存 (age={cached.age:.0f}s)")
+                return CachedValue(cached.value, cached.fetched_at, stale=True)
+            raise
+
+    def invalidate(self) -> None:
+        """清空缓存（下次访问时重新加载）"""
+        self._cached = None
+
+    def stats(self) -> dict[str, Any]:
+        """缓存状态"""
+        return {
+            "name": self.name,
+            "cached": self._cached is not None,
+            "age": round(self._cached.age, 3) if self._cached else None,
+            "ttl": self.ttl,
+            "refreshing": self._refresh_task is not None and not self._refresh_task.done(),
+        }
+
+    def _ensure_refresh(self) -> asyncio.Task:
+        """启动刷新任务（已有在途刷新时复用）"""
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._refresh())
+            # 后台刷新无人等待时也要取走异常，避免 "exception was never retrieved"
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._refresh_task = task
+        return task
+
+    async def _refresh(self) -> CachedValue[T]:
+        """调用 loader 并更新缓存"""
+        try:
+            value = await self._loader()
+        except Exception as e:
+            logger.warning(f"{self.name} 刷新失败: {e}")
+            raise
+        self._cached = CachedValue(value, time.time())
+        logger.debug(f"{self.name} 已刷新")
+        return self._cached
@@ -0,0 +1,97 @@
+"""
+Bot API 请求连接池
+
+长轮询 getUpdates 与普通 API 调用（发消息、编辑消息、赠送、后台通知）使用各自的 HTTPXRequest，
+互不争抢连接。InstrumentedHTTPXRequest 在进入 httpx 连接池前用同等大小的信号量排队，
+从而可以统计连接池等待时间；等待超过 pool_timeout 时与 PTB 一样抛出 TimedOut。
+"""
+
+import asyncio
+import time
+from typing import Any
+
+from telegram.error import TimedOut
+from telegram.request import BaseRequest, HTTPXRequest
+
+from .wait_stats import WaitTimeWindow
+
+
+# PTB 表示「未指定，使用默认值」的哨兵类型
+_DEFAULT_VALUE_TYPE = type(BaseRequest.DEFAULT_NONE)
+
+# 已创建的连接池（名称 -> 实例），用于统计接口
+_pools: dict[str, "InstrumentedHTTPXRequest"] = {}
+
+
+class InstrumentedHTTPXRequest(HTTPXRequest):
+    """统计连接池等待时间的 HTTPXRequest"""
+
+    def __init__(self, name: str, connection_pool_size: int = 1, **kwargs: Any):
+        super().__init__(connection_pool_size=connection_pool_size, **kwargs)
+        self.name = name
+        self.pool_size = connection_pool_size
+        self._slots = asyncio.Semaphore(connection_pool_size)
+        self._in_use = 0
+        self._waiting = 0
+        self._requests = 0
+        self._pool_timeouts = 0
+        self._waits = WaitTimeWindow()
+        _pools[name] = self
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data=None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ) -> tuple[int, bytes]:
+        timeout = self._client.timeout.pool if isinstance(pool_timeout, _DEFAULT_VALUE_TYPE) else pool_timeout
+
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except TimeoutError as e:
+            self._pool_timeouts += 1
+            raise TimedOut(
+                message=f"Pool timeout: all {self.pool_size} connections of the '{self.name}' pool are occupied"
+            ) from e
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - started
+        self._waits.observe(waited)
+        self._requests += 1
+        self._in_use += 1
+        try:
+            return await super().do_request(
+                url,
+                method,
+                request_data=request_data,
+                read_timeout=read_timeout,
+                write_timeout=write_timeout,
+                connect_timeout=connect_timeout,
+                pool_timeout=pool_timeout,
+            )
+        finally:
+            self._in_use -= 1
+            self._slots.release()
+
+    def stats(self) -> dict[str, Any]:
+        """连接池使用与等待统计"""
+        return {
+            "pool_size": self.pool_size,
+            "in_use": self._in_use,
+            "waiting": self._waiting,
+            "requests": self._requests,
+            "pool_timeouts": self._pool_timeouts,
+            **self._waits.snapshot(),
+        }
+
+
+def get_request_pool_stats() -> dict[str, dict[str, Any]]:
+    """所有 Bot API 连接池的统计"""
+    return {name: pool.stats() for name, pool in _pools.items()}
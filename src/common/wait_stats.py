@@ -0,0 +1,33 @@
+"""
+等待时间统计
+
+保存最近 N 次等待时长，提供平均值、P95 与最大值（毫秒），用于队列/连接池等待监控。
+"""
+
+import math
+from collections import deque
+from typing import Any
+
+
+class WaitTimeWindow:
+    """最近 N 次等待时间的滑动窗口"""
+
+    def __init__(self, size: int = 500):
+        self._waits: deque[float] = deque(maxlen=size)
+
+    def observe(self, seconds: float) -> None:
+        self._waits.append(seconds)
+
+    def reset(self) -> None:
+        self._waits.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        waits = sorted(self._waits)
+        if not waits:
+            return {"wait_avg_ms": 0.0, "wait_p95_ms": 0.0, "wait_max_ms": 0.0}
+        p95 = waits[min(len(waits) - 1, math.ceil(len(waits) * 0.95) - 1)]
+        return {
+            "wait_avg_ms": round(sum(waits) / len(waits) * 1000, 1),
+            "wait_p95_ms": round(p95 * 1000, 1),
+            "wait_max_ms": round(waits[-1] * 1000, 1),
+        }
@@ -16,7 +16,28 @@ class Settings(BaseSettings):
     bot_service_host: str = "0.0.0.0"
     bot_service_port: int = 8080
     bot_webhook_url: str = Field(default="", validation_alias="BOT_WEBHOOK_URL")
+    bot_webhook_path: str = "/telegram/webhook"  # API 服务上接收 Telegram 更新的路由
+    bot_webhook_secret_token: str = ""  # X-Telegram-Bot-Api-Secret-Token，为空时由 webhook_secret 派生
+    bot_webhook_max_connections: int = 40  # Telegram 同时推送更新的最大连接数
     bot_instance_name: str = "primary"
+    bot_concurrent_updates: int = 16  # 同时处理的更新数（同一用户的更新仍按顺序串行）
+    bot_api_pool_size: int = 32  # 普通 Bot API 调用（发消息、编辑、通知）的连接数
+    bot_api_pool_timeout: float = 10.0  # 等待空闲连接的超时（秒）
+    bot_get_updates_pool_size: int = 1  # 长轮询 getUpdates 专用连接数
+    bot_update_journal_enabled: bool = True  # 更新日志：重启后继续处理未完成的更新（替代丢弃积压）
+    bot_catchup_batch_size: int = 50  # 重启追赶时每批处理的更新数
+    bot_catchup_callback_max_age_secs: int = 30  # 超过该时长的积压按钮回调视为过期并跳过
+    bot_persistence_enabled: bool = False  # user_data/chat_data/对话状态保存到 Redis（多实例部署需开启）
+    bot_persistence_flush_secs: float = 5.0  # 状态写回 Redis 的间隔（秒）
+    bot_persistence_ttl_days: int = 30  # Redis 中闲置用户状态的保留天数
+    bot_persistence_idle_minutes: int = 60  # 闲置超过该时长的用户状态移出进程内存
+    leader_election_enabled: bool = False  # 多实例部署时开启：只有领导者实例运行支付监听与定时任务
+    leader_lease_secs: float = 15.0  # 领导者租约时长（秒），领导者失联后最多经过该时长由其他实例接管
+    leader_renew_secs: float = 5.0  # 续约/竞选间隔（秒）
+    bot_startup_step_timeout_secs: float = 15.0  # 并发启动步骤（建表、Redis、命令菜单等）各自的超时（秒）
+    bot_warmup_enabled: bool = True  # 开始接收更新前预热文案、设置、价格与汇率缓存
+    bot_warmup_timeout_secs: float = 10.0  # 每个预热项的超时（秒）
+    bot_callback_router_enabled: bool = True  # 按钮回调按 callback_data 前缀查表分发到所属模块，不再逐个正则匹配
 
     # USDT TRC20 支付
     usdt_trc20_receive_addr: str
@@ -34,31 +55,57 @@ class Settings(BaseSettings):
     # 订单设置
     order_timeout_minutes: int = 30
     base_price_decimal_places: int = 3
+    order_expiry_reconcile_minutes: int = 10  # 过期订单对账扫描间隔（定时器兜底）
 
     # TRON API (可选)
     tron_api_url: str = ""
     tron_api_key: str = ""
     tron_explorer: str = "tronscan"  # tronscan | oklink
+    tron_address_cache_ttl: int = 30  # 地址信息缓存时间（秒）
+    tron_address_negative_cache_ttl: int = 10  # 无效/未知地址的负缓存时间（秒）
+    tron_address_cache_size: int = 1024  # 进程内缓存的最大地址数
+    tron_address_cache_shared: bool = False  # 是否通过 Redis 在多实例间共享地址缓存
+    tron_api_mirrors: str = ""  # 额外的 TRON 数据源镜像，逗号分隔的 "kind=url"（kind: tronscan | trongrid）
+    tron_provider_fail_max: int = 3  # 数据源连续失败多少次后暂时摘除
+    tron_provider_probe_interval: int = 30  # 摘除的数据源多久后放行一次探测请求（秒）
+    tron_bulk_concurrency: int = 8  # 批量地址查询的并发数
+    tron_upstream_rate_per_second: float = 5.0  # 批量查询对上游的请求速率预算（次/秒）
 
     # 地址查询限频（分钟）
     address_query_rate_limit_minutes: int = 1
+    address_query_rate_burst: int = 1  # 令牌桶突发容量（冷却期内最多连续查询次数）
+    address_query_log_enabled: bool = True  # 是否后台批量记录地址查询日志
+    address_bulk_max: int = 200  # 批量地址查询单次最多地址数
 
     # HTTP 超时配置（秒）
     api_timeout_default_secs: int = 10  # 通用 API 默认超时
     okx_timeout_secs: int = 10  # OKX 汇率接口超时
+    okx_channel_deadline_secs: int = 15  # 单个 OKX 支付渠道（含重试）的整体超时
     tron_timeout_secs: int = 15  # Tron/区块链接口超时
+    tron_tx_timeout_secs: int = 5  # 地址查询中交易记录请求的超时（超时仅返回余额）
 
     # USDT 汇率看板配置
     usdt_rates_cache_ttl: int = 3600  # Redis 缓存 TTL（秒）
+    usdt_rates_refresh_minutes: int = 5  # 后台刷新汇率缓存的间隔（分钟），汇率菜单只读缓存
     usdt_rate_bank_markup: float = 0.0
     usdt_rate_alipay_markup: float = 0.001
     usdt_rate_wechat_markup: float = 0.002
 
+    # 汇率历史配置（原始采样 + 1m/1h/1d 聚合）
+    rate_history_enabled: bool = True  # 是否记录汇率历史
+    rate_history_raw_retention_days: int = 2  # 原始采样保留天数
+    rate_history_minute_retention_days: int = 7  # 分钟聚合保留天数
+    rate_history_hour_retention_days: int = 180  # 小时聚合保留天数
+    rate_history_day_retention_days: int = 0  # 日聚合保留天数，0 表示永久保留
+
     # 能量API配置
     energy_api_username: str = ""
     energy_api_password: str = ""
     energy_api_base_url: str = "https://trxno.com"
     energy_api_backup_url: str = "https://trxfast.com"
+    energy_sync_log_mode: bool = True  # 能量订单同步优先使用 /api/logs 日志对账
+    energy_price_cache_ttl: int = 60  # 能量价格缓存新鲜期（秒）
+    energy_account_cache_ttl: int = 30  # 能量账户信息缓存新鲜期（秒）
 
     # 能量代理地址（TRX直转模式）
     energy_rent_address: str = ""  # 时长能量收TRX地址
@@ -73,6 +120,7 @@ class Settings(BaseSettings):
     trx_exchange_private_key: SecretStr = SecretStr("")  # 发TRX私钥（生产环境填写）
     trx_exchange_qrcode_file_id: str = ""  # 收款二维码 Telegram file_id
     trx_exchange_default_rate: float = 3.05  # 默认汇率（1 USDT = X TRX）
+    trx_rate_cache_version_check_secs: int = 5  # 读取汇率缓存时检查跨进程版本号的最小间隔（pub/sub 断线兜底）
     trx_exchange_test_mode: bool = True  # 测试模式（不实际转账）
 
     # 免费克隆功能文案
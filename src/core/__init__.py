@@ -7,6 +7,15 @@ from .base import BaseModule
 from .formatter import MessageFormatter
 from .registry import ModuleRegistry, get_registry
 from .state_manager import ModuleStateManager
+from .update_processor import PerUserUpdateProcessor, get_update_processor
 
 
-__all__ = ["BaseModule", "MessageFormatter", "ModuleRegistry", "ModuleStateManager", "get_registry"]
+__all__ = [
+    "BaseModule",
+    "MessageFormatter",
+    "ModuleRegistry",
+    "ModuleStateManager",
+    "PerUserUpdateProcessor",
+    "get_registry",
+    "get_update_processor",
+]
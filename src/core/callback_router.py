@@ -0,0 +1,320 @@
+"""
+回调路由表
+
+每个按钮回调原本要按分组依次经过所有模块的 CallbackQueryHandler 与 ConversationHandler
+（入口、当前状态、fallbacks）逐个做正则匹配，模块和按钮越多越慢。
+
+callback_data 采用「命名空间_动作」的前缀约定（energy_type_small、orders_detail_1、admin_prices ...），
+注册中心在初始化时从各模块处理器的 pattern 中提取字面量，建立：
+- 精确表：callback_data -> 分组（^menu_support$、^(back_to_main|nav_back_to_main)$ 等）
+- 前缀表：前缀 -> 分组（^orders_、^premium_\\d+$ 等，取正则开头的字面量部分）
+
+CallbackRouter 注册在所有模块分组之前，收到回调时通过字典查表得到可能处理它的模块分组，
+只在这些分组中按 PTB 原有语义（每组第一个匹配的处理器）分发，其余模块分组直接跳过。
+查表次数只与 callback_data 的长度（最多 64 字节）有关，与模块和按钮数量无关。
+
+无法提取字面量的 pattern（无 pattern、自定义函数、忽略大小写等）所在分组作为兜底，
+每个回调仍在这些分组中走原有的正则匹配。非注册中心管理的分组照常处理。
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from typing import Any
+
+from telegram import Update
+from telegram.ext import (
+    Application,
+    ApplicationHandlerStop,
+    BaseHandler,
+    CallbackQueryHandler,
+    CommandHandler,
+    ConversationHandler,
+    InlineQueryHandler,
+    MessageHandler,
+    PrefixHandler,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# 路由处理器所在分组：在持久化预加载（PRELOAD_GROUP=-100）之后、所有模块分组（优先级 0-12）之前
+CALLBACK_ROUTER_GROUP = -1
+
+# 不会处理回调查询的处理器类型
+_NON_CALLBACK_HANDLERS = (CommandHandler, MessageHandler, PrefixHandler, InlineQueryHandler)
+
+_META_CHARS = set(".^$*+?{}[]\\|()")
+_QUANTIFIERS = set("*?{")
+
+# (字面量, 是否精确匹配)
+Route = tuple[str, bool]
+
+
+def _read_literal(pattern: str, pos: int) -> tuple[str, int]:
+    """从 pos 开始读取字面量（支持 \\. \\- 等转义），返回字面量与停止位置"""
+    chars = []
+    while pos < len(pattern):
+        char = pattern[pos]
+        if char == "\\" and pos + 1 < len(pattern) and not pattern[pos + 1].isalnum():
+            chars.append(pattern[pos + 1])
+            pos += 2
+        elif char in _META_CHARS:
+            break
+        else:
+            chars.append(char)
+            pos += 1
+    return "".join(chars), pos
+
+
+def _split_alternatives(pattern: str) -> list[str] | None:
+    """按顶层的 | 拆分；括号不匹配时返回 None"""
+    parts, depth, start, pos = [], 0, 0, 0
+    while pos < len(pattern):
+        char = pattern[pos]
+        if char == "\\":
+            pos += 2
+            continue
+        if char == "[":
+            end = pattern.find("]", pos + 2)
+            if end == -1:
+                return None
+            pos = end + 1
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                return None
+        elif char == "|" and depth == 0:
+            parts.append(pattern[start:pos])
+            start = pos + 1
+        pos += 1
+    if depth != 0:
+        return None
+    parts.append(pattern[start:])
+    return parts
+
+
+def _parse_alternative(pattern: str) -> list[Route] | None:
+    if pattern.startswith("^"):
+        pattern = pattern[1:]
+    head, pos = _read_literal(pattern, 0)
+    rest = pattern[pos:]
+
+    if rest in ("", "$", "\\Z"):
+        return [(head, rest != "")]
+    if rest[0] in _QUANTIFIERS:
+        # 最后一个字符可选：前缀不包含它
+        head = head[:-1]
+    elif rest.startswith("(") and (rest[1:2] != "?" or rest.startswith("(?:")):
+        # 字面量分组：^help_(basic|payment)$、^(energy|menu_energy)$
+        inner_start = 3 if rest.startswith("(?:") else 1
+        end = rest.find(")")
+        options = rest[inner_start:end].split("|")
+        if end != -1 and all(_read_literal(option, 0)[1] == len(option) for option in options):
+            literals = [_read_literal(option, 0)[0] for option in options]
+            after = rest[end + 1 :]
+            if after in ("$", "\\Z"):
+                return [(head + literal, True) for literal in literals]
+            if not after or after[0] not in _QUANTIFIERS:
+                return [(head + literal, False) for literal in literals]
+    if not head:
+        return None
+    return [(head, False)]
+
+
+def parse_callback_pattern(pattern: str) -> list[Route] | None:
+    """
+    从回调 pattern 中提取路由
+
+    结果可以比正则更宽（例如 ^premium_\\d+$ 提取为前缀 premium_），命中路由后仍由处理器自身的正则确认，
+    因此只要不遗漏就是正确的。
+
+    Returns:
+        (字面量, 是否精确匹配) 列表；无法提取（可能匹配任意 callback_data）时返回 None
+    """
+    alternatives = _split_alternatives(pattern)
+    if alternatives is None:
+        return None
+    routes: list[Route] = []
+    for alternative in alternatives:
+        parsed = _parse_alternative(alternative)
+        if parsed is None:
+            return None
+        routes.extend(parsed)
+    return routes
+
+
+def extract_callback_routes(handler: BaseHandler) -> list[Route] | None:
+    """
+    提取处理器可能处理的 callback_data
+
+    Returns:
+        路由列表（不处理回调的处理器为空列表）；无法确定时返回 None（作为兜底分组）
+    """
+    if isinstance(handler, _NON_CALLBACK_HANDLERS):
+        return []
+    if isinstance(handler, ConversationHandler):
+        children = [*handler.entry_points, *(h for hs in handler.states.values() for h in hs), *handler.fallbacks]
+        routes: list[Route] = []
+        for child in children:
+            child_routes = extract_callback_routes(child)
+            if child_routes is None:
+                return None
+            routes.extend(child_routes)
+        return routes
+    if isinstance(handler, CallbackQueryHandler):
+        pattern = handler.pattern
+        if isinstance(pattern, re.Pattern) and pattern.flags & ~re.UNICODE == 0:
+            return parse_callback_pattern(pattern.pattern)
+        if isinstance(pattern, str):
+            return parse_callback_pattern(pattern)
+    return None
+
+
+class CallbackRoutingTable:
+    """callback_data -> 模块分组"""
+
+    def __init__(self):
+        self.exact: dict[str, set[int]] = {}
+        self.prefixes: dict[str, set[int]] = {}
+        self.fallback_groups: set[int] = set()
+        self.group_modules: dict[int, list[str]] = {}
+        self._prefix_lengths: list[int] = []
+
+    @property
+    def groups(self) -> set[int]:
+        return set(self.group_modules)
+
+    def add_handler(self, handler: BaseHandler, group: int, module_name: str) -> None:
+        """登记一个模块处理器"""
+        modules = self.group_modules.setdefault(group, [])
+        if module_name not in modules:
+            modules.append(module_name)
+
+        routes = extract_callback_routes(handler)
+        if routes is None:
+            self.fallback_groups.add(group)
+            logger.debug(f"模块 {module_name} 的处理器 {handler} 无法建立回调路由，使用正则兜底")
+            return
+        for literal, exact in routes:
+            table = self.exact if exact else self.prefixes
+            table.setdefault(literal, set()).add(group)
+        self._prefix_lengths = sorted({len(prefix) for prefix in self.prefixes})
+
+    def lookup(self, data: str) -> set[int]:
+        """查找可能处理该 callback_data 的分组（不含兜底分组）"""
+        groups = set(self.exact.get(data, ()))
+        for length in self._prefix_lengths:
+            if length > len(data):
+                break
+            matched = self.prefixes.get(data[:length])
+            if matched:
+                groups |= matched
+        return groups
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "exact": len(self.exact),
+            "prefixes": len(self.prefixes),
+            "fallback_modules": sorted(
+                {name for group in self.fallback_groups for name in self.group_modules.get(group, [])}
+            ),
+        }
+
+
+class CallbackRouter(BaseHandler[Update, Any]):
+    """
+    回调路由处理器
+
+    check_update 查表确定需要经过的模块分组，handle_update 按 PTB 的分组语义依次分发，
+    完成后抛出 ApplicationHandlerStop，后续分组不再逐个匹配。
+    """
+
+    def __init__(self, table: CallbackRoutingTable):
+        super().__init__(self._dispatch)
+        self.table = table
+        self.routed = 0
+        self.unmatched = 0
+        self.fallback = 0
+        self.lookup_seconds = 0.0
+        self.max_lookup_seconds = 0.0
+        self.handled_by: Counter[str] = Counter()
+
+    def check_update(self, update: object) -> frozenset[int] | None:
+        if not isinstance(update, Update) or update.callback_query is None:
+            return None
+        data = update.callback_query.data
+        if not isinstance(data, str):
+            return None
+
+        start = time.perf_counter()
+        groups = self.table.lookup(data)
+        elapsed = time.perf_counter() - start
+
+        self.routed += 1
+        self.lookup_seconds += elapsed
+        self.max_lookup_seconds = max(self.max_lookup_seconds, elapsed)
+        if not groups:
+            self.unmatched += 1
+        if self.table.fallback_groups:
+            self.fallback += 1
+            groups |= self.table.fallback_groups
+        return frozenset(groups)
+
+    async def handle_update(
+        self, update: Update, application: Application, check_result: frozenset[int], context: Any
+    ) -> None:
+        routed_groups = self.table.groups
+        for group, handlers in list(application.handlers.items()):
+            # 当前分组及之前的分组已由 Application 处理
+            if group <= CALLBACK_ROUTER_GROUP:
+                continue
+            if group in routed_groups and group not in check_result:
+                continue
+            try:
+                for handler in handlers:
+                    check = handler.check_update(update)
+                    if check is None or check is False:
+                        continue
+                    if group in routed_groups:
+                        self.handled_by.update(self.table.group_modules[group])
+                    coroutine = handler.handle_update(update, application, check, context)
+                    if self._is_blocking(handler, application):
+                        await coroutine
+                    else:
+                        application.create_task(coroutine, update=update, name=f"CallbackRouter:{handler}")
+                    break
+            except ApplicationHandlerStop:
+                break
+            except Exception as exc:
+                if await application.process_error(update=update, error=exc):
+                    break
+        raise ApplicationHandlerStop
+
+    async def _dispatch(self, update: Update, context: Any) -> None:
+        """占位回调（分发在 handle_update 中完成）"""
+
+    @staticmethod
+    def _is_blocking(handler: BaseHandler, application: Application) -> bool:
+        if handler.block is True:
+            return True
+        if not handler.block:
+            return False
+        # 未显式设置 block 时遵循 Application 的默认值
+        defaults = getattr(application.bot, "defaults", None)
+        return defaults is None or defaults.block
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.table.summary(),
+            "routed": self.routed,
+            "unmatched": self.unmatched,
+            "fallback": self.fallback,
+            "avg_lookup_us": round(self.lookup_seconds / self.routed * 1e6, 2) if self.routed else 0.0,
+            "max_lookup_us": round(self.max_lookup_seconds * 1e6, 2),
+            "handled_by": dict(self.handled_by),
+        }
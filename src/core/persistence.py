@@ -0,0 +1,327 @@
+"""
+基于 Redis 的 Bot 状态持久化
+
+user_data、chat_data 与具名 SafeConversationHandler 的对话状态保存在 Redis，重启后未完成的购买流程
+可以继续，多个实例也能共享用户状态：
+- 按需加载：启动时不加载任何用户，某用户的第一个更新到达时才读取其状态（refresh_user_data）
+- 合并写入：由 Application 每 update_interval 秒统一写回期间有变动的用户
+- 过期清理：Redis 中的用户状态闲置超过 TTL 自动过期；进程内闲置用户由 evict_idle() 定期移出内存
+Redis 不可用时退化为进程内状态（未加载成功的用户不会写回，避免覆盖 Redis 中的数据）。
+"""
+
+import json
+import logging
+import pickle
+import time
+from typing import Any
+
+from telegram import Update
+from telegram.ext import Application, BasePersistence, ContextTypes, ConversationHandler, PersistenceInput, TypeHandler
+
+from src.common.conversation_wrapper import ConversationTracker
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Redis 失败后多久内不再尝试（秒）
+REDIS_RETRY_INTERVAL = 30.0
+# 触发按需加载的处理器所在分组（早于所有业务处理器，对话处理器判断状态前完成加载）
+PRELOAD_GROUP = -100
+
+_DATA_FIELD = "data"
+
+
+class RedisPersistence(BasePersistence[dict[Any, Any], dict[Any, Any], dict[Any, Any]]):
+    """按用户懒加载、合并写入的 Redis 持久化"""
+
+    def __init__(self, bot_id: str, update_interval: float = 5.0, ttl_seconds: int = 30 * 86400):
+        """
+        Args:
+            bot_id: Bot ID（token 冒号前部分），同一 Bot 的多个实例共享状态
+            update_interval: 写回间隔（秒）
+            ttl_seconds: Redis 中闲置状态的保留时间（秒）
+        """
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, callback_data=False), update_interval=update_interval
+        )
+        self.prefix = f"tg_state:{bot_id}"
+        self.ttl_seconds = ttl_seconds
+        self.redis_client = None
+        self._loaded_users: set[int] = set()
+        self._loaded_chats: set[int] = set()
+        self._last_seen: dict[int, float] = {}
+        self._redis_disabled_until = 0.0
+
+    # ==================== 按需加载 ====================
+
+    async def get_user_data(self) -> dict[int, dict[Any, Any]]:
+        # 启动时不加载，首次访问时由 refresh_user_data 读取
+        return {}
+
+    async def get_chat_data(self) -> dict[int, dict[Any, Any]]:
+        return {}
+
+    async def get_bot_data(self) -> dict[Any, Any]:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> dict[tuple[int | str, ...], object]:
+        """启动时只加载不属于具体用户的对话，用户对话随用户状态按需加载"""
+        client = self._get_client()
+        if client is None:
+            return {}
+        try:
+            entries = await client.hgetall(self._conversation_key(name))
+        except Exception as e:
+            self._disable_redis(e)
+            return {}
+        return {tuple(json.loads(field)): pickle.loads(value) for field, value in entries.items()}
+
+    async def refresh_user_data(self, user_id: int, user_data: dict[Any, Any]) -> None:
+        """用户的更新到达：首次访问时从 Redis 读取 user_data 与对话状态"""
+        self._last_seen[user_id] = time.monotonic()
+        if user_id in self._loaded_users:
+            return
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            entries = await client.hgetall(self._user_key(user_id))
+        except Exception as e:
+            self._disable_redis(e)
+            return
+
+        conversations: dict[str, dict[tuple, object]] = {}
+        for field, value in entries.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            try:
+                if field == _DATA_FIELD:
+                    user_data.update(pickle.loads(value))
+                elif field.startswith("conv:"):
+                    name, key = field[5:].split(":", 1)
+                    conversations.setdefault(name, {})[tuple(json.loads(key))] = pickle.loads(value)
+            except Exception as e:
+                logger.warning(f"跳过无法解析的用户状态 {user_id}/{field}: {e}")
+
+        for name, states in conversations.items():
+            handler = ConversationTracker._registered_handlers.get(name)
+            if handler is None or not handler.persistent:
+                continue
+            # 不记录为写入，避免下次写回时原样写回 Redis
+            conversations_dict = handler._conversations
+            getattr(conversations_dict, "update_no_track", conversations_dict.update)(states)
+            for key in states:
+                ConversationTracker.track_key(handler, key, True)
+            ConversationTracker.set_active(user_id, name)
+
+        self._loaded_users.add(user_id)
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict[Any, Any]) -> None:
+        if chat_id in self._loaded_chats:
+            return
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            value = await client.get(self._chat_key(chat_id))
+            if value is not None:
+                chat_data.update(pickle.loads(value))
+        except Exception as e:
+            self._disable_redis(e)
+            return
+        self._loaded_chats.add(chat_id)
+
+    async def refresh_bot_data(self, bot_data: dict[Any, Any]) -> None:
+        pass
+
+    # ==================== 写回 ====================
+
+    async def update_user_data(self, user_id: int, data: dict[Any, Any]) -> None:
+        if user_id not in self._loaded_users:
+            return
+        client = self._get_client()
+        if client is None:
+            return
+        key = self._user_key(user_id)
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hset(key, _DATA_FIELD, pickle.dumps(data))
+            pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            self._disable_redis(e)
+
+    async def update_chat_data(self, chat_id: int, data: dict[Any, Any]) -> None:
+        if chat_id not in self._loaded_chats:
+            return
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            await client.set(self._chat_key(chat_id), pickle.dumps(data), ex=self.ttl_seconds)
+        except Exception as e:
+            self._disable_redis(e)
+
+    async def update_conversation(self, name: str, key: tuple[int | str, ...], new_state: object | None) -> None:
+        user_id = self._user_of(name, key)
+        if user_id is not None:
+            if user_id not in self._loaded_users:
+                return
+            redis_key, field = self._user_key(user_id), f"conv:{name}:{json.dumps(list(key))}"
+        else:
+            redis_key, field = self._conversation_key(name), json.dumps(list(key))
+
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            if new_state is None:
+                pipe.hdel(redis_key, field)
+            else:
+                pipe.hset(redis_key, field, pickle.dumps(new_state))
+            pipe.expire(redis_key, self.ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            self._disable_redis(e)
+
+    async def update_bot_data(self, data: dict[Any, Any]) -> None:
+        pass
+
+    async def update_callback_data(self, data: Any) -> None:
+        pass
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._forget_user(user_id)
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            await client.delete(self._user_key(user_id))
+        except Exception as e:
+            self._disable_redis(e)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._loaded_chats.discard(chat_id)
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            await client.delete(self._chat_key(chat_id))
+        except Exception as e:
+            self._disable_redis(e)
+
+    async def flush(self) -> None:
+        """Application 停止时最后一次写回之后调用：关闭连接"""
+        if self.redis_client is not None:
+            try:
+                await self.redis_client.aclose()
+            except Exception as e:
+                logger.debug(f"关闭持久化 Redis 连接失败: {e}")
+            self.redis_client = None
+
+    # ==================== 内存回收 ====================
+
+    async def evict_idle(self, application: Application, idle_seconds: float) -> int:
+        """
+        将闲置用户的状态移出进程内存（Redis 中保留，下次访问时重新加载）
+
+        Returns:
+            移出的用户数
+        """
+        # 先写回，保证移出的状态已落到 Redis
+        await application.update_persistence()
+
+        now = time.monotonic()
+        idle_users = [user_id for user_id, seen in self._last_seen.items() if now - seen > idle_seconds]
+        for user_id in idle_users:
+            # 直接操作底层字典，避免被记录为「删除」而清空 Redis 中的状态
+            application._user_data.pop(user_id, None)
+            # 私聊的 chat_id 与 user_id 相同
+            application._chat_data.pop(user_id, None)
+            self._loaded_chats.discard(user_id)
+            for name, keys in ConversationTracker.get_user_conversations(user_id).items():
+                handler = ConversationTracker._registered_handlers.get(name)
+                if handler is None or not handler.persistent:
+                    continue
+                conversations_dict = getattr(handler._conversations, "data", handler._conversations)
+                for key in keys:
+                    conversations_dict.pop(key, None)
+                    ConversationTracker.track_key(handler, key, False)
+            ConversationTracker.clear_active(user_id)
+            self._forget_user(user_id)
+
+        if idle_users:
+            logger.info(f"移出 {len(idle_users)} 个闲置用户的内存状态")
+        return len(idle_users)
+
+    def stats(self) -> dict[str, Any]:
+        return {"loaded_users": len(self._loaded_users), "loaded_chats": len(self._loaded_chats)}
+
+    # ==================== 内部方法 ====================
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self.prefix}:user:{user_id}"
+
+    def _chat_key(self, chat_id: int) -> str:
+        return f"{self.prefix}:chat:{chat_id}"
+
+    def _conversation_key(self, name: str) -> str:
+        return f"{self.prefix}:conv:{name}"
+
+    @staticmethod
+    def _user_of(name: str, key: tuple[int | str, ...]) -> int | None:
+        """对话 key 所属的用户（key 依次由 chat_id、user_id、message_id 中启用的部分组成）"""
+        handler: ConversationHandler | None = ConversationTracker._registered_handlers.get(name)
+        if handler is None or not handler.per_user:
+            return None
+        index = 1 if handler.per_chat else 0
+        return key[index] if len(key) > index else None
+
+    def _forget_user(self, user_id: int) -> None:
+        self._loaded_users.discard(user_id)
+        self._last_seen.pop(user_id, None)
+
+    def _get_client(self):
+        if time.monotonic() < self._redis_disabled_until:
+            return None
+        if self.redis_client is None:
+            try:
+                from src.common.redis_helper import create_redis_client
+
+                self.redis_client = create_redis_client(decode_responses=False)
+            except Exception as e:
+                self._disable_redis(e)
+                return None
+        return self.redis_client
+
+    def _disable_redis(self, error: Exception) -> None:
+        self._redis_disabled_until = time.monotonic() + REDIS_RETRY_INTERVAL
+        logger.warning(f"状态持久化无法访问 Redis，{REDIS_RETRY_INTERVAL:.0f}s 内仅使用进程内状态: {error}")
+
+
+async def _preload_state(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """空处理：匹配即触发 context.refresh_data()，在对话处理器判断状态前加载用户状态"""
+
+
+def create_preload_handler() -> TypeHandler:
+    """按需加载用户状态的处理器（注册在 PRELOAD_GROUP）"""
+    return TypeHandler(Update, _preload_state)
+
+
+_persistence: RedisPersistence | None = None
+
+
+def get_persistence() -> RedisPersistence:
+    """获取全局持久化实例"""
+    global _persistence
+    if _persistence is None:
+        _persistence = RedisPersistence(
+            settings.bot_token.split(":", 1)[0],
+            update_interval=settings.bot_persistence_flush_secs,
+            ttl_seconds=settings.bot_persistence_ttl_days * 86400,
+        )
+    return _persistence
@@ -7,7 +7,10 @@ from typing import Any
 
 from telegram.ext import Application
 
+from src.config import settings
+
 from .base import BaseModule
+from .callback_router import CALLBACK_ROUTER_GROUP, CallbackRouter, CallbackRoutingTable
 
 
 logger = logging.getLogger(__name__)
@@ -21,6 +24,7 @@ class ModuleRegistry:
         self._modules: dict[str, BaseModule] = {}
         self._module_info: dict[str, dict[str, Any]] = {}
         self._initialized = False
+        self._callback_router: CallbackRouter | None = None
 
     def register(
         self, module: BaseModule, priority: int = 5, enabled: bool = True, metadata: dict[str, Any] | None = None
@@ -110,6 +114,9 @@ class ModuleRegistry:
             logger.warning("模块已初始化，跳过重复初始化")
             return
 
+        # 按钮回调路由表（callback_data 前缀 -> 模块分组）
+        routing_table = CallbackRoutingTable()
+
         # 按优先级排序模块
         sorted_modules = sorted(self._modules.items(), key=lambda x: self._module_info[x[0]]["priority"])
 
@@ -128,6 +135,7 @@ class ModuleRegistry:
                 # 注册处理器
                 for handler in handlers:
                     app.add_handler(handler, group=priority)
+                    routing_table.add_handler(handler, priority, module_name)
                     info["handlers_count"] += 1
 
                 logger.info(f"✅ 模块 {module_name} 已初始化: {info['handlers_count']} 个处理器 (group={priority})")
@@ -136,6 +144,15 @@ class ModuleRegistry:
                 logger.error(f"❌ 初始化模块 {module_name} 失败: {e}")
                 info["enabled"] = False
 
+        if settings.bot_callback_router_enabled and routing_table.group_modules:
+            self._callback_router = CallbackRouter(routing_table)
+            app.add_handler(self._callback_router, group=CALLBACK_ROUTER_GROUP)
+            summary = routing_table.summary()
+            logger.info(
+                f"🧭 回调路由表: {summary['exact']} 个精确项, {summary['prefixes']} 个前缀, "
+                f"正则兜底模块 {summary['fallback_modules'] or '无'}"
+            )
+
         self._initialized = True
         logger.info(f"🎯 共初始化 {len([m for m in self._module_info.values() if m['enabled']])} 个模块")
 
@@ -153,6 +170,7 @@ class ModuleRegistry:
                 name: {"enabled": info["enabled"], "priority": info["priority"], "handlers": info["handlers_count"]}
                 for name, info in self._module_info.items()
             },
+            "callback_routing": self._callback_router.stats() if self._callback_router else None,
         }
 
 
@@ -0,0 +1,119 @@
+"""
+启动阶段计时、并发启动步骤与就绪状态
+
+崩溃重启后的恢复时间由启动耗时决定：
+- 导入模块时不执行 I/O，建表、读文件、连接 Redis 等改为显式的启动步骤，由 run_hooks() 并发执行，
+  每个步骤有独立的超时，慢步骤（例如网络不佳时的 setMyCommands）不会拖住整个启动
+- 每个启动阶段与步骤的耗时记录在 StartupTimer 中，启动完成后输出报告，并通过 /api/stats 查看
+- 开始接收更新时标记为就绪，编排系统通过 /api/ready 判断实例是否可以接收流量；停止时先取消就绪
+"""
+
+import asyncio
+import contextlib
+import inspect
+import logging
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """记录各启动阶段的耗时"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.finished_at: float | None = None
+        self.phases: list[dict[str, Any]] = []
+        self.ready = False
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """计时一个启动阶段（异常照常抛出，阶段记为 failed）"""
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "failed"
+            raise
+        finally:
+            self._record(name, time.perf_counter() - start, status)
+
+    async def run_hooks(
+        self, hooks: dict[str, Callable[[], Any]], timeout: float | None = None, prefix: str = "hook"
+    ) -> dict[str, bool]:
+        """
+        并发执行初始化钩子
+
+        同步函数在线程池中执行（建表、读文件等阻塞 I/O 不占用事件循环），协程函数直接等待。
+        单个钩子失败或超时只记录日志，不影响其他钩子与后续启动。
+
+        Args:
+            timeout: 每个钩子的超时（秒），None 表示不限。超时的同步钩子无法中断，会在后台线程中继续执行
+            prefix: 计时记录的名称前缀
+
+        Returns:
+            钩子名称 -> 是否成功
+        """
+
+        async def run(name: str, hook: Callable[[], Any]) -> bool:
+            start = time.perf_counter()
+            label = f"{prefix}:{name}"
+            try:
+                if inspect.iscoroutinefunction(hook):
+                    await asyncio.wait_for(hook(), timeout)
+                else:
+                    await asyncio.wait_for(asyncio.to_thread(hook), timeout)
+            except TimeoutError:
+                logger.error(f"启动步骤 {name} 超过 {timeout:.0f}s 未完成，继续启动")
+                self._record(label, time.perf_counter() - start, "timeout")
+                return False
+            except Exception as e:
+                logger.error(f"启动步骤 {name} 失败: {e}", exc_info=True)
+                self._record(label, time.perf_counter() - start, "failed")
+                return False
+            self._record(label, time.perf_counter() - start, "ok")
+            return True
+
+        results = await asyncio.gather(*(run(name, hook) for name, hook in hooks.items()))
+        return dict(zip(hooks, results, strict=True))
+
+    def finish(self) -> None:
+        """启动完成（已开始接收更新）：标记就绪，记录总耗时并输出报告"""
+        self.finished_at = time.perf_counter()
+        self.ready = True
+        lines = [f"  {p['name']:<24} {p['seconds'] * 1000:>8.1f} ms  {p['status']}" for p in self.phases]
+        logger.info(f"⏱️ 启动耗时 {self.total_seconds():.2f}s\n" + "\n".join(lines))
+
+    def set_ready(self, ready: bool) -> None:
+        """更新就绪状态（停止时先取消就绪，编排系统不再分配流量）"""
+        self.ready = ready
+
+    def total_seconds(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "finished": self.finished_at is not None,
+            "total_seconds": round(self.total_seconds(), 3),
+            "phases": list(self.phases),
+        }
+
+    def _record(self, name: str, seconds: float, status: str) -> None:
+        self.phases.append({"name": name, "seconds": round(seconds, 4), "status": status})
+
+
+_startup_timer: StartupTimer | None = None
+
+
+def get_startup_timer() -> StartupTimer:
+    """获取本进程的启动计时器（第一次调用时开始计时）"""
+    global _startup_timer
+    if _startup_timer is None:
+        _startup_timer = StartupTimer()
+    return _startup_timer
@@ -0,0 +1,321 @@
+"""
+更新日志与重启追赶
+
+长轮询在把更新放入 update_queue 后即向 Telegram 确认（下一次 getUpdates 的 offset），
+Webhook 在返回 200 后即视为已送达，进程此时崩溃或重启会丢失已确认但尚未处理完的更新。
+
+UpdateJournal 在更新入队前写入 Redis，处理完成后删除，并持久化「已处理水位」
+（该 update_id 及之前的更新全部处理完成）。重启时 catch_up_updates()：
+- 读取日志中未处理完的更新，以及 Telegram 端尚未确认的更新（从水位之后开始拉取）
+- 按配置丢弃过期的按钮回调（Telegram 只允许在点击后短时间内应答）；有积压消息的用户优先，同一用户的更新保持原有顺序
+- 按批次交给更新处理器，每批处理完再进行下一批，避免积压瞬间压垮处理器
+Redis 不可用时退化为不记录日志（与之前的行为一致）。
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from typing import Any
+
+from telegram import Update
+from telegram.error import TelegramError
+from telegram.ext import Application
+
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Redis 失败后多久内不再尝试（秒），避免每个更新都等待连接超时
+REDIS_RETRY_INTERVAL = 30.0
+# 存活时间戳写入间隔（秒），重启时据此估算停机时长
+HEARTBEAT_INTERVAL = 10.0
+# 追赶时每次 getUpdates 拉取的数量（Telegram 上限 100）
+CATCH_UP_FETCH_LIMIT = 100
+
+
+class UpdateJournal:
+    """基于 Redis 的更新日志与已处理水位"""
+
+    def __init__(self, bot_id: str, instance: str = "primary"):
+        """
+        Args:
+            bot_id: Bot ID（token 冒号前部分）
+            instance: 实例名，每个实例只重放自己未处理完的更新
+        """
+        self.pending_key = f"tg_updates:{bot_id}:{instance}:pending"
+        self.offset_key = f"tg_updates:{bot_id}:{instance}:offset"
+        self.redis_client = None
+        self._inflight: set[int] = set()
+        self._max_seen = 0
+        self._watermark = 0
+        self._redis_disabled_until = 0.0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def watermark(self) -> int:
+        """本进程已处理水位：不大于它的已接收更新全部处理完成"""
+        return self._watermark
+
+    async def record(self, update: Update) -> None:
+        """更新入队前写入日志"""
+        self.track(update.update_id)
+        client = self._get_client()
+        if client is None:
+            return
+        entry = json.dumps({"received_at": time.time(), "update": update.to_dict()}, ensure_ascii=False)
+        try:
+            await client.hset(self.pending_key, str(update.update_id), entry)
+        except Exception as e:
+            self._disable_redis(e)
+
+    def track(self, update_id: int) -> None:
+        """登记已在日志中、尚未处理完的更新（参与水位计算）"""
+        self._inflight.add(update_id)
+        self._max_seen = max(self._max_seen, update_id)
+
+    async def complete(self, update_id: int) -> None:
+        """更新处理完成（或被追赶策略跳过）：移出日志并推进水位"""
+        self._inflight.discard(update_id)
+        self._max_seen = max(self._max_seen, update_id)
+        watermark = min(self._inflight) - 1 if self._inflight else self._max_seen
+        advanced = watermark > self._watermark
+        self._watermark = max(self._watermark, watermark)
+
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hdel(self.pending_key, str(update_id))
+            if advanced:
+                pipe.hset(self.offset_key, mapping={"update_id": self._watermark, "alive_at": time.time()})
+            await pipe.execute()
+        except Exception as e:
+            self._disable_redis(e)
+
+    async def load_state(self) -> tuple[int, float | None]:
+        """
+        读取上一次运行持久化的水位
+
+        Returns:
+            (已处理水位 update_id, 上次存活时间戳)，无记录时为 (0, None)
+        """
+        client = self._get_client()
+        if client is None:
+            return 0, None
+        try:
+            data = await client.hgetall(self.offset_key)
+        except Exception as e:
+            self._disable_redis(e)
+            return 0, None
+        watermark = int(data.get("update_id") or 0)
+        alive_at = float(data["alive_at"]) if data.get("alive_at") else None
+        self._watermark = max(self._watermark, watermark)
+        self._max_seen = max(self._max_seen, watermark)
+        return watermark, alive_at
+
+    async def load_pending(self, bot) -> list[tuple[Update, float]]:
+        """读取日志中尚未处理完的更新（按 update_id 升序）"""
+        client = self._get_client()
+        if client is None:
+            return []
+        try:
+            entries = await client.hgetall(self.pending_key)
+        except Exception as e:
+            self._disable_redis(e)
+            return []
+
+        pending = []
+        for raw in entries.values():
+            try:
+                entry = json.loads(raw)
+                update = Update.de_json(entry["update"], bot)
+            except Exception as e:
+                logger.warning(f"跳过无法解析的日志更新: {e}")
+                continue
+            if update is not None:
+                pending.append((update, float(entry.get("received_at") or 0)))
+        pending.sort(key=lambda item: item[0].update_id)
+        return pending
+
+    async def start(self) -> None:
+        """启动存活时间戳写入任务（重复调用无副作用）"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        """停止存活时间戳任务并写入最终水位"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+        await self._touch()
+
+    def reset(self) -> None:
+        """清空本地状态（测试用）"""
+        self._inflight.clear()
+        self._max_seen = 0
+        self._watermark = 0
+        self._redis_disabled_until = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {"watermark": self._watermark, "inflight": len(self._inflight)}
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await self._touch()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    async def _touch(self) -> None:
+        client = self._get_client()
+        if client is None:
+            return
+        mapping: dict[str, Any] = {"alive_at": time.time()}
+        if self._watermark:
+            mapping["update_id"] = self._watermark
+        try:
+            await client.hset(self.offset_key, mapping=mapping)
+        except Exception as e:
+            self._disable_redis(e)
+
+    def _get_client(self):
+        if time.monotonic() < self._redis_disabled_until:
+            return None
+        if self.redis_client is None:
+            try:
+                from src.common.redis_helper import create_redis_client
+
+                self.redis_client = create_redis_client(decode_responses=True)
+            except Exception as e:
+                self._disable_redis(e)
+                return None
+        return self.redis_client
+
+    def _disable_redis(self, error: Exception) -> None:
+        self._redis_disabled_until = time.monotonic() + REDIS_RETRY_INTERVAL
+        logger.warning(f"更新日志无法访问 Redis，{REDIS_RETRY_INTERVAL:.0f}s 内不记录: {error}")
+
+
+class JournaledUpdateQueue(asyncio.Queue):
+    """入队前先写日志的 update_queue（长轮询与 Webhook 路由共用）"""
+
+    def __init__(self, journal: UpdateJournal):
+        super().__init__()
+        self.journal = journal
+
+    async def put(self, item: object) -> None:
+        if isinstance(item, Update):
+            await self.journal.record(item)
+        await super().put(item)
+
+
+async def catch_up_updates(
+    application: Application,
+    journal: UpdateJournal,
+    *,
+    fetch_from_telegram: bool = True,
+    allowed_updates: list[str] | None = None,
+) -> dict[str, int]:
+    """
+    处理重启前积压的更新（需在 application.initialize() 之后、开始接收新更新之前调用）
+
+    Args:
+        fetch_from_telegram: 是否通过 getUpdates 拉取 Telegram 端未确认的更新（仅长轮询模式）
+        allowed_updates: getUpdates 的更新类型
+
+    Returns:
+        追赶统计：processed / skipped_callbacks / batches
+    """
+    watermark, alive_at = await journal.load_state()
+    now = time.time()
+    # 停机期间收到的更新无法得知确切时间，按停机时长估算（偏保守：停机较久则视为过期）
+    downtime_received_at = alive_at if alive_at is not None else 0.0
+
+    backlog: dict[int, tuple[Update, float]] = {}
+    for update, received_at in await journal.load_pending(application.bot):
+        if update.update_id > watermark:
+            journal.track(update.update_id)
+            backlog[update.update_id] = (update, received_at)
+        else:
+            # 已处理但删除日志时 Redis 失败的残留
+            await journal.complete(update.update_id)
+
+    if fetch_from_telegram:
+        offset = watermark + 1 if watermark else None
+        while True:
+            try:
+                updates = await application.bot.get_updates(
+                    offset=offset, limit=CATCH_UP_FETCH_LIMIT, timeout=0, allowed_updates=allowed_updates
+                )
+            except TelegramError as e:
+                # 例如仍设置着 Webhook（Conflict）：剩余更新交给 start_polling 正常拉取
+                logger.warning(f"拉取积压更新失败，跳过 Telegram 端追赶: {e}")
+                break
+            if not updates:
+                break
+            for update in updates:
+                # 先写日志，下一次 getUpdates 才会向 Telegram 确认
+                await journal.record(update)
+                if update.update_id > watermark:
+                    backlog.setdefault(update.update_id, (update, downtime_received_at))
+            offset = updates[-1].update_id + 1
+
+    if not backlog:
+        return {"processed": 0, "skipped_callbacks": 0, "batches": 0}
+
+    from src.core.update_processor import PerUserUpdateProcessor
+
+    # 过期回调原地丢弃；其余更新按用户分组，组内保持 update_id 顺序（对话状态依赖先后顺序）
+    max_age = settings.bot_catchup_callback_max_age_secs
+    groups: dict[Any, list[Update]] = {}
+    skipped = []
+    for update, received_at in (backlog[key] for key in sorted(backlog)):
+        if update.callback_query is not None and now - received_at > max_age:
+            skipped.append(update)
+            continue
+        key = PerUserUpdateProcessor.ordering_key(update) or ("update", update.update_id)
+        groups.setdefault(key, []).append(update)
+
+    for update in skipped:
+        await journal.complete(update.update_id)
+
+    # 消息优先只作用于用户之间：有积压消息（地址、金额等输入）的用户先处理，只有按钮回调的用户在后
+    ordered_groups = sorted(
+        groups.values(), key=lambda updates: all(update.callback_query is not None for update in updates)
+    )
+    ordered = [update for updates in ordered_groups for update in updates]
+    callbacks = sum(update.callback_query is not None for update in ordered)
+    processor = application.update_processor
+    batch_size = max(1, settings.bot_catchup_batch_size)
+    batches = 0
+    for start in range(0, len(ordered), batch_size):
+        batch = ordered[start : start + batch_size]
+        results = await asyncio.gather(
+            *(processor.process_update(update, application.process_update(update)) for update in batch),
+            return_exceptions=True,
+        )
+        for update, result in zip(batch, results, strict=True):
+            if isinstance(result, Exception):
+                logger.error(f"追赶处理更新 {update.update_id} 失败: {result}")
+        batches += 1
+
+    logger.info(
+        f"✅ 重启追赶完成：处理 {len(ordered)} 条（消息 {len(ordered) - callbacks}，回调 {callbacks}），"
+        f"跳过过期回调 {len(skipped)} 条，共 {batches} 批"
+    )
+    return {"processed": len(ordered), "skipped_callbacks": len(skipped), "batches": batches}
+
+
+_update_journal: UpdateJournal | None = None
+
+
+def get_update_journal() -> UpdateJournal:
+    """获取全局更新日志（按 Bot ID 与实例名区分）"""
+    global _update_journal
+    if _update_journal is None:
+        _update_journal = UpdateJournal(settings.bot_token.split(":", 1)[0], settings.bot_instance_name)
+    return _update_journal
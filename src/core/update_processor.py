@@ -0,0 +1,153 @@
+"""
+更新并发处理器
+
+python-telegram-bot 默认逐个处理更新，一个慢请求（TronScan 查询、OKX 汇率）会阻塞所有用户。
+PerUserUpdateProcessor 允许最多 max_workers 个更新同时处理，
+同一用户（无用户时按会话）的更新仍按到达顺序串行，保证 ConversationHandler 状态一致。
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Hashable
+from typing import TYPE_CHECKING, Any
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from src.common.wait_stats import WaitTimeWindow
+from src.config import settings
+
+
+if TYPE_CHECKING:
+    from .update_journal import UpdateJournal
+
+logger = logging.getLogger(__name__)
+
+# 等待时间统计窗口（最近 N 个更新）
+WAIT_WINDOW = 500
+# 允许同时排队的更新上限（超过时由 PTB 在拉取端等待）
+MAX_PENDING_UPDATES = 10000
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """有界并发 + 按用户串行的更新处理器"""
+
+    def __init__(self, max_workers: int, max_pending: int = MAX_PENDING_UPDATES):
+        """
+        Args:
+            max_workers: 同时处理的更新数
+            max_pending: 已接收但未处理完的更新总数上限
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+        # 基类信号量只限制在途更新总数，实际并发由 _workers 控制，
+        # 避免同一用户排队的更新占满并发名额导致其他用户饥饿
+        super().__init__(max_concurrent_updates=max(max_pending, max_workers))
+        self.max_workers = max_workers
+        self._workers = asyncio.Semaphore(max_workers)
+        # 用户/会话 -> 最后一个排队更新完成时置位的 future
+        self._tails: dict[Hashable, asyncio.Future] = {}
+        self._queued = 0
+        self._active = 0
+        self._max_queued = 0
+        self._processed = 0
+        self._waits = WaitTimeWindow(WAIT_WINDOW)
+        # 更新日志：处理完成后移出日志并推进已处理水位（未设置时不记录）
+        self.journal: UpdateJournal | None = None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    @staticmethod
+    def ordering_key(update: object) -> Hashable | None:
+        """串行化 key：优先用户 ID，其次会话 ID；无法识别的更新不排序"""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_user is not None:
+            return ("user", update.effective_user.id)
+        if update.effective_chat is not None:
+            return ("chat", update.effective_chat.id)
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        loop = asyncio.get_running_loop()
+        key = self.ordering_key(update)
+        previous = self._tails.get(key) if key is not None else None
+        done = loop.create_future()
+        if key is not None:
+            self._tails[key] = done
+
+        enqueued_at = loop.time()
+        self._queued += 1
+        self._max_queued = max(self._max_queued, self._queued)
+        started = False
+        completed = False
+        try:
+            if previous is not None and not previous.done():
+                await asyncio.shield(previous)
+            async with self._workers:
+                self._queued -= 1
+                started = True
+                self._waits.observe(loop.time() - enqueued_at)
+                self._active += 1
+                try:
+                    await coroutine
+                    completed = True
+                except Exception:
+                    # 处理失败同样视为已处理，重启后不再重放
+                    completed = True
+                    raise
+                finally:
+                    self._active -= 1
+                    self._processed += 1
+        finally:
+            if not started:
+                self._queued -= 1
+                if asyncio.iscoroutine(coroutine):
+                    coroutine.close()
+            self._release(key, previous, done)
+            # 被取消（停机）的更新留在日志中，重启后重放
+            if completed and self.journal is not None and isinstance(update, Update):
+                await self.journal.complete(update.update_id)
+
+    def _release(self, key: Hashable | None, previous: asyncio.Future | None, done: asyncio.Future) -> None:
+        if previous is not None and not previous.done():
+            # 被取消时前一个更新仍在处理，等它完成后再放行后续更新
+            def finish(_: asyncio.Future) -> None:
+                self._finish(key, done)
+
+            previous.add_done_callback(finish)
+            return
+        self._finish(key, done)
+
+    def _finish(self, key: Hashable | None, done: asyncio.Future) -> None:
+        if not done.done():
+            done.set_result(None)
+        if key is not None and self._tails.get(key) is done:
+            del self._tails[key]
+
+    def stats(self) -> dict[str, Any]:
+        """队列深度与等待时间统计"""
+        return {
+            "max_workers": self.max_workers,
+            "active": self._active,
+            "queued": self._queued,
+            "max_queued": self._max_queued,
+            "ordering_keys": len(self._tails),
+            "processed": self._processed,
+            **self._waits.snapshot(),
+        }
+
+
+_update_processor: PerUserUpdateProcessor | None = None
+
+
+def get_update_processor() -> PerUserUpdateProcessor:
+    """获取全局更新处理器（按配置的并发数创建）"""
+    global _update_processor
+    if _update_processor is None:
+        _update_processor = PerUserUpdateProcessor(settings.bot_concurrent_updates)
+    return _update_processor
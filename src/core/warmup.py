@@ -0,0 +1,87 @@
+"""
+启动预热
+
+重启后第一批用户会触发冷缓存：文案缓存为空、汇率需要回源、数据库连接池与 SQLite 页缓存尚未建立。
+warm_up_caches() 在开始接收更新前并发加载这些热点数据，使部署后的响应时间与稳定运行时一致。
+预热失败或超时不影响启动（对应请求照常回源）。
+"""
+
+import logging
+
+from src.config import settings
+from src.core.startup import StartupTimer, get_startup_timer
+
+
+logger = logging.getLogger(__name__)
+
+# 主菜单与帮助页使用的文案键（content_helper 带缓存）
+CONTENT_KEYS = ("welcome_message", "free_clone_message", "clone_message", "support_contact")
+# 帮助页与管理面板展示的价格配置
+PRICE_KEYS = (
+    "premium_3_months",
+    "premium_6_months",
+    "premium_12_months",
+    "energy_small",
+    "energy_large",
+    "energy_package_per_tx",
+)
+
+
+def _warm_content() -> None:
+    from src.common import content_service
+    from src.utils.content_helper import preload_content
+
+    preload_content(CONTENT_KEYS)
+    content_service.get_welcome_message()
+    content_service.get_free_clone_message()
+    content_service.get_support_contact()
+
+
+def _warm_settings_and_prices() -> None:
+    from src.bot_admin.config_manager import config_manager
+    from src.common.settings_service import get_address_cooldown_minutes, get_order_timeout_minutes
+
+    get_order_timeout_minutes()
+    get_address_cooldown_minutes()
+    for key in PRICE_KEYS:
+        config_manager.get_price(key)
+
+
+def _warm_trx_rate() -> None:
+    from src.common.db_manager import get_db_context_readonly
+    from src.modules.trx_exchange.rate_manager import RateManager
+
+    with get_db_context_readonly() as db:
+        RateManager.get_rate(db)
+
+
+async def _warm_usdt_rates() -> None:
+    from src.rates.service import get_or_refresh_rates
+
+    # Redis 中有缓存时直接读取，否则回源刷新一次（并发的刷新会合并）
+    await get_or_refresh_rates()
+
+
+async def warm_up_caches(timer: StartupTimer | None = None) -> dict[str, bool]:
+    """
+    并发预热热点缓存（每项受 BOT_WARMUP_TIMEOUT_SECS 限制）
+
+    Returns:
+        预热项 -> 是否成功
+    """
+    if not settings.bot_warmup_enabled:
+        return {}
+    timer = timer or get_startup_timer()
+    results = await timer.run_hooks(
+        {
+            "content": _warm_content,
+            "settings_prices": _warm_settings_and_prices,
+            "trx_rate": _warm_trx_rate,
+            "usdt_rates": _warm_usdt_rates,
+        },
+        timeout=settings.bot_warmup_timeout_secs,
+        prefix="warmup",
+    )
+    warmed = sum(results.values())
+    logger.info(f"✅ 缓存预热完成 {warmed}/{len(results)}")
+    return results
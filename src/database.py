@@ -110,6 +110,55 @@ class AddressQueryLog(Base):
     query_count = Column(Integer, default=1, nullable=False)  # 查询次数
 
 
+class AddressQueryRecord(Base):
+    """地址查询日志表（仅追加，由后台批量写入）"""
+
+    __tablename__ = "address_query_records"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=False)
+    address = Column(String(64), nullable=False)
+    queried_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (Index("idx_address_query_user_time", "user_id", "queried_at"),)
+
+
+class RateSample(Base):
+    """汇率原始采样（仅追加，按保留期清理）"""
+
+    __tablename__ = "rate_samples"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(20), nullable=False)  # okx / trx_exchange
+    channel = Column(String(20), nullable=False)  # bank / alipay / wechat / usdt_trx
+    ts = Column(DateTime, nullable=False)  # UTC
+    price = Column(Float, nullable=False)
+
+    __table_args__ = (Index("idx_rate_samples_series_ts", "source", "channel", "ts"),)
+
+
+class RateRollup(Base):
+    """汇率聚合桶（1m / 1h / 1d），写入采样时增量更新"""
+
+    __tablename__ = "rate_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(20), nullable=False)
+    channel = Column(String(20), nullable=False)
+    resolution = Column(String(4), nullable=False)  # 1m / 1h / 1d
+    bucket_start = Column(DateTime, nullable=False)  # UTC
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    total = Column(Float, nullable=False)  # 价格之和，用于计算均值
+    count = Column(Integer, nullable=False, default=0)
+    first_at = Column(DateTime, nullable=False)
+    last_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (Index("idx_rate_rollups_bucket", "source", "channel", "resolution", "bucket_start", unique=True),)
+
+
 class EnergyOrder(Base):
     """能量订单表"""
 
@@ -288,6 +337,9 @@ def init_db_safe():
                 "debit_records",
                 "suffix_allocations",
                 "address_query_logs",
+                "address_query_records",
+                "rate_samples",
+                "rate_rollups",
                 "energy_orders",
             ]
 
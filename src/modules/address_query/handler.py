@@ -2,8 +2,9 @@
 地址查询模块主处理器 - 标准化版本
 """
 
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import time
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
@@ -19,21 +20,38 @@ from telegram.ext import (
 from src.clients.tron import TronAPIClient
 from src.common.conversation_wrapper import SafeConversationHandler
 from src.common.navigation_manager import NavigationManager
+from src.common.rate_limiter import TokenBucketLimiter, retry_after_minutes
 from src.common.settings_service import get_address_cooldown_minutes
+from src.config import settings
 from src.core.base import BaseModule
 from src.core.formatter import MessageFormatter
 from src.core.state_manager import ModuleStateManager
-from src.database import AddressQueryLog, SessionLocal
 
 from .messages import AddressQueryMessages
+from .query_log import query_log_writer
 from .states import *
 
 # 从本模块导入业务逻辑类
-from .validator import AddressValidator
+from .validator import AddressValidator, parse_address_list
 
 
 logger = logging.getLogger(__name__)
 
+# 冷却时间配置的本地缓存时长（秒），避免每次限频检查都读数据库
+COOLDOWN_CACHE_SECONDS = 60
+
+# 批量查询时每条消息包含的结果数（避免超过 Telegram 4096 字符限制）
+BULK_RESULTS_PER_MESSAGE = 20
+# 批量查询汇总中最多列出的无效条目数
+BULK_INVALID_PREVIEW = 10
+
+# 地址查询令牌桶：容量为突发次数，每个冷却周期补充一个令牌（速率在检查时按当前配置传入）
+address_query_limiter = TokenBucketLimiter(
+    capacity=settings.address_query_rate_burst,
+    refill_per_second=1 / 60,
+    prefix="address_query:bucket:",
+)
+
 
 class AddressQueryModule(BaseModule):
     """标准化的地址查询模块"""
@@ -44,6 +62,8 @@ class AddressQueryModule(BaseModule):
         self.state_manager = ModuleStateManager()
         self.validator = AddressValidator()
         self.tron_client = TronAPIClient()
+        self._cooldown_minutes: int | None = None
+        self._cooldown_loaded_at = 0.0
 
     @property
     def module_name(self) -> str:
@@ -90,8 +110,8 @@ class AddressQueryModule(BaseModule):
 
         user_id = update.effective_user.id
 
-        # 检查限频
-        can_query, remaining_minutes = self._check_rate_limit(user_id)
+        # 检查限频（只查看，不消耗令牌）
+        can_query, remaining_minutes = await self._check_rate_limit(user_id)
 
         if not can_query:
             text = AddressQueryMessages.RATE_LIMIT.format(remaining_minutes=remaining_minutes)
@@ -109,7 +129,7 @@ class AddressQueryModule(BaseModule):
             return ConversationHandler.END
 
         # 提示输入地址
-        text = AddressQueryMessages.START_QUERY
+        text = AddressQueryMessages.START_QUERY.format(max_count=settings.address_bulk_max)
 
         keyboard = [[InlineKeyboardButton("❌ 取消", callback_data="addrq_cancel")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -126,6 +146,11 @@ class AddressQueryModule(BaseModule):
     async def handle_address_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """处理用户输入的地址"""
         try:
+            # 多个有效地址（每行一个）进入批量查询
+            addresses, invalid = parse_address_list(update.message.text)
+            if len(addresses) > 1:
+                return await self._handle_bulk_input(update, context, addresses, invalid)
+
             # 清理地址：移除所有空白字符
             address = "".join(update.message.text.split())
             user_id = update.effective_user.id
@@ -142,8 +167,8 @@ class AddressQueryModule(BaseModule):
                 await update.message.reply_text(text, parse_mode="HTML", reply_markup=reply_markup)
                 return AWAITING_ADDRESS  # 继续等待输入
 
-            # 再次检查限频（防止绕过）
-            can_query, remaining_minutes = self._check_rate_limit(user_id)
+            # 再次检查限频并消耗令牌（防止绕过）
+            can_query, remaining_minutes = await self._check_rate_limit(user_id, consume=True)
 
             if not can_query:
                 text = AddressQueryMessages.RATE_LIMIT.format(remaining_minutes=remaining_minutes)
@@ -153,7 +178,7 @@ class AddressQueryModule(BaseModule):
                 return ConversationHandler.END
 
             # 记录查询
-            self._record_query(user_id)
+            self._record_query(user_id, address)
 
             # 显示查询中提示
             processing_msg = await update.message.reply_text(AddressQueryMessages.PROCESSING)
@@ -188,6 +213,8 @@ class AddressQueryModule(BaseModule):
                     transactions_info = AddressQueryMessages.RECENT_TRANSACTIONS.format(
                         transaction_list=transaction_list
                     )
+                elif not address_info.txs_complete:
+                    transactions_info = AddressQueryMessages.TRANSACTIONS_UNAVAILABLE
                 else:
                     transactions_info = AddressQueryMessages.NO_TRANSACTIONS
 
@@ -243,6 +270,77 @@ class AddressQueryModule(BaseModule):
 
             return ConversationHandler.END
 
+    async def _handle_bulk_input(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        addresses: list[str],
+        invalid: list[str],
+    ) -> int:
+        """批量查询：并发获取地址信息，按完成顺序分批发送结果"""
+        user_id = update.effective_user.id
+        max_count = settings.address_bulk_max
+
+        if len(addresses) > max_count:
+            text = AddressQueryMessages.BULK_TOO_MANY.format(max_count=max_count, count=len(addresses))
+            keyboard = [[InlineKeyboardButton("❌ 取消", callback_data="addrq_cancel")]]
+            await update.message.reply_text(text, parse_mode="HTML", reply_markup=InlineKeyboardMarkup(keyboard))
+            return AWAITING_ADDRESS
+
+        # 一次批量查询消耗一次查询额度
+        can_query, remaining_minutes = await self._check_rate_limit(user_id, consume=True)
+        if not can_query:
+            text = AddressQueryMessages.RATE_LIMIT.format(remaining_minutes=remaining_minutes)
+            keyboard = [[InlineKeyboardButton("🔙 返回主菜单", callback_data="nav_back_to_main")]]
+            await update.message.reply_text(text, parse_mode="HTML", reply_markup=InlineKeyboardMarkup(keyboard))
+            return ConversationHandler.END
+
+        logger.info(f"用户 {user_id} 批量查询 {len(addresses)} 个地址")
+        for address in addresses:
+            self._record_query(user_id, address)
+
+        await update.message.reply_text(
+            AddressQueryMessages.BULK_PROCESSING.format(count=len(addresses)), parse_mode="HTML"
+        )
+
+        success = failed = 0
+        lines: list[str] = []
+        async for address, info in self.tron_client.iter_address_infos(addresses):
+            if info:
+                success += 1
+                lines.append(
+                    AddressQueryMessages.BULK_RESULT_LINE.format(
+                        address=address, trx_balance=info.format_trx(), usdt_balance=info.format_usdt()
+                    )
+                )
+            else:
+                failed += 1
+                lines.append(AddressQueryMessages.BULK_RESULT_FAILED.format(address=address))
+
+            if len(lines) >= BULK_RESULTS_PER_MESSAGE:
+                await update.message.reply_text("\n".join(lines), parse_mode="HTML")
+                lines = []
+
+        if lines:
+            await update.message.reply_text("\n".join(lines), parse_mode="HTML")
+
+        invalid_info = ""
+        if invalid:
+            preview = "\n".join(f"• {self.formatter.escape_html(item[:40])}" for item in invalid[:BULK_INVALID_PREVIEW])
+            if len(invalid) > BULK_INVALID_PREVIEW:
+                preview += "\n…"
+            invalid_info = AddressQueryMessages.BULK_INVALID_INFO.format(count=len(invalid), invalid_list=preview)
+
+        keyboard = [[InlineKeyboardButton("🔙 返回主菜单", callback_data="nav_back_to_main")]]
+        await update.message.reply_text(
+            AddressQueryMessages.BULK_SUMMARY.format(success=success, failed=failed, invalid_info=invalid_info),
+            parse_mode="HTML",
+            reply_markup=InlineKeyboardMarkup(keyboard),
+        )
+
+        self.state_manager.clear_state(context, self.module_name)
+        return ConversationHandler.END
+
     async def cancel(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """取消操作"""
         query = update.callback_query
@@ -252,55 +350,47 @@ class AddressQueryModule(BaseModule):
         # 使用统一的导航管理器（会自动清理状态）
         return await NavigationManager.cleanup_and_show_main_menu(update, context)
 
-    def _check_rate_limit(self, user_id: int) -> tuple[bool, int]:
+    async def _check_rate_limit(self, user_id: int, consume: bool = False) -> tuple[bool, int]:
         """
-        检查用户查询限频
+        检查用户查询限频（令牌桶，Redis 不可用时使用进程内令牌桶）
 
         Args:
             user_id: 用户ID
+            consume: 是否消耗令牌（真正发起查询时为 True）
 
         Returns:
             (是否可以查询, 剩余分钟数)
         """
         try:
-            db = SessionLocal()
-            cooldown_minutes = get_address_cooldown_minutes()
-
-            # 查询最近一次查询记录
-            last_query = (
-                db.query(AddressQueryLog)
-                .filter_by(user_id=user_id)
-                .order_by(AddressQueryLog.last_query_at.desc())
-                .first()
-            )
-
-            if last_query:
-                time_since_last = datetime.now() - last_query.last_query_at
-                if time_since_last < timedelta(minutes=cooldown_minutes):
-                    remaining = cooldown_minutes - int(time_since_last.total_seconds() / 60)
-                    return False, max(1, remaining)
+            cooldown_minutes = await self._get_cooldown_minutes()
+            rate = 1 / (cooldown_minutes * 60)
+            key = str(user_id)
+            if consume:
+                allowed, retry_after = await address_query_limiter.acquire(key, refill_per_second=rate)
+            else:
+                allowed, retry_after = await address_query_limiter.peek(key, refill_per_second=rate)
 
-            return True, 0
+            if allowed:
+                return True, 0
+            return False, retry_after_minutes(retry_after)
 
         except Exception as e:
             logger.error(f"检查限频失败: {e}", exc_info=True)
             return True, 0  # 出错时允许查询
-        finally:
-            db.close()
 
-    def _record_query(self, user_id: int):
-        """记录查询"""
-        try:
-            db = SessionLocal()
-
-            log = AddressQueryLog(user_id=user_id, last_query_at=datetime.now())
-            db.add(log)
-            db.commit()
+    async def _get_cooldown_minutes(self) -> int:
+        """获取查询冷却时间（分钟），配置在本地缓存 COOLDOWN_CACHE_SECONDS 秒"""
+        now = time.monotonic()
+        if self._cooldown_minutes is None or now - self._cooldown_loaded_at >= COOLDOWN_CACHE_SECONDS:
+            self._cooldown_minutes = await asyncio.to_thread(get_address_cooldown_minutes)
+            self._cooldown_loaded_at = now
+        return self._cooldown_minutes
 
+    def _record_query(self, user_id: int, address: str):
+        """记录查询（放入后台批量写入队列，不阻塞事件循环）"""
+        try:
+            query_log_writer.record(user_id, address)
         except Exception as e:
             logger.error(f"记录查询失败: {e}", exc_info=True)
-            db.rollback()
-        finally:
-            db.close()
 
     # API 调用已迁移到 src/clients/tron.py (TronAPIClient)
@@ -12,7 +12,9 @@ class AddressQueryMessages:
 
 请输入 TRC20 地址，查询地址详情
 
-示例: <code>TLyqzVGLV1srkB7dToTAEqgDSfPtXRJZYH</code>"""
+示例: <code>TLyqzVGLV1srkB7dToTAEqgDSfPtXRJZYH</code>
+
+💡 支持批量查询：每行一个地址（最多 {max_count} 个）"""
 
     # 限频提示
     RATE_LIMIT = """💡 您的查询过于频繁，请在 <b>{remaining_minutes}</b> 分钟后再试"""
@@ -56,6 +58,9 @@ class AddressQueryMessages:
     # 无交易记录
     NO_TRANSACTIONS = """📊 <i>暂无最近交易记录</i>"""
 
+    # 交易记录获取失败（仅有余额）
+    TRANSACTIONS_UNAVAILABLE = """📊 <i>交易记录暂时无法获取，请稍后重试或点击下方按钮查看</i>"""
+
     # 查询失败
     QUERY_ERROR = """❌ <b>查询失败</b>
 
@@ -69,3 +74,23 @@ class AddressQueryMessages:
 地址查询已取消
 
 返回主菜单"""
+
+    # 批量查询
+    BULK_TOO_MANY = """❌ 一次最多查询 <b>{max_count}</b> 个地址，您输入了 {count} 个"""
+
+    BULK_PROCESSING = """🔄 正在批量查询 <b>{count}</b> 个地址，结果将陆续发送..."""
+
+    BULK_RESULT_LINE = """<code>{address}</code>
+   💰 {trx_balance} TRX | 🪙 {usdt_balance} USDT"""
+
+    BULK_RESULT_FAILED = """<code>{address}</code>
+   ⚠️ 查询失败"""
+
+    BULK_SUMMARY = """✅ <b>批量查询完成</b>
+
+成功: <b>{success}</b> 个
+失败: <b>{failed}</b> 个{invalid_info}"""
+
+    BULK_INVALID_INFO = """
+格式无效（已跳过）: <b>{count}</b> 个
+{invalid_list}"""
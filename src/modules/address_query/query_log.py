@@ -0,0 +1,91 @@
+"""
+地址查询日志（异步批量写入）
+
+查询时只把记录放入内存缓冲区，由后台任务按批次在线程池中写入 address_query_records，
+数据库写入不阻塞事件循环，也不影响查询本身。
+"""
+
+import asyncio
+import contextlib
+import logging
+from datetime import datetime
+
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# 缓冲区上限，数据库长时间不可用时丢弃最旧的记录
+MAX_BUFFERED_RECORDS = 10000
+
+
+class QueryLogWriter:
+    """地址查询日志的 write-behind 写入器"""
+
+    def __init__(self, flush_interval: float = 5.0, batch_size: int = 100):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._buffer: list[tuple[int, str, datetime]] = []
+        self._flush_task: asyncio.Task | None = None
+
+    def record(self, user_id: int, address: str) -> None:
+        """记录一次查询（只写内存，立即返回）"""
+        if not settings.address_query_log_enabled:
+            return
+
+        self._buffer.append((user_id, address, datetime.now()))
+        if len(self._buffer) > MAX_BUFFERED_RECORDS:
+            del self._buffer[: len(self._buffer) - MAX_BUFFERED_RECORDS]
+
+        if self._flush_task is None or self._flush_task.done():
+            delay = 0 if len(self._buffer) >= self.batch_size else self.flush_interval
+            self._flush_task = asyncio.create_task(self._flush_later(delay))
+
+    async def flush(self) -> int:
+        """立即写入缓冲区中的全部记录，返回写入条数"""
+        if not self._buffer:
+            return 0
+
+        batch, self._buffer = self._buffer, []
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except Exception as e:
+            logger.error(f"写入地址查询日志失败 ({len(batch)} 条): {e}")
+            # 放回缓冲区，下次再试
+            self._buffer[:0] = batch
+            return 0
+        return len(batch)
+
+    async def close(self) -> None:
+        """取消定时刷新并写入剩余记录（关闭时调用）"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+        self._flush_task = None
+        await self.flush()
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    @staticmethod
+    def _write(batch: list[tuple[int, str, datetime]]) -> None:
+        from src.database import AddressQueryRecord, SessionLocal
+
+        db = SessionLocal()
+        try:
+            db.add_all(
+                AddressQueryRecord(user_id=user_id, address=address, queried_at=queried_at)
+                for user_id, address, queried_at in batch
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# 全局实例
+query_log_writer = QueryLogWriter()
@@ -49,3 +49,23 @@ def validate_tron_address(address: str) -> tuple[bool, str | None]:
         (是否有效, 错误消息)
     """
     return AddressValidator.validate(address)
+
+
+def parse_address_list(text: str) -> tuple[list[str], list[str]]:
+    """
+    解析多行/逗号分隔的地址列表
+
+    Args:
+        text: 用户粘贴的文本
+
+    Returns:
+        (有效地址列表, 无效条目列表)，均去重并保持原顺序
+    """
+    valid: list[str] = []
+    invalid: list[str] = []
+    for item in dict.fromkeys(re.split(r"[\s,;，；]+", text or "")):
+        if not item:
+            continue
+        is_valid, _ = AddressValidator.validate(item)
+        (valid if is_valid else invalid).append(item)
+    return valid, invalid
@@ -6,8 +6,16 @@ TRXNO/TRXFAST API 客户端
 - 支持 async with 上下文管理器
 - 延迟创建 httpx.AsyncClient（避免在事件循环外创建）
 - 提供优雅关闭机制
+- 主/备端点分别统计延迟并熔断，跳过不健康的端点
+- 查询类（幂等）请求对冲：主端点超过延迟分位数未响应时并发请求备用端点，取先返回者
+- 购买类请求不对冲，携带幂等键，仅在请求未发出（连接失败）时切换备用端点
 """
 
+import asyncio
+import math
+import time
+import uuid
+from collections import deque
 from typing import Any
 
 import httpx
@@ -29,6 +37,78 @@ class EnergyAPIError(Exception):
         super().__init__(f"API Error {code}: {message}")
 
 
+class EndpointHealth:
+    """单个端点的延迟统计与熔断状态"""
+
+    STATE_CLOSED = "closed"
+    STATE_OPEN = "open"
+    STATE_HALF_OPEN = "half_open"
+
+    def __init__(self, base_url: str, fail_max: int = 5, reset_timeout: float = 30.0, window: int = 50):
+        """
+        Args:
+            base_url: 端点URL
+            fail_max: 连续失败多少次后熔断
+            reset_timeout: 熔断后多久允许试探请求(秒)
+            window: 延迟统计窗口大小
+        """
+        self.base_url = base_url
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._consecutive_failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        """当前熔断状态"""
+        if self._opened_at is None:
+            return self.STATE_CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.STATE_HALF_OPEN
+        return self.STATE_OPEN
+
+    @property
+    def available(self) -> bool:
+        """是否允许发送请求（熔断打开期间不可用，半开状态允许试探）"""
+        return self.state != self.STATE_OPEN
+
+    def record_success(self, latency: float) -> None:
+        """记录成功请求（关闭熔断）"""
+        self._latencies.append(latency)
+        self._consecutive_failures = 0
+        if self._opened_at is not None:
+            logger.info(f"能量API端点恢复: {self.base_url}")
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        """记录失败请求（达到阈值或半开试探失败时打开熔断）"""
+        self._consecutive_failures += 1
+        if self._opened_at is not None or self._consecutive_failures >= self.fail_max:
+            if self.state != self.STATE_OPEN:
+                logger.warning(f"能量API端点熔断: {self.base_url} (连续失败 {self._consecutive_failures} 次)")
+            self._opened_at = time.monotonic()
+
+    def latency_percentile(self, percentile: float) -> float | None:
+        """延迟分位数(秒)，无样本时返回 None"""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(percentile * len(ordered)) - 1))
+        return ordered[index]
+
+    def stats(self) -> dict[str, Any]:
+        """端点状态"""
+        return {
+            "base_url": self.base_url,
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "p50": self.latency_percentile(0.5),
+            "p95": self.latency_percentile(0.95),
+            "samples": len(self._latencies),
+        }
+
+
 class EnergyAPIClient:
     """
     能量API客户端
@@ -57,6 +137,13 @@ class EnergyAPIClient:
     CODE_SERVER_ERROR = 10010
     CODE_PACKAGE_EXISTS = 10011
 
+    # 幂等的查询类端点（允许对冲请求）
+    IDEMPOTENT_ENDPOINTS = frozenset({"/api/account", "/api/price", "/api/orderinfo", "/api/logs"})
+
+    # 无延迟样本时的默认对冲等待时间(秒)
+    DEFAULT_HEDGE_DELAY = 1.0
+    MIN_HEDGE_DELAY = 0.1
+
     def __init__(
         self,
         username: str,
@@ -64,6 +151,9 @@ class EnergyAPIClient:
         base_url: str = "https://trxno.com",
         backup_url: str = "https://trxfast.com",
         timeout: float = 30.0,
+        hedge_percentile: float = 0.95,
+        breaker_fail_max: int = 5,
+        breaker_reset_timeout: float = 30.0,
     ):
         """
         初始化API客户端
@@ -74,12 +164,21 @@ class EnergyAPIClient:
             base_url: 主URL
             backup_url: 备用URL
             timeout: 超时时间(秒)
+            hedge_percentile: 对冲触发的主端点延迟分位数
+            breaker_fail_max: 端点连续失败多少次后熔断
+            breaker_reset_timeout: 熔断后多久允许试探请求(秒)
         """
         self.username = username
         self.password = password
         self.base_url = base_url
         self.backup_url = backup_url
         self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+
+        self._endpoints: dict[str, EndpointHealth] = {
+            url: EndpointHealth(url, fail_max=breaker_fail_max, reset_timeout=breaker_reset_timeout)
+            for url in dict.fromkeys(u for u in (base_url, backup_url) if u)
+        }
 
         # 延迟创建客户端（避免在事件循环外创建）
         self._client: httpx.AsyncClient | None = None
@@ -109,6 +208,25 @@ class EnergyAPIClient:
             self._closed = True
             logger.debug("EnergyAPIClient closed")
 
+    def endpoint_stats(self) -> list[dict[str, Any]]:
+        """各端点的延迟与熔断状态"""
+        return [health.stats() for health in self._endpoints.values()]
+
+    def _ordered_endpoints(self, use_backup: bool = False) -> list[EndpointHealth]:
+        """按优先级排列端点，熔断中的端点排除；全部熔断时仍按原顺序尝试"""
+        endpoints = list(self._endpoints.values())
+        if use_backup:
+            endpoints.reverse()
+        available = [e for e in endpoints if e.available]
+        return available or endpoints
+
+    def _hedge_delay(self, endpoint: EndpointHealth) -> float:
+        """主端点超过该时间未响应则发起对冲请求"""
+        delay = endpoint.latency_percentile(self.hedge_percentile)
+        if delay is None:
+            delay = self.DEFAULT_HEDGE_DELAY
+        return min(max(delay, self.MIN_HEDGE_DELAY), self.timeout)
+
     async def _request(self, endpoint: str, data: dict[str, Any], use_backup: bool = False) -> dict[str, Any]:
         """
         发送API请求
@@ -116,7 +234,7 @@ class EnergyAPIClient:
         Args:
             endpoint: API端点
             data: 请求数据
-            use_backup: 是否使用备用URL
+            use_backup: 是否优先使用备用URL
 
         Returns:
             API响应数据
@@ -125,39 +243,97 @@ class EnergyAPIClient:
             EnergyAPIError: API错误
             httpx.HTTPError: HTTP错误
         """
-        url = f"{self.backup_url if use_backup else self.base_url}{endpoint}"
-
         # 添加认证信息
         request_data = {"username": self.username, "password": self.password, **data}
+        endpoints = self._ordered_endpoints(use_backup)
+
+        # 安全加固：只记录端点，不打印完整请求数据
+        logger.info(f"API请求: {endpoint}")
+
+        if endpoint in self.IDEMPOTENT_ENDPOINTS:
+            if len(endpoints) > 1:
+                return await self._hedged_request(endpoints[0], endpoints[1], endpoint, request_data)
+            return await self._send(endpoints[0], endpoint, request_data)
+
+        # 非幂等请求：携带幂等键，仅在请求未发出时切换端点
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        last_error: httpx.HTTPError | None = None
+        for health in endpoints:
+            try:
+                return await self._send(health, endpoint, request_data, headers)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                last_error = e
+                logger.info("请求未送达，尝试使用备用URL")
+        raise last_error
+
+    async def _hedged_request(
+        self, primary: EndpointHealth, backup: EndpointHealth, endpoint: str, request_data: dict[str, Any]
+    ) -> dict[str, Any]:
+        """对冲请求：主端点慢于延迟分位数时并发请求备用端点，取先成功返回者"""
+        primary_task = asyncio.create_task(self._send(primary, endpoint, request_data))
+        done, _ = await asyncio.wait({primary_task}, timeout=self._hedge_delay(primary))
+
+        if done:
+            try:
+                return primary_task.result()
+            except httpx.HTTPError as e:
+                logger.error(f"HTTP错误: {e}")
+                logger.info("尝试使用备用URL")
+                return await self._send(backup, endpoint, request_data)
 
+        logger.info(f"主端点 {primary.base_url} 响应慢，发起对冲请求")
+        backup_task = asyncio.create_task(self._send(backup, endpoint, request_data))
+        pending = {primary_task, backup_task}
+        last_error: BaseException | None = None
         try:
-            # 安全加固：只记录端点，不打印完整请求数据
-            logger.info(f"API请求: {endpoint}")
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None or isinstance(error, EnergyAPIError):
+                        # 业务错误也是有效响应，直接返回给调用方
+                        return task.result()
+                    last_error = error
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send(
+        self,
+        health: EndpointHealth,
+        endpoint: str,
+        request_data: dict[str, Any],
+        extra_headers: dict[str, str] | None = None,
+    ) -> dict[str, Any]:
+        """向单个端点发送请求并记录延迟与健康状态"""
+        url = f"{health.base_url}{endpoint}"
+        headers = {"Content-Type": "application/json", **(extra_headers or {})}
+        started = time.monotonic()
 
+        try:
             client = self._get_client()
-            response = await client.post(url, json=request_data, headers={"Content-Type": "application/json"})
+            response = await client.post(url, json=request_data, headers=headers)
             response.raise_for_status()
+        except httpx.HTTPError as e:
+            health.record_failure()
+            logger.error(f"HTTP错误 ({health.base_url}): {e}")
+            raise
 
-            result = response.json()
-            # 安全加固：只记录状态码，不打印完整响应
-            logger.info(f"API响应: code={result.get('code')}, msg={result.get('msg', '')}")
+        health.record_success(time.monotonic() - started)
 
-            # 检查状态码
-            code = result.get("code")
-            if code != self.CODE_SUCCESS:
-                msg = result.get("msg", "未知错误")
-                logger.warning(f"API业务错误: code={code}, msg={msg}")
-                raise EnergyAPIError(code, msg)
+        result = response.json()
+        # 安全加固：只记录状态码，不打印完整响应
+        logger.info(f"API响应: code={result.get('code')}, msg={result.get('msg', '')}")
 
-            return result
+        # 检查状态码
+        code = result.get("code")
+        if code != self.CODE_SUCCESS:
+            msg = result.get("msg", "未知错误")
+            logger.warning(f"API业务错误: code={code}, msg={msg}")
+            raise EnergyAPIError(code, msg)
 
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP错误: {e}")
-            # 如果主URL失败且未使用备用URL，尝试备用URL
-            if not use_backup:
-                logger.info("尝试使用备用URL")
-                return await self._request(endpoint, data, use_backup=True)
-            raise
+        return result
 
     async def get_account_info(self) -> APIAccountInfo:
         """
@@ -283,13 +283,16 @@ class MainMenuModule(BaseModule):
         构建汇率显示文本
 
         Args:
-            rates_data: OKX API返回的汇率数据（fetch_usdt_cny_from_okx格式）
+            rates_data: 缓存的汇率载荷（build_rates_payload 格式）
             channel: 显示的渠道 (all/bank/alipay/wechat)
 
         Returns:
             格式化的汇率文本
         """
+        from src.rates.service import rates_age_seconds
+
         lines = ["<b>欧意 OTC实时汇率 TOP10</b>\n"]
+        details = rates_data.get("details", {})
 
         # 排名emoji
         rank_emojis = ["🥇", "🥈", "🥉", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"]
@@ -298,7 +301,7 @@ class MainMenuModule(BaseModule):
             # 合并所有渠道，按价格排序取TOP10
             all_merchants = []
             for ch in ("bank", "alipay", "wechat"):
-                ch_data = rates_data.get(ch, {})
+                ch_data = details.get(ch, {})
                 merchants = ch_data.get("merchants", [])
                 for m in merchants:
                     all_merchants.append({"price": m.get("price", 0), "name": m.get("name", "商家")})
@@ -307,7 +310,7 @@ class MainMenuModule(BaseModule):
             top10 = all_merchants[:10]
         else:
             # 显示单渠道TOP10
-            ch_data = rates_data.get(channel, {})
+            ch_data = details.get(channel, {})
             merchants = ch_data.get("merchants", [])
             top10 = [{"price": m.get("price", 0), "name": m.get("name", "商家")} for m in merchants[:10]]
 
@@ -321,9 +324,12 @@ class MainMenuModule(BaseModule):
         if not top10:
             lines.append("\n⚠️ 暂无数据")
 
-        # 添加时间戳
-        now = datetime.now()
-        lines.append(f"\n🕐 当前时间：{now.strftime('%Y-%m-%d %H:%M:%S')}")
+        # 添加数据更新时间
+        age = rates_age_seconds(rates_data)
+        if age is not None:
+            updated_at = datetime.fromisoformat(rates_data["updated_at"]).astimezone()
+            age_text = "刚刚" if age < 60 else f"{int(age // 60)} 分钟前"
+            lines.append(f"\n🕐 数据更新于：{updated_at.strftime('%Y-%m-%d %H:%M:%S')}（{age_text}）")
 
         return "\n".join(lines)
 
@@ -351,41 +357,29 @@ class MainMenuModule(BaseModule):
     async def show_rates(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
         显示实时U价（底部键盘按钮）
-        调用 rates 服务获取 OKX C2C 汇率，支持渠道切换
+        读取后台定时刷新的汇率缓存，支持渠道切换
         """
-        from src.rates.service import fetch_usdt_cny_from_okx
-
-        # 发送"正在获取"提示
-        processing_msg = await update.message.reply_text("🔄 正在获取实时汇率...")
+        from src.rates.service import get_or_refresh_rates
 
         try:
-            # 获取汇率数据
-            channel_prices = await fetch_usdt_cny_from_okx()
-
-            # 保存到 context 以便渠道切换时使用
-            context.user_data["rates_data"] = channel_prices
+            rates_data = await get_or_refresh_rates()
+        except Exception as e:
+            logger.error(f"获取汇率失败: {e}", exc_info=True)
+            rates_data = None
 
+        if rates_data:
             # 默认显示"所有"渠道
-            text = self._build_rates_text(channel_prices, "all")
+            text = self._build_rates_text(rates_data, "all")
             keyboard = self._build_rates_keyboard("all")
-
-        except Exception as e:
-            logger.error(f"获取汇率失败: {e}", exc_info=True)
+        else:
             text = "❌ <b>获取汇率失败</b>\n\n请稍后重试。"
             keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("🔙 返回主菜单", callback_data="nav_back_to_main")]])
 
-        # 删除"正在获取"提示
-        try:
-            await processing_msg.delete()
-        except Exception:
-            pass
-
-        # 发送结果
         await update.message.reply_text(text, parse_mode="HTML", reply_markup=keyboard)
 
     async def handle_rate_channel(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """处理汇率渠道切换"""
-        from src.rates.service import fetch_usdt_cny_from_okx
+        from src.rates.service import get_or_refresh_rates
 
         query = update.callback_query
         await query.answer()
@@ -393,24 +387,21 @@ class MainMenuModule(BaseModule):
         # 从 callback_data 解析渠道
         channel = query.data.replace("rate_channel_", "")
 
-        # 尝试从 context 获取缓存的汇率数据
-        rates_data = context.user_data.get("rates_data")
+        try:
+            rates_data = await get_or_refresh_rates()
+        except Exception as e:
+            logger.error(f"获取汇率失败: {e}", exc_info=True)
+            rates_data = None
 
         if not rates_data:
-            # 如果没有缓存，重新获取
-            try:
-                rates_data = await fetch_usdt_cny_from_okx()
-                context.user_data["rates_data"] = rates_data
-            except Exception as e:
-                logger.error(f"获取汇率失败: {e}", exc_info=True)
-                await query.edit_message_text(
-                    "❌ <b>获取汇率失败</b>\n\n请稍后重试。",
-                    parse_mode="HTML",
-                    reply_markup=InlineKeyboardMarkup(
-                        [[InlineKeyboardButton("🔙 返回主菜单", callback_data="nav_back_to_main")]]
-                    ),
-                )
-                return
+            await query.edit_message_text(
+                "❌ <b>获取汇率失败</b>\n\n请稍后重试。",
+                parse_mode="HTML",
+                reply_markup=InlineKeyboardMarkup(
+                    [[InlineKeyboardButton("🔙 返回主菜单", callback_data="nav_back_to_main")]]
+                ),
+            )
+            return
 
         # 构建显示文本和键盘
         text = self._build_rates_text(rates_data, channel)
@@ -423,9 +414,6 @@ class MainMenuModule(BaseModule):
         query = update.callback_query
         await query.answer("已关闭")
 
-        # 清理缓存的汇率数据
-        context.user_data.pop("rates_data", None)
-
         # 删除消息
         try:
             await query.message.delete()
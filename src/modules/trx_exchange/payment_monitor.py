@@ -13,9 +13,11 @@ from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Session
 
+from src.clients.tron_router import PROVIDER_TRONSCAN, TronProvider, tron_router
 from src.common.db_manager import get_db_context_manual_commit
 from src.common.error_collector import collect_error
 from src.common.http_client import get_async_client
+from src.common.leader_election import get_leader_elector
 from src.config import settings
 
 from .models import TRXExchangeOrder
@@ -42,8 +44,7 @@ class PaymentMonitor:
     def __init__(self):
         """初始化监听器"""
         self.receive_address = getattr(settings, "trx_exchange_receive_address", "")
-        self.api_url = getattr(settings, "tron_api_url", "https://apilist.tronscanapi.com")
-        self.api_key = getattr(settings, "tron_api_key", "")
+        self.router = tron_router
         self.trx_sender = TRXSender()
         self.running = False
         self.poll_interval = 30  # 轮询间隔（秒）
@@ -131,44 +132,70 @@ class PaymentMonitor:
             collect_error("trx_check_payments", str(e), exception=e)
 
     async def _fetch_usdt_transfers(self) -> list[dict]:
-        """获取 USDT 转账记录"""
+        """获取 USDT 转账记录（由数据源路由选择 TronScan/TronGrid，失败时自动切换）"""
         try:
             client = await get_async_client()
 
-            # TronScan TRC20 转账 API
-            url = f"{self.api_url}/api/token_trc20/transfers"
-            params = {
-                "relatedAddress": self.receive_address,
-                "contract_address": USDT_CONTRACT,
-                "limit": 20,
-                "order_by": "-timestamp",
-            }
-
-            headers = {"Accept": "application/json"}
-            if self.api_key:
-                headers["TRON-PRO-API-KEY"] = self.api_key
-
-            response = await client.get(url, params=params, headers=headers, timeout=15)
+            async def fetch(provider: TronProvider) -> list[dict]:
+                if provider.kind == PROVIDER_TRONSCAN:
+                    return await self._fetch_transfers_from_tronscan(client, provider)
+                return await self._fetch_transfers_from_trongrid(client, provider)
 
-            if response.status_code != 200:
-                logger.warning(f"获取转账记录失败: {response.status_code}")
-                return []
-
-            data = response.json()
+            transfers = await self.router.call(fetch)
 
             # 只返回转入的交易（to_address 是收款地址）
-            transfers = []
-            for item in data.get("token_transfers", []):
-                if item.get("to_address") == self.receive_address:
-                    transfers.append(item)
-
-            return transfers
+            return [item for item in transfers if item.get("to_address") == self.receive_address]
 
         except Exception as e:
             logger.error(f"获取转账记录异常: {e}")
             collect_error("trx_fetch_transfers", str(e), exception=e)
             return []
 
+    async def _fetch_transfers_from_tronscan(self, client, provider: TronProvider) -> list[dict]:
+        """TronScan TRC20 转账 API"""
+        url = f"{provider.base_url}/api/token_trc20/transfers"
+        params = {
+            "relatedAddress": self.receive_address,
+            "contract_address": USDT_CONTRACT,
+            "limit": 20,
+            "order_by": "-timestamp",
+        }
+
+        response = await client.get(url, params=params, headers=provider.headers(), timeout=15)
+
+        if response.status_code != 200:
+            logger.warning(f"获取转账记录失败: {response.status_code}")
+            raise RuntimeError(f"TronScan HTTP {response.status_code}")
+
+        return response.json().get("token_transfers", [])
+
+    async def _fetch_transfers_from_trongrid(self, client, provider: TronProvider) -> list[dict]:
+        """TronGrid TRC20 转账 API，结果转换为 TronScan 字段格式"""
+        url = f"{provider.base_url}/v1/accounts/{self.receive_address}/transactions/trc20"
+        params = {
+            "contract_address": USDT_CONTRACT,
+            "only_to": "true",
+            "limit": 20,
+            "order_by": "block_timestamp,desc",
+        }
+
+        response = await client.get(url, params=params, headers=provider.headers(), timeout=15)
+
+        if response.status_code != 200:
+            logger.warning(f"获取转账记录失败: {response.status_code}")
+            raise RuntimeError(f"TronGrid HTTP {response.status_code}")
+
+        return [
+            {
+                "transaction_id": item.get("transaction_id", ""),
+                "from_address": item.get("from", ""),
+                "to_address": item.get("to", ""),
+                "quant": item.get("value", "0"),
+                "block_ts": item.get("block_timestamp", 0),
+            }
+            for item in response.json().get("data", [])
+        ]
+
     async def _process_transfer(self, tx: dict):
         """处理单笔转账"""
         tx_hash = tx.get("transaction_id", "")
@@ -189,6 +216,11 @@ class PaymentMonitor:
 
         logger.info(f"检测到 USDT 转入: {amount} USDT, tx: {tx_hash[:16]}...")
 
+        # 多实例部署：非领导者提前退出；真正防止重复发放的是下方的条件更新
+        if not await get_leader_elector().verify():
+            logger.warning(f"已不是领导者实例，交由新领导者处理转账 {tx_hash[:16]}...")
+            return
+
         # 匹配订单 - 使用手动提交的上下文管理器确保连接正确关闭
         with get_db_context_manual_commit() as db:
             try:
@@ -201,10 +233,21 @@ class PaymentMonitor:
 
                 logger.info(f"匹配到订单: {order.order_id}, 金额: {order.usdt_amount}")
 
-                # 更新订单状态
-                order.status = "PAID"
-                order.tx_hash = tx_hash
-                order.paid_at = datetime.now(UTC)
+                # 条件更新 PENDING -> PAID：verify() 之后失去领导权的旧实例若与新领导者同时认领，
+                # 数据库只允许一方更新成功，另一方放弃发放
+                claimed = (
+                    db.query(TRXExchangeOrder)
+                    .filter(
+                        TRXExchangeOrder.order_id == order.order_id,
+                        TRXExchangeOrder.status == "PENDING",
+                    )
+                    .update({"status": "PAID", "tx_hash": tx_hash, "paid_at": datetime.now(UTC)})
+                )
+                if claimed != 1:
+                    db.rollback()
+                    logger.warning(f"订单 {order.order_id} 已被其他实例认领，跳过转账 {tx_hash[:16]}...")
+                    self._add_processed_tx(tx_hash)
+                    return
                 db.commit()
 
                 # 自动发送 TRX
@@ -346,13 +389,19 @@ _monitor_task: asyncio.Task | None = None
 
 
 async def start_payment_monitor():
-    """启动支付监听（在 bot 启动时调用）"""
+    """启动支付监听（在 bot 启动或成为领导者实例时调用，已在运行时不重复启动）"""
     global _monitor_task
+    if _monitor_task is not None and not _monitor_task.done():
+        return
     monitor = get_monitor()
     _monitor_task = asyncio.create_task(monitor.start())
 
 
 def stop_payment_monitor():
-    """停止支付监听"""
+    """停止支付监听（取消轮询任务，失去领导权后不再发放 TRX）"""
+    global _monitor_task
     if _monitor:
         _monitor.stop()
+    if _monitor_task is not None:
+        _monitor_task.cancel()
+        _monitor_task = None
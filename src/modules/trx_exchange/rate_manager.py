@@ -7,6 +7,8 @@ from decimal import Decimal
 from sqlalchemy import DECIMAL, Column, DateTime, String
 from sqlalchemy.orm import Session
 
+from src.common.cache_invalidation import CacheInvalidator
+from src.config import settings
 from src.database import Base
 
 from .config import TRXExchangeConfig
@@ -29,13 +31,20 @@ class TRXExchangeRate(Base):
         return f"<TRXExchangeRate(rate={self.rate}, updated_at={self.updated_at})>"
 
 
+# Cross-process invalidation: rate changes in any process clear every process's cache
+rate_cache_invalidator = CacheInvalidator(
+    "trx_exchange_rate", check_interval=settings.trx_rate_cache_version_check_secs
+)
+
+
 class RateManager:
     """Manage TRX Exchange Rate with Cache."""
 
-    # In-memory cache
+    # In-memory cache (invalidated across processes via rate_cache_invalidator)
     _cached_rate: Decimal | None = None
     _cache_expires_at: datetime | None = None
-    _cache_ttl_seconds = 3600  # 1 hour
+    _cache_version: int = 0
+    _cache_ttl_seconds = 86400  # 24 hours, only a safety net when Redis is unavailable
     _config: TRXExchangeConfig = None
 
     @classmethod
@@ -55,7 +64,8 @@ class RateManager:
         """
         Get current TRX/USDT exchange rate.
 
-        Returns locked rate from database with 1-hour cache.
+        Returns locked rate from database with an in-memory cache that is
+        dropped as soon as any process publishes a rate change.
         Falls back to config default if no rate in database.
 
         Args:
@@ -65,9 +75,11 @@ class RateManager:
             TRX/USDT rate (e.g., Decimal('3.05') means 1 USDT = 3.05 TRX)
         """
         now = datetime.now(UTC)
+        # Read the version before loading so a change published meanwhile is not missed
+        version = rate_cache_invalidator.current_version()
 
         # Return cached rate if valid
-        if cls._cached_rate and cls._cache_expires_at and now < cls._cache_expires_at:
+        if cls._cached_rate and cls._cache_expires_at and now < cls._cache_expires_at and cls._cache_version == version:
             logger.debug(f"Using cached TRX rate: {cls._cached_rate}")
             return cls._cached_rate
 
@@ -86,6 +98,7 @@ class RateManager:
         # Update cache
         cls._cached_rate = rate
         cls._cache_expires_at = now + timedelta(seconds=cls._cache_ttl_seconds)
+        cls._cache_version = version
 
         return rate
 
@@ -127,8 +140,18 @@ class RateManager:
 
         db.commit()
 
-        # Clear cache to force reload
-        cls._clear_cache()
+        # Clear cache in this and every other process
+        rate_cache_invalidator.publish()
+
+        # Keep rate history so orders can be priced as of their creation time
+        if settings.rate_history_enabled:
+            try:
+                from src.rates.history import SOURCE_TRX_EXCHANGE, rate_history
+
+                rate_history.record([(SOURCE_TRX_EXCHANGE, "usdt_trx", new_rate)], at=now, db=db)
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Failed to record TRX rate history: {e}")
 
     @classmethod
     def _clear_cache(cls) -> None:
@@ -151,3 +174,6 @@ class RateManager:
         """
         trx_amount = usdt_amount * rate
         return trx_amount.quantize(Decimal("0.000001"))
+
+
+rate_cache_invalidator.add_listener(RateManager._clear_cache)
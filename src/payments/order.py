@@ -120,6 +120,11 @@ class OrderManager:
         # 保存订单到Redis
         await self._save_order(order, timeout_minutes=timeout_minutes)
 
+        # 登记订单过期定时器（截止时间到达时精确触发过期处理）
+        from ..tasks.expiry_scheduler import order_expiry_scheduler
+
+        await order_expiry_scheduler.schedule(order.order_id, order.expires_at)
+
         return order
 
     async def _save_order(self, order: Order, *, timeout_minutes: int | None = None) -> bool:
@@ -233,6 +238,12 @@ class OrderManager:
         if new_status in [OrderStatus.PAID, OrderStatus.DELIVERED, OrderStatus.CANCELLED, OrderStatus.EXPIRED]:
             await suffix_manager.release_suffix(order.unique_suffix, order_id)
 
+        # 订单离开 PENDING 后不再需要过期定时器
+        if new_status in [OrderStatus.PAID, OrderStatus.CANCELLED]:
+            from ..tasks.expiry_scheduler import order_expiry_scheduler
+
+            await order_expiry_scheduler.cancel(order_id)
+
         # 保存更新后的订单
         return await self._save_order(order)
 
@@ -1,18 +1,25 @@
 """USDT 汇率相关服务。"""
 
+from .history import RateHistoryStore, rate_history
 from .service import (
     USDT_RATES_REDIS_KEY,
     fetch_usdt_cny_from_okx,
     get_cached_rates,
+    get_okx_latency_stats,
     get_or_refresh_rates,
+    rates_age_seconds,
     refresh_usdt_rates,
 )
 
 
 __all__ = [
     "USDT_RATES_REDIS_KEY",
+    "RateHistoryStore",
     "fetch_usdt_cny_from_okx",
     "get_cached_rates",
+    "get_okx_latency_stats",
     "get_or_refresh_rates",
+    "rate_history",
+    "rates_age_seconds",
     "refresh_usdt_rates",
 ]
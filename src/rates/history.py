@@ -0,0 +1,312 @@
+"""汇率历史时间序列。
+
+每次采样追加一条原始记录，并增量更新 1m / 1h / 1d 三级聚合桶（OHLC + 均值），
+写入开销与历史长度无关。区间查询只读取聚合桶，查询数月数据也只按桶数线性增长。
+原始采样与各级聚合按各自的保留期由定时任务清理。
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+
+
+logger = logging.getLogger(__name__)
+
+SOURCE_OKX = "okx"
+SOURCE_TRX_EXCHANGE = "trx_exchange"
+
+RESOLUTIONS: dict[str, timedelta] = {
+    "1m": timedelta(minutes=1),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+
+# 单次区间查询最多返回的桶数
+MAX_POINTS = 2000
+
+
+def _to_utc_naive(value: datetime | None) -> datetime:
+    """统一为不带时区的 UTC 时间（数据库中的存储格式）。"""
+    if value is None:
+        return datetime.now(UTC).replace(tzinfo=None)
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    """采样时间所在聚合桶的起始时间。"""
+    if resolution == "1m":
+        return ts.replace(second=0, microsecond=0)
+    if resolution == "1h":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if resolution == "1d":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"unknown resolution: {resolution}")
+
+
+def choose_resolution(start: datetime, end: datetime) -> str:
+    """按查询跨度选择不超过 MAX_POINTS 个桶的最细粒度。"""
+    span = end - start
+    for resolution, step in RESOLUTIONS.items():
+        if span / step <= MAX_POINTS:
+            return resolution
+    return "1d"
+
+
+def _retention_days() -> dict[str, int]:
+    return {
+        "raw": settings.rate_history_raw_retention_days,
+        "1m": settings.rate_history_minute_retention_days,
+        "1h": settings.rate_history_hour_retention_days,
+        "1d": settings.rate_history_day_retention_days,
+    }
+
+
+class RateHistoryStore:
+    """汇率时间序列存储（同步接口，异步代码中通过 asyncio.to_thread 调用）。"""
+
+    def __init__(self, session_factory: Callable[[], Session] | None = None):
+        self._session_factory = session_factory
+
+    def _session(self) -> Session:
+        if self._session_factory is not None:
+            return self._session_factory()
+        from ..database import SessionLocal
+
+        return SessionLocal()
+
+    def record(
+        self,
+        samples: Iterable[tuple[str, str, float]],
+        at: datetime | None = None,
+        db: Session | None = None,
+    ) -> int:
+        """
+        写入一组同一时刻的采样并更新聚合桶。
+
+        Args:
+            samples: (source, channel, price) 列表
+            at: 采样时间，默认当前时间
+            db: 复用调用方的会话（会在其上提交）；默认使用独立会话
+
+        Returns:
+            写入的采样数
+        """
+        samples = [(source, channel, float(price)) for source, channel, price in samples]
+        if not samples:
+            return 0
+        ts = _to_utc_naive(at)
+
+        if db is not None:
+            self._write(db, samples, ts)
+            db.commit()
+            return len(samples)
+
+        session = self._session()
+        try:
+            # 并发写入同一个新桶时唯一索引冲突，回滚后重试一次即会走更新分支
+            for attempt in range(2):
+                try:
+                    self._write(session, samples, ts)
+                    session.commit()
+                    break
+                except IntegrityError:
+                    session.rollback()
+                    if attempt:
+                        raise
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        return len(samples)
+
+    @staticmethod
+    def _write(db: Session, samples: list[tuple[str, str, float]], ts: datetime) -> None:
+        from ..database import RateRollup, RateSample
+
+        for source, channel, price in samples:
+            db.add(RateSample(source=source, channel=channel, ts=ts, price=price))
+            for resolution in RESOLUTIONS:
+                start = bucket_start(ts, resolution)
+                row = (
+                    db.query(RateRollup)
+                    .filter_by(source=source, channel=channel, resolution=resolution, bucket_start=start)
+                    .first()
+                )
+                if row is None:
+                    db.add(
+                        RateRollup(
+                            source=source,
+                            channel=channel,
+                            resolution=resolution,
+                            bucket_start=start,
+                            open=price,
+                            high=price,
+                            low=price,
+                            close=price,
+                            total=price,
+                            count=1,
+                            first_at=ts,
+                            last_at=ts,
+                        )
+                    )
+                    db.flush()
+                    continue
+
+                row.high = max(row.high, price)
+                row.low = min(row.low, price)
+                row.total += price
+                row.count += 1
+                if ts >= row.last_at:
+                    row.close = price
+                    row.last_at = ts
+                if ts < row.first_at:
+                    row.open = price
+                    row.first_at = ts
+
+    def query(
+        self,
+        source: str,
+        channel: str,
+        start: datetime,
+        end: datetime,
+        resolution: str | None = None,
+    ) -> tuple[str, list[dict[str, Any]]]:
+        """
+        读取 [start, end) 区间内的聚合桶。
+
+        Args:
+            resolution: 1m / 1h / 1d，默认按区间跨度自动选择
+
+        Returns:
+            (实际使用的粒度, 按时间升序的桶列表)
+
+        Raises:
+            ValueError: 粒度未知、区间无效或桶数超过 MAX_POINTS
+        """
+        from ..database import RateRollup
+
+        start, end = _to_utc_naive(start), _to_utc_naive(end)
+        if end <= start:
+            raise ValueError("end must be after start")
+        resolution = resolution or choose_resolution(start, end)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"unknown resolution: {resolution}")
+        if (end - start) / RESOLUTIONS[resolution] > MAX_POINTS:
+            raise ValueError(f"too many points for resolution {resolution} (max {MAX_POINTS})")
+
+        session = self._session()
+        try:
+            rows = (
+                session.query(RateRollup)
+                .filter(
+                    RateRollup.source == source,
+                    RateRollup.channel == channel,
+                    RateRollup.resolution == resolution,
+                    RateRollup.bucket_start >= bucket_start(start, resolution),
+                    RateRollup.bucket_start < end,
+                )
+                .order_by(RateRollup.bucket_start)
+                .all()
+            )
+            return resolution, [
+                {
+                    "ts": row.bucket_start.replace(tzinfo=UTC).isoformat(),
+                    "open": row.open,
+                    "high": row.high,
+                    "low": row.low,
+                    "close": row.close,
+                    "avg": round(row.total / row.count, 6) if row.count else None,
+                    "count": row.count,
+                }
+                for row in rows
+            ]
+        finally:
+            session.close()
+
+    def rate_at(self, source: str, channel: str, at: datetime) -> float | None:
+        """
+        指定时刻生效的汇率（该时刻之前的最后一次采样）。
+
+        原始采样已过保留期时依次使用 1m / 1h / 1d 聚合桶中最后一个在该时刻之前结束的桶的收盘价，
+        误差不超过一个桶。
+        """
+        from ..database import RateRollup, RateSample
+
+        at = _to_utc_naive(at)
+        session = self._session()
+        try:
+            sample = (
+                session.query(RateSample)
+                .filter(RateSample.source == source, RateSample.channel == channel, RateSample.ts <= at)
+                .order_by(RateSample.ts.desc())
+                .first()
+            )
+            if sample is not None:
+                return sample.price
+
+            for resolution in RESOLUTIONS:
+                row = (
+                    session.query(RateRollup)
+                    .filter(
+                        RateRollup.source == source,
+                        RateRollup.channel == channel,
+                        RateRollup.resolution == resolution,
+                        RateRollup.bucket_start <= at,
+                        RateRollup.last_at <= at,
+                    )
+                    .order_by(RateRollup.bucket_start.desc())
+                    .first()
+                )
+                if row is not None:
+                    return row.close
+            return None
+        finally:
+            session.close()
+
+    def prune(self, now: datetime | None = None) -> int:
+        """按保留期清理原始采样与聚合桶，返回删除的行数。"""
+        from ..database import RateRollup, RateSample
+
+        now = _to_utc_naive(now)
+        deleted = 0
+        session = self._session()
+        try:
+            for level, days in _retention_days().items():
+                if days <= 0:
+                    continue
+                cutoff = now - timedelta(days=days)
+                if level == "raw":
+                    deleted += (
+                        session.query(RateSample).filter(RateSample.ts < cutoff).delete(synchronize_session=False)
+                    )
+                else:
+                    deleted += (
+                        session.query(RateRollup)
+                        .filter(RateRollup.resolution == level, RateRollup.bucket_start < cutoff)
+                        .delete(synchronize_session=False)
+                    )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        if deleted:
+            logger.info("清理过期汇率历史 %s 条", deleted)
+        return deleted
+
+
+# 全局实例
+rate_history = RateHistoryStore()
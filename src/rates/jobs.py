@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 
 from telegram.ext import ContextTypes
 
+from .history import rate_history
 from .service import refresh_usdt_rates
 
 
@@ -19,3 +21,12 @@ async def refresh_usdt_rates_job(context: ContextTypes.DEFAULT_TYPE) -> None:
         await refresh_usdt_rates()
     except Exception as exc:  # pragma: no cover - defensive guard
         logger.warning("USDT 汇率刷新任务失败: %s", exc)
+
+
+async def prune_rate_history_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Periodic task that drops rate history past its retention."""
+    del context
+    try:
+        await asyncio.to_thread(rate_history.prune)
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.warning("汇率历史清理任务失败: %s", exc)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 from datetime import UTC, datetime
@@ -28,6 +29,10 @@ PAYMENT_METHODS = {
 }
 
 _redis_client: redis.Redis | None = None
+# 最近一次刷新结果的进程内副本（Redis 不可用时兜底，避免每次读取都请求 OKX）
+_local_rates: dict[str, Any] | None = None
+# 缓存未命中时正在进行的刷新，并发读取共享同一次 OKX 请求
+_refresh_task: asyncio.Task | None = None
 
 
 async def _get_redis_client() -> redis.Redis | None:
@@ -44,72 +49,158 @@ async def _get_redis_client() -> redis.Redis | None:
     return _redis_client
 
 
-async def fetch_usdt_cny_from_okx() -> dict[str, dict[str, Any]]:
-    """从 OKX C2C 获取不同支付渠道的 USDT-CNY 报价与商家列表。"""
-    channel_prices: dict[str, dict[str, Any]] = {key: {"min_price": None, "merchants": []} for key in PAYMENT_METHODS}
+class LatencyHistogram:
+    """按渠道统计请求延迟分布（累计计数直方图）。"""
+
+    BUCKETS: tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+    def __init__(self) -> None:
+        self._counts: dict[str, list[int]] = {}
+        self._sums: dict[str, float] = {}
+        self._failures: dict[str, int] = {}
+
+    def observe(self, channel: str, seconds: float, *, ok: bool = True) -> None:
+        counts = self._counts.setdefault(channel, [0] * len(self.BUCKETS))
+        for index, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                counts[index] += 1
+                break
+        self._sums[channel] = self._sums.get(channel, 0.0) + seconds
+        if not ok:
+            self._failures[channel] = self._failures.get(channel, 0) + 1
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        result: dict[str, dict[str, Any]] = {}
+        for channel, counts in self._counts.items():
+            total = sum(counts)
+            result[channel] = {
+                "count": total,
+                "failures": self._failures.get(channel, 0),
+                "avg": round(self._sums[channel] / total, 4) if total else None,
+                "buckets": {
+                    ("+Inf" if bound == float("inf") else str(bound)): count
+                    for bound, count in zip(self.BUCKETS, counts, strict=True)
+                },
+            }
+        return result
+
+    def reset(self) -> None:
+        self._counts.clear()
+        self._sums.clear()
+        self._failures.clear()
+
+
+# 各渠道请求延迟直方图
+okx_latency_histogram = LatencyHistogram()
+
+# 各渠道最近一次成功获取的报价，渠道请求失败时沿用
+_last_known_channels: dict[str, dict[str, Any]] = {}
+
+
+def _parse_channel_payload(channel: str, payload: dict[str, Any]) -> dict[str, Any] | None:
+    """解析单个渠道的 OKX 响应，无可用报价时返回 None。"""
+    code = str(payload.get("code", ""))
+    if code != "0":
+        msg = payload.get("msg", "OKX response error")
+        logger.warning("OKX C2C 返回错误 (%s): %s %s", channel, code, msg)
+        return None
 
-    from src.common.http_utils import get_with_retry
+    data = payload.get("data") or {}
+    items = None
+    if isinstance(data, dict):
+        items = data.get("sell") or data.get("items") or data.get("buy")
 
-    for channel, payment_method in PAYMENT_METHODS.items():
-        params = {**OKX_C2C_COMMON_PARAMS, "paymentMethod": payment_method}
+    if not isinstance(items, list) or not items:
+        logger.warning("OKX C2C 数据为空 (%s): %s", channel, json.dumps(payload)[:200])
+        return None
+
+    merchants: list[dict[str, Any]] = []
+    for entry in items[:10]:
+        if not isinstance(entry, dict):
+            continue
+        price_str = entry.get("price")
         try:
-            # 只读查询操作，可使用自动重试
-            response = await get_with_retry(
+            price_val = round(float(price_str), 4)
+        except (TypeError, ValueError):
+            logger.warning("OKX C2C 价格解析失败 (%s): %s", channel, price_str)
+            continue
+
+        name = entry.get("nickName") or entry.get("merchantId") or entry.get("publicUserId") or "商家"
+        merchants.append(
+            {
+                "price": price_val,
+                "name": name,
+            }
+        )
+
+    if not merchants:
+        return None
+
+    return {"min_price": merchants[0]["price"], "merchants": merchants}
+
+
+async def _fetch_okx_channel(channel: str, payment_method: str) -> dict[str, Any] | None:
+    """获取单个渠道报价（带整体超时），失败返回 None。"""
+    from src.common.http_utils import get_with_retry
+
+    params = {**OKX_C2C_COMMON_PARAMS, "paymentMethod": payment_method}
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    result = None
+    try:
+        # 只读查询操作，可使用自动重试；整体耗时受渠道超时约束，慢渠道不拖累其他渠道
+        response = await asyncio.wait_for(
+            get_with_retry(
                 OKX_C2C_URL,
                 params=params,
                 timeout=settings.okx_timeout_secs,
                 retries=2,
-            )
-            response.raise_for_status()
-            payload = response.json()
-        except Exception as exc:  # pragma: no cover - 网络异常
-            logger.warning("OKX C2C 请求失败 (%s): %s", channel, exc)
-            continue
-
-        code = str(payload.get("code", ""))
-        if code != "0":
-            msg = payload.get("msg", "OKX response error")
-            logger.warning("OKX C2C 返回错误 (%s): %s %s", channel, code, msg)
-            continue
+            ),
+            timeout=settings.okx_channel_deadline_secs,
+        )
+        response.raise_for_status()
+        result = _parse_channel_payload(channel, response.json())
+    except Exception as exc:  # pragma: no cover - 网络异常
+        logger.warning("OKX C2C 请求失败 (%s): %s", channel, str(exc) or type(exc).__name__)
+    finally:
+        okx_latency_histogram.observe(channel, loop.time() - started, ok=result is not None)
 
-        data = payload.get("data") or {}
-        items = None
-        if isinstance(data, dict):
-            items = data.get("sell") or data.get("items") or data.get("buy")
+    return result
 
-        if not isinstance(items, list) or not items:
-            logger.warning("OKX C2C 数据为空 (%s): %s", channel, json.dumps(payload)[:200])
-            continue
 
-        merchants: list[dict[str, Any]] = []
-        for entry in items[:10]:
-            if not isinstance(entry, dict):
-                continue
-            price_str = entry.get("price")
-            try:
-                price_val = round(float(price_str), 4)
-            except (TypeError, ValueError):
-                logger.warning("OKX C2C 价格解析失败 (%s): %s", channel, price_str)
-                continue
-
-            name = entry.get("nickName") or entry.get("merchantId") or entry.get("publicUserId") or "商家"
-            merchants.append(
-                {
-                    "price": price_val,
-                    "name": name,
-                }
-            )
-
-        if merchants:
-            channel_prices[channel]["min_price"] = merchants[0]["price"]
-            channel_prices[channel]["merchants"] = merchants
-
-    if not any(info.get("min_price") is not None for info in channel_prices.values()):
+async def fetch_usdt_cny_from_okx() -> dict[str, dict[str, Any]]:
+    """
+    从 OKX C2C 并发获取不同支付渠道的 USDT-CNY 报价与商家列表。
+
+    某个渠道失败时沿用该渠道上次成功的报价（标记 stale）；所有渠道均无新数据时抛出 ValueError。
+    """
+    results = await asyncio.gather(
+        *(_fetch_okx_channel(channel, payment_method) for channel, payment_method in PAYMENT_METHODS.items())
+    )
+
+    channel_prices: dict[str, dict[str, Any]] = {}
+    fresh = 0
+    for channel, result in zip(PAYMENT_METHODS, results, strict=True):
+        if result is not None:
+            fresh += 1
+            _last_known_channels[channel] = result
+            channel_prices[channel] = result
+        elif channel in _last_known_channels:
+            channel_prices[channel] = {**_last_known_channels[channel], "stale": True}
+        else:
+            channel_prices[channel] = {"min_price": None, "merchants": []}
+
+    if not fresh:
         raise ValueError("OKX C2C 返回为空或不可用")
 
     return channel_prices
 
 
+def get_okx_latency_stats() -> dict[str, dict[str, Any]]:
+    """各渠道 OKX 请求延迟直方图。"""
+    return okx_latency_histogram.snapshot()
+
+
 def build_rates_payload(channel_prices: dict[str, dict[str, Any]]) -> dict[str, Any]:
     """根据渠道报价构建缓存载荷。"""
     updated_at = datetime.now(UTC).isoformat()
@@ -136,12 +227,35 @@ def build_rates_payload(channel_prices: dict[str, dict[str, Any]]) -> dict[str,
         details[key] = {
             "merchants": channel_info.get("merchants", []),
         }
+        if channel_info.get("stale"):
+            details[key]["stale"] = True
 
     payload["details"] = details
 
     return payload
 
 
+async def _record_history(channel_prices: dict[str, dict[str, Any]]) -> None:
+    """把本次获取到的新报价写入汇率历史（沿用旧报价的渠道不重复记录）。"""
+    if not settings.rate_history_enabled:
+        return
+
+    from .history import SOURCE_OKX, rate_history
+
+    samples = [
+        (SOURCE_OKX, channel, info["min_price"])
+        for channel, info in channel_prices.items()
+        if info.get("min_price") is not None and not info.get("stale")
+    ]
+    if not samples:
+        return
+
+    try:
+        await asyncio.to_thread(rate_history.record, samples)
+    except Exception as exc:
+        logger.warning("写入汇率历史失败: %s", exc)
+
+
 async def refresh_usdt_rates(redis_client: redis.Redis | None = None) -> dict[str, Any] | None:
     """刷新 USDT 汇率并写入 Redis。"""
     try:
@@ -151,6 +265,9 @@ async def refresh_usdt_rates(redis_client: redis.Redis | None = None) -> dict[st
         return None
 
     payload = build_rates_payload(channel_prices)
+    global _local_rates
+    _local_rates = payload
+    await _record_history(channel_prices)
 
     if redis_client is None:
         redis_client = await _get_redis_client()
@@ -172,28 +289,49 @@ async def refresh_usdt_rates(redis_client: redis.Redis | None = None) -> dict[st
     return payload
 
 
+def rates_age_seconds(payload: dict[str, Any]) -> float | None:
+    """缓存载荷距今的秒数，无法解析 updated_at 时返回 None。"""
+    try:
+        updated_at = datetime.fromisoformat(payload["updated_at"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=UTC)
+    return max(0.0, (datetime.now(UTC) - updated_at).total_seconds())
+
+
+def _get_local_rates() -> dict[str, Any] | None:
+    """未过期的进程内汇率副本。"""
+    if _local_rates is None:
+        return None
+    age = rates_age_seconds(_local_rates)
+    if age is None or age > settings.usdt_rates_cache_ttl:
+        return None
+    return _local_rates
+
+
 async def get_cached_rates(redis_client: redis.Redis | None = None) -> dict[str, Any] | None:
-    """读取 Redis 中缓存的汇率。"""
+    """读取缓存的汇率（优先 Redis，不可用时使用进程内副本）。"""
     if redis_client is None:
         redis_client = await _get_redis_client()
 
     if redis_client is None:
-        return None
+        return _get_local_rates()
 
     try:
         raw = await redis_client.get(USDT_RATES_REDIS_KEY)
     except Exception as exc:
         logger.warning("读取 Redis 失败: %s", exc)
-        return None
+        return _get_local_rates()
 
     if not raw:
-        return None
+        return _get_local_rates()
 
     try:
         return json.loads(raw)
     except json.JSONDecodeError:
         logger.warning("Redis 中的 USDT 汇率数据格式错误，忽略。")
-        return None
+        return _get_local_rates()
 
 
 async def get_or_refresh_rates(
@@ -201,10 +339,22 @@ async def get_or_refresh_rates(
     *,
     force_refresh: bool = False,
 ) -> dict[str, Any] | None:
-    """优先读取缓存，必要时刷新。"""
-    if not force_refresh:
-        cached = await get_cached_rates(redis_client)
-        if cached:
-            return cached
+    """优先读取缓存，必要时刷新（并发的缓存未命中只触发一次刷新）。"""
+    if force_refresh:
+        return await refresh_usdt_rates(redis_client)
+
+    cached = await get_cached_rates(redis_client)
+    if cached:
+        return cached
+
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.ensure_future(refresh_usdt_rates(redis_client))
+    return await asyncio.shield(_refresh_task)
+
 
-    return await refresh_usdt_rates(redis_client)
+def reset_rates_cache() -> None:
+    """清空进程内汇率副本（测试用）。"""
+    global _local_rates, _refresh_task
+    _local_rates = None
+    _refresh_task = None
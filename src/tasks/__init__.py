@@ -1,7 +1,16 @@
 """后台任务模块"""
 
 from .energy_sync import EnergySyncTask, get_energy_sync_task, run_energy_sync
+from .expiry_scheduler import HierarchicalTimerWheel, OrderExpiryScheduler, order_expiry_scheduler
 from .order_expiry import OrderExpiryTask
 
 
-__all__ = ["EnergySyncTask", "OrderExpiryTask", "get_energy_sync_task", "run_energy_sync"]
+__all__ = [
+    "EnergySyncTask",
+    "HierarchicalTimerWheel",
+    "OrderExpiryScheduler",
+    "OrderExpiryTask",
+    "get_energy_sync_task",
+    "order_expiry_scheduler",
+    "run_energy_sync",
+]
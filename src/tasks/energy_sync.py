@@ -2,10 +2,18 @@
 能量订单状态同步任务
 
 定期从 trxfast.com 查询订单状态，同步到本地数据库
+
+- 日志对账模式（默认）：从持久化游标开始分页拉取 /api/logs，批量匹配所有待处理订单，
+  API 调用次数随新事件数量增长，而不是随待处理订单数量增长
+- 单轮达到页数上限时保留游标并记录下一页，下一轮从该页继续（日志按时间倒序，不会跳过旧记录）
+- 日志未覆盖的订单才回退到逐单 /api/orderinfo 查询
+- 订单查询在信号量限制下并发执行，复用同一个带连接池的 API 客户端
+- 每轮同步的状态变更在同一个数据库事务中批量提交
 """
 
+import asyncio
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import TYPE_CHECKING, Any
 
 from src.common.db_manager import get_db_context, get_db_context_readonly
@@ -24,23 +32,49 @@ logger = logging.getLogger(__name__)
 SYNC_INTERVAL_MINUTES = 5  # 同步间隔（分钟）
 SYNC_ORDER_AGE_HOURS = 24  # 只同步最近 N 小时内的订单
 MAX_ORDERS_PER_SYNC = 50  # 每次同步最大订单数
+SYNC_CONCURRENCY = 10  # 并发查询订单数上限
+LOG_PAGE_SIZE = 100  # 日志分页大小
+MAX_LOG_PAGES = 50  # 每轮最多拉取的日志页数
+LOG_CURSOR_SETTING_KEY = "energy_sync_log_cursor"  # 日志游标（YYYY-MM-DD）持久化键
+LOG_PAGE_SETTING_KEY = "energy_sync_log_page"  # 游标下继续拉取的起始页持久化键
 
 
 class EnergySyncTask:
     """能量订单状态同步任务"""
 
-    def __init__(self):
+    def __init__(self, concurrency: int = SYNC_CONCURRENCY):
         self._bot: Bot | None = None
+        self._concurrency = concurrency
+        # 跨轮次复用的 API 客户端（内部 httpx 连接池保持长连接）
+        self._client: EnergyAPIClient | None = None
 
     def set_bot(self, bot: "Bot") -> None:
         """设置 Bot 实例用于发送通知"""
         self._bot = bot
         logger.info("EnergySyncTask: Bot 实例已设置")
 
+    def _get_client(self) -> EnergyAPIClient:
+        """获取共享的 API 客户端（延迟创建）"""
+        if self._client is None:
+            self._client = EnergyAPIClient(
+                username=settings.energy_api_username,
+                password=settings.energy_api_password,
+                base_url=settings.energy_api_base_url,
+                backup_url=settings.energy_api_backup_url,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """关闭共享的 API 客户端（进程退出时调用）"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
     async def sync_orders(self) -> None:
         """同步待处理订单的状态（主入口）"""
         try:
-            orders = self._get_pending_orders()
+            log_mode = settings.energy_sync_log_mode
+            orders = self._get_pending_orders(all_pending=log_mode)
 
             if not orders:
                 logger.debug("没有需要同步的能量订单")
@@ -48,36 +82,210 @@ class EnergySyncTask:
 
             logger.info(f"开始同步 {len(orders)} 个能量订单状态")
 
-            async with EnergyAPIClient(
-                username=settings.energy_api_username,
-                password=settings.energy_api_password,
-                base_url=settings.energy_api_base_url,
-                backup_url=settings.energy_api_backup_url,
-            ) as client:
-                for order in orders:
-                    await self._sync_single_order(client, order)
+            client = self._get_client()
+            updates: list[tuple[dict[str, Any], str, str]] = []
+            new_cursor: tuple[date, int] | None = None
+            poll_orders = orders
+
+            if log_mode:
+                log_updates, uncovered, new_cursor = await self._reconcile_from_logs(client, orders)
+                updates.extend(log_updates)
+                poll_orders = self._select_poll_candidates(uncovered)
+
+            updates.extend(await self._poll_orders(client, poll_orders))
+
+            if updates:
+                # 单个事务批量提交本轮所有状态变更
+                self._update_orders_status(updates)
 
-            logger.info("能量订单状态同步完成")
+            if new_cursor is not None:
+                self._save_log_cursor(*new_cursor)
+
+            # 提交成功后再通知用户
+            for order, new_status, tx_hash in updates:
+                if new_status in ("COMPLETED", "FAILED"):
+                    await self._notify_user(order, new_status, tx_hash)
+
+            logger.info(
+                f"能量订单状态同步完成：待处理 {len(orders)} 个，逐单查询 {len(poll_orders)} 个，更新 {len(updates)} 个"
+            )
 
         except Exception as e:
             logger.error(f"能量订单同步失败: {e}", exc_info=True)
             collect_error("energy_sync", str(e), exception=e)
 
-    def _get_pending_orders(self) -> list[dict[str, Any]]:
-        """获取需要同步的订单"""
+    async def _poll_orders(
+        self, client: EnergyAPIClient, orders: list[dict[str, Any]]
+    ) -> list[tuple[dict[str, Any], str, str]]:
+        """在并发上限内逐单查询订单状态，返回有变化的订单"""
+        if not orders:
+            return []
+
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def _bounded_sync(order: dict[str, Any]) -> tuple[dict[str, Any], str, str] | None:
+            async with semaphore:
+                return await self._sync_single_order(client, order)
+
+        results = await asyncio.gather(*(_bounded_sync(order) for order in orders))
+        return [result for result in results if result is not None]
+
+    async def _reconcile_from_logs(
+        self, client: EnergyAPIClient, orders: list[dict[str, Any]]
+    ) -> tuple[list[tuple[dict[str, Any], str, str]], list[dict[str, Any]], tuple[date, int] | None]:
+        """
+        用供应商日志批量对账
+
+        Returns:
+            (状态有变化的订单, 日志未覆盖的订单, (新游标, 下一轮起始页))；日志拉取失败时全部视为未覆盖
+        """
+        saved = self._load_log_cursor()
+        if saved is None:
+            cursor, start_page = (datetime.now() - timedelta(hours=SYNC_ORDER_AGE_HOURS)).date(), 1
+        else:
+            cursor, start_page = saved
+
+        try:
+            entries, new_cursor = await self._fetch_log_entries(client, cursor, start_page)
+        except Exception as e:
+            logger.warning(f"拉取能量日志失败，回退为逐单查询: {e}")
+            return [], orders, None
+
+        updates: list[tuple[dict[str, Any], str, str]] = []
+        uncovered: list[dict[str, Any]] = []
+        for order in orders:
+            entry = entries.get(str(order["api_order_id"]))
+            if entry is None:
+                uncovered.append(order)
+                continue
+
+            new_status = self._map_api_status(entry)
+            if new_status != order["status"]:
+                logger.info(f"订单 {order['order_id']} 状态更新(日志): {order['status']} -> {new_status}")
+                updates.append((order, new_status, entry.get("hash", "")))
+
+        logger.info(
+            f"能量日志对账：游标 {cursor.isoformat()} 第 {start_page} 页起，日志订单 {len(entries)} 个，"
+            f"命中 {len(orders) - len(uncovered)} 个，更新 {len(updates)} 个"
+        )
+        return updates, uncovered, new_cursor
+
+    async def _fetch_log_entries(
+        self, client: EnergyAPIClient, cursor: date, start_page: int = 1
+    ) -> tuple[dict[str, dict], tuple[date, int]]:
+        """
+        从游标日期的 start_page 页开始分页拉取日志
+
+        日志按时间倒序分页，未读完的页都比已读的旧，因此达到页数上限时不能推进游标，
+        只记录下一页，下一轮从该页继续。期间新增的日志会让旧记录后移，最多重复读取，不会遗漏。
+
+        Returns:
+            (API 订单号 -> 最新日志记录, (新游标, 下一轮起始页))
+        """
+        entries: dict[str, dict] = {}
+        latest = cursor
+
+        for page in range(start_page, start_page + MAX_LOG_PAGES):
+            data = await client.query_logs(start_date=cursor.isoformat(), page=page, page_size=LOG_PAGE_SIZE)
+            items = self._extract_log_items(data)
+
+            for item in items:
+                api_order_id = item.get("orderid") or item.get("order_id")
+                # 只关心带状态的订单记录（充值等其他日志跳过）
+                if not api_order_id or "status" not in item:
+                    continue
+
+                key = str(api_order_id)
+                previous = entries.get(key)
+                # 同一订单多条记录时，终态优先于处理中
+                if previous is None or self._map_api_status(previous) == "PROCESSING":
+                    entries[key] = item
+
+                item_date = self._parse_log_date(item)
+                if item_date and item_date > latest:
+                    latest = item_date
+
+            if len(items) < LOG_PAGE_SIZE:
+                break
+        else:
+            next_page = start_page + MAX_LOG_PAGES
+            logger.warning(f"能量日志单轮超过 {MAX_LOG_PAGES} 页，下一轮从第 {next_page} 页继续")
+            return entries, (cursor, next_page)
+
+        return entries, (min(latest, date.today()), 1)
+
+    @staticmethod
+    def _extract_log_items(data: Any) -> list[dict]:
+        """兼容不同的日志分页结构（list/data/records）"""
+        if isinstance(data, list):
+            items = data
+        elif isinstance(data, dict):
+            items = data.get("list") or data.get("data") or data.get("records") or []
+        else:
+            items = []
+        return [item for item in items if isinstance(item, dict)]
+
+    @staticmethod
+    def _parse_log_date(item: dict) -> date | None:
+        """解析日志记录的日期（用于推进游标）"""
+        raw = item.get("create_time") or item.get("time") or item.get("created_at")
+        if not raw:
+            return None
+        try:
+            if isinstance(raw, int | float):
+                # 兼容秒/毫秒时间戳
+                return datetime.fromtimestamp(raw / 1000 if raw > 1e12 else raw).date()
+            return date.fromisoformat(str(raw)[:10])
+        except (ValueError, OverflowError, OSError):
+            return None
+
+    def _select_poll_candidates(self, orders: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """日志未覆盖的订单中，只对最近的订单逐单查询"""
         cutoff_time = datetime.now() - timedelta(hours=SYNC_ORDER_AGE_HOURS)
+        recent = [o for o in orders if o.get("created_at") is None or o["created_at"] >= cutoff_time]
+        return recent[:MAX_ORDERS_PER_SYNC]
+
+    def _load_log_cursor(self) -> tuple[date, int] | None:
+        """读取持久化的日志游标与起始页"""
+        from src.bot_admin.config_manager import config_manager
+
+        raw = config_manager.get_setting(LOG_CURSOR_SETTING_KEY, "")
+        try:
+            cursor = date.fromisoformat(raw) if raw else None
+        except ValueError:
+            logger.warning(f"无效的能量日志游标: {raw}")
+            return None
+        if cursor is None:
+            return None
+
+        raw_page = config_manager.get_setting(LOG_PAGE_SETTING_KEY, "1")
+        page = int(raw_page) if raw_page.isdigit() else 1
+        return cursor, max(page, 1)
+
+    def _save_log_cursor(self, cursor: date, page: int = 1) -> None:
+        """持久化日志游标与下一轮起始页"""
+        from src.bot_admin.config_manager import config_manager
 
+        config_manager.set_setting(LOG_CURSOR_SETTING_KEY, cursor.isoformat(), 0, "能量日志对账游标")
+        config_manager.set_setting(LOG_PAGE_SETTING_KEY, str(page), 0, "能量日志对账起始页")
+
+    def _get_pending_orders(self, all_pending: bool = False) -> list[dict[str, Any]]:
+        """
+        获取需要同步的订单
+
+        Args:
+            all_pending: 日志对账模式下返回全部待处理订单（不限时间和数量）
+        """
         with get_db_context_readonly() as db:
-            orders = (
-                db.query(DBEnergyOrder)
-                .filter(
-                    DBEnergyOrder.status.in_(["PENDING", "PROCESSING"]),
-                    DBEnergyOrder.api_order_id.isnot(None),  # 必须有 API 订单号
-                    DBEnergyOrder.created_at >= cutoff_time,
-                )
-                .limit(MAX_ORDERS_PER_SYNC)
-                .all()
+            query = db.query(DBEnergyOrder).filter(
+                DBEnergyOrder.status.in_(["PENDING", "PROCESSING"]),
+                DBEnergyOrder.api_order_id.isnot(None),  # 必须有 API 订单号
             )
+            if not all_pending:
+                cutoff_time = datetime.now() - timedelta(hours=SYNC_ORDER_AGE_HOURS)
+                query = query.filter(DBEnergyOrder.created_at >= cutoff_time).limit(MAX_ORDERS_PER_SYNC)
+
+            orders = query.order_by(DBEnergyOrder.created_at.desc()).all()
 
             # 提取需要的字段避免 detached instance 问题
             return [
@@ -87,12 +295,20 @@ class EnergySyncTask:
                     "status": o.status,
                     "user_id": o.user_id,
                     "energy_amount": o.energy_amount,
+                    "created_at": o.created_at,
                 }
                 for o in orders
             ]
 
-    async def _sync_single_order(self, client: EnergyAPIClient, order: dict[str, Any]) -> None:
-        """同步单个订单状态"""
+    async def _sync_single_order(
+        self, client: EnergyAPIClient, order: dict[str, Any]
+    ) -> tuple[dict[str, Any], str, str] | None:
+        """
+        查询单个订单状态
+
+        Returns:
+            状态有变化时返回 (订单, 新状态, 交易哈希)，否则返回 None
+        """
         order_id = order["order_id"]
         api_order_id = order["api_order_id"]
         current_status = order["status"]
@@ -102,7 +318,7 @@ class EnergySyncTask:
 
             if response.data is None:
                 logger.warning(f"订单 {order_id} API 返回数据为空")
-                return
+                return None
 
             # 记录 API 返回便于调试
             logger.debug(f"订单 {order_id} API 返回: {response.data}")
@@ -113,12 +329,8 @@ class EnergySyncTask:
 
             # 状态有变化才更新
             if new_status != current_status:
-                self._update_order_status(order_id, new_status, tx_hash)
                 logger.info(f"订单 {order_id} 状态更新: {current_status} -> {new_status}")
-
-                # 完成或失败时通知用户
-                if new_status in ("COMPLETED", "FAILED"):
-                    await self._notify_user(order, new_status, tx_hash)
+                return order, new_status, tx_hash
 
         except EnergyAPIError as e:
             if e.code == EnergyAPIClient.CODE_ORDER_NOT_FOUND:  # 10004
@@ -128,6 +340,8 @@ class EnergySyncTask:
         except Exception as e:
             logger.error(f"同步订单 {order_id} 异常: {e}")
 
+        return None
+
     def _map_api_status(self, data: dict) -> str:
         """
         映射 API 返回状态到本地数据库状态
@@ -152,11 +366,14 @@ class EnergySyncTask:
         else:
             return "PROCESSING"
 
-    def _update_order_status(self, order_id: str, new_status: str, tx_hash: str = None) -> None:
-        """更新订单状态"""
+    def _update_orders_status(self, updates: list[tuple[dict[str, Any], str, str]]) -> None:
+        """在单个事务中批量更新订单状态"""
+        changes = {order["order_id"]: (new_status, tx_hash) for order, new_status, tx_hash in updates}
+
         with get_db_context() as db:
-            order = db.query(DBEnergyOrder).filter_by(order_id=order_id).first()
-            if order:
+            orders = db.query(DBEnergyOrder).filter(DBEnergyOrder.order_id.in_(list(changes))).all()
+            for order in orders:
+                new_status, tx_hash = changes[order.order_id]
                 order.status = new_status
                 if new_status == "COMPLETED":
                     order.completed_at = datetime.now()
@@ -0,0 +1,323 @@
+"""
+订单定时过期调度器
+
+使用进程内分层时间轮（Hierarchical Timer Wheel）在订单截止时间到达时精确触发过期处理，
+并以 Redis ZSET 持久化截止时间，进程重启后自动恢复。
+
+原有的分钟级扫描（OrderExpiryTask.check_and_expire_orders）保留为低频对账兜底。
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+
+
+logger = logging.getLogger(__name__)
+
+# Redis ZSET：member = order_id，score = 截止时间（Unix 时间戳，秒）
+EXPIRY_SCHEDULE_KEY = "order_expiry:schedule"
+
+# 默认时间轮配置：1 秒精度，三层分别覆盖 60 秒 / 60 分钟 / 24 小时
+DEFAULT_TICK_SECONDS = 1.0
+DEFAULT_WHEEL_SIZES = (60, 60, 24)
+# 从 Redis ZSET 同步其他实例登记的订单的间隔（秒）：多实例部署时只有领导者运行调度循环
+RESYNC_INTERVAL_SECONDS = 30.0
+
+
+class HierarchicalTimerWheel:
+    """
+    分层时间轮
+
+    - add/cancel 均为 O(1)
+    - advance 每个 tick 只处理当前槽位，高层槽位到期时级联下沉到低层
+    - 超出最高层范围的定时器放入溢出集合，每转完一整圈重新分配
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float = DEFAULT_TICK_SECONDS,
+        wheel_sizes: tuple[int, ...] = DEFAULT_WHEEL_SIZES,
+        now: float | None = None,
+    ):
+        if tick_seconds <= 0:
+            raise ValueError("tick_seconds must be positive")
+        if not wheel_sizes or any(size < 2 for size in wheel_sizes):
+            raise ValueError("wheel_sizes must contain sizes >= 2")
+
+        self.tick_seconds = tick_seconds
+        self._sizes = wheel_sizes
+        # 每层一个槽位的跨度（以 tick 为单位）
+        self._spans: list[int] = []
+        span = 1
+        for size in wheel_sizes:
+            self._spans.append(span)
+            span *= size
+        # 整个时间轮覆盖的 tick 数
+        self._horizon = span
+
+        self._wheels: list[list[set[str]]] = [[set() for _ in range(size)] for size in wheel_sizes]
+        self._overflow: set[str] = set()
+        self._ready: set[str] = set()
+        # key -> (截止 tick, 截止时间戳)
+        self._timers: dict[str, tuple[int, float]] = {}
+        # key -> 当前所在的槽位集合（用于 O(1) 取消）
+        self._locations: dict[str, set[str]] = {}
+
+        start = time.time() if now is None else now
+        self._current_tick = int(start // tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._timers
+
+    def add(self, key: str, deadline: float) -> None:
+        """
+        添加（或替换）定时器
+
+        Args:
+            key: 定时器标识（订单号）
+            deadline: 截止时间（Unix 时间戳，秒）
+        """
+        self.cancel(key)
+        target_tick = math.ceil(deadline / self.tick_seconds)
+        self._timers[key] = (target_tick, deadline)
+        self._place(key)
+
+    def cancel(self, key: str) -> bool:
+        """取消定时器，返回是否存在"""
+        bucket = self._locations.pop(key, None)
+        if bucket is not None:
+            bucket.discard(key)
+        return self._timers.pop(key, None) is not None
+
+    def advance(self, now: float) -> list[str]:
+        """
+        推进时间轮到 now，返回所有已到期的定时器标识
+
+        Args:
+            now: 当前时间（Unix 时间戳，秒）
+        """
+        due: list[str] = []
+        self._collect(self._ready, due)
+
+        now_tick = int(now // self.tick_seconds)
+        while self._current_tick < now_tick:
+            self._current_tick += 1
+
+            if self._current_tick % self._horizon == 0 and self._overflow:
+                self._cascade(self._overflow)
+
+            # 从高层到低层依次级联
+            for level in range(len(self._sizes) - 1, 0, -1):
+                span = self._spans[level]
+                if self._current_tick % span == 0:
+                    slot = (self._current_tick // span) % self._sizes[level]
+                    self._cascade(self._wheels[level][slot])
+
+            slot = self._current_tick % self._sizes[0]
+            self._collect(self._wheels[0][slot], due)
+            self._collect(self._ready, due)
+
+        return due
+
+    def _place(self, key: str) -> None:
+        """根据剩余 tick 数将定时器放入对应层级的槽位"""
+        target_tick, _ = self._timers[key]
+        delta = target_tick - self._current_tick
+
+        if delta <= 0:
+            bucket = self._ready
+        elif delta >= self._horizon:
+            bucket = self._overflow
+        else:
+            bucket = self._overflow
+            for level, size in enumerate(self._sizes):
+                span = self._spans[level]
+                if delta < span * size:
+                    bucket = self._wheels[level][(target_tick // span) % size]
+                    break
+
+        bucket.add(key)
+        self._locations[key] = bucket
+
+    def _cascade(self, bucket: set[str]) -> None:
+        """将槽位中的定时器重新分配到更低层级"""
+        keys = list(bucket)
+        bucket.clear()
+        for key in keys:
+            self._place(key)
+
+    def _collect(self, bucket: set[str], due: list[str]) -> None:
+        """取出槽位中已到期的定时器"""
+        if not bucket:
+            return
+        keys = list(bucket)
+        bucket.clear()
+        for key in keys:
+            target_tick, _ = self._timers[key]
+            if target_tick <= self._current_tick:
+                self._timers.pop(key)
+                self._locations.pop(key, None)
+                due.append(key)
+            else:
+                # 防御：未到期的定时器重新放置
+                self._place(key)
+
+
+class OrderExpiryScheduler:
+    """
+    订单过期调度器
+
+    - schedule(): 订单创建时登记截止时间（时间轮 + Redis ZSET）
+    - cancel(): 订单支付/取消后移除
+    - start(): 从 Redis 恢复未到期订单并启动 tick 循环，到期时批量回调
+    """
+
+    def __init__(self, tick_seconds: float = DEFAULT_TICK_SECONDS):
+        self.redis_client = None
+        self.wheel = HierarchicalTimerWheel(tick_seconds=tick_seconds)
+        self.running = False
+        self._task: asyncio.Task | None = None
+        self._on_expire: Callable[[list[str]], Awaitable[object]] | None = None
+
+    async def connect(self):
+        """连接Redis（支持 Zeabur 连接字符串）"""
+        if not self.redis_client:
+            from ..common.redis_helper import create_redis_client
+
+            self.redis_client = create_redis_client(decode_responses=True)
+
+    async def disconnect(self):
+        """断开Redis连接"""
+        if self.redis_client:
+            await self.redis_client.close()
+            self.redis_client = None
+
+    async def schedule(self, order_id: str, expires_at: datetime) -> None:
+        """
+        登记订单截止时间
+
+        Redis 不可用时仅保留进程内定时器，由对账扫描兜底。
+        """
+        deadline = expires_at.timestamp()
+        self.wheel.add(order_id, deadline)
+
+        try:
+            await self.connect()
+            await self.redis_client.zadd(EXPIRY_SCHEDULE_KEY, {order_id: deadline})
+        except Exception as e:
+            logger.warning(f"持久化订单过期时间失败 (订单: {order_id}): {e}")
+
+    async def cancel(self, order_id: str) -> None:
+        """移除订单的过期定时器（订单已支付/取消时调用）"""
+        self.wheel.cancel(order_id)
+
+        try:
+            await self.connect()
+            await self.redis_client.zrem(EXPIRY_SCHEDULE_KEY, order_id)
+        except Exception as e:
+            logger.warning(f"移除订单过期定时器失败 (订单: {order_id}): {e}")
+
+    async def load_pending(self) -> int:
+        """从 Redis ZSET 恢复定时器（包括重启期间已到期的订单）"""
+        try:
+            await self.connect()
+            entries = await self.redis_client.zrange(EXPIRY_SCHEDULE_KEY, 0, -1, withscores=True)
+        except Exception as e:
+            logger.warning(f"从 Redis 恢复订单过期定时器失败: {e}")
+            return 0
+
+        for order_id, deadline in entries:
+            self.wheel.add(order_id, float(deadline))
+
+        logger.info(f"已恢复 {len(entries)} 个订单过期定时器")
+        return len(entries)
+
+    async def start(self, on_expire: Callable[[list[str]], Awaitable[object]]) -> None:
+        """
+        启动调度循环
+
+        Args:
+            on_expire: 到期回调，参数为到期订单号列表
+        """
+        if self.running:
+            return
+
+        self._on_expire = on_expire
+        await self.load_pending()
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info("✅ 订单过期调度器已启动")
+
+    async def stop(self) -> None:
+        """停止调度循环"""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        logger.info("订单过期调度器已停止")
+
+    async def tick(self, now: float | None = None) -> list[str]:
+        """推进时间轮并处理到期订单，返回本次到期的订单号"""
+        due = self.wheel.advance(time.time() if now is None else now)
+        if not due or self._on_expire is None:
+            return due
+
+        logger.info(f"订单过期调度器触发 {len(due)} 个到期订单")
+        try:
+            await self._on_expire(due)
+        except Exception as e:
+            # 失败的订单保留在 ZSET 中，由对账扫描或下次重启兜底
+            logger.error(f"订单过期回调失败: {e}", exc_info=True)
+            return due
+
+        try:
+            await self.connect()
+            await self.redis_client.zrem(EXPIRY_SCHEDULE_KEY, *due)
+        except Exception as e:
+            logger.warning(f"清理已到期订单定时器失败: {e}")
+
+        return due
+
+    async def resync(self) -> int:
+        """将 ZSET 中尚未在时间轮中的订单（由其他实例登记）加入时间轮，返回新增数量"""
+        try:
+            await self.connect()
+            entries = await self.redis_client.zrange(EXPIRY_SCHEDULE_KEY, 0, -1, withscores=True)
+        except Exception as e:
+            logger.warning(f"同步订单过期定时器失败: {e}")
+            return 0
+
+        added = 0
+        for order_id, deadline in entries:
+            if order_id not in self.wheel:
+                self.wheel.add(order_id, float(deadline))
+                added += 1
+        if added:
+            logger.debug(f"从 Redis 同步 {added} 个订单过期定时器")
+        return added
+
+    async def _run(self) -> None:
+        """tick 循环：每个 tick 仅推进时间轮，无到期订单时不访问数据库"""
+        last_resync = time.monotonic()
+        while self.running:
+            try:
+                await self.tick()
+                if time.monotonic() - last_resync >= RESYNC_INTERVAL_SECONDS:
+                    last_resync = time.monotonic()
+                    await self.resync()
+            except Exception as e:
+                logger.error(f"订单过期调度循环异常: {e}", exc_info=True)
+            await asyncio.sleep(self.wheel.tick_seconds)
+
+
+# 全局实例
+order_expiry_scheduler = OrderExpiryScheduler()
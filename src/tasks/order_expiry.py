@@ -1,8 +1,9 @@
 """
 订单超时自动处理任务
 
-定期检查数据库中的 PENDING 订单，自动将超时订单标记为 EXPIRED，
-并释放占用的 Redis 后缀（如果适用）。
+由订单过期调度器（expiry_scheduler）在截止时间到达时按订单号精确触发，
+将 PENDING 订单标记为 EXPIRED，并释放占用的 Redis 后缀（如果适用）。
+定期扫描数据库超时订单的 check_and_expire_orders 保留为低频对账兜底。
 
 注意：此模块使用异步方法，与 AsyncIOScheduler 兼容。
 """
@@ -104,6 +105,64 @@ class OrderExpiryTask:
 
         return stats
 
+    async def expire_orders_by_ids(self, order_ids: list[str]) -> dict:
+        """
+        按订单号处理到期订单（由订单过期调度器回调）
+
+        仅处理仍为 PENDING 的订单，已支付/已取消的订单会被忽略，因此可安全重复调用。
+
+        Args:
+            order_ids: 到期订单号列表
+
+        Returns:
+            dict: 处理结果统计（同 check_and_expire_orders）
+        """
+        stats = {"checked": 0, "expired": 0, "suffix_released": 0, "errors": 0}
+        if not order_ids:
+            return stats
+
+        with get_db_context_manual_commit() as session:
+            try:
+                stmt = select(Order).where(Order.order_id.in_(order_ids), Order.status == "PENDING")
+                expired_orders = session.execute(stmt).scalars().all()
+
+                stats["checked"] = len(expired_orders)
+
+                for order in expired_orders:
+                    try:
+                        await self._expire_single_order(session, order, stats)
+                    except Exception as e:
+                        logger.error(f"处理订单 {order.order_id} 失败: {e}", exc_info=True)
+                        stats["errors"] += 1
+
+                session.commit()
+
+            except Exception as e:
+                logger.error(f"按订单号处理过期订单失败: {e}", exc_info=True)
+                session.rollback()
+                stats["errors"] += 1
+
+        # 同步 Redis 中的订单状态（同时释放后缀）
+        from ..models import OrderStatus
+        from ..payments.order import order_manager
+
+        for order_id in order_ids:
+            try:
+                await order_manager.update_order_status(order_id, OrderStatus.EXPIRED)
+            except Exception as e:
+                logger.warning(f"更新 Redis 订单 {order_id} 过期状态失败: {e}")
+
+        if stats["expired"] or stats["errors"]:
+            logger.info(
+                f"定时过期处理完成 - "
+                f"触发: {len(order_ids)}, "
+                f"已过期: {stats['expired']}, "
+                f"释放后缀: {stats['suffix_released']}, "
+                f"错误: {stats['errors']}"
+            )
+
+        return stats
+
     async def _expire_single_order(self, session: Session, order: Order, stats: dict):
         """
         处理单个过期订单（异步方法）
@@ -63,6 +63,23 @@ class ContentHelper:
         logger.error(f"配置不存在: {key}")
         return f"⚠️ 配置缺失: {key}"
 
+    def preload(self, keys: tuple[str, ...]) -> int:
+        """
+        预热缓存：读取数据库中存在的文案（缺失的键不记录日志，由调用方使用默认值）
+
+        Returns:
+            写入缓存的数量
+        """
+        loaded = 0
+        for key in keys:
+            if self.cache.get(key) is not None:
+                continue
+            db_value = self.config_mgr.get_content(key)
+            if db_value:
+                self.cache.set(key, db_value)
+                loaded += 1
+        return loaded
+
     def clear_cache(self, key: str | None = None):
         """
         清除缓存
@@ -104,3 +121,16 @@ def clear_content_cache(key: str | None = None):
         key: 配置键，如果为 None 则清空所有缓存
     """
     _content_helper.clear_cache(key)
+
+
+def preload_content(keys: tuple[str, ...]) -> int:
+    """
+    便捷函数：预热文案缓存
+
+    Args:
+        keys: 配置键
+
+    Returns:
+        写入缓存的数量
+    """
+    return _content_helper.preload(keys)
@@ -391,6 +391,44 @@ def isolate_database():
         database.SessionLocal = original_session_local
 
 
+@pytest.fixture(autouse=True)
+def reset_tron_data_sources():
+    """
+    重置共享的 TRON 数据源路由与地址缓存，防止测试间的健康统计/缓存相互影响
+    """
+    from src.clients.tron import address_info_cache
+    from src.clients.tron_router import tron_router
+
+    tron_router.reset()
+    address_info_cache.invalidate()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_conversation_tracker():
+    """
+    恢复 ConversationTracker 的类级状态（注册的处理器、活跃对话、对话键索引），防止测试间污染
+    """
+    from src.common.conversation_wrapper import ConversationTracker
+
+    registered = dict(ConversationTracker._registered_handlers)
+    unindexed = set(ConversationTracker._unindexed_handlers)
+    active = dict(ConversationTracker._active_conversations)
+    index = {
+        owner: {name: set(keys) for name, keys in conversations.items()}
+        for owner, conversations in ConversationTracker._conversation_index.items()
+    }
+    yield
+    ConversationTracker._registered_handlers.clear()
+    ConversationTracker._registered_handlers.update(registered)
+    ConversationTracker._unindexed_handlers.clear()
+    ConversationTracker._unindexed_handlers.update(unindexed)
+    ConversationTracker._active_conversations.clear()
+    ConversationTracker._active_conversations.update(active)
+    ConversationTracker._conversation_index.clear()
+    ConversationTracker._conversation_index.update(index)
+
+
 @pytest.fixture
 async def bot_app_v2():
     """
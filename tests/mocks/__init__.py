@@ -5,9 +5,11 @@ Mock 对象和响应模块
 
 from .tronscan_responses import TronScanMockResponses
 from .energy_api_responses import EnergyAPIMockResponses
+from .telegram_updates import TelegramUpdateRecordings
 
 __all__ = [
     "TronScanMockResponses",
     "EnergyAPIMockResponses",
+    "TelegramUpdateRecordings",
 ]
 
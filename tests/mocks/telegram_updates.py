@@ -0,0 +1,74 @@
+"""
+Telegram 更新录制样本
+用于 Webhook 接收测试与本地回放（scripts/replay_telegram_updates.py）
+"""
+from typing import Any, Dict, List
+
+
+class TelegramUpdateRecordings:
+    """Telegram 推送的原始更新 JSON"""
+
+    USER = {"id": 123456789, "is_bot": False, "first_name": "Test", "username": "test_user", "language_code": "zh-hans"}
+    CHAT = {"id": 123456789, "first_name": "Test", "username": "test_user", "type": "private"}
+
+    @classmethod
+    def start_command(cls, update_id: int = 100000001, user: Dict[str, Any] = None) -> Dict[str, Any]:
+        """用户发送 /start"""
+        user = user or cls.USER
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": 1,
+                "from": user,
+                "chat": {**cls.CHAT, "id": user["id"]},
+                "date": 1760000000,
+                "text": "/start",
+                "entities": [{"offset": 0, "length": 6, "type": "bot_command"}],
+            },
+        }
+
+    @classmethod
+    def text_message(cls, text: str, update_id: int = 100000002, user: Dict[str, Any] = None) -> Dict[str, Any]:
+        """用户发送普通文本（如输入地址、金额）"""
+        user = user or cls.USER
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": 2,
+                "from": user,
+                "chat": {**cls.CHAT, "id": user["id"]},
+                "date": 1760000010,
+                "text": text,
+            },
+        }
+
+    @classmethod
+    def callback_query(cls, data: str, update_id: int = 100000003, user: Dict[str, Any] = None) -> Dict[str, Any]:
+        """用户点击内联按钮"""
+        user = user or cls.USER
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": f"cb{update_id}",
+                "from": user,
+                "chat_instance": "-1234567890123456789",
+                "data": data,
+                "message": {
+                    "message_id": 3,
+                    "from": {"id": 7000000000, "is_bot": True, "first_name": "Bot", "username": "test_bot"},
+                    "chat": {**cls.CHAT, "id": user["id"]},
+                    "date": 1760000005,
+                    "text": "🏠 主菜单",
+                },
+            },
+        }
+
+    @classmethod
+    def session(cls) -> List[Dict[str, Any]]:
+        """一次典型的用户会话：/start -> 帮助 -> 返回主菜单 -> 发送文本"""
+        return [
+            cls.start_command(update_id=100000001),
+            cls.callback_query("menu_help", update_id=100000002),
+            cls.callback_query("back_to_main", update_id=100000003),
+            cls.text_message("TLyqzVGLV1srkB7dToTAEqgDSfPtXRJZYH", update_id=100000004),
+        ]
@@ -0,0 +1,200 @@
+"""
+批量地址查询测试：地址解析、并发查询、Bot 流程与 API 流式返回
+"""
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.clients.tron import AddressInfo, AddressInfoCache, TronAPIClient
+
+
+ADDR_A = "TN3W4H6rK2ce4vX9YnFQHwKENnHjoxb3m9"
+ADDR_B = "TLyqzVGLV1srkB7dToTAEqgDSfPtXRJZYH"
+ADDR_C = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
+
+
+def make_info(address: str, trx: float = 1.0) -> AddressInfo:
+    return AddressInfo(address=address, trx_balance=trx, usdt_balance=2.0, recent_txs=[])
+
+
+class TestParseAddressList:
+    """测试批量地址解析"""
+
+    def test_split_dedupe_and_invalid(self):
+        from src.modules.address_query.validator import parse_address_list
+
+        text = f"{ADDR_A}\n{ADDR_B}, bad_one；{ADDR_A}\n\n"
+        valid, invalid = parse_address_list(text)
+
+        assert valid == [ADDR_A, ADDR_B]
+        assert invalid == ["bad_one"]
+
+
+class TestIterAddressInfos:
+    """测试批量并发查询"""
+
+    @pytest.fixture
+    def client(self):
+        return TronAPIClient(cache=AddressInfoCache(ttl=0, negative_ttl=0))
+
+    @pytest.mark.asyncio
+    async def test_total_time_close_to_max_latency(self, client):
+        """总耗时接近单次最大延迟而不是延迟之和"""
+        async def fetch(address):
+            await asyncio.sleep(0.05)
+            return make_info(address)
+
+        addresses = [f"T{i:033d}" for i in range(10)]
+        with patch.object(client, "_fetch_address_info_budgeted", side_effect=fetch):
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            results = [item async for item in client.iter_address_infos(addresses, concurrency=10)]
+            elapsed = loop.time() - started
+
+        assert sorted(address for address, _ in results) == addresses
+        assert elapsed < 0.25
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, client):
+        """同时在途的查询数不超过并发上限"""
+        in_flight = 0
+        peak = 0
+
+        async def fetch(address):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return make_info(address)
+
+        with patch.object(client, "_fetch_address_info_budgeted", side_effect=fetch):
+            results = [item async for item in client.iter_address_infos([f"T{i}" for i in range(12)], concurrency=3)]
+
+        assert len(results) == 12
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_yields_in_completion_order_and_isolates_failures(self, client):
+        """按完成顺序产出，单个地址失败不影响其他地址"""
+        async def fetch(address):
+            if address == ADDR_A:
+                await asyncio.sleep(0.05)
+                return make_info(address)
+            if address == ADDR_B:
+                raise RuntimeError("HTTP 503")
+            return make_info(address)
+
+        with patch.object(client, "_fetch_address_info_budgeted", side_effect=fetch):
+            results = [item async for item in client.iter_address_infos([ADDR_A, ADDR_B, ADDR_C])]
+
+        assert results[-1][0] == ADDR_A
+        assert dict(results)[ADDR_B] is None
+
+    @pytest.mark.asyncio
+    async def test_upstream_budget_waits(self, client):
+        """上游预算不足时等待而不是失败"""
+        limiter = MagicMock()
+        limiter.acquire = AsyncMock(side_effect=[(False, 0.01), (True, 0.0)])
+
+        with patch("src.clients.tron.tron_upstream_limiter", limiter), \
+             patch.object(client, "_fetch_address_info", new_callable=AsyncMock, return_value=make_info(ADDR_A)):
+            result = await client._fetch_address_info_budgeted(ADDR_A)
+
+        assert result.address == ADDR_A
+        assert limiter.acquire.await_count == 2
+
+
+class TestBulkQueryBotFlow:
+    """测试 Bot 批量查询流程"""
+
+    @pytest.fixture
+    def module(self):
+        from src.modules.address_query.handler import AddressQueryModule
+        return AddressQueryModule()
+
+    @pytest.fixture
+    def update(self):
+        update = MagicMock()
+        update.effective_user.id = 123456789
+        update.message.text = f"{ADDR_A}\n{ADDR_B}\nnot_an_address<&>"
+        update.message.reply_text = AsyncMock()
+        return update
+
+    @pytest.mark.asyncio
+    async def test_multi_line_paste_runs_bulk_lookup(self, module, update):
+        from telegram.ext import ConversationHandler
+
+        async def fake_iter(addresses):
+            for address in addresses:
+                yield address, make_info(address) if address == ADDR_A else None
+
+        context = MagicMock()
+        context.user_data = {}
+        with patch.object(module, "_check_rate_limit", return_value=(True, 0)), \
+             patch.object(module, "_record_query") as record, \
+             patch.object(module.tron_client, "iter_address_infos", side_effect=fake_iter):
+            result = await module.handle_address_input(update, context)
+
+        assert result == ConversationHandler.END
+        assert record.call_count == 2
+
+        texts = [call.args[0] for call in update.message.reply_text.await_args_list]
+        assert ADDR_A in texts[1] and "查询失败" in texts[1]
+        assert "成功: <b>1</b>" in texts[-1]
+        assert "not_an_address&lt;&amp;&gt;" in texts[-1]
+
+    @pytest.mark.asyncio
+    async def test_too_many_addresses(self, module, update):
+        from src.modules.address_query.states import AWAITING_ADDRESS
+
+        update.message.text = f"{ADDR_A}\n{ADDR_B}\n{ADDR_C}"
+        with patch("src.modules.address_query.handler.settings") as mock_settings:
+            mock_settings.address_bulk_max = 2
+            result = await module.handle_address_input(update, MagicMock())
+
+        assert result == AWAITING_ADDRESS
+        assert "最多查询" in update.message.reply_text.await_args.args[0]
+
+
+class TestBulkQueryAPI:
+    """测试批量查询 API"""
+
+    @pytest.fixture
+    def client(self):
+        from fastapi.testclient import TestClient
+        from src.api.app import create_api_app
+        from src.api.auth import api_key_auth
+
+        app = create_api_app()
+        app.dependency_overrides[api_key_auth] = lambda: "test_api_key"
+        return TestClient(app)
+
+    def test_streams_ndjson(self, client):
+        async def fake_iter(self, addresses):
+            for address in addresses:
+                yield address, make_info(address, trx=3.0)
+
+        with patch.object(TronAPIClient, "iter_address_infos", fake_iter):
+            response = client.post("/api/address/bulk-query", json={"addresses": [ADDR_A, "bad", ADDR_B]})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert rows[0] == {"address": "bad", "success": False, "error": "invalid_address"}
+        assert {row["address"] for row in rows[1:]} == {ADDR_A, ADDR_B}
+        assert all(row["trx_balance"] == 3.0 for row in rows[1:])
+
+    def test_rejects_too_many(self, client):
+        with patch("src.config.settings.address_bulk_max", 1):
+            response = client.post("/api/address/bulk-query", json={"addresses": [ADDR_A, ADDR_B]})
+
+        assert response.status_code == 400
+
+    def test_invalid_entries_count_towards_limit(self, client):
+        with patch("src.config.settings.address_bulk_max", 2):
+            response = client.post("/api/address/bulk-query", json={"addresses": [ADDR_A, "bad", "worse"]})
+
+        assert response.status_code == 400
@@ -204,53 +204,58 @@ class TestAddressQueryHandlerMethods:
         assert isinstance(handlers, list)
         assert len(handlers) == 1  # 一个 ConversationHandler
 
-    def test_check_rate_limit_no_previous_query(self, module, full_test_db):
+    @pytest.fixture
+    def limiter(self):
+        """使用进程内令牌桶，测试间互不影响"""
+        from src.modules.address_query.handler import address_query_limiter
+
+        original = address_query_limiter.use_redis
+        address_query_limiter.use_redis = False
+        address_query_limiter.reset()
+        yield address_query_limiter
+        address_query_limiter.use_redis = original
+        address_query_limiter.reset()
+
+    @pytest.mark.asyncio
+    async def test_check_rate_limit_no_previous_query(self, module, limiter):
         """测试没有历史查询时的限频检查"""
-        # 使用一个不存在查询记录的用户ID
-        can_query, remaining = module._check_rate_limit(999999999)
+        with patch.object(module, '_get_cooldown_minutes', new_callable=AsyncMock, return_value=1):
+            can_query, remaining = await module._check_rate_limit(999999999)
         assert can_query is True
         assert remaining == 0
 
-    def test_check_rate_limit_within_cooldown(self, module, full_test_db):
+    @pytest.mark.asyncio
+    async def test_check_rate_limit_within_cooldown(self, module, limiter):
         """测试冷却时间内的限频检查"""
-        from src.database import AddressQueryLog, SessionLocal
-        import uuid
+        user_id = 888888888
 
-        # 使用唯一的用户ID避免冲突
-        user_id = int(uuid.uuid4().int % 1000000000)
-        db = SessionLocal()
-        try:
-            # 创建一个刚刚的查询记录
-            log = AddressQueryLog(
-                user_id=user_id,
-                last_query_at=datetime.now(),
-                query_count=1
-            )
-            db.add(log)
-            db.commit()
-        finally:
-            db.close()
+        with patch.object(module, '_get_cooldown_minutes', new_callable=AsyncMock, return_value=5):
+            # 查看不消耗令牌
+            assert (await module._check_rate_limit(user_id))[0] is True
+            assert (await module._check_rate_limit(user_id, consume=True))[0] is True
+
+            can_query, remaining = await module._check_rate_limit(user_id)
 
-        # 检查限频
-        can_query, remaining = module._check_rate_limit(user_id)
         assert can_query is False
-        assert remaining >= 1
+        assert 1 <= remaining <= 5
 
-    def test_record_query(self, module, full_test_db):
-        """测试记录查询"""
-        from src.database import AddressQueryLog, SessionLocal
+    @pytest.mark.asyncio
+    async def test_record_query(self, module):
+        """测试记录查询（后台批量写入 address_query_records）"""
+        from src.database import AddressQueryRecord, SessionLocal, engine
+        from src.modules.address_query.query_log import query_log_writer
 
+        AddressQueryRecord.__table__.create(bind=engine, checkfirst=True)
         user_id = 777777777
 
-        # 记录查询
-        module._record_query(user_id)
+        module._record_query(user_id, "TN3W4H6rK2ce4vX9YnFQHwKENnHjoxb3m9")
+        await query_log_writer.close()
 
-        # 验证记录已创建
         db = SessionLocal()
         try:
-            log = db.query(AddressQueryLog).filter_by(user_id=user_id).first()
-            assert log is not None
-            assert log.user_id == user_id
+            record = db.query(AddressQueryRecord).filter_by(user_id=user_id).order_by(AddressQueryRecord.id.desc()).first()
+            assert record is not None
+            assert record.address == "TN3W4H6rK2ce4vX9YnFQHwKENnHjoxb3m9"
         finally:
             db.close()
 
@@ -7,6 +7,7 @@ import pytest
 import sys
 import os
 from unittest.mock import patch, MagicMock
+from decimal import Decimal
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -432,10 +433,14 @@ class TestAdminHandlerMethods:
         """测试处理有效的 TRX 汇率输入"""
         mock_update.message.text = "7.14"
 
-        with patch.object(config_manager, 'set_price', return_value=True):
+        from src.modules.trx_exchange.rate_manager import RateManager
+
+        with patch.object(config_manager, 'set_price', return_value=True), \
+             patch.object(RateManager, 'set_rate') as set_rate:
             from telegram.ext import ConversationHandler
             result = await handler.handle_trx_rate_input(mock_update, mock_context)
             assert result == ConversationHandler.END
+            assert set_rate.call_args.args[1] == Decimal("7.14")
 
     @pytest.mark.asyncio
     async def test_handle_trx_rate_input_invalid(self, handler, mock_update, mock_context):
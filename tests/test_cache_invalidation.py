@@ -0,0 +1,157 @@
+"""
+跨进程缓存失效测试：版本号兜底、pub/sub 广播与 RateManager 汇率缓存
+"""
+import asyncio
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.common.cache_invalidation import CacheInvalidator
+
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_invalidator(server, name="test", **kwargs) -> CacheInvalidator:
+    """模拟一个进程：各自的同步/异步客户端连接同一个 Redis"""
+    invalidator = CacheInvalidator(name, **kwargs)
+    invalidator.redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    invalidator.async_redis_client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    return invalidator
+
+
+class TestCacheInvalidator:
+    """测试版本号与广播"""
+
+    def test_publish_bumps_version_and_notifies_local(self, server):
+        invalidator = make_invalidator(server)
+        callback = MagicMock()
+        invalidator.add_listener(callback)
+
+        assert invalidator.publish() == 1
+        assert invalidator.publish() == 2
+        assert callback.call_count == 2
+
+    def test_version_fallback_sees_other_process(self, server):
+        """订阅不可用时，读取端在检查间隔后通过版本号发现变更"""
+        writer = make_invalidator(server)
+        reader = make_invalidator(server, check_interval=0)
+
+        assert reader.current_version() == 0
+        writer.publish()
+        assert reader.current_version() == 1
+
+    def test_version_check_is_throttled(self, server):
+        writer = make_invalidator(server)
+        reader = make_invalidator(server, check_interval=60)
+
+        reader.current_version()
+        writer.publish()
+        assert reader.current_version() == 0
+
+    def test_redis_unavailable_degrades_to_local(self):
+        invalidator = CacheInvalidator("test")
+        invalidator.redis_client = MagicMock()
+        invalidator.redis_client.incr.side_effect = ConnectionError("down")
+        callback = MagicMock()
+        invalidator.add_listener(callback)
+
+        invalidator.publish()
+        invalidator.current_version()
+
+        callback.assert_called_once()
+        invalidator.redis_client.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_reads_do_not_block(self, server):
+        """事件循环中读取版本号不使用同步客户端，到期后在后台刷新"""
+        writer = make_invalidator(server)
+        reader = make_invalidator(server, check_interval=0)
+        reader.redis_client = MagicMock(side_effect=AssertionError("blocking call"))
+        writer.publish()
+
+        assert reader.current_version() == 0
+        await asyncio.sleep(0.05)
+        assert reader.current_version() == 1
+        reader.redis_client.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_publish_uses_async_client(self, server):
+        invalidator = make_invalidator(server)
+        invalidator.redis_client = MagicMock()
+        callback = MagicMock()
+        invalidator.add_listener(callback)
+
+        invalidator.publish()
+        callback.assert_called_once()
+        await asyncio.sleep(0.05)
+
+        assert invalidator._version == 1
+        assert await invalidator.async_redis_client.get(invalidator.version_key) == "1"
+        invalidator.redis_client.incr.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_pubsub_invalidates_other_process_immediately(self, server):
+        writer = make_invalidator(server)
+        reader = make_invalidator(server, check_interval=3600)
+        received = asyncio.Event()
+        reader.add_listener(received.set)
+
+        await reader.start()
+        try:
+            # 等待订阅建立
+            for _ in range(100):
+                [(_channel, subscribers)] = await reader.async_redis_client.pubsub_numsub(reader.channel)
+                if subscribers:
+                    break
+                await asyncio.sleep(0.01)
+
+            writer.publish()
+            await asyncio.wait_for(received.wait(), timeout=3)
+        finally:
+            await reader.stop()
+
+        assert reader._version == 1
+
+
+class TestRateManagerInvalidation:
+    """测试汇率缓存在其他进程修改后立即失效"""
+
+    @pytest.fixture
+    def invalidator(self, server):
+        from src.modules.trx_exchange import rate_manager
+
+        invalidator = make_invalidator(server, name="trx_exchange_rate", check_interval=0)
+        invalidator.add_listener(rate_manager.RateManager._clear_cache)
+        rate_manager.RateManager._clear_cache()
+        with patch.object(rate_manager, "rate_cache_invalidator", invalidator):
+            yield invalidator
+        rate_manager.RateManager._clear_cache()
+
+    def test_other_process_update_clears_cache(self, invalidator, server, test_db):
+        from src.modules.trx_exchange.rate_manager import RateManager, TRXExchangeRate
+
+        RateManager.set_rate(test_db, Decimal("3.05"), admin_user_id=1)
+        assert RateManager.get_rate(test_db) == Decimal("3.05")
+
+        # 另一个进程修改数据库并发布新版本号
+        test_db.query(TRXExchangeRate).one().rate = Decimal("3.50")
+        test_db.commit()
+        make_invalidator(server, name="trx_exchange_rate").publish()
+
+        assert RateManager.get_rate(test_db) == Decimal("3.50")
+
+    def test_cached_while_version_unchanged(self, invalidator, test_db):
+        from src.modules.trx_exchange.rate_manager import RateManager
+
+        RateManager.set_rate(test_db, Decimal("3.05"), admin_user_id=1)
+        RateManager.get_rate(test_db)
+
+        with patch.object(test_db, "query", side_effect=AssertionError("should use cache")):
+            assert RateManager.get_rate(test_db) == Decimal("3.05")
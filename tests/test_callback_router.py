@@ -0,0 +1,258 @@
+"""
+回调路由表测试：pattern 字面量提取、前缀查表，以及按 PTB 分组语义分发到所属模块
+"""
+import re
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from telegram import Bot, Update, User
+from telegram.ext import (
+    Application,
+    ApplicationHandlerStop,
+    CallbackQueryHandler,
+    CommandHandler,
+    ConversationHandler,
+    MessageHandler,
+    filters,
+)
+
+from src.core.base import BaseModule
+from src.core.callback_router import (
+    CALLBACK_ROUTER_GROUP,
+    CallbackRoutingTable,
+    extract_callback_routes,
+    parse_callback_pattern,
+)
+from src.core.registry import ModuleRegistry
+from tests.mocks.telegram_updates import TelegramUpdateRecordings
+
+
+class FakeModule(BaseModule):
+
+    def __init__(self, name, handlers):
+        self._name = name
+        self._handlers = handlers
+
+    @property
+    def module_name(self):
+        return self._name
+
+    def get_handlers(self):
+        return self._handlers
+
+
+class SpyCallbackHandler(CallbackQueryHandler):
+    """记录 check_update 调用次数"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checks = 0
+
+    def check_update(self, update):
+        self.checks += 1
+        return super().check_update(update)
+
+
+def callback_update(application, data):
+    return Update.de_json(TelegramUpdateRecordings.callback_query(data), application.bot)
+
+
+async def start_application():
+    application = Application.builder().token("123456:TEST_TOKEN").updater(None).build()
+    bot_user = User(id=123456, is_bot=True, first_name="Bot", username="test_bot")
+    with patch.object(Bot, "get_me", AsyncMock(return_value=bot_user)):
+        await application.initialize()
+    return application
+
+
+class TestPatternParsing:
+
+    @pytest.mark.parametrize(
+        ("pattern", "routes"),
+        [
+            (r"^menu_help$", [("menu_help", True)]),
+            (r"^orders_", [("orders_", False)]),
+            (r"^(back_to_main|nav_back_to_main)$", [("back_to_main", True), ("nav_back_to_main", True)]),
+            (r"^help_(basic|faq)$", [("help_basic", True), ("help_faq", True)]),
+            (r"^trx_(paid|cancel)", [("trx_paid", False), ("trx_cancel", False)]),
+            (r"^premium_\d+$", [("premium_", False)]),
+            (r"^pages?$", [("page", False)]),
+            (r"^a\.b$", [("a.b", True)]),
+            (r"^x_1|^y_\d", [("x_1", False), ("y_", False)]),
+        ],
+    )
+    def test_literal_routes(self, pattern, routes):
+        assert parse_callback_pattern(pattern) == routes
+
+    @pytest.mark.parametrize("pattern", [r".*", r"^\d+$", r"^(?i)menu", r"^(a|b(c))$", r"^[ab]_x"])
+    def test_unindexable_patterns(self, pattern):
+        assert parse_callback_pattern(pattern) is None
+
+    def test_extract_from_conversation_handler(self):
+        conversation = ConversationHandler(
+            entry_points=[CommandHandler("energy", AsyncMock()), CallbackQueryHandler(AsyncMock(), pattern="^energy$")],
+            states={1: [CallbackQueryHandler(AsyncMock(), pattern="^energy_type_")]},
+            fallbacks=[MessageHandler(filters.TEXT, AsyncMock())],
+        )
+
+        assert extract_callback_routes(conversation) == [("energy", True), ("energy_type_", False)]
+
+    def test_handlers_without_literal_pattern_fall_back(self):
+        assert extract_callback_routes(CallbackQueryHandler(AsyncMock())) is None
+        assert extract_callback_routes(CallbackQueryHandler(AsyncMock(), pattern=lambda data: True)) is None
+        ignore_case = CallbackQueryHandler(AsyncMock(), pattern=re.compile("^menu", re.IGNORECASE))
+        assert extract_callback_routes(ignore_case) is None
+
+
+class TestRoutingTable:
+
+    def test_lookup_exact_and_prefix(self):
+        table = CallbackRoutingTable()
+        table.add_handler(CallbackQueryHandler(AsyncMock(), pattern="^menu_help$"), 0, "menu")
+        table.add_handler(CallbackQueryHandler(AsyncMock(), pattern="^orders_"), 11, "orders")
+        table.add_handler(CallbackQueryHandler(AsyncMock(), pattern="^orders_detail_"), 12, "detail")
+
+        assert table.lookup("menu_help") == {0}
+        assert table.lookup("menu_help_x") == set()
+        assert table.lookup("orders_list") == {11}
+        assert table.lookup("orders_detail_1") == {11, 12}
+        assert table.lookup("unknown") == set()
+
+    def test_unindexable_handler_marks_group_as_fallback(self):
+        table = CallbackRoutingTable()
+        table.add_handler(CallbackQueryHandler(AsyncMock()), 5, "legacy")
+
+        assert table.fallback_groups == {5}
+        assert table.summary()["fallback_modules"] == ["legacy"]
+
+
+class TestCallbackRouter:
+
+    @pytest.mark.asyncio
+    async def test_dispatches_only_to_owning_module(self):
+        application = await start_application()
+        menu_cb, orders_cb, other_cb = AsyncMock(), AsyncMock(), AsyncMock()
+        menu = SpyCallbackHandler(menu_cb, pattern="^menu_help$")
+        orders = SpyCallbackHandler(orders_cb, pattern="^orders_")
+        registry = ModuleRegistry()
+        registry.register(FakeModule("menu", [menu]), priority=0)
+        registry.register(FakeModule("orders", [orders]), priority=11)
+        registry.initialize_all(application)
+        # 非注册中心管理的分组照常处理
+        application.add_handler(CallbackQueryHandler(other_cb), group=50)
+
+        await application.process_update(callback_update(application, "orders_list"))
+
+        orders_cb.assert_awaited_once()
+        other_cb.assert_awaited_once()
+        menu_cb.assert_not_called()
+        assert menu.checks == 0
+        assert orders.checks == 1
+
+        stats = registry.get_statistics()["callback_routing"]
+        assert stats["routed"] == 1
+        assert stats["unmatched"] == 0
+        assert stats["handled_by"] == {"orders": 1}
+
+    @pytest.mark.asyncio
+    async def test_first_match_per_group_and_stop(self):
+        application = await start_application()
+        first, second, later = AsyncMock(side_effect=ApplicationHandlerStop), AsyncMock(), AsyncMock()
+        registry = ModuleRegistry()
+        registry.register(
+            FakeModule(
+                "menu",
+                [CallbackQueryHandler(first, pattern="^back_to_main$"), CallbackQueryHandler(second, pattern="^back_")],
+            ),
+            priority=0,
+        )
+        registry.register(FakeModule("energy", [CallbackQueryHandler(later, pattern="^back_to_main$")]), priority=3)
+        registry.initialize_all(application)
+
+        await application.process_update(callback_update(application, "back_to_main"))
+
+        first.assert_awaited_once()
+        second.assert_not_called()
+        later.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_handler_errors_go_to_error_handler_and_continue(self):
+        application = await start_application()
+        error_handler = AsyncMock()
+        application.add_error_handler(error_handler)
+        later = AsyncMock()
+        registry = ModuleRegistry()
+        registry.register(
+            FakeModule("menu", [CallbackQueryHandler(AsyncMock(side_effect=RuntimeError("boom")), pattern="^x$")]),
+            priority=0,
+        )
+        registry.register(FakeModule("help", [CallbackQueryHandler(later, pattern="^x$")]), priority=12)
+        registry.initialize_all(application)
+
+        await application.process_update(callback_update(application, "x"))
+
+        error_handler.assert_awaited_once()
+        assert isinstance(error_handler.await_args.args[1].error, RuntimeError)
+        later.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_fallback_module_still_matched_by_regex(self):
+        application = await start_application()
+        legacy_cb = AsyncMock()
+        registry = ModuleRegistry()
+        registry.register(FakeModule("menu", [CallbackQueryHandler(AsyncMock(), pattern="^menu_help$")]), priority=0)
+        registry.register(FakeModule("legacy", [CallbackQueryHandler(legacy_cb, pattern=r"^\d+$")]), priority=5)
+        registry.initialize_all(application)
+
+        await application.process_update(callback_update(application, "42"))
+
+        legacy_cb.assert_awaited_once()
+        stats = registry.get_statistics()["callback_routing"]
+        assert stats["unmatched"] == 1
+        assert stats["fallback"] == 1
+        assert stats["fallback_modules"] == ["legacy"]
+
+    def test_non_callback_updates_are_not_routed(self):
+        registry = ModuleRegistry()
+        registry.register(FakeModule("menu", [CallbackQueryHandler(AsyncMock(), pattern="^menu_help$")]), priority=0)
+        app = MagicMock()
+        registry.initialize_all(app)
+        router = registry._callback_router
+
+        update = Update.de_json(TelegramUpdateRecordings.start_command(), None)
+
+        assert router.check_update(update) is None
+        app.add_handler.assert_any_call(router, group=CALLBACK_ROUTER_GROUP)
+
+    def test_disabled(self, monkeypatch):
+        from src.core import registry as registry_module
+
+        monkeypatch.setattr(registry_module.settings, "bot_callback_router_enabled", False)
+        registry = ModuleRegistry()
+        registry.register(FakeModule("menu", [CallbackQueryHandler(AsyncMock(), pattern="^menu_help$")]), priority=0)
+        app = MagicMock()
+        registry.initialize_all(app)
+
+        assert app.add_handler.call_count == 1
+        assert registry.get_statistics()["callback_routing"] is None
+
+
+class TestProjectCallbackNamespaces:
+
+    @pytest.mark.asyncio
+    async def test_all_module_callbacks_are_indexed(self):
+        """新增按钮应遵循「命名空间_动作」约定，使所有模块的回调都能查表分发"""
+        from src.bot_v2 import TelegramBotV2
+
+        bot = TelegramBotV2()
+        bot.registry = ModuleRegistry()
+        bot.app = Application.builder().token("123456:TEST_TOKEN").updater(None).build()
+        await bot._register_standardized_modules()
+        bot.registry.initialize_all(bot.app)
+
+        table = bot.registry._callback_router.table
+        assert table.fallback_groups == set()
+        assert table.lookup("menu_help")
+        assert table.lookup("energy_type_small")
+        assert table.lookup("orders_detail_1")
+
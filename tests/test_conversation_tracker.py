@@ -0,0 +1,126 @@
+"""
+对话追踪器测试：用户 -> 对话键索引的维护、按用户清理与结束对话的自动移除
+"""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from telegram import Bot, Update, User
+from telegram.ext import Application, CommandHandler, ConversationHandler, MessageHandler, filters
+
+from src.common.conversation_wrapper import ConversationTracker, SafeConversationHandler, TrackedConversationHandler
+from tests.mocks.telegram_updates import TelegramUpdateRecordings
+
+
+USER_ID = TelegramUpdateRecordings.USER["id"]
+KEY = (USER_ID, USER_ID)
+ASK_ADDRESS = 1
+
+
+def make_conversation(name="tracked_flow") -> ConversationHandler:
+    async def start(update, context):
+        return ASK_ADDRESS
+
+    async def address(update, context):
+        return ConversationHandler.END
+
+    return SafeConversationHandler.create(
+        entry_points=[CommandHandler("start", start)],
+        states={ASK_ADDRESS: [MessageHandler(filters.TEXT & ~filters.COMMAND, address)]},
+        fallbacks=[],
+        name=name,
+    )
+
+
+def make_context(chat_id=USER_ID):
+    context = MagicMock()
+    context._chat_id = chat_id
+    context.user_data = {}
+    return context
+
+
+async def start_application(*handlers):
+    application = Application.builder().token("123456:TEST_TOKEN").updater(None).build()
+    for handler in handlers:
+        application.add_handler(handler)
+    bot_user = User(id=123456, is_bot=True, first_name="Bot", username="test_bot")
+    with patch.object(Bot, "get_me", AsyncMock(return_value=bot_user)):
+        await application.initialize()
+    application.bot._bot_user = bot_user
+    return application
+
+
+class TestConversationIndex:
+
+    @pytest.mark.asyncio
+    async def test_index_follows_conversation_state(self):
+        handler = make_conversation()
+        application = await start_application(handler)
+        assert isinstance(handler, TrackedConversationHandler)
+
+        await application.process_update(Update.de_json(TelegramUpdateRecordings.start_command(), application.bot))
+
+        assert ConversationTracker.get_user_conversations(USER_ID) == {"tracked_flow": {KEY}}
+        assert ConversationTracker.get_active(USER_ID) == "tracked_flow"
+
+        address = TelegramUpdateRecordings.text_message("TLyqzVGLV1srkB7dToTAEqgDSfPtXRJZYH")
+        await application.process_update(Update.de_json(address, application.bot))
+
+        assert KEY not in handler._conversations
+        assert ConversationTracker.get_user_conversations(USER_ID) == {}
+        assert ("user", USER_ID) not in ConversationTracker._conversation_index
+
+    def test_ended_conversation_evicts_active_entry(self):
+        """对话被 fallback 或超时结束（未经过包装的状态回调）时也移除活跃记录"""
+        handler = make_conversation()
+        ConversationTracker.set_active(USER_ID, "tracked_flow")
+        handler._update_state(ASK_ADDRESS, KEY)
+
+        handler._update_state(ConversationHandler.END, KEY)
+
+        assert ConversationTracker.get_active(USER_ID) is None
+
+    def test_other_conversation_ending_keeps_active_entry(self):
+        tracked, other = make_conversation(), make_conversation("other_flow")
+        tracked._update_state(ASK_ADDRESS, KEY)
+        other._update_state(ASK_ADDRESS, KEY)
+        ConversationTracker.set_active(USER_ID, "tracked_flow")
+
+        other._update_state(ConversationHandler.END, KEY)
+
+        assert ConversationTracker.get_active(USER_ID) == "tracked_flow"
+
+    def test_clear_all_only_touches_own_keys(self):
+        tracked, other = make_conversation(), make_conversation("other_flow")
+        for user_id in range(1, 1001):
+            tracked._update_state(ASK_ADDRESS, (user_id, user_id))
+        tracked._update_state(ASK_ADDRESS, KEY)
+        tracked._update_state(ASK_ADDRESS, (-100, USER_ID))  # 群聊中的对话
+        other._update_state(ASK_ADDRESS, KEY)
+        ConversationTracker.set_active(USER_ID, "other_flow")
+
+        with patch.object(tracked, "_conversations", wraps=tracked._conversations) as conversations:
+            ConversationTracker.clear_all_for_user(USER_ID, make_context())
+            conversations.keys.assert_not_called()
+            conversations.__iter__.assert_not_called()
+
+        assert KEY not in tracked._conversations
+        assert (-100, USER_ID) not in tracked._conversations
+        assert KEY not in other._conversations
+        assert len(tracked._conversations) == 1000
+        assert ConversationTracker.get_active(USER_ID) is None
+        assert ConversationTracker.get_user_conversations(USER_ID) == {}
+
+    def test_unindexed_handler_falls_back_to_scan(self):
+        plain = ConversationHandler(
+            entry_points=[CommandHandler("start", AsyncMock())],
+            states={ASK_ADDRESS: [MessageHandler(filters.TEXT, AsyncMock())]},
+            fallbacks=[],
+            name="plain_flow",
+        )
+        ConversationTracker.register_handler("plain_flow", plain)
+        plain._conversations[KEY] = ASK_ADDRESS
+        plain._conversations[(1, 1)] = ASK_ADDRESS
+
+        ConversationTracker.clear_all_for_user(USER_ID, make_context())
+
+        assert plain._conversations == {(1, 1): ASK_ADDRESS}
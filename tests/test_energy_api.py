@@ -22,6 +22,16 @@ from src.modules.energy.models import APIAccountInfo, APIPriceQuery, APIOrderRes
 
 # ==================== Fixtures ====================
 
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """每个测试前后清空能量上游缓存"""
+    from src.api.routes import reset_energy_caches
+
+    reset_energy_caches()
+    yield
+    reset_energy_caches()
+
+
 @pytest.fixture
 def app():
     """创建测试用 FastAPI 应用"""
@@ -169,6 +179,18 @@ class TestEnergyTrxnoAPI:
         assert data["data"]["energy_65k_price"] == 3.0
         assert data["data"]["energy_131k_price"] == 6.0
         assert data["data"]["source"] == "trxno.com"
+        assert "cache_age" in data["data"]
+
+    @patch('src.api.routes.get_energy_api_client')
+    def test_get_energy_prices_cached(self, mock_get_client, client, mock_energy_client):
+        """测试价格缓存：多次请求只调用一次上游"""
+        mock_get_client.return_value = mock_energy_client
+
+        for _ in range(3):
+            response = client.get("/api/energy/prices")
+            assert response.status_code == 200
+
+        assert mock_energy_client.query_price.await_count == 1
     
     def test_get_energy_account(self, auth_client):
         """测试查询代理账户信息"""
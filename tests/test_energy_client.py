@@ -0,0 +1,176 @@
+"""
+能量 API 客户端测试：端点熔断、对冲请求、非幂等请求切换
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.modules.energy.client import EndpointHealth, EnergyAPIClient, EnergyAPIError
+
+
+PRIMARY = "https://primary.test"
+BACKUP = "https://backup.test"
+
+
+def make_client(handler, **kwargs) -> EnergyAPIClient:
+    """创建使用 MockTransport 的客户端"""
+    client = EnergyAPIClient("user", "pass", base_url=PRIMARY, backup_url=BACKUP, **kwargs)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def ok(data=None):
+    return httpx.Response(200, json={"code": EnergyAPIClient.CODE_SUCCESS, "msg": "ok", "data": data or {}})
+
+
+class TestEndpointHealth:
+    """测试端点健康状态"""
+
+    def test_opens_after_consecutive_failures(self):
+        health = EndpointHealth(PRIMARY, fail_max=3, reset_timeout=60)
+        for _ in range(2):
+            health.record_failure()
+        assert health.available is True
+
+        health.record_failure()
+        assert health.state == EndpointHealth.STATE_OPEN
+        assert health.available is False
+
+    def test_half_open_after_reset_timeout(self):
+        health = EndpointHealth(PRIMARY, fail_max=1, reset_timeout=0)
+        health.record_failure()
+
+        assert health.state == EndpointHealth.STATE_HALF_OPEN
+        assert health.available is True
+
+        health.record_success(0.1)
+        assert health.state == EndpointHealth.STATE_CLOSED
+
+    def test_latency_percentile(self):
+        health = EndpointHealth(PRIMARY, window=100)
+        assert health.latency_percentile(0.95) is None
+
+        for latency in range(1, 101):
+            health.record_success(latency / 100)
+
+        assert health.latency_percentile(0.5) == pytest.approx(0.5)
+        assert health.latency_percentile(0.95) == pytest.approx(0.95)
+
+        # 滑动窗口只保留最近的样本
+        for _ in range(100):
+            health.record_success(2.0)
+        assert health.latency_percentile(0.5) == pytest.approx(2.0)
+
+
+class TestEnergyAPIClientRouting:
+    """测试请求路由"""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_no_hedge(self):
+        """主端点及时响应时不请求备用端点"""
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url.host)
+            return ok({"energy_65k": 3.5})
+
+        client = make_client(handler)
+        price = await client.query_price()
+
+        assert price.energy_65k_price == 3.5
+        assert calls == ["primary.test"]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged(self):
+        """主端点慢于对冲延迟时发起备用请求并取先返回者"""
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url.host)
+            if request.url.host == "primary.test":
+                await asyncio.sleep(1)
+                return ok({"energy_65k": 1.0})
+            return ok({"energy_65k": 2.0})
+
+        client = make_client(handler)
+        client.DEFAULT_HEDGE_DELAY = 0.05
+
+        price = await client.query_price()
+
+        assert price.energy_65k_price == 2.0
+        assert calls == ["primary.test", "backup.test"]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_business_error_not_hedged_away(self):
+        """业务错误直接返回给调用方，不切换端点"""
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url.host)
+            return httpx.Response(200, json={"code": EnergyAPIClient.CODE_ORDER_NOT_FOUND, "msg": "not found"})
+
+        client = make_client(handler)
+
+        with pytest.raises(EnergyAPIError):
+            await client.query_order("missing")
+        assert calls == ["primary.test"]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_skips_primary(self):
+        """主端点熔断后直接使用备用端点"""
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url.host)
+            if request.url.host == "primary.test":
+                return httpx.Response(503)
+            return ok()
+
+        client = make_client(handler, breaker_fail_max=2, breaker_reset_timeout=60)
+
+        for _ in range(2):
+            await client.query_price()
+        assert client._endpoints[PRIMARY].state == EndpointHealth.STATE_OPEN
+
+        calls.clear()
+        await client.query_price()
+        assert calls == ["backup.test"]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_purchase_fails_over_only_when_not_sent(self):
+        """购买请求仅在连接失败时切换端点，并复用同一个幂等键"""
+        keys = []
+
+        async def handler(request):
+            keys.append(request.headers.get("Idempotency-Key"))
+            if request.url.host == "primary.test":
+                raise httpx.ConnectError("connection refused", request=request)
+            return ok({"order_id": "A1"})
+
+        client = make_client(handler)
+        response = await client.buy_package("TAddress")
+
+        assert response.order_id == "A1"
+        assert len(keys) == 2 and keys[0] == keys[1] and keys[0]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_purchase_not_retried_after_server_error(self):
+        """购买请求在服务端已收到后失败时不重试备用端点（避免重复下单）"""
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url.host)
+            return httpx.Response(500)
+
+        client = make_client(handler)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.buy_package("TAddress")
+        assert calls == ["primary.test"]
+        await client.close()
@@ -6,6 +6,14 @@ from unittest.mock import MagicMock, AsyncMock, patch
 from src.tasks.energy_sync import EnergySyncTask, get_energy_sync_task
 
 
+@pytest.fixture(autouse=True)
+def isolate_log_cursor():
+    """避免测试读写真实数据库中的日志游标"""
+    with patch.object(EnergySyncTask, '_load_log_cursor', return_value=None):
+        with patch.object(EnergySyncTask, '_save_log_cursor') as mock_save:
+            yield mock_save
+
+
 class TestEnergySyncTask:
     """EnergySyncTask 测试"""
     
@@ -70,10 +78,8 @@ class TestEnergySyncTask:
             "energy_amount": 65000,
         }
         
-        with patch.object(task, '_update_order_status') as mock_update:
-            with patch.object(task, '_notify_user', new_callable=AsyncMock):
-                await task._sync_single_order(mock_client, order)
-                mock_update.assert_called_once_with("ENERGY_001", "COMPLETED", "abc123")
+        result = await task._sync_single_order(mock_client, order)
+        assert result == (order, "COMPLETED", "abc123")
     
     @pytest.mark.asyncio
     async def test_sync_single_order_no_change(self):
@@ -93,10 +99,8 @@ class TestEnergySyncTask:
             "energy_amount": 65000,
         }
         
-        with patch.object(task, '_update_order_status') as mock_update:
-            await task._sync_single_order(mock_client, order)
-            # 状态没变，不应该调用更新
-            mock_update.assert_not_called()
+        # 状态没变，不应该返回更新
+        assert await task._sync_single_order(mock_client, order) is None
     
     @pytest.mark.asyncio
     async def test_sync_single_order_not_found(self):
@@ -119,7 +123,7 @@ class TestEnergySyncTask:
         }
         
         # 不应抛出异常
-        await task._sync_single_order(mock_client, order)
+        assert await task._sync_single_order(mock_client, order) is None
     
     @pytest.mark.asyncio
     async def test_sync_single_order_empty_data(self):
@@ -137,10 +141,8 @@ class TestEnergySyncTask:
             "energy_amount": 65000,
         }
         
-        with patch.object(task, '_update_order_status') as mock_update:
-            await task._sync_single_order(mock_client, order)
-            # 空数据不应该调用更新
-            mock_update.assert_not_called()
+        # 空数据不应该返回更新
+        assert await task._sync_single_order(mock_client, order) is None
     
     @pytest.mark.asyncio
     async def test_notify_user_completed(self):
@@ -243,7 +245,7 @@ class TestEnergySyncURLParams:
                 mock_instance.__aexit__.return_value = None
                 MockClient.return_value = mock_instance
 
-                with patch.object(task, '_update_order_status'):
+                with patch.object(task, '_update_orders_status'):
                     with patch.object(task, '_notify_user', new_callable=AsyncMock):
                         await task.sync_orders()
 
@@ -255,3 +257,226 @@ class TestEnergySyncURLParams:
                     backup_url=settings.energy_api_backup_url,
                 )
 
+
+
+class TestEnergySyncConcurrency:
+    """测试并发同步与批量提交"""
+
+    @staticmethod
+    def _make_orders(count):
+        return [
+            {
+                "order_id": f"ENERGY_{i:03d}",
+                "api_order_id": str(10000 + i),
+                "status": "PROCESSING",
+                "user_id": 10001,
+                "energy_amount": 65000,
+            }
+            for i in range(count)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_queries_run_concurrently_within_limit(self):
+        """测试订单查询并发执行且不超过并发上限"""
+        import asyncio
+
+        task = EnergySyncTask(concurrency=3)
+        in_flight = 0
+        max_in_flight = 0
+
+        async def slow_query(api_order_id):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return MagicMock(data={"status": 1, "hash": "Waiting"})
+
+        mock_client = AsyncMock()
+        mock_client.query_order.side_effect = slow_query
+        task._client = mock_client
+
+        with patch.object(task, '_get_pending_orders', return_value=self._make_orders(10)):
+            await task.sync_orders()
+
+        assert mock_client.query_order.await_count == 10
+        assert max_in_flight == 3
+
+    @pytest.mark.asyncio
+    async def test_updates_committed_in_single_batch(self):
+        """测试状态变更在一次批量提交中完成，提交后再通知"""
+        task = EnergySyncTask()
+        mock_client = AsyncMock()
+        mock_client.query_order.return_value = MagicMock(data={"status": 1, "hash": "abc123"})
+        task._client = mock_client
+        orders = self._make_orders(4)
+
+        with patch.object(task, '_get_pending_orders', return_value=orders):
+            with patch.object(task, '_update_orders_status') as mock_update:
+                with patch.object(task, '_notify_user', new_callable=AsyncMock) as mock_notify:
+                    await task.sync_orders()
+
+        mock_update.assert_called_once()
+        assert len(mock_update.call_args.args[0]) == 4
+        assert mock_notify.await_count == 4
+
+    @pytest.mark.asyncio
+    async def test_client_reused_across_runs(self):
+        """测试 API 客户端跨轮次复用"""
+        task = EnergySyncTask()
+
+        with patch('src.tasks.energy_sync.EnergyAPIClient') as MockClient:
+            mock_instance = AsyncMock()
+            mock_instance.query_order.return_value = MagicMock(data={"status": 1, "hash": "Waiting"})
+            MockClient.return_value = mock_instance
+
+            with patch.object(task, '_get_pending_orders', return_value=self._make_orders(1)):
+                await task.sync_orders()
+                await task.sync_orders()
+
+            MockClient.assert_called_once()
+
+            await task.close()
+            mock_instance.close.assert_awaited_once()
+            assert task._client is None
+
+
+class TestEnergySyncLogReconciliation:
+    """测试日志对账模式"""
+
+    @staticmethod
+    def _order(order_id, api_order_id, status="PROCESSING", hours_ago=1):
+        from datetime import datetime, timedelta
+
+        return {
+            "order_id": order_id,
+            "api_order_id": api_order_id,
+            "status": status,
+            "user_id": 10001,
+            "energy_amount": 65000,
+            "created_at": datetime.now() - timedelta(hours=hours_ago),
+        }
+
+    @pytest.mark.asyncio
+    async def test_log_entries_update_orders_without_polling(self, isolate_log_cursor):
+        """测试日志覆盖的订单直接批量更新，不再逐单查询"""
+        from datetime import date
+
+        task = EnergySyncTask()
+        mock_client = AsyncMock()
+        mock_client.query_logs.return_value = {
+            "list": [
+                {"orderid": "A1", "status": 1, "hash": "hash_a1", "create_time": "2026-10-18 10:00:00"},
+                {"orderid": "A2", "status": 0, "hash": "", "create_time": "2026-10-18 11:00:00"},
+                {"type": "recharge", "amount": 100},
+            ]
+        }
+        task._client = mock_client
+        orders = [self._order("E1", "A1"), self._order("E2", "A2")]
+
+        with patch.object(task, '_get_pending_orders', return_value=orders):
+            with patch.object(task, '_update_orders_status') as mock_update:
+                with patch.object(task, '_notify_user', new_callable=AsyncMock):
+                    await task.sync_orders()
+
+        mock_client.query_order.assert_not_called()
+        updates = mock_update.call_args.args[0]
+        assert {(o["order_id"], status) for o, status, _ in updates} == {("E1", "COMPLETED"), ("E2", "FAILED")}
+        isolate_log_cursor.assert_called_once_with(date(2026, 10, 18), 1)
+
+    @pytest.mark.asyncio
+    async def test_uncovered_orders_fall_back_to_polling(self):
+        """测试日志未覆盖的近期订单回退为逐单查询，过旧订单不查询"""
+        task = EnergySyncTask()
+        mock_client = AsyncMock()
+        mock_client.query_logs.return_value = {"list": [{"orderid": "A1", "status": 1, "hash": "h1"}]}
+        mock_client.query_order.return_value = MagicMock(data={"status": 1, "hash": "h2"})
+        task._client = mock_client
+        orders = [self._order("E1", "A1"), self._order("E2", "A2"), self._order("E3", "A3", hours_ago=72)]
+
+        with patch.object(task, '_get_pending_orders', return_value=orders):
+            with patch.object(task, '_update_orders_status') as mock_update:
+                with patch.object(task, '_notify_user', new_callable=AsyncMock):
+                    await task.sync_orders()
+
+        mock_client.query_order.assert_awaited_once_with("A2")
+        assert len(mock_update.call_args.args[0]) == 2
+
+    @pytest.mark.asyncio
+    async def test_log_paging_stops_on_short_page(self):
+        """测试日志分页在不足一页时停止"""
+        from src.tasks.energy_sync import LOG_PAGE_SIZE
+
+        task = EnergySyncTask()
+        full_page = {"list": [{"orderid": f"X{i}", "status": 1, "hash": "h"} for i in range(LOG_PAGE_SIZE)]}
+        last_page = {"list": [{"orderid": "A1", "status": 1, "hash": "h"}]}
+        mock_client = AsyncMock()
+        mock_client.query_logs.side_effect = [full_page, last_page]
+        task._client = mock_client
+
+        with patch.object(task, '_get_pending_orders', return_value=[self._order("E1", "A1")]):
+            with patch.object(task, '_update_orders_status') as mock_update:
+                with patch.object(task, '_notify_user', new_callable=AsyncMock):
+                    await task.sync_orders()
+
+        assert mock_client.query_logs.await_count == 2
+        assert mock_client.query_logs.await_args_list[1].kwargs["page"] == 2
+        mock_update.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_log_page_cap_keeps_cursor_and_resumes(self, isolate_log_cursor):
+        """测试达到页数上限时保留游标并记录下一页，下一轮从该页继续拉取旧记录"""
+        from datetime import date
+
+        from src.tasks.energy_sync import LOG_PAGE_SIZE
+
+        cursor = date(2026, 10, 17)
+        task = EnergySyncTask()
+        full_page = {
+            "list": [
+                {"orderid": f"X{i}", "status": 1, "hash": "h", "create_time": "2026-10-18 10:00:00"}
+                for i in range(LOG_PAGE_SIZE)
+            ]
+        }
+        mock_client = AsyncMock()
+        mock_client.query_logs.return_value = full_page
+        task._client = mock_client
+
+        with patch('src.tasks.energy_sync.MAX_LOG_PAGES', 2):
+            with patch.object(task, '_load_log_cursor', return_value=(cursor, 1)):
+                with patch.object(task, '_get_pending_orders', return_value=[self._order("E1", "A1")]):
+                    with patch.object(task, '_sync_single_order', return_value=None):
+                        await task.sync_orders()
+
+            assert [c.kwargs["page"] for c in mock_client.query_logs.await_args_list] == [1, 2]
+            isolate_log_cursor.assert_called_once_with(cursor, 3)
+
+            mock_client.query_logs.reset_mock()
+            isolate_log_cursor.reset_mock()
+            mock_client.query_logs.return_value = {"list": [{"orderid": "A1", "status": 1, "hash": "h"}]}
+
+            with patch.object(task, '_load_log_cursor', return_value=(cursor, 3)):
+                with patch.object(task, '_get_pending_orders', return_value=[self._order("E1", "A1")]):
+                    with patch.object(task, '_update_orders_status'):
+                        with patch.object(task, '_notify_user', new_callable=AsyncMock):
+                            await task.sync_orders()
+
+        mock_client.query_logs.assert_awaited_once_with(start_date="2026-10-17", page=3, page_size=LOG_PAGE_SIZE)
+        isolate_log_cursor.assert_called_once_with(cursor, 1)
+
+    @pytest.mark.asyncio
+    async def test_log_failure_falls_back_and_keeps_cursor(self, isolate_log_cursor):
+        """测试日志拉取失败时回退为逐单查询且不推进游标"""
+        from src.modules.energy.client import EnergyAPIError
+
+        task = EnergySyncTask()
+        mock_client = AsyncMock()
+        mock_client.query_logs.side_effect = EnergyAPIError(10010, "server error")
+        mock_client.query_order.return_value = MagicMock(data={"status": 1, "hash": "Waiting"})
+        task._client = mock_client
+
+        with patch.object(task, '_get_pending_orders', return_value=[self._order("E1", "A1")]):
+            await task.sync_orders()
+
+        mock_client.query_order.assert_awaited_once_with("A1")
+        isolate_log_cursor.assert_not_called()
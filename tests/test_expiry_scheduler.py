@@ -0,0 +1,153 @@
+"""
+测试订单过期调度器（分层时间轮 + Redis ZSET 持久化）
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+from src.tasks.expiry_scheduler import (
+    EXPIRY_SCHEDULE_KEY,
+    HierarchicalTimerWheel,
+    OrderExpiryScheduler,
+)
+
+
+START = 1_700_000_000.0
+
+
+class TestHierarchicalTimerWheel:
+    """测试分层时间轮"""
+
+    @pytest.fixture
+    def wheel(self):
+        return HierarchicalTimerWheel(tick_seconds=1.0, wheel_sizes=(60, 60, 24), now=START)
+
+    def test_fires_at_deadline(self, wheel):
+        """定时器在截止时间到达时触发，不提前"""
+        wheel.add("order_a", START + 5)
+
+        assert wheel.advance(START + 4) == []
+        assert wheel.advance(START + 5) == ["order_a"]
+        assert len(wheel) == 0
+
+    def test_cascades_from_higher_levels(self, wheel):
+        """跨层级的定时器（分钟级、小时级）在精确时刻触发"""
+        wheel.add("minutes", START + 30 * 60 + 7)
+        wheel.add("hours", START + 5 * 3600 + 11)
+
+        assert wheel.advance(START + 30 * 60 + 6) == []
+        assert wheel.advance(START + 30 * 60 + 7) == ["minutes"]
+        assert wheel.advance(START + 5 * 3600 + 10) == []
+        assert wheel.advance(START + 5 * 3600 + 11) == ["hours"]
+
+    def test_overflow_beyond_horizon(self, wheel):
+        """超出时间轮范围的定时器经溢出集合后仍能准确触发"""
+        deadline = START + 3 * 86400 + 42
+        wheel.add("far", deadline)
+
+        assert wheel.advance(deadline - 1) == []
+        assert wheel.advance(deadline) == ["far"]
+
+    def test_past_deadline_fires_immediately(self, wheel):
+        """已过期的截止时间在下一次推进时立即触发"""
+        wheel.add("late", START - 100)
+
+        assert wheel.advance(START) == ["late"]
+
+    def test_cancel(self, wheel):
+        """取消后的定时器不会触发"""
+        wheel.add("order_a", START + 10)
+        wheel.add("order_b", START + 10)
+
+        assert wheel.cancel("order_a") is True
+        assert wheel.cancel("missing") is False
+        assert wheel.advance(START + 10) == ["order_b"]
+
+    def test_reschedule_replaces_deadline(self, wheel):
+        """重复添加同一订单会替换截止时间"""
+        wheel.add("order_a", START + 10)
+        wheel.add("order_a", START + 20)
+
+        assert wheel.advance(START + 10) == []
+        assert wheel.advance(START + 20) == ["order_a"]
+
+    def test_invalid_config(self):
+        """非法配置抛出 ValueError"""
+        with pytest.raises(ValueError):
+            HierarchicalTimerWheel(tick_seconds=0)
+        with pytest.raises(ValueError):
+            HierarchicalTimerWheel(wheel_sizes=(60, 1))
+
+
+class TestOrderExpiryScheduler:
+    """测试订单过期调度器"""
+
+    @pytest.fixture
+    def scheduler(self, fake_redis):
+        scheduler = OrderExpiryScheduler()
+        scheduler.wheel = HierarchicalTimerWheel(now=START)
+        scheduler.redis_client = fake_redis
+        return scheduler
+
+    @pytest.mark.asyncio
+    async def test_schedule_persists_to_redis(self, scheduler, fake_redis):
+        """登记的截止时间写入 Redis ZSET"""
+        expires_at = datetime.fromtimestamp(START + 60)
+        await scheduler.schedule("ORDER_1", expires_at)
+
+        assert "ORDER_1" in scheduler.wheel
+        assert await fake_redis.zscore(EXPIRY_SCHEDULE_KEY, "ORDER_1") == pytest.approx(START + 60)
+
+    @pytest.mark.asyncio
+    async def test_cancel_removes_from_redis(self, scheduler, fake_redis):
+        """取消后从时间轮和 ZSET 中移除"""
+        await scheduler.schedule("ORDER_1", datetime.fromtimestamp(START + 60))
+        await scheduler.cancel("ORDER_1")
+
+        assert "ORDER_1" not in scheduler.wheel
+        assert await fake_redis.zscore(EXPIRY_SCHEDULE_KEY, "ORDER_1") is None
+
+    @pytest.mark.asyncio
+    async def test_tick_invokes_callback_and_cleans_up(self, scheduler, fake_redis):
+        """到期时回调并清理 ZSET"""
+        callback = AsyncMock()
+        scheduler._on_expire = callback
+        await scheduler.schedule("ORDER_1", datetime.fromtimestamp(START + 5))
+        await scheduler.schedule("ORDER_2", datetime.fromtimestamp(START + 500))
+
+        assert await scheduler.tick(START + 4) == []
+        assert await scheduler.tick(START + 5) == ["ORDER_1"]
+
+        callback.assert_awaited_once_with(["ORDER_1"])
+        assert await fake_redis.zscore(EXPIRY_SCHEDULE_KEY, "ORDER_1") is None
+        assert await fake_redis.zscore(EXPIRY_SCHEDULE_KEY, "ORDER_2") is not None
+
+    @pytest.mark.asyncio
+    async def test_failed_callback_keeps_redis_entry(self, scheduler, fake_redis):
+        """回调失败时保留 ZSET 记录，交由对账扫描兜底"""
+        scheduler._on_expire = AsyncMock(side_effect=RuntimeError("db down"))
+        await scheduler.schedule("ORDER_1", datetime.fromtimestamp(START + 1))
+
+        assert await scheduler.tick(START + 1) == ["ORDER_1"]
+        assert await fake_redis.zscore(EXPIRY_SCHEDULE_KEY, "ORDER_1") is not None
+
+    @pytest.mark.asyncio
+    async def test_load_pending_restores_after_restart(self, scheduler, fake_redis):
+        """重启后从 ZSET 恢复定时器"""
+        await fake_redis.zadd(EXPIRY_SCHEDULE_KEY, {"ORDER_1": START - 10, "ORDER_2": START + 30})
+
+        restored = await scheduler.load_pending()
+
+        assert restored == 2
+        assert scheduler.wheel.advance(START) == ["ORDER_1"]
+        assert scheduler.wheel.advance(START + 30) == ["ORDER_2"]
+
+    @pytest.mark.asyncio
+    async def test_resync_picks_up_orders_from_other_instances(self, scheduler, fake_redis):
+        """领导者实例同步其他实例登记到 ZSET 的订单"""
+        await scheduler.schedule("ORDER_1", datetime.fromtimestamp(START + 10))
+        await fake_redis.zadd(EXPIRY_SCHEDULE_KEY, {"ORDER_2": START + 20})
+
+        assert await scheduler.resync() == 1
+        assert await scheduler.resync() == 0
+        assert scheduler.wheel.advance(START + 20) == ["ORDER_1", "ORDER_2"]
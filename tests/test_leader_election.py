@@ -0,0 +1,260 @@
+"""
+领导者选举测试：租约获取与续约、故障转移、fencing token 校验与单例任务启停
+"""
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.common.leader_election import LeaderElector
+
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_elector(server, instance, lease_seconds=15.0) -> LeaderElector:
+    """模拟一个实例（连接同一个 Redis）"""
+    elector = LeaderElector("test:jobs", instance=instance, lease_seconds=lease_seconds, renew_interval=60)
+    elector.redis_client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    return elector
+
+
+class TestLeaderElector:
+
+    @pytest.mark.asyncio
+    async def test_only_one_instance_leads(self, server):
+        first, second = make_elector(server, "a"), make_elector(server, "b")
+
+        await first._campaign()
+        await second._campaign()
+
+        assert first.is_leader is True
+        assert second.is_leader is False
+        assert first.fencing_token == 1
+        assert second.fencing_token is None
+
+    @pytest.mark.asyncio
+    async def test_renew_extends_lease(self, server):
+        elector = make_elector(server, "a")
+        await elector._campaign()
+        await elector.redis_client.pexpire(elector.lease_key, 1000)
+
+        await elector._campaign()
+
+        assert elector.is_leader is True
+        assert await elector.redis_client.pttl(elector.lease_key) > 10_000
+
+    @pytest.mark.asyncio
+    async def test_release_on_stop_fails_over_immediately(self, server):
+        first, second = make_elector(server, "a"), make_elector(server, "b")
+        on_release = AsyncMock()
+        first.add_listener(on_release=on_release)
+        await first._campaign()
+
+        await first.stop()
+        await second._campaign()
+
+        on_release.assert_awaited_once()
+        assert first.is_leader is False
+        assert second.is_leader is True
+        assert second.fencing_token == 2
+
+    @pytest.mark.asyncio
+    async def test_failover_after_lease_expires(self, server):
+        first, second = make_elector(server, "a"), make_elector(server, "b")
+        await first._campaign()
+
+        # 领导者进程失联：租约在 Redis 中过期
+        await first.redis_client.delete(first.lease_key)
+        await second._campaign()
+
+        assert second.is_leader is True
+        assert second.fencing_token > 1
+
+        # 旧领导者恢复后续约失败并退位，不会与新领导者同时执行
+        on_release = AsyncMock()
+        first.add_listener(on_release=on_release)
+        await first._campaign()
+        assert first.is_leader is False
+        on_release.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stale_fencing_token_is_rejected(self, server):
+        first, second = make_elector(server, "a"), make_elector(server, "b")
+        await first._campaign()
+        await first.redis_client.delete(first.lease_key)
+        await second._campaign()
+
+        # 旧领导者的本地租约尚未到期，但发放前的校验会发现 token 已被替换
+        assert first.is_leader is True
+        assert await first.verify() is False
+        assert first.is_leader is False
+        assert await second.verify() is True
+
+    @pytest.mark.asyncio
+    async def test_steps_down_when_redis_unreachable(self, server):
+        elector = make_elector(server, "a", lease_seconds=2.0)
+        await elector._campaign()
+        elector.redis_client = MagicMock()
+        elector.redis_client.pipeline = MagicMock(side_effect=ConnectionError("down"))
+
+        # 本地租约未到期前保持领导权
+        await elector._campaign()
+        assert elector._is_leader is True
+
+        elector._lease_deadline = time.monotonic() - 1
+        await elector._campaign()
+        assert elector._is_leader is False
+
+    @pytest.mark.asyncio
+    async def test_listeners_and_leader_only_jobs(self, server):
+        leader, follower = make_elector(server, "a"), make_elector(server, "b")
+        started = []
+        for elector in (leader, follower):
+            elector.add_listener(on_acquire=AsyncMock(side_effect=lambda name=elector.instance: started.append(name)))
+        job = AsyncMock(return_value="done")
+
+        await leader.start()
+        await follower.start()
+        try:
+            assert started == ["a"]
+            assert await leader.leader_only(job)() == "done"
+            assert await follower.leader_only(job)() is None
+            job.assert_awaited_once()
+        finally:
+            await leader.stop()
+            await follower.stop()
+
+    @pytest.mark.asyncio
+    async def test_disabled_is_always_leader(self):
+        elector = LeaderElector("test:jobs", enabled=False)
+        on_acquire = AsyncMock()
+        elector.add_listener(on_acquire=on_acquire)
+
+        await elector.start()
+        await elector.start()
+
+        on_acquire.assert_awaited_once()
+        assert elector.is_leader is True
+        assert await elector.verify() is True
+        assert elector.status()["is_leader"] is True
+        await elector.stop()
+
+    @pytest.mark.asyncio
+    async def test_status(self, server):
+        elector = make_elector(server, "a")
+        await elector._campaign()
+
+        status = elector.status()
+
+        assert status["is_leader"] is True
+        assert status["fencing_token"] == 1
+        assert status["instance"] == "a"
+        assert 0 < status["lease_remaining"] <= 15
+
+
+class TestPaymentMonitorFencing:
+
+    @pytest.mark.asyncio
+    async def test_follower_does_not_process_transfers(self, monkeypatch):
+        from src.modules.trx_exchange import payment_monitor
+        from src.modules.trx_exchange.payment_monitor import PaymentMonitor
+
+        elector = MagicMock()
+        elector.verify = AsyncMock(return_value=False)
+        monkeypatch.setattr(payment_monitor, "get_leader_elector", lambda: elector)
+        monitor = PaymentMonitor()
+        monitor._match_order = AsyncMock()
+
+        await monitor._process_transfer({"transaction_id": "a" * 64, "quant": "10000000"})
+
+        monitor._match_order.assert_not_called()
+        # 未标记为已处理，新领导者仍会处理该转账
+        assert not monitor._is_tx_processed("a" * 64)
+
+    @pytest.mark.asyncio
+    async def test_deposed_leader_cannot_claim_paid_order(self, monkeypatch, tmp_path):
+        """verify() 通过后失去领导权：新领导者已认领订单时，旧领导者的条件更新被数据库拒绝"""
+        from contextlib import contextmanager
+        from decimal import Decimal
+
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        from src.modules.trx_exchange import payment_monitor
+        from src.modules.trx_exchange.models import TRXExchangeOrder
+        from src.modules.trx_exchange.payment_monitor import PaymentMonitor
+
+        engine = create_engine(f"sqlite:///{tmp_path}/orders.db")
+        TRXExchangeOrder.__table__.create(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            db.add(
+                TRXExchangeOrder(
+                    order_id="T1", user_id=1, usdt_amount=Decimal("10.123"), trx_amount=Decimal("30"),
+                    exchange_rate=Decimal("3"), recipient_address="TR", payment_address="TP", status="PENDING",
+                )
+            )
+            db.commit()
+
+        @contextmanager
+        def db_context():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        elector = MagicMock()
+        elector.verify = AsyncMock(return_value=True)
+        monkeypatch.setattr(payment_monitor, "get_leader_elector", lambda: elector)
+        monkeypatch.setattr(payment_monitor, "get_db_context_manual_commit", db_context)
+        monitor = PaymentMonitor()
+        monitor._send_trx = AsyncMock()
+        match_order = monitor._match_order
+
+        async def match_then_lose_leadership(db, amount):
+            order = await match_order(db, amount)
+            # 新领导者在此期间认领了订单
+            with Session() as other:
+                other.query(TRXExchangeOrder).filter_by(order_id="T1").update({"status": "PAID", "tx_hash": "new"})
+                other.commit()
+            return order
+
+        monitor._match_order = match_then_lose_leadership
+
+        await monitor._process_transfer({"transaction_id": "b" * 64, "quant": "10123000"})
+
+        monitor._send_trx.assert_not_called()
+        with Session() as db:
+            assert db.get(TRXExchangeOrder, "T1").tx_hash == "new"
+        engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_monitor_task(self, monkeypatch):
+        from src.modules.trx_exchange import payment_monitor
+
+        monitor = MagicMock()
+
+        async def run():
+            await asyncio.sleep(10)
+
+        monitor.start = run
+        monkeypatch.setattr(payment_monitor, "_monitor", monitor)
+        monkeypatch.setattr(payment_monitor, "_monitor_task", None)
+
+        await payment_monitor.start_payment_monitor()
+        task = payment_monitor._monitor_task
+        await payment_monitor.start_payment_monitor()
+        assert payment_monitor._monitor_task is task
+
+        payment_monitor.stop_payment_monitor()
+        await asyncio.sleep(0)
+        assert task.cancelled()
+        assert payment_monitor._monitor_task is None
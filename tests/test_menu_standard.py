@@ -291,3 +291,54 @@ class TestMainMenuStandard:
 # 运行测试
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
+
+
+class TestRatesMenu:
+    """测试汇率菜单读取共享缓存"""
+
+    RATES = {
+        "updated_at": "2026-01-01T00:00:00+00:00",
+        "base": 7.1,
+        "bank": 7.1,
+        "alipay": 7.2,
+        "wechat": None,
+        "details": {
+            "bank": {"merchants": [{"price": 7.1, "name": "银行商家"}]},
+            "alipay": {"merchants": [{"price": 7.2, "name": "支付宝商家"}]},
+            "wechat": {"merchants": []},
+        },
+    }
+
+    @pytest.mark.asyncio
+    async def test_show_rates_reads_cache(self, menu_module):
+        update = create_mock_update(message_text="💱 实时汇率")
+        context = MockContext()
+
+        with patch("src.rates.service.get_or_refresh_rates", new_callable=AsyncMock, return_value=self.RATES), \
+             patch("src.rates.service.fetch_usdt_cny_from_okx", new_callable=AsyncMock) as fetch:
+            await menu_module.show_rates(update, context)
+
+        fetch.assert_not_awaited()
+        assert context.user_data == {}
+        text = update.message.reply_text.await_args.args[0]
+        assert text.index("银行商家") < text.index("支付宝商家")
+        assert "数据更新于" in text and "分钟前" in text
+
+    @pytest.mark.asyncio
+    async def test_channel_switch_reads_cache(self, menu_module):
+        update = create_mock_update(callback_data="rate_channel_alipay")
+
+        with patch("src.rates.service.get_or_refresh_rates", new_callable=AsyncMock, return_value=self.RATES):
+            await menu_module.handle_rate_channel(update, MockContext())
+
+        text = update.callback_query.edit_message_text.await_args.args[0]
+        assert "支付宝商家" in text and "银行商家" not in text
+
+    @pytest.mark.asyncio
+    async def test_show_rates_without_data(self, menu_module):
+        update = create_mock_update(message_text="💱 实时汇率")
+
+        with patch("src.rates.service.get_or_refresh_rates", new_callable=AsyncMock, return_value=None):
+            await menu_module.show_rates(update, MockContext())
+
+        assert "获取汇率失败" in update.message.reply_text.await_args.args[0]
@@ -239,6 +239,44 @@ class TestOrderExpiryTask:
         # 由于后缀释放抛出异常，不会增加 suffix_released 计数
         # 但错误会被捕获，所以流程继续
 
+    @pytest.mark.asyncio
+    @patch('src.payments.order.order_manager.update_order_status')
+    @patch('src.tasks.order_expiry.get_db_context_manual_commit')
+    async def test_expire_orders_by_ids(self, mock_db_context, mock_update_status, task):
+        """测试按订单号处理定时器触发的到期订单"""
+        from unittest.mock import AsyncMock
+
+        expired_order = Mock(spec=Order)
+        expired_order.order_id = "PREM_TEST_001"
+        expired_order.order_type = "premium"
+        expired_order.status = "PENDING"
+        expired_order.amount_usdt = 10_123_000
+        expired_order.created_at = datetime.now() - timedelta(minutes=30)
+        expired_order.user_id = 123456789
+
+        mock_session = MagicMock()
+        mock_db_context.return_value = create_mock_db_context(mock_session)()
+        mock_session.execute.return_value.scalars.return_value.all.return_value = [expired_order]
+        mock_update_status.side_effect = AsyncMock(return_value=True)
+        task.suffix_manager.release_suffix = AsyncMock(return_value=True)
+
+        stats = await task.expire_orders_by_ids(["PREM_TEST_001"])
+
+        assert stats["expired"] == 1
+        assert stats["suffix_released"] == 1
+        assert expired_order.status == "EXPIRED"
+        mock_session.commit.assert_called_once()
+        assert mock_update_status.await_count == 1
+
+    @pytest.mark.asyncio
+    @patch('src.tasks.order_expiry.get_db_context_manual_commit')
+    async def test_expire_orders_by_ids_empty(self, mock_db_context, task):
+        """测试空订单号列表不访问数据库"""
+        stats = await task.expire_orders_by_ids([])
+
+        assert stats["expired"] == 0
+        mock_db_context.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_run(self, task):
         """测试 run 方法（由调度器调用）"""
@@ -0,0 +1,156 @@
+"""
+Redis 状态持久化测试：按需加载、写回、闲置回收与重启后继续对话
+"""
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from telegram import Bot, Update, User
+from telegram.ext import Application, CommandHandler, ConversationHandler, MessageHandler, filters
+
+from src.common.conversation_wrapper import ConversationTracker
+from src.core.persistence import PRELOAD_GROUP, RedisPersistence, create_preload_handler
+from tests.mocks.telegram_updates import TelegramUpdateRecordings
+
+
+fakeredis = pytest.importorskip("fakeredis")
+
+USER_ID = TelegramUpdateRecordings.USER["id"]
+KEY = (USER_ID, USER_ID)
+ASK_ADDRESS = 1
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_persistence(server) -> RedisPersistence:
+    """模拟一个进程的持久化实例（连接同一个 Redis）"""
+    persistence = RedisPersistence("123456", update_interval=60, ttl_seconds=3600)
+    persistence.redis_client = fakeredis.aioredis.FakeRedis(server=server)
+    return persistence
+
+
+def make_conversation(received):
+    async def start(update, context):
+        context.user_data["step"] = "address"
+        return ASK_ADDRESS
+
+    async def address(update, context):
+        received.append((update.message.text, context.user_data.get("step")))
+        return ConversationHandler.END
+
+    handler = ConversationHandler(
+        entry_points=[CommandHandler("start", start)],
+        states={ASK_ADDRESS: [MessageHandler(filters.TEXT & ~filters.COMMAND, address)]},
+        fallbacks=[],
+        name="flow",
+        persistent=True,
+    )
+    ConversationTracker.register_handler("flow", handler)
+    return handler
+
+
+async def start_application(persistence, handler):
+    application = Application.builder().token("123456:TEST_TOKEN").persistence(persistence).updater(None).build()
+    application.add_handler(create_preload_handler(), group=PRELOAD_GROUP)
+    application.add_handler(handler)
+    bot_user = User(id=123456, is_bot=True, first_name="Bot", username="test_bot")
+    with patch.object(Bot, "get_me", AsyncMock(return_value=bot_user)):
+        await application.initialize()
+    application.bot._bot_user = bot_user
+    return application
+
+
+class TestRedisPersistence:
+
+    @pytest.mark.asyncio
+    async def test_conversation_survives_restart(self, server):
+        """第一个进程进入对话后重启，第二个进程从 Redis 恢复对话状态与 user_data"""
+        received = []
+        first = await start_application(make_persistence(server), make_conversation(received))
+        await first.process_update(Update.de_json(TelegramUpdateRecordings.start_command(), first.bot))
+        await first.update_persistence()
+
+        # 重启：新的进程、新的处理器实例
+        ConversationTracker._active_conversations.clear()
+        second_persistence = make_persistence(server)
+        second = await start_application(second_persistence, make_conversation(received))
+        assert second.user_data == {}  # 启动时不加载用户
+
+        address = TelegramUpdateRecordings.text_message("TLyqzVGLV1srkB7dToTAEqgDSfPtXRJZYH")
+        await second.process_update(Update.de_json(address, second.bot))
+
+        assert received == [("TLyqzVGLV1srkB7dToTAEqgDSfPtXRJZYH", "address")]
+
+        # 对话结束后 Redis 中的对话状态被删除
+        await second.update_persistence()
+        fields = await second_persistence.redis_client.hkeys(second_persistence._user_key(USER_ID))
+        assert fields == [b"data"]
+
+    @pytest.mark.asyncio
+    async def test_lazy_load_sets_active_conversation(self, server):
+        writer = make_persistence(server)
+        handler = make_conversation([])
+        writer._loaded_users.add(USER_ID)
+        await writer.update_user_data(USER_ID, {"order_id": "abc"})
+        await writer.update_conversation("flow", KEY, ASK_ADDRESS)
+
+        reader = make_persistence(server)
+        user_data = {}
+        await reader.refresh_user_data(USER_ID, user_data)
+
+        assert user_data == {"order_id": "abc"}
+        assert handler._conversations[KEY] == ASK_ADDRESS
+        assert ConversationTracker.get_active(USER_ID) == "flow"
+        assert await reader.redis_client.ttl(reader._user_key(USER_ID)) > 0
+
+    @pytest.mark.asyncio
+    async def test_unloaded_user_is_not_written(self, server):
+        persistence = make_persistence(server)
+
+        await persistence.update_user_data(USER_ID, {"partial": True})
+
+        assert await persistence.redis_client.exists(persistence._user_key(USER_ID)) == 0
+
+    @pytest.mark.asyncio
+    async def test_global_conversations_load_at_startup(self, server):
+        persistence = make_persistence(server)
+        await persistence.update_conversation("not_tracked", (42,), 3)
+
+        assert await make_persistence(server).get_conversations("not_tracked") == {(42,): 3}
+
+    @pytest.mark.asyncio
+    async def test_evict_idle_keeps_redis_state(self, server):
+        persistence = make_persistence(server)
+        handler = make_conversation([])
+        application = await start_application(persistence, handler)
+
+        await application.process_update(Update.de_json(TelegramUpdateRecordings.start_command(), application.bot))
+        persistence._last_seen[USER_ID] = time.monotonic() - 7200
+
+        assert await persistence.evict_idle(application, idle_seconds=3600) == 1
+        assert USER_ID not in application.user_data
+        assert KEY not in handler._conversations
+        assert ConversationTracker.get_active(USER_ID) is None
+
+        # 下次访问时重新加载
+        user_data = {}
+        await persistence.refresh_user_data(USER_ID, user_data)
+        assert user_data == {"step": "address"}
+        assert handler._conversations[KEY] == ASK_ADDRESS
+
+    @pytest.mark.asyncio
+    async def test_redis_unavailable_degrades(self):
+        persistence = RedisPersistence("123456")
+        persistence.redis_client = MagicMock()
+        persistence.redis_client.hgetall = AsyncMock(side_effect=ConnectionError("down"))
+        user_data = {"local": 1}
+
+        await persistence.refresh_user_data(USER_ID, user_data)
+        await persistence.update_user_data(USER_ID, user_data)
+
+        assert user_data == {"local": 1}
+        assert USER_ID not in persistence._loaded_users
+        assert await persistence.get_conversations("flow") == {}
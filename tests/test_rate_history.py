@@ -0,0 +1,189 @@
+"""
+汇率历史时间序列测试：聚合桶、区间查询、时点查询与保留期清理
+"""
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database import Base, RateRollup, RateSample
+from src.rates.history import RateHistoryStore, bucket_start, choose_resolution
+
+
+T0 = datetime(2026, 3, 1, 10, 0, 0)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def store(session_factory):
+    return RateHistoryStore(session_factory)
+
+
+class TestRollups:
+    """测试写入时增量聚合"""
+
+    def test_ohlc_per_bucket(self, store, session_factory):
+        for offset, price in [(0, 7.10), (20, 7.30), (40, 7.00), (50, 7.20)]:
+            store.record([("okx", "bank", price)], at=T0 + timedelta(seconds=offset))
+
+        session = session_factory()
+        minute = session.query(RateRollup).filter_by(resolution="1m").one()
+        assert (minute.open, minute.high, minute.low, minute.close) == (7.10, 7.30, 7.00, 7.20)
+        assert minute.count == 4
+        assert session.query(RateRollup).count() == 3
+        assert session.query(RateSample).count() == 4
+        session.close()
+
+    def test_out_of_order_sample_keeps_close(self, store, session_factory):
+        store.record([("okx", "bank", 7.2)], at=T0 + timedelta(seconds=30))
+        store.record([("okx", "bank", 7.1)], at=T0)
+
+        session = session_factory()
+        minute = session.query(RateRollup).filter_by(resolution="1m").one()
+        assert (minute.open, minute.close) == (7.1, 7.2)
+        session.close()
+
+    def test_aware_timestamps_stored_as_utc(self, store, session_factory):
+        store.record([("okx", "bank", 7.1)], at=datetime(2026, 3, 1, 18, 30, tzinfo=UTC))
+        store.record([("okx", "bank", 7.2)], at=datetime.fromisoformat("2026-03-02T02:45:00+08:00"))
+
+        session = session_factory()
+        assert session.query(RateRollup).filter_by(resolution="1h").count() == 1
+        assert bucket_start(session.query(RateSample).first().ts, "1d") == datetime(2026, 3, 1)
+        session.close()
+
+
+class TestQueries:
+    """测试区间查询与时点查询"""
+
+    def test_range_query_reads_rollups(self, store):
+        for hour in range(5):
+            store.record([("okx", "bank", 7.0 + hour / 10)], at=T0 + timedelta(hours=hour))
+
+        resolution, points = store.query("okx", "bank", T0, T0 + timedelta(hours=5), resolution="1h")
+
+        assert resolution == "1h"
+        assert [p["close"] for p in points] == [7.0, 7.1, 7.2, 7.3, 7.4]
+        assert points[0]["ts"] == "2026-03-01T10:00:00+00:00"
+
+    def test_auto_resolution_and_point_limit(self, store):
+        assert choose_resolution(T0, T0 + timedelta(hours=6)) == "1m"
+        assert choose_resolution(T0, T0 + timedelta(days=30)) == "1h"
+        assert choose_resolution(T0, T0 + timedelta(days=365)) == "1d"
+
+        with pytest.raises(ValueError):
+            store.query("okx", "bank", T0, T0 + timedelta(days=30), resolution="1m")
+
+    def test_rate_at_falls_back_to_rollups_after_prune(self, store):
+        store.record([("trx_exchange", "usdt_trx", 3.05)], at=T0)
+        store.record([("trx_exchange", "usdt_trx", 3.10)], at=T0 + timedelta(hours=2))
+
+        assert store.rate_at("trx_exchange", "usdt_trx", T0 + timedelta(hours=1)) == 3.05
+        assert store.rate_at("trx_exchange", "usdt_trx", T0 - timedelta(seconds=1)) is None
+
+        # 原始采样过期后使用分钟聚合
+        store.prune(now=T0 + timedelta(days=3))
+        assert store.rate_at("trx_exchange", "usdt_trx", T0 + timedelta(hours=1)) == 3.05
+
+
+class TestRetention:
+    """测试保留期清理"""
+
+    def test_prune_by_level(self, store, session_factory):
+        store.record([("okx", "bank", 7.1)], at=T0)
+
+        deleted = store.prune(now=T0 + timedelta(days=10))
+
+        session = session_factory()
+        assert session.query(RateSample).count() == 0
+        assert {row.resolution for row in session.query(RateRollup)} == {"1h", "1d"}
+        session.close()
+        assert deleted == 2
+
+
+class TestRecordingSources:
+    """测试汇率来源写入历史"""
+
+    def test_set_rate_records_history(self, test_db):
+        from src.modules.trx_exchange.rate_manager import RateManager
+
+        RateManager.set_rate(test_db, Decimal("3.20"), admin_user_id=1)
+
+        sample = test_db.query(RateSample).one()
+        assert (sample.source, sample.channel, sample.price) == ("trx_exchange", "usdt_trx", 3.2)
+
+    def test_set_rate_respects_history_switch(self, test_db, monkeypatch):
+        from src.modules.trx_exchange import rate_manager
+        from src.modules.trx_exchange.rate_manager import RateManager
+
+        monkeypatch.setattr(rate_manager.settings, "rate_history_enabled", False)
+        RateManager.set_rate(test_db, Decimal("3.20"), admin_user_id=1)
+
+        assert test_db.query(RateSample).count() == 0
+
+    @pytest.mark.asyncio
+    async def test_refresh_skips_stale_channels(self, monkeypatch):
+        from src.rates import service as rates_service
+
+        async def fake_fetch():
+            return {
+                "bank": {"min_price": 7.1, "merchants": []},
+                "alipay": {"min_price": 7.2, "merchants": [], "stale": True},
+                "wechat": {"min_price": None, "merchants": []},
+            }
+
+        monkeypatch.setattr(rates_service, "fetch_usdt_cny_from_okx", fake_fetch)
+        with patch("src.rates.history.rate_history.record") as record:
+            await rates_service.refresh_usdt_rates(redis_client=None)
+
+        assert record.call_args.args[0] == [("okx", "bank", 7.1)]
+        rates_service.reset_rates_cache()
+
+
+class TestHistoryAPI:
+    """测试汇率历史 API"""
+
+    @pytest.fixture
+    def client(self, store):
+        from fastapi.testclient import TestClient
+
+        from src.api.app import create_api_app
+        from src.api.auth import api_key_auth
+
+        app = create_api_app()
+        app.dependency_overrides[api_key_auth] = lambda: "test_api_key"
+        with patch("src.rates.history.rate_history", store):
+            yield TestClient(app)
+
+    def test_history_and_rate_at(self, client, store):
+        store.record([("okx", "bank", 7.1)], at=T0)
+
+        response = client.get(
+            "/api/rates/history",
+            params={"start": "2026-03-01T09:00:00Z", "end": "2026-03-01T12:00:00Z", "resolution": "1h"},
+        )
+        assert response.status_code == 200
+        assert response.json()["data"]["points"][0]["close"] == 7.1
+
+        response = client.get("/api/rates/at", params={"at": "2026-03-01T10:30:00Z", "source": "okx", "channel": "bank"})
+        assert response.json()["data"]["rate"] == 7.1
+
+        response = client.get("/api/rates/at", params={"at": "2026-03-01T09:00:00Z"})
+        assert response.status_code == 404
+
+    def test_invalid_range(self, client):
+        response = client.get(
+            "/api/rates/history", params={"start": "2026-03-01T00:00:00Z", "end": "2026-02-01T00:00:00Z"}
+        )
+        assert response.status_code == 400
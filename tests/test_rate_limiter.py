@@ -0,0 +1,203 @@
+"""
+限流器测试：令牌桶、GCRA 与 API 限流中间件
+"""
+import pytest
+from unittest.mock import patch
+
+from src.common.rate_limiter import GCRALimiter, TokenBucketLimiter, retry_after_minutes
+
+
+class TestTokenBucketLimiter:
+    """测试进程内令牌桶"""
+
+    @pytest.fixture
+    def limiter(self):
+        return TokenBucketLimiter(capacity=2, refill_per_second=1, use_redis=False)
+
+    @pytest.mark.asyncio
+    async def test_burst_then_throttle(self, limiter):
+        """容量内允许突发，耗尽后拒绝并给出等待时间"""
+        with patch("src.common.rate_limiter.time.time", return_value=1000.0):
+            assert (await limiter.acquire("u1"))[0] is True
+            assert (await limiter.acquire("u1"))[0] is True
+            allowed, retry_after = await limiter.acquire("u1")
+
+        assert allowed is False
+        assert retry_after == pytest.approx(1.0)
+
+    @pytest.mark.asyncio
+    async def test_refill(self, limiter):
+        """令牌按速率补充"""
+        with patch("src.common.rate_limiter.time.time", return_value=1000.0):
+            await limiter.acquire("u1", cost=2)
+        with patch("src.common.rate_limiter.time.time", return_value=1001.5):
+            assert (await limiter.acquire("u1"))[0] is True
+            assert (await limiter.acquire("u1"))[0] is False
+
+    @pytest.mark.asyncio
+    async def test_peek_does_not_consume(self, limiter):
+        """peek 不扣减令牌"""
+        for _ in range(5):
+            assert (await limiter.peek("u1"))[0] is True
+        assert (await limiter.acquire("u1", cost=2))[0] is True
+        assert (await limiter.peek("u1"))[0] is False
+
+    @pytest.mark.asyncio
+    async def test_keys_are_independent(self, limiter):
+        """不同用户互不影响"""
+        await limiter.acquire("u1", cost=2)
+        assert (await limiter.acquire("u2"))[0] is True
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_redis_fails(self):
+        """Redis 异常时退化为进程内令牌桶，并暂停尝试 Redis"""
+        limiter = TokenBucketLimiter(capacity=1, refill_per_second=0.01)
+
+        class BrokenRedis:
+            calls = 0
+
+            def register_script(self, script):
+                async def run(keys, args):
+                    BrokenRedis.calls += 1
+                    raise ConnectionError("redis down")
+                return run
+
+        limiter.redis_client = BrokenRedis()
+
+        assert (await limiter.acquire("u1"))[0] is True
+        assert (await limiter.acquire("u1"))[0] is False
+        assert BrokenRedis.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_script(self, fake_redis):
+        """Redis Lua 脚本（需要 lupa 支持的 fakeredis）"""
+        pytest.importorskip("lupa")
+        limiter = TokenBucketLimiter(capacity=1, refill_per_second=0.01)
+        limiter.redis_client = fake_redis
+
+        assert (await limiter.acquire("u1"))[0] is True
+        allowed, retry_after = await limiter.acquire("u1")
+        assert allowed is False
+        assert retry_after > 0
+
+    def test_invalid_config(self):
+        with pytest.raises(ValueError):
+            TokenBucketLimiter(capacity=0, refill_per_second=1)
+
+    def test_retry_after_minutes(self):
+        assert retry_after_minutes(0.5) == 1
+        assert retry_after_minutes(61) == 2
+
+
+class TestGCRALimiter:
+    """测试 GCRA 限流"""
+
+    @pytest.fixture
+    def limiter(self):
+        return GCRALimiter(use_redis=False)
+
+    @pytest.mark.asyncio
+    async def test_burst_then_spacing(self, limiter):
+        """窗口内允许 limit 次突发，之后按 period/limit 的间隔放行"""
+        with patch("src.common.rate_limiter.time.time", return_value=1000.0):
+            results = [await limiter.acquire("c1", limit=3, period=60) for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert [r.remaining for r in results[:3]] == [2, 1, 0]
+        assert results[3].retry_after == pytest.approx(20.0)
+        assert results[2].reset_after == pytest.approx(60.0)
+
+        with patch("src.common.rate_limiter.time.time", return_value=1020.0):
+            assert (await limiter.acquire("c1", limit=3, period=60)).allowed is True
+            assert (await limiter.acquire("c1", limit=3, period=60)).allowed is False
+
+    @pytest.mark.asyncio
+    async def test_state_is_one_value_per_client(self, limiter):
+        """每个客户端只保存一个值，被拒绝的请求不改变状态"""
+        with patch("src.common.rate_limiter.time.time", return_value=1000.0):
+            for _ in range(50):
+                await limiter.acquire("c1", limit=5, period=60)
+            tat = limiter._local["c1"]
+
+        assert len(limiter._local) == 1
+        assert tat == pytest.approx(1060.0)
+
+    @pytest.mark.asyncio
+    async def test_local_precheck_skips_redis(self):
+        """被拒绝后等待期内的请求不再访问 Redis"""
+        calls = 0
+
+        class DenyingRedis:
+            def register_script(self, script):
+                async def run(keys, args):
+                    nonlocal calls
+                    calls += 1
+                    return [0, 0, "5.0", "65.0"]
+
+                return run
+
+        limiter = GCRALimiter()
+        limiter.redis_client = DenyingRedis()
+
+        with patch("src.common.rate_limiter.time.time", return_value=1000.0):
+            first = await limiter.acquire("c1", limit=1, period=60)
+        with patch("src.common.rate_limiter.time.time", return_value=1003.0):
+            second = await limiter.acquire("c1", limit=1, period=60)
+        with patch("src.common.rate_limiter.time.time", return_value=1006.0):
+            await limiter.acquire("c1", limit=1, period=60)
+
+        assert first.allowed is False and second.allowed is False
+        assert second.retry_after == pytest.approx(2.0)
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_no_local_fallback_raises(self):
+        limiter = GCRALimiter(local_fallback=False)
+
+        class BrokenRedis:
+            def register_script(self, script):
+                async def run(keys, args):
+                    raise ConnectionError("redis down")
+
+                return run
+
+        limiter.redis_client = BrokenRedis()
+        with pytest.raises(ConnectionError):
+            await limiter.acquire("c1", limit=1, period=60)
+
+    @pytest.mark.asyncio
+    async def test_redis_script(self, fake_redis):
+        """Redis Lua 脚本（需要 lupa 支持的 fakeredis）"""
+        pytest.importorskip("lupa")
+        limiter = GCRALimiter(local_precheck=False)
+        limiter.redis_client = fake_redis
+
+        assert (await limiter.acquire("c1", limit=1, period=60)).allowed is True
+        result = await limiter.acquire("c1", limit=1, period=60)
+        assert result.allowed is False
+        assert result.retry_after > 0
+
+
+class TestRateLimitMiddleware:
+    """测试 API 限流中间件响应头"""
+
+    def test_headers_and_429(self):
+        from fastapi.testclient import TestClient
+
+        from src.api import middleware
+        from src.api.app import create_api_app
+
+        client = TestClient(create_api_app())
+        with patch.object(middleware, "api_rate_limiter", GCRALimiter(use_redis=False)), \
+             patch.object(middleware.RateLimitConfig, "IP_LIMIT_REQUESTS", 2):
+            middleware.api_rate_limiter.redis_client = object()
+            first = client.get("/api/modules")
+            client.get("/api/modules")
+            blocked = client.get("/api/modules")
+
+        assert first.headers["RateLimit-Limit"] == "2"
+        assert first.headers["RateLimit-Remaining"] == "1"
+        assert first.headers["RateLimit-Policy"] == "2;w=60"
+        assert blocked.status_code == 429
+        assert blocked.headers["Retry-After"] == "30"
+        assert blocked.headers["RateLimit-Remaining"] == "0"
@@ -7,6 +7,19 @@ import pytest
 from src.rates import service as rates_service
 
 
+@pytest.fixture(autouse=True)
+def reset_channel_state(monkeypatch):
+    """清空渠道的上次报价和延迟统计（汇率历史写入在 test_rate_history 中单独测试）"""
+    monkeypatch.setattr(rates_service.settings, "rate_history_enabled", False)
+    rates_service._last_known_channels.clear()
+    rates_service.okx_latency_histogram.reset()
+    rates_service.reset_rates_cache()
+    yield
+    rates_service._last_known_channels.clear()
+    rates_service.okx_latency_histogram.reset()
+    rates_service.reset_rates_cache()
+
+
 class DummyResponse:
     def __init__(self, payload):
         self._payload = payload
@@ -76,3 +89,128 @@ async def test_refresh_usdt_rates_writes_redis(monkeypatch):
     saved_payload = json.loads(stored.value)
     assert saved_payload["details"]["bank"]["merchants"][0]["name"] == "A"
     assert stored.ttl == rates_service.settings.usdt_rates_cache_ttl
+
+
+def _channel_payload(price):
+    return {"code": "0", "data": {"items": [{"price": price, "nickName": "M"}]}}
+
+
+@pytest.mark.asyncio
+async def test_fetch_channels_concurrently():
+    """三个渠道并发请求，总耗时约等于最慢的单个渠道"""
+    import asyncio
+
+    async def slow_get(url, params, **kwargs):
+        await asyncio.sleep(0.05)
+        return DummyResponse(_channel_payload("7.2"))
+
+    with patch("src.common.http_utils.get_with_retry", side_effect=slow_get):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        prices = await rates_service.fetch_usdt_cny_from_okx()
+        elapsed = loop.time() - started
+
+    assert all(prices[channel]["min_price"] == pytest.approx(7.2) for channel in ("bank", "alipay", "wechat"))
+    assert elapsed < 0.12
+
+    stats = rates_service.get_okx_latency_stats()
+    assert stats["bank"]["count"] == 1
+    assert stats["bank"]["buckets"]["0.1"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_channel_keeps_last_known_value():
+    """渠道失败时沿用上次报价并标记 stale"""
+    responses = {"bank": "7.10", "alipay": "7.11", "wechat": "7.12"}
+
+    async def fake_get(url, params, **kwargs):
+        price = responses[params["paymentMethod"]]
+        if price is None:
+            raise ConnectionError("timeout")
+        return DummyResponse(_channel_payload(price))
+
+    with patch("src.common.http_utils.get_with_retry", side_effect=fake_get):
+        await rates_service.fetch_usdt_cny_from_okx()
+        responses.update(bank="7.20", wechat=None)
+        prices = await rates_service.fetch_usdt_cny_from_okx()
+
+    assert prices["bank"]["min_price"] == pytest.approx(7.20)
+    assert prices["wechat"]["min_price"] == pytest.approx(7.12)
+    assert prices["wechat"]["stale"] is True
+    assert "stale" not in prices["bank"]
+    assert rates_service.get_okx_latency_stats()["wechat"]["failures"] == 1
+
+    payload = rates_service.build_rates_payload(prices)
+    assert payload["details"]["wechat"]["stale"] is True
+
+
+@pytest.mark.asyncio
+async def test_slow_channel_times_out_without_blocking_others(monkeypatch):
+    """超过渠道超时的请求被放弃，其他渠道正常返回"""
+    import asyncio
+
+    monkeypatch.setattr(rates_service.settings, "okx_channel_deadline_secs", 0.05)
+
+    async def fake_get(url, params, **kwargs):
+        if params["paymentMethod"] == "alipay":
+            await asyncio.sleep(1)
+        return DummyResponse(_channel_payload("7.3"))
+
+    with patch("src.common.http_utils.get_with_retry", side_effect=fake_get):
+        prices = await rates_service.fetch_usdt_cny_from_okx()
+
+    assert prices["bank"]["min_price"] == pytest.approx(7.3)
+    assert prices["alipay"]["min_price"] is None
+
+
+@pytest.mark.asyncio
+async def test_all_channels_failed_raises():
+    """所有渠道都没有新数据时抛出异常（即使有旧报价）"""
+    rates_service._last_known_channels["bank"] = {"min_price": 7.0, "merchants": []}
+
+    with patch("src.common.http_utils.get_with_retry", side_effect=ConnectionError("down")):
+        with pytest.raises(ValueError):
+            await rates_service.fetch_usdt_cny_from_okx()
+
+
+class MissingRedis:
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis down")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cache_misses_share_one_refresh(monkeypatch):
+    """缓存未命中时并发读取只请求一次 OKX，之后使用进程内副本"""
+    import asyncio
+
+    calls = 0
+
+    async def fake_fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"bank": {"min_price": 7.1, "merchants": [{"price": 7.1, "name": "A"}]}}
+
+    monkeypatch.setattr(rates_service, "fetch_usdt_cny_from_okx", fake_fetch)
+    redis_client = MissingRedis()
+
+    results = await asyncio.gather(*(rates_service.get_or_refresh_rates(redis_client) for _ in range(5)))
+    again = await rates_service.get_or_refresh_rates(redis_client)
+
+    assert calls == 1
+    assert all(result["bank"] == pytest.approx(7.1) for result in results)
+    assert again is results[0]
+
+
+@pytest.mark.asyncio
+async def test_local_copy_expires_with_cache_ttl(monkeypatch):
+    """进程内副本超过缓存 TTL 后不再使用"""
+    payload = rates_service.build_rates_payload({"bank": {"min_price": 7.1, "merchants": []}})
+    payload["updated_at"] = "2000-01-01T00:00:00+00:00"
+    rates_service._local_rates = payload
+
+    assert await rates_service.get_cached_rates(MissingRedis()) is None
+    assert rates_service.rates_age_seconds(payload) > rates_service.settings.usdt_rates_cache_ttl
@@ -0,0 +1,224 @@
+"""
+启动耗时优化测试：初始化钩子并发执行、阶段计时，以及导入/构造时不再执行 I/O
+"""
+import asyncio
+import atexit
+import json
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+
+from src.core import startup
+from src.core.startup import StartupTimer
+
+
+class TestStartupTimer:
+
+    @pytest.mark.asyncio
+    async def test_hooks_run_concurrently(self):
+        timer = StartupTimer()
+
+        async def async_hook():
+            await asyncio.sleep(0.2)
+
+        def blocking_hook():
+            time.sleep(0.2)
+
+        start = time.perf_counter()
+        results = await timer.run_hooks({"redis": async_hook, "database": blocking_hook, "files": blocking_hook})
+
+        assert time.perf_counter() - start < 0.5
+        assert results == {"redis": True, "database": True, "files": True}
+        assert sorted(p["name"] for p in timer.phases) == ["hook:database", "hook:files", "hook:redis"]
+
+    @pytest.mark.asyncio
+    async def test_failed_hook_does_not_stop_others(self):
+        timer = StartupTimer()
+        ran = []
+
+        def broken():
+            raise RuntimeError("db down")
+
+        results = await timer.run_hooks({"broken": broken, "ok": lambda: ran.append(1)})
+
+        assert results == {"broken": False, "ok": True}
+        assert ran == [1]
+        assert {p["name"]: p["status"] for p in timer.phases} == {"hook:broken": "failed", "hook:ok": "ok"}
+
+    @pytest.mark.asyncio
+    async def test_slow_step_times_out_without_blocking_others(self):
+        timer = StartupTimer()
+
+        async def slow():
+            await asyncio.sleep(5)
+
+        async def fast():
+            pass
+
+        start = time.perf_counter()
+        results = await timer.run_hooks({"bot_commands": slow, "scheduler": fast}, timeout=0.1)
+
+        assert time.perf_counter() - start < 1
+        assert results == {"bot_commands": False, "scheduler": True}
+        assert {p["name"]: p["status"] for p in timer.phases}["hook:bot_commands"] == "timeout"
+
+    def test_phase_and_report(self):
+        timer = StartupTimer()
+
+        with timer.phase("modules"):
+            pass
+        with pytest.raises(ValueError), timer.phase("api_app"):
+            raise ValueError("boom")
+        assert timer.report()["finished"] is False
+        timer.finish()
+
+        report = timer.report()
+        assert report["ready"] is True
+        assert report["finished"] is True
+        assert [(p["name"], p["status"]) for p in report["phases"]] == [("modules", "ok"), ("api_app", "failed")]
+        assert report["total_seconds"] >= 0
+
+
+class TestDeferredInitialization:
+
+    def test_config_manager_creates_tables_on_init(self, tmp_path):
+        from src.bot_admin.config_manager import ConfigManager
+
+        manager = ConfigManager(f"sqlite:///{tmp_path}/nested/config.db")
+        assert not (tmp_path / "nested").exists()
+
+        manager.init()
+        assert "price_configs" in inspect(manager.engine).get_table_names()
+
+    def test_config_manager_initializes_on_first_use(self, tmp_path):
+        from src.bot_admin.config_manager import ConfigManager
+
+        manager = ConfigManager(f"sqlite:///{tmp_path}/config.db")
+
+        assert manager.set_price("energy_small", 3.0, 0) is True
+        assert manager.get_price("energy_small") == 3.0
+
+    def test_audit_logger_initializes_on_first_use(self, tmp_path):
+        from src.bot_admin.audit_log import AuditLogger
+
+        audit = AuditLogger(f"sqlite:///{tmp_path}/audit.db")
+        assert inspect(audit.engine).get_table_names() == []
+
+        audit.log(1, "set_price")
+        assert len(audit.get_recent_logs()) == 1
+
+    def test_error_collector_loads_history_on_first_use(self, tmp_path, monkeypatch):
+        from src.common.error_collector import ErrorCollector
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "logs").mkdir()
+        history = {"errors": [{"timestamp": "2026-01-01T00:00:00", "type": "old", "message": "x", "context": {}}]}
+        (tmp_path / "logs" / "errors.json").write_text(json.dumps(history), encoding="utf-8")
+
+        collector = ErrorCollector(filename="errors.json", auto_load=False)
+        # 退出时不再写入（仍为脏数据）
+        atexit.unregister(collector._save_on_exit)
+        assert collector.log_dir == tmp_path / "logs"
+        assert collector.errors == []
+
+        # 加载前收集的错误不会被历史数据覆盖
+        collector.collect("new", "y")
+        assert [error["type"] for error in collector.errors] == ["old", "new"]
+        assert collector.get_summary()["total"] == 2
+
+    def test_error_collected_during_load_is_kept(self, tmp_path, monkeypatch):
+        """启动钩子在工作线程加载时，事件循环上收集的错误等待加载完成后再追加"""
+        import threading
+
+        from src.common import error_collector as module
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "logs").mkdir()
+        history = {"errors": [{"timestamp": "2026-01-01T00:00:00", "type": "old", "message": "x", "context": {}}]}
+        (tmp_path / "logs" / "errors.json").write_text(json.dumps(history), encoding="utf-8")
+
+        collector = module.ErrorCollector(filename="errors.json", auto_load=False)
+        atexit.unregister(collector._save_on_exit)
+        reading, collected = threading.Event(), threading.Event()
+        json_load = json.load
+
+        def slow_load(f):
+            reading.set()
+            # 读取期间另一线程收集错误
+            collected.wait(0.2)
+            return json_load(f)
+
+        def collect_while_loading():
+            reading.wait()
+            collector.collect("new", "y")
+            collected.set()
+
+        collecting = threading.Thread(target=collect_while_loading)
+        collecting.start()
+        with patch.object(module.json, "load", slow_load):
+            collector.ensure_loaded()
+        collecting.join(timeout=5)
+
+        assert [error["type"] for error in collector.errors] == ["old", "new"]
+
+
+class TestReadiness:
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        from src.api.app import create_api_app
+
+        monkeypatch.setattr(startup, "_startup_timer", StartupTimer())
+        return TestClient(create_api_app())
+
+    def test_not_ready_until_receiving_updates(self, client):
+        response = client.get("/api/ready")
+
+        assert response.status_code == 503
+        assert response.json()["ready"] is False
+
+    def test_ready_after_finish_and_not_ready_when_stopping(self, client):
+        startup.get_startup_timer().finish()
+        assert client.get("/api/ready").status_code == 200
+
+        startup.get_startup_timer().set_ready(False)
+        assert client.get("/api/ready").status_code == 503
+
+
+class TestWarmUp:
+
+    @pytest.mark.asyncio
+    async def test_warm_up_loads_hot_caches(self, tmp_path, monkeypatch):
+        from src.bot_admin.config_manager import ConfigManager
+        from src.core import warmup
+        from src.utils import content_helper
+
+        manager = ConfigManager(f"sqlite:///{tmp_path}/config.db")
+        manager.set_content("welcome_message", "欢迎", 0)
+        monkeypatch.setattr(content_helper._content_helper, "config_mgr", manager)
+        content_helper.clear_content_cache()
+        refresh = AsyncMock(return_value={"channels": {}})
+        timer = StartupTimer()
+
+        with patch("src.rates.service.get_or_refresh_rates", refresh), \
+                patch.object(warmup, "_warm_trx_rate", lambda: None):
+            results = await warmup.warm_up_caches(timer)
+
+        assert results["content"] is True
+        assert results["usdt_rates"] is True
+        refresh.assert_awaited_once()
+        assert content_helper._content_helper.cache.get("welcome_message") == "欢迎"
+        assert content_helper._content_helper.cache.get("support_contact") is None
+        assert all(p["name"].startswith("warmup:") for p in timer.phases)
+        content_helper.clear_content_cache()
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, monkeypatch):
+        from src.core import warmup
+
+        monkeypatch.setattr(warmup.settings, "bot_warmup_enabled", False)
+
+        assert await warmup.warm_up_caches(StartupTimer()) == {}
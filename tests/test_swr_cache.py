@@ -0,0 +1,120 @@
+"""
+测试 Stale-While-Revalidate 缓存
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.common.swr_cache import SWRCache
+
+
+class CountingLoader:
+    """记录调用次数的加载器"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return self.calls
+
+
+class TestSWRCache:
+    """测试 SWRCache"""
+
+    @pytest.mark.asyncio
+    async def test_fresh_value_served_from_cache(self):
+        """新鲜期内不调用上游"""
+        loader = CountingLoader()
+        cache = SWRCache(loader, ttl=60)
+
+        first = await cache.get()
+        second = await cache.get()
+
+        assert first.value == second.value == 1
+        assert second.stale is False
+        assert loader.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_are_coalesced(self):
+        """并发首次加载只触发一次上游调用（single-flight）"""
+        loader = CountingLoader(delay=0.02)
+        cache = SWRCache(loader, ttl=60)
+
+        results = await asyncio.gather(*(cache.get() for _ in range(10)))
+
+        assert loader.calls == 1
+        assert {r.value for r in results} == {1}
+
+    @pytest.mark.asyncio
+    async def test_stale_value_returned_while_refreshing(self):
+        """过期后立即返回旧值，后台刷新一次"""
+        loader = CountingLoader(delay=0.01)
+        cache = SWRCache(loader, ttl=60, max_stale=600)
+        await cache.get()
+        cache._cached.fetched_at = time.time() - 120
+
+        results = await asyncio.gather(*(cache.get() for _ in range(5)))
+
+        assert all(r.stale and r.value == 1 for r in results)
+        await cache._refresh_task
+        assert loader.calls == 2
+        fresh = await cache.get()
+        assert fresh.value == 2
+        assert fresh.stale is False
+
+    @pytest.mark.asyncio
+    async def test_too_stale_value_waits_for_refresh(self):
+        """超过最大陈旧时间时同步等待刷新"""
+        loader = CountingLoader()
+        cache = SWRCache(loader, ttl=60, max_stale=120)
+        await cache.get()
+        cache._cached.fetched_at = time.time() - 300
+
+        result = await cache.get()
+
+        assert result.value == 2
+        assert result.stale is False
+
+    @pytest.mark.asyncio
+    async def test_refresh_failure_serves_stale(self):
+        """刷新失败时返回陈旧数据"""
+        loader = CountingLoader()
+        cache = SWRCache(loader, ttl=60, max_stale=120)
+        await cache.get()
+        cache._cached.fetched_at = time.time() - 300
+        loader.fail = True
+
+        result = await cache.get()
+
+        assert result.value == 1
+        assert result.stale is True
+
+    @pytest.mark.asyncio
+    async def test_first_load_failure_raises(self):
+        """首次加载失败时抛出异常"""
+        cache = SWRCache(CountingLoader(fail=True), ttl=60)
+
+        with pytest.raises(RuntimeError):
+            await cache.get()
+
+    @pytest.mark.asyncio
+    async def test_invalidate_and_stats(self):
+        """清空缓存后重新加载"""
+        loader = CountingLoader()
+        cache = SWRCache(loader, ttl=60, name="test")
+        await cache.get()
+
+        cache.invalidate()
+        assert cache.stats()["cached"] is False
+
+        result = await cache.get()
+        assert result.value == 2
+        assert cache.stats()["name"] == "test"
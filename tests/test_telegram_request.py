@@ -0,0 +1,69 @@
+"""
+Bot API 连接池测试：并发请求、连接池等待统计与池超时
+"""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from telegram.error import TimedOut
+from telegram.request import HTTPXRequest
+
+from src.common.telegram_request import InstrumentedHTTPXRequest, get_request_pool_stats
+
+
+def slow_request(delay):
+    async def do_request(self, url, method, **kwargs):
+        await asyncio.sleep(delay)
+        return 200, b'{"ok": true, "result": []}'
+
+    return do_request
+
+
+class TestInstrumentedHTTPXRequest:
+
+    @pytest.mark.asyncio
+    async def test_requests_run_concurrently(self):
+        request = InstrumentedHTTPXRequest("test_concurrent", connection_pool_size=4)
+
+        with patch.object(HTTPXRequest, "do_request", slow_request(0.05)):
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            await asyncio.gather(*(request.do_request("https://api.telegram.org/x", "POST") for _ in range(4)))
+
+        assert loop.time() - started < 0.15
+        stats = request.stats()
+        assert stats["requests"] == 4
+        assert stats["in_use"] == 0
+        assert stats["wait_max_ms"] < 50
+
+    @pytest.mark.asyncio
+    async def test_pool_wait_is_recorded(self):
+        request = InstrumentedHTTPXRequest("test_wait", connection_pool_size=1, pool_timeout=5.0)
+
+        with patch.object(HTTPXRequest, "do_request", slow_request(0.05)):
+            await asyncio.gather(*(request.do_request("https://api.telegram.org/x", "POST") for _ in range(2)))
+
+        assert request.stats()["wait_max_ms"] >= 40
+        assert request.stats()["waiting"] == 0
+
+    @pytest.mark.asyncio
+    async def test_pool_timeout_raises_timed_out(self):
+        request = InstrumentedHTTPXRequest("test_timeout", connection_pool_size=1)
+
+        with patch.object(HTTPXRequest, "do_request", slow_request(0.2)):
+            busy = asyncio.create_task(request.do_request("https://api.telegram.org/x", "POST"))
+            await asyncio.sleep(0)
+            with pytest.raises(TimedOut):
+                await request.do_request("https://api.telegram.org/x", "POST", pool_timeout=0.01)
+            await busy
+
+        assert request.stats()["pool_timeouts"] == 1
+        assert request.stats()["requests"] == 1
+
+    def test_pools_are_registered_by_name(self):
+        InstrumentedHTTPXRequest("test_api", connection_pool_size=8)
+        InstrumentedHTTPXRequest("test_get_updates", connection_pool_size=1)
+
+        stats = get_request_pool_stats()
+        assert stats["test_api"]["pool_size"] == 8
+        assert stats["test_get_updates"]["pool_size"] == 1
@@ -0,0 +1,152 @@
+"""
+Webhook 模式更新接收测试：secret token 校验、入队、回放录制的更新与启动时 setWebhook
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from telegram import Update
+from telegram.ext import Application
+
+from src.api import telegram_webhook
+from src.api.telegram_webhook import attach_application, get_webhook_secret_token
+from src.config import settings
+from tests.mocks.telegram_updates import TelegramUpdateRecordings
+
+
+@pytest.fixture
+def application():
+    app = Application.builder().token("123456:TEST_TOKEN").updater(None).build()
+    attach_application(app)
+    yield app
+    attach_application(None)
+
+
+@pytest.fixture
+def client():
+    from src.api.app import create_api_app
+
+    return TestClient(create_api_app())
+
+
+def post_updates(client, updates, secret=None):
+    """回放录制的更新，返回各请求的响应"""
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret or get_webhook_secret_token()}
+    return [client.post(settings.bot_webhook_path, json=update, headers=headers) for update in updates]
+
+
+def drain(application):
+    updates = []
+    while not application.update_queue.empty():
+        updates.append(application.update_queue.get_nowait())
+    return updates
+
+
+class TestTelegramWebhook:
+
+    def test_recorded_session_is_enqueued_in_order(self, client, application):
+        session = TelegramUpdateRecordings.session()
+
+        responses = post_updates(client, session)
+
+        assert [r.status_code for r in responses] == [200] * len(session)
+        queued = drain(application)
+        assert all(isinstance(update, Update) for update in queued)
+        assert [update.update_id for update in queued] == [u["update_id"] for u in session]
+        assert queued[1].callback_query.data == "menu_help"
+        assert queued[0].effective_user.id == TelegramUpdateRecordings.USER["id"]
+
+    def test_invalid_secret_is_rejected(self, client, application):
+        update = TelegramUpdateRecordings.start_command()
+
+        [wrong] = post_updates(client, [update], secret="wrong")
+        missing = client.post(settings.bot_webhook_path, json=update)
+
+        assert wrong.status_code == 403
+        assert missing.status_code == 403
+        assert drain(application) == []
+
+    def test_invalid_payload(self, client, application):
+        headers = {"X-Telegram-Bot-Api-Secret-Token": get_webhook_secret_token()}
+
+        response = client.post(settings.bot_webhook_path, content=b"not json", headers=headers)
+
+        assert response.status_code == 400
+        assert drain(application) == []
+
+    def test_inactive_without_application(self, client):
+        attach_application(None)
+
+        [response] = post_updates(client, [TelegramUpdateRecordings.start_command()])
+
+        assert response.status_code == 503
+
+    def test_not_rate_limited(self, client, application):
+        with patch("src.api.middleware.check_rate_limit", new_callable=AsyncMock) as check:
+            post_updates(client, [TelegramUpdateRecordings.start_command()])
+
+        check.assert_not_called()
+
+    def test_configured_secret_token(self):
+        with patch.object(settings, "bot_webhook_secret_token", "configured_token"):
+            assert get_webhook_secret_token() == "configured_token"
+
+    def test_derived_secret_token_is_valid_for_telegram(self):
+        with patch.object(settings, "bot_webhook_secret_token", ""):
+            token = get_webhook_secret_token()
+
+        assert 1 <= len(token) <= 256
+        assert token.isalnum()
+        assert settings.webhook_secret not in token
+
+    def test_stats(self, client, application):
+        received = telegram_webhook._received
+        post_updates(client, TelegramUpdateRecordings.session())
+
+        stats = telegram_webhook.get_webhook_stats()
+        assert stats["active"] is True
+        assert stats["received"] == received + 4
+        assert stats["queue_size"] == 4
+
+
+class TestBotWebhookStartup:
+
+    @pytest.mark.asyncio
+    async def test_start_webhook_registers_with_secret(self):
+        from src.bot_v2 import TelegramBotV2
+
+        bot = TelegramBotV2()
+        bot.app = MagicMock()
+        bot.app.initialize = AsyncMock()
+        bot.app.start = AsyncMock()
+        bot.app.bot.set_webhook = AsyncMock()
+
+        with patch.object(settings, "bot_webhook_url", "https://bot.example.com/telegram/webhook"), \
+                patch.object(settings, "bot_update_journal_enabled", False), \
+                patch("src.core.warmup.settings.bot_warmup_enabled", False):
+            task = asyncio.create_task(bot._start_webhook())
+            for _ in range(100):
+                if bot.app.bot.set_webhook.called:
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        try:
+            kwargs = bot.app.bot.set_webhook.call_args.kwargs
+            assert kwargs["url"] == "https://bot.example.com/telegram/webhook"
+            assert kwargs["secret_token"] == get_webhook_secret_token()
+            assert telegram_webhook._application is bot.app
+        finally:
+            attach_application(None)
+
+    @pytest.mark.asyncio
+    async def test_start_webhook_requires_url(self):
+        from src.bot_v2 import TelegramBotV2
+
+        bot = TelegramBotV2()
+        bot.app = MagicMock()
+
+        with patch.object(settings, "bot_webhook_url", ""):
+            with pytest.raises(RuntimeError):
+                await bot._start_webhook()
@@ -100,6 +100,7 @@ class TestTronAPIClientAsync:
                 mock_settings.tron_api_key = None
                 mock_settings.tron_explorer = 'tronscan'
                 mock_settings.tron_timeout_secs = 10
+                mock_settings.tron_tx_timeout_secs = 5
                 
                 client = TronAPIClient()
                 result = await client.get_address_info("TLyqzVGLV1srkB7dToTAEqgDSfPtXRJZYH")
@@ -139,3 +140,194 @@ class TestBackwardCompatibility:
             assert "txs" in links
         except ImportError:
             pytest.skip("explorer 模块已移除")
+
+
+class TestAddressInfoCache:
+    """测试地址信息缓存"""
+
+    ADDRESS = "TLyqzVGLV1srkB7dToTAEqgDSfPtXRJZYH"
+
+    def _info(self, trx=1.0):
+        from src.clients.tron import AddressInfo
+        return AddressInfo(address=self.ADDRESS, trx_balance=trx, usdt_balance=0.0, recent_txs=[])
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_request(self):
+        """并发未命中只请求一次上游"""
+        import asyncio
+        from src.clients.tron import AddressInfoCache
+
+        cache = AddressInfoCache(ttl=30)
+        loader = AsyncMock()
+
+        async def slow_load(address):
+            await asyncio.sleep(0.01)
+            return self._info()
+
+        loader.side_effect = slow_load
+        results = await asyncio.gather(*(cache.get_or_load(self.ADDRESS, loader) for _ in range(10)))
+
+        assert loader.await_count == 1
+        assert all(r.trx_balance == 1.0 for r in results)
+
+        # 之后的请求直接命中缓存
+        await cache.get_or_load(self.ADDRESS, loader)
+        assert loader.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_negative_result_cached_briefly(self):
+        """上游明确无数据时短暂缓存 None"""
+        from src.clients.tron import AddressInfoCache
+
+        cache = AddressInfoCache(ttl=30, negative_ttl=10)
+        loader = AsyncMock(return_value=None)
+
+        assert await cache.get_or_load(self.ADDRESS, loader) is None
+        assert await cache.get_or_load(self.ADDRESS, loader) is None
+        assert loader.await_count == 1
+
+        cache.negative_ttl = 0
+        cache.invalidate()
+        await cache.get_or_load(self.ADDRESS, loader)
+        await cache.get_or_load(self.ADDRESS, loader)
+        assert loader.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_errors_not_cached(self):
+        """上游异常不缓存"""
+        from src.clients.tron import AddressInfoCache
+
+        cache = AddressInfoCache(ttl=30)
+        loader = AsyncMock(side_effect=[RuntimeError("HTTP 503"), self._info()])
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load(self.ADDRESS, loader)
+        result = await cache.get_or_load(self.ADDRESS, loader)
+
+        assert result.trx_balance == 1.0
+        assert cache.stats()["inflight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """超过容量时淘汰最久未使用的地址"""
+        from src.clients.tron import AddressInfoCache
+
+        cache = AddressInfoCache(ttl=30, max_size=2)
+        loader = AsyncMock(return_value=self._info())
+
+        for address in ("A", "B", "A", "C"):
+            await cache.get_or_load(address, loader)
+
+        assert list(cache._entries) == ["A", "C"]
+
+    @pytest.mark.asyncio
+    async def test_shared_via_redis(self, fake_redis):
+        """开启共享时，其他实例可复用 Redis 中的结果"""
+        from src.clients.tron import AddressInfoCache
+
+        writer = AddressInfoCache(ttl=30, shared=True)
+        writer.redis_client = fake_redis
+        await writer.get_or_load(self.ADDRESS, AsyncMock(return_value=self._info(trx=7.5)))
+
+        reader = AddressInfoCache(ttl=30, shared=True)
+        reader.redis_client = fake_redis
+        loader = AsyncMock()
+        result = await reader.get_or_load(self.ADDRESS, loader)
+
+        assert result.trx_balance == 7.5
+        loader.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_client_does_not_cache_server_errors(self):
+        """TronScan 5xx 不进入负缓存"""
+        from src.clients.tron import AddressInfoCache, TronAPIClient
+
+        error_response = MagicMock(status_code=503)
+        mock_client = AsyncMock()
+        mock_client.get.return_value = error_response
+
+        with patch('src.clients.tron.get_async_client', return_value=mock_client):
+            client = TronAPIClient(cache=AddressInfoCache(ttl=30, negative_ttl=30))
+            assert await client.get_address_info(self.ADDRESS) is None
+            assert await client.get_address_info(self.ADDRESS) is None
+
+        account_calls = [c for c in mock_client.get.await_args_list if c.args[0].endswith("/api/accountv2")]
+        assert len(account_calls) == 2
+
+
+class TestTronScanParallelFetch:
+    """测试 TronScan 账户与交易记录并发请求"""
+
+    ADDRESS = "TLyqzVGLV1srkB7dToTAEqgDSfPtXRJZYH"
+
+    def _client(self, handler, tx_timeout=5):
+        from src.clients.tron import AddressInfoCache, TronAPIClient
+
+        client = TronAPIClient(cache=AddressInfoCache(ttl=0, negative_ttl=0))
+        client.tx_timeout = tx_timeout
+        http = AsyncMock()
+        http.get.side_effect = handler
+        return client, http
+
+    @staticmethod
+    def _response(payload, status_code=200):
+        response = MagicMock(status_code=status_code)
+        response.json.return_value = payload
+        return response
+
+    @pytest.mark.asyncio
+    async def test_requests_run_concurrently(self):
+        """两个请求同时在途，总耗时约等于较慢的一个"""
+        import asyncio
+
+        in_flight = []
+
+        async def handler(url, **kwargs):
+            in_flight.append(url)
+            await asyncio.sleep(0.05)
+            if url.endswith("/api/accountv2"):
+                return self._response({"balance": 2_000_000})
+            return self._response({"data": []})
+
+        client, http = self._client(handler)
+        with patch('src.clients.tron.get_async_client', return_value=http):
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            info = await client.get_address_info(self.ADDRESS)
+            elapsed = loop.time() - started
+
+        assert info.trx_balance == 2.0
+        assert info.txs_complete is True
+        assert len(in_flight) == 2
+        assert elapsed < 0.09
+
+    @pytest.mark.asyncio
+    async def test_slow_transactions_return_partial(self):
+        """交易记录超时时仍返回余额"""
+        import asyncio
+
+        async def handler(url, **kwargs):
+            if url.endswith("/api/accountv2"):
+                return self._response({"balance": 3_000_000})
+            await asyncio.sleep(1)
+            return self._response({"data": []})
+
+        client, http = self._client(handler, tx_timeout=0.05)
+        with patch('src.clients.tron.get_async_client', return_value=http):
+            info = await client.get_address_info(self.ADDRESS)
+
+        assert info.trx_balance == 3.0
+        assert info.recent_txs == []
+        assert info.txs_complete is False
+
+    @pytest.mark.asyncio
+    async def test_account_failure_fails_query(self):
+        """账户请求失败时整体返回 None"""
+        async def handler(url, **kwargs):
+            if url.endswith("/api/accountv2"):
+                return self._response({}, status_code=400)
+            return self._response({"data": []})
+
+        client, http = self._client(handler)
+        with patch('src.clients.tron.get_async_client', return_value=http):
+            assert await client.get_address_info(self.ADDRESS) is None
@@ -0,0 +1,173 @@
+"""
+TRON 数据源路由测试
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.clients.tron_router import (
+    PROVIDER_TRONGRID,
+    PROVIDER_TRONSCAN,
+    AllProvidersFailedError,
+    TronProvider,
+    TronProviderRouter,
+    build_providers_from_settings,
+)
+
+
+def make_router(**kwargs) -> TronProviderRouter:
+    providers = [
+        TronProvider(name="scan", kind=PROVIDER_TRONSCAN, base_url="https://scan.test", priority=0),
+        TronProvider(name="grid", kind=PROVIDER_TRONGRID, base_url="https://grid.test", priority=1),
+    ]
+    return TronProviderRouter(providers, **kwargs)
+
+
+class TestTronProviderRouter:
+    """测试数据源选择与切换"""
+
+    @pytest.mark.asyncio
+    async def test_uses_priority_without_samples(self):
+        """无统计数据时按配置顺序选择"""
+        router = make_router()
+        operation = AsyncMock(return_value="ok")
+
+        assert await router.call(operation) == "ok"
+        assert operation.await_args.args[0].name == "scan"
+
+    @pytest.mark.asyncio
+    async def test_fails_over_to_next_provider(self):
+        """首选数据源异常时切换到下一个"""
+        router = make_router()
+
+        async def operation(provider):
+            if provider.name == "scan":
+                raise RuntimeError("HTTP 503")
+            return provider.name
+
+        assert await router.call(operation) == "grid"
+        assert router.providers[0].consecutive_failures == 1
+
+    @pytest.mark.asyncio
+    async def test_all_failed(self):
+        """所有数据源失败时抛出 AllProvidersFailedError"""
+        router = make_router()
+
+        with pytest.raises(AllProvidersFailedError):
+            await router.call(AsyncMock(side_effect=RuntimeError("down")))
+
+    def test_prefers_lower_latency(self):
+        """延迟更低、错误更少的数据源排在前面"""
+        router = make_router()
+        scan, grid = router.providers
+        router.record_success(scan, 0.5)
+        router.record_success(grid, 0.2)
+
+        assert [p.name for p in router.ordered()] == ["grid", "scan"]
+
+        router.record_failure(grid)
+        router.record_success(grid, 0.2)
+        assert grid.error_rate == pytest.approx(1 / 3)
+        assert [p.name for p in router.ordered()] == ["scan", "grid"]
+
+    def test_cooldown_and_probe(self):
+        """连续失败进入冷却，冷却结束后恢复参与选择"""
+        router = make_router(fail_max=2, probe_interval=30)
+        scan = router.providers[0]
+
+        with patch("src.clients.tron_router.time.monotonic", return_value=1000.0):
+            router.record_failure(scan)
+            router.record_failure(scan)
+            assert [p.name for p in router.ordered()] == ["grid"]
+
+        with patch("src.clients.tron_router.time.monotonic", return_value=1031.0):
+            assert "scan" in [p.name for p in router.ordered()]
+
+    def test_all_cooling_down_still_tried(self):
+        """所有数据源都在冷却时仍全部返回"""
+        router = make_router(fail_max=1)
+        for provider in router.providers:
+            router.record_failure(provider)
+
+        assert len(router.ordered()) == 2
+
+    def test_kinds_filter(self):
+        """可以限定数据源类型"""
+        router = make_router()
+        assert [p.name for p in router.ordered({PROVIDER_TRONGRID})] == ["grid"]
+
+
+class TestBuildProviders:
+    """测试从配置构建数据源"""
+
+    def test_defaults_and_mirrors(self):
+        with patch("src.clients.tron_router.settings") as mock_settings:
+            mock_settings.tron_api_url = ""
+            mock_settings.tron_api_key = "key"
+            mock_settings.tron_explorer = "tronscan"
+            mock_settings.tron_api_mirrors = "trongrid=https://mirror.test/, bogus=https://x.test"
+
+            providers = build_providers_from_settings()
+
+        assert [(p.kind, p.base_url) for p in providers] == [
+            (PROVIDER_TRONSCAN, "https://apilist.tronscanapi.com"),
+            (PROVIDER_TRONGRID, "https://api.trongrid.io"),
+            (PROVIDER_TRONGRID, "https://mirror.test"),
+        ]
+        assert providers[0].api_key == "key"
+        assert providers[1].api_key == ""
+
+
+class TestSharedRouting:
+    """测试地址查询与支付监听使用路由切换数据源"""
+
+    @pytest.mark.asyncio
+    async def test_address_query_falls_back_to_trongrid(self):
+        """TronScan 不可用时地址查询改用 TronGrid"""
+        from src.clients.tron import AddressInfoCache, TronAPIClient
+
+        async def handler(url, **kwargs):
+            if "scan.test" in url:
+                return MagicMock(status_code=503)
+            response = MagicMock(status_code=200)
+            response.json.return_value = {"data": [{"balance": 5_000_000, "trc20": []}]}
+            return response
+
+        http = AsyncMock()
+        http.get.side_effect = handler
+        router = make_router()
+        client = TronAPIClient(cache=AddressInfoCache(ttl=0, negative_ttl=0), router=router)
+
+        with patch("src.clients.tron.get_async_client", return_value=http):
+            info = await client.get_address_info("TLyqzVGLV1srkB7dToTAEqgDSfPtXRJZYH")
+
+        assert info.trx_balance == 5.0
+        assert router.providers[0].consecutive_failures == 1
+
+    @pytest.mark.asyncio
+    async def test_payment_monitor_normalizes_trongrid_transfers(self):
+        """支付监听切换到 TronGrid 时转换为 TronScan 字段格式"""
+        from src.modules.trx_exchange.payment_monitor import PaymentMonitor
+
+        receive = "TReceiveAddress12345678901234567890"
+
+        async def handler(url, **kwargs):
+            if "scan.test" in url:
+                raise ConnectionError("timeout")
+            response = MagicMock(status_code=200)
+            response.json.return_value = {
+                "data": [{"transaction_id": "tx1", "from": "TSender", "to": receive, "value": "1500000"}]
+            }
+            return response
+
+        http = AsyncMock()
+        http.get.side_effect = handler
+        monitor = PaymentMonitor()
+        monitor.receive_address = receive
+        monitor.router = make_router()
+
+        with patch("src.modules.trx_exchange.payment_monitor.get_async_client", return_value=http):
+            transfers = await monitor._fetch_usdt_transfers()
+
+        assert transfers == [
+            {"transaction_id": "tx1", "from_address": "TSender", "to_address": receive, "quant": "1500000", "block_ts": 0}
+        ]
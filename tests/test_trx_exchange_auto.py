@@ -544,13 +544,16 @@ class TestPaymentMonitor:
             return mock_order
 
         monitor._match_order = mock_match_order
+        mock_db.query.return_value.filter.return_value.update.return_value = 1
 
-        with patch('src.common.db_manager.get_db_context_manual_commit', return_value=create_mock_db_context(mock_db)()):
+        with patch('src.modules.trx_exchange.payment_monitor.get_db_context_manual_commit', create_mock_db_context(mock_db)):
             await monitor._process_transfer(tx)
 
-        # 验证订单状态更新
-        assert mock_order.status == "PAID"
-        assert mock_order.tx_hash == "tx_success"
+        # 验证订单状态以 PENDING 为条件更新
+        values = mock_db.query.return_value.filter.return_value.update.call_args.args[0]
+        assert values["status"] == "PAID"
+        assert values["tx_hash"] == "tx_success"
+        mock_db.commit.assert_called_once()
         assert monitor._is_tx_processed("tx_success")
 
     @pytest.mark.asyncio
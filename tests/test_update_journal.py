@@ -0,0 +1,191 @@
+"""
+更新日志与重启追赶测试：入队写日志、处理完成推进水位、积压分批追赶与过期回调跳过
+"""
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from telegram import Update
+from telegram.error import Conflict
+
+from src.core.update_journal import JournaledUpdateQueue, UpdateJournal, catch_up_updates
+from src.core.update_processor import PerUserUpdateProcessor
+from tests.mocks.telegram_updates import TelegramUpdateRecordings
+
+
+fakeredis = pytest.importorskip("fakeredis")
+
+OTHER_USER = {**TelegramUpdateRecordings.USER, "id": 987654321, "username": "other_user"}
+THIRD_USER = {**TelegramUpdateRecordings.USER, "id": 555555555, "username": "third_user"}
+
+
+def make_update(data) -> Update:
+    return Update.de_json(data, None)
+
+
+def message(update_id, user=None):
+    return make_update(TelegramUpdateRecordings.text_message("hello", update_id=update_id, user=user))
+
+
+def callback(update_id, user=None):
+    return make_update(TelegramUpdateRecordings.callback_query("menu_help", update_id=update_id, user=user))
+
+
+@pytest.fixture
+def journal():
+    journal = UpdateJournal("123456", "test")
+    journal.redis_client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return journal
+
+
+async def write_pending(journal, update, received_at):
+    entry = json.dumps({"received_at": received_at, "update": update.to_dict()})
+    await journal.redis_client.hset(journal.pending_key, str(update.update_id), entry)
+
+
+def make_application(journal, fetched=None):
+    """模拟 Application：记录处理顺序，getUpdates 返回给定的批次"""
+    application = MagicMock()
+    application.bot.defaults = None
+    application.bot.get_updates = AsyncMock(side_effect=[*(fetched or []), []])
+    application.update_processor = PerUserUpdateProcessor(max_workers=4)
+    application.update_processor.journal = journal
+    application.handled = []
+
+    async def process_update(update):
+        application.handled.append(update.update_id)
+
+    application.process_update = process_update
+    return application
+
+
+class TestUpdateJournal:
+
+    @pytest.mark.asyncio
+    async def test_record_and_complete(self, journal):
+        queue = JournaledUpdateQueue(journal)
+        for update_id in (1, 2, 3):
+            await queue.put(message(update_id))
+
+        assert await journal.redis_client.hlen(journal.pending_key) == 3
+        assert queue.qsize() == 3
+
+        await journal.complete(2)
+        assert journal.watermark == 0  # 1 仍未处理完
+        await journal.complete(1)
+        assert journal.watermark == 2
+        await journal.complete(3)
+        assert journal.watermark == 3
+
+        assert await journal.redis_client.hlen(journal.pending_key) == 0
+        assert await journal.redis_client.hget(journal.offset_key, "update_id") == "3"
+
+    @pytest.mark.asyncio
+    async def test_processor_completes_but_keeps_cancelled(self, journal):
+        processor = PerUserUpdateProcessor(max_workers=1)
+        processor.journal = journal
+        first, second = message(1), message(2, user=OTHER_USER)
+        await journal.record(first)
+        await journal.record(second)
+
+        async def slow():
+            await asyncio.sleep(10)
+
+        async def noop():
+            pass
+
+        await processor.process_update(first, noop())
+        task = asyncio.create_task(processor.process_update(second, slow()))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert await journal.redis_client.hkeys(journal.pending_key) == ["2"]
+        assert journal.watermark == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_unavailable_is_ignored(self):
+        journal = UpdateJournal("123456", "test")
+        journal.redis_client = MagicMock()
+        journal.redis_client.hset = AsyncMock(side_effect=ConnectionError("down"))
+
+        await journal.record(message(1))
+        await journal.complete(1)
+
+        assert journal.watermark == 1
+        assert await journal.load_pending(None) == []
+
+
+class TestCatchUp:
+
+    @pytest.mark.asyncio
+    async def test_replays_journal_and_telegram_backlog(self, journal):
+        now = time.time()
+        await journal.redis_client.hset(journal.offset_key, mapping={"update_id": 10, "alive_at": now - 5})
+        await write_pending(journal, callback(11, user=THIRD_USER), now - 5)
+        await write_pending(journal, callback(12), now - 5)
+        await write_pending(journal, message(13), now - 5)
+        application = make_application(journal, fetched=[[message(14, user=OTHER_USER)]])
+
+        stats = await catch_up_updates(application, journal)
+
+        # 从持久化水位之后开始拉取
+        assert application.bot.get_updates.await_args_list[0].kwargs["offset"] == 11
+        # 有积压消息的用户优先；同一用户内保持原有顺序（先回调 12 再消息 13）
+        assert application.handled == [12, 13, 14, 11]
+        assert stats == {"processed": 4, "skipped_callbacks": 0, "batches": 1}
+        assert journal.watermark == 14
+        assert await journal.redis_client.hlen(journal.pending_key) == 0
+
+    @pytest.mark.asyncio
+    async def test_skips_stale_callbacks(self, journal):
+        now = time.time()
+        # 停机 10 分钟：停机期间从 Telegram 拉到的回调也视为过期
+        await journal.redis_client.hset(journal.offset_key, mapping={"update_id": 10, "alive_at": now - 600})
+        await write_pending(journal, callback(11), now - 600)
+        application = make_application(journal, fetched=[[callback(12, user=OTHER_USER), message(13)]])
+
+        stats = await catch_up_updates(application, journal)
+
+        assert application.handled == [13]
+        assert stats["skipped_callbacks"] == 2
+        assert journal.watermark == 13
+        assert await journal.redis_client.hlen(journal.pending_key) == 0
+
+    @pytest.mark.asyncio
+    async def test_bounded_batches(self, journal, monkeypatch):
+        from src.core import update_journal
+
+        monkeypatch.setattr(update_journal.settings, "bot_catchup_batch_size", 2)
+        application = make_application(journal, fetched=[[message(i, user={**OTHER_USER, "id": i}) for i in range(1, 6)]])
+
+        stats = await catch_up_updates(application, journal)
+
+        assert stats["batches"] == 3
+        assert sorted(application.handled) == [1, 2, 3, 4, 5]
+
+    @pytest.mark.asyncio
+    async def test_ignores_already_processed_and_conflict(self, journal):
+        await journal.redis_client.hset(journal.offset_key, mapping={"update_id": 20, "alive_at": time.time()})
+        await write_pending(journal, message(19), time.time())
+        application = make_application(journal)
+        application.bot.get_updates = AsyncMock(side_effect=Conflict("webhook is active"))
+
+        stats = await catch_up_updates(application, journal)
+
+        assert stats["processed"] == 0
+        assert application.handled == []
+        assert await journal.redis_client.hlen(journal.pending_key) == 0
+
+    @pytest.mark.asyncio
+    async def test_webhook_mode_does_not_fetch(self, journal):
+        await write_pending(journal, message(5), time.time())
+        application = make_application(journal)
+
+        await catch_up_updates(application, journal, fetch_from_telegram=False)
+
+        application.bot.get_updates.assert_not_called()
+        assert application.handled == [5]
@@ -0,0 +1,118 @@
+"""
+更新并发处理器测试：不同用户并发、同一用户串行、并发上限与统计
+"""
+import asyncio
+
+import pytest
+from unittest.mock import MagicMock
+from telegram import Update
+
+from src.core.update_processor import PerUserUpdateProcessor
+
+
+def make_update(user_id=None, chat_id=None):
+    update = MagicMock(spec=Update)
+    update.effective_user = MagicMock(id=user_id) if user_id is not None else None
+    update.effective_chat = MagicMock(id=chat_id) if chat_id is not None else None
+    return update
+
+
+async def run_all(processor, items):
+    """按到达顺序为每个更新创建任务（与 Application 的行为一致）"""
+    tasks = [asyncio.create_task(processor.process_update(update, coro)) for update, coro in items]
+    await asyncio.gather(*tasks)
+
+
+class TestPerUserUpdateProcessor:
+
+    @pytest.mark.asyncio
+    async def test_different_users_run_concurrently(self):
+        processor = PerUserUpdateProcessor(max_workers=4)
+
+        async def handler():
+            await asyncio.sleep(0.05)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await run_all(processor, [(make_update(user_id=i), handler()) for i in range(4)])
+
+        assert loop.time() - started < 0.15
+
+    @pytest.mark.asyncio
+    async def test_same_user_is_serialized_in_order(self):
+        processor = PerUserUpdateProcessor(max_workers=4)
+        events = []
+
+        async def handler(name, delay):
+            events.append(f"start {name}")
+            await asyncio.sleep(delay)
+            events.append(f"end {name}")
+
+        await run_all(processor, [
+            (make_update(user_id=1), handler("a", 0.03)),
+            (make_update(user_id=1), handler("b", 0)),
+            (make_update(user_id=1), handler("c", 0)),
+        ])
+
+        assert events == ["start a", "end a", "start b", "end b", "start c", "end c"]
+        assert processor.stats()["ordering_keys"] == 0
+
+    @pytest.mark.asyncio
+    async def test_queued_user_does_not_starve_others(self):
+        """同一用户排队的更新不占用并发名额"""
+        processor = PerUserUpdateProcessor(max_workers=2)
+        finished = []
+
+        async def handler(name, delay):
+            await asyncio.sleep(delay)
+            finished.append(name)
+
+        items = [(make_update(user_id=1), handler(f"u1-{i}", 0.02)) for i in range(5)]
+        items.append((make_update(user_id=2), handler("u2", 0)))
+        await run_all(processor, items)
+
+        assert finished.index("u2") < finished.index("u1-1")
+
+    @pytest.mark.asyncio
+    async def test_worker_limit_and_stats(self):
+        processor = PerUserUpdateProcessor(max_workers=2)
+        running = 0
+        peak = 0
+
+        async def handler():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await run_all(processor, [(make_update(chat_id=i), handler()) for i in range(6)])
+
+        stats = processor.stats()
+        assert peak == 2
+        assert stats["processed"] == 6
+        assert stats["queued"] == 0
+        assert stats["max_queued"] == 4
+        assert stats["wait_max_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_failed_update_releases_next(self):
+        processor = PerUserUpdateProcessor(max_workers=1)
+        events = []
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        async def ok():
+            events.append("ok")
+
+        task = asyncio.create_task(processor.process_update(make_update(user_id=1), failing()))
+        await processor.process_update(make_update(user_id=1), ok())
+        with pytest.raises(RuntimeError):
+            await task
+
+        assert events == ["ok"]
+
+    def test_invalid_workers(self):
+        with pytest.raises(ValueError):
+            PerUserUpdateProcessor(max_workers=0)